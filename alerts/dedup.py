@@ -1,15 +1,32 @@
 """
 MNEMOS 2.1 - Signal de-duplication: cooldown windows, symbol + signal-type locking, severity escalation.
+alert_lock is cached in memory as (symbol, signal_type) -> epoch seconds with write-through to SQLite;
+other processes' writes are picked up via a version counter checked every ALERT_LOCK_CACHE_CHECK_SEC.
 """
 import logging
-from datetime import datetime, timedelta
-from typing import Optional, Tuple
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
 
-from config.settings import ALERT_COOLDOWN_SYMBOL_MINUTES, SIGNAL_COOLDOWN_MINUTES
-from storage.db import cursor, get_alert_lock, upsert_alert_lock
+import storage.db as _db
+from config.settings import (
+    ALERT_COOLDOWN_SYMBOL_MINUTES,
+    ALERT_LOCK_CACHE_CHECK_SEC,
+    SIGNAL_COOLDOWN_MINUTES,
+)
+from storage.db import bump_cache_version, cursor, get_all_alert_locks, get_cache_version, upsert_alert_lock
 
 logger = logging.getLogger(__name__)
 
+ALERT_LOCK_CACHE = "alert_lock"
+
+_locks: Dict[Tuple[str, str], float] = {}  # (symbol, signal_type) -> last alert epoch seconds
+_locks_version: Optional[int] = None
+_locks_db: Optional[str] = None
+_locks_checked: float = 0.0
+_locks_mutex = threading.Lock()
+
 # Signal type constants (must match friction_engine first-signal prefixes)
 SIGNAL_TYPE_PANIC = "panic_selling"
 SIGNAL_TYPE_ACCUMULATION = "silent_accumulation"
@@ -48,32 +65,86 @@ def severity_from_score(score: float) -> int:
     return 1
 
 
+def _iso_to_epoch(ts: str) -> Optional[float]:
+    """ISO UTC (e.g. ...Z) -> epoch seconds, or None if unparseable."""
+    try:
+        naive = datetime.fromisoformat(ts.replace("Z", "").split("+")[0].strip())
+        return naive.replace(tzinfo=timezone.utc).timestamp()
+    except Exception as e:
+        logger.debug("Parse last_alert_ts: %s", e)
+        return None
+
+
+def _refresh_locks() -> None:
+    """Reload alert_lock into memory if another process changed it (or the DB changed). Call under _locks_mutex."""
+    global _locks_version, _locks_db, _locks_checked
+    now = time.time()
+    db_path = str(_db.DB_PATH)
+    if _locks_db == db_path and now - _locks_checked < ALERT_LOCK_CACHE_CHECK_SEC:
+        return
+    try:
+        with cursor() as cur:
+            version = get_cache_version(cur, ALERT_LOCK_CACHE)
+            if _locks_db == db_path and version == _locks_version:
+                _locks_checked = now
+                return
+            rows = get_all_alert_locks(cur)
+    except Exception as e:
+        logger.warning("Alert lock cache refresh failed: %s", e)
+        return
+    _locks.clear()
+    for sym, sig, ts in rows:
+        epoch = _iso_to_epoch(ts)
+        if epoch is not None:
+            _locks[(sym, sig)] = epoch
+    _locks_version, _locks_db, _locks_checked = version, db_path, now
+
+
+def invalidate_alert_lock_cache() -> None:
+    """Force a reload on the next cooldown check."""
+    global _locks_db
+    with _locks_mutex:
+        _locks_db = None
+
+
+def last_alert_epoch(symbol: str, signal_type: str) -> Optional[float]:
+    """Epoch seconds of the last alert for (symbol, signal_type), from the in-memory cache."""
+    with _locks_mutex:
+        _refresh_locks()
+        return _locks.get((symbol[:32], signal_type[:32]))
+
+
+def in_signal_cooldown(symbol: str, signal_type: str) -> bool:
+    """True if this symbol+signal_type alerted within SIGNAL_COOLDOWN_MINUTES (skip the candidate early)."""
+    last = last_alert_epoch(symbol, signal_type)
+    return last is not None and (time.time() - last) / 60.0 < SIGNAL_COOLDOWN_MINUTES
+
+
 def can_send_alert(symbol: str, signal_type: str) -> Tuple[bool, Optional[str]]:
     """
     True if alert is allowed (past cooldown for this symbol+signal_type).
     Returns (allowed, reason_if_not).
     """
-    with cursor() as cur:
-        last_ts = get_alert_lock(cur, symbol, signal_type)
-    if not last_ts:
-        return True, None
-    try:
-        # last_ts is ISO UTC (e.g. ...Z)
-        last_naive = datetime.fromisoformat(last_ts.replace("Z", "").split("+")[0].strip())
-        now_naive = datetime.utcnow()
-        delta_min = (now_naive - last_naive).total_seconds() / 60.0
-        if delta_min < ALERT_COOLDOWN_SYMBOL_MINUTES:
-            return False, f"Cooldown: {ALERT_COOLDOWN_SYMBOL_MINUTES - int(delta_min)} min left"
-    except Exception as e:
-        logger.debug("Parse last_alert_ts: %s", e)
+    last = last_alert_epoch(symbol, signal_type)
+    if last is None:
         return True, None
+    delta_min = (time.time() - last) / 60.0
+    if delta_min < ALERT_COOLDOWN_SYMBOL_MINUTES:
+        return False, f"Cooldown: {ALERT_COOLDOWN_SYMBOL_MINUTES - int(delta_min)} min left"
     return True, None
 
 
 def record_alert_sent(symbol: str, signal_type: str) -> None:
-    """Record that an alert was sent (for cooldown)."""
+    """Record that an alert was sent (for cooldown): SQLite first, then the in-memory cache."""
+    global _locks_version
     try:
         with cursor() as cur:
             upsert_alert_lock(cur, symbol, signal_type)
+            version = bump_cache_version(cur, ALERT_LOCK_CACHE)
     except Exception as e:
         logger.warning("Failed to record alert lock: %s", e)
+        return
+    with _locks_mutex:
+        _locks[(symbol[:32], signal_type[:32])] = time.time()
+        if _locks_version is not None and version == _locks_version + 1:
+            _locks_version = version  # only our own write since last load; no reload needed
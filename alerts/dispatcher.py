@@ -2,11 +2,13 @@
 MNEMOS 2.1 - Alert dispatcher: Telegram + Email with de-dup and severity.
 """
 import logging
-from typing import Optional
+from typing import Optional, Union
 
+from config.settings import GROQ_ASYNC_NOTES
 from alerts.dedup import can_send_alert, record_alert_sent
-from alerts.email_alert import send_friction_email
-from alerts.telegram_alert import send_friction_alert
+from alerts.email_alert import attach_ai_note, flush_email_digest, send_friction_email
+from alerts.priority import QUEUED
+from alerts.telegram_alert import flush_telegram, send_ai_note, send_friction_alert
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +19,7 @@ def dispatch_friction(
     explanation: str,
     headline: Optional[str] = None,
     signal_type: Optional[str] = None,
+    confidence: Optional[float] = None,
 ) -> None:
     """Send friction to Telegram and Email if de-dup allows. Optional GROQ analysis appended."""
     if signal_type is None:
@@ -25,13 +28,92 @@ def dispatch_friction(
     if not allowed:
         logger.debug("Alert skipped (dedup): %s %s - %s", symbol, signal_type, reason)
         return
+    if deliver_friction(symbol, score, explanation, headline, confidence):
+        record_alert_sent(symbol, signal_type)
+
+
+def deliver_friction(
+    symbol: str,
+    score: float,
+    explanation: str,
+    headline: Optional[str] = None,
+    confidence: Optional[float] = None,
+    outbox_id: Optional[int] = None,
+) -> Union[bool, str]:
+    """
+    Telegram + Email + GROQ note, no dedup. True if any channel delivered, QUEUED if none did but one
+    buffered it for its next send window (outbox_id then comes back from that channel's pop_delivered()).
+    GROQ_ASYNC_NOTES: the alert goes out first and the note follows; otherwise it is fetched inline.
+    """
     groq_analysis = None
+    if not GROQ_ASYNC_NOTES:
+        try:
+            from engine.groq_analysis import analyze_signal
+            groq_analysis = analyze_signal(symbol, score, explanation)
+        except Exception:
+            pass
+    sent_tg = send_friction_alert(symbol, score, explanation, headline, groq_analysis, confidence, outbox_id)
+    sent_em = send_friction_email(symbol, score, explanation, groq_analysis, confidence, outbox_id)
+    if (sent_tg or sent_em) and GROQ_ASYNC_NOTES:
+        _queue_ai_note(symbol, score, explanation, confidence)
+    if sent_tg is True or sent_em is True:
+        return True
+    return QUEUED if QUEUED in (sent_tg, sent_em) else False
+
+
+def _queue_ai_note(symbol: str, score: float, explanation: str, confidence: Optional[float]) -> None:
+    """Request the GROQ note in the background; deliver it as a follow-up on each channel."""
+    def on_note(note: str) -> None:
+        send_ai_note(symbol, score, note, confidence)
+        attach_ai_note(symbol, note)
+
     try:
-        from engine.groq_analysis import analyze_signal
-        groq_analysis = analyze_signal(symbol, score, explanation)
-    except Exception:
-        pass
-    sent_tg = send_friction_alert(symbol, score, explanation, headline, groq_analysis)
-    sent_em = send_friction_email(symbol, score, explanation, groq_analysis)
+        from engine.groq_analysis import queue_signal_note
+        queue_signal_note(symbol, score, explanation, on_note)
+    except Exception as e:
+        logger.debug("GROQ note queue failed: %s", e)
+
+
+def flush_pending_alerts(force: bool = False) -> None:
+    """Send buffered Telegram (coalesced) and email (digest) alerts whose send window is open."""
+    for flush in (flush_telegram, flush_email_digest):
+        try:
+            flush(force=force)
+        except Exception as e:
+            logger.warning("Alert flush failed: %s", e)
+
+
+async def dispatch_friction_async(
+    symbol: str,
+    score: float,
+    explanation: str,
+    headline: Optional[str] = None,
+    signal_type: Optional[str] = None,
+    confidence: Optional[float] = None,
+) -> None:
+    """Async dispatch_friction: dedup in a worker thread, Telegram + Email concurrently, GROQ note as follow-up."""
+    import asyncio
+    from alerts.email_alert import send_friction_email_async
+    from alerts.telegram_alert import send_friction_alert_async
+    from core.async_http import run_blocking
+    if signal_type is None:
+        signal_type = "unknown"
+    allowed, reason = await run_blocking(can_send_alert, symbol, signal_type)
+    if not allowed:
+        logger.debug("Alert skipped (dedup): %s %s - %s", symbol, signal_type, reason)
+        return
+    groq_analysis = None
+    if not GROQ_ASYNC_NOTES:
+        try:
+            from engine.groq_analysis import analyze_signal_async
+            groq_analysis = await analyze_signal_async(symbol, score, explanation)
+        except Exception:
+            pass
+    sent_tg, sent_em = await asyncio.gather(
+        send_friction_alert_async(symbol, score, explanation, headline, groq_analysis, confidence),
+        send_friction_email_async(symbol, score, explanation, groq_analysis, confidence),
+    )
     if sent_tg or sent_em:
-        record_alert_sent(symbol, signal_type)
+        if GROQ_ASYNC_NOTES:
+            _queue_ai_note(symbol, score, explanation, confidence)
+        await run_blocking(record_alert_sent, symbol, signal_type)
@@ -1,23 +1,48 @@
 """
 MNEMOS 2.1 - Gmail SMTP email alerts. Multiple recipients (mail trail); rate limiting.
+One persistent, health-checked SMTP session (reconnect on failure). Digest mode: friction alerts
+arriving within EMAIL_MIN_INTERVAL_SEC are batched into one message instead of dropped.
 """
+import asyncio
 import logging
 import smtplib
+import threading
 import time
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Union
 
 from config.settings import (
     GMAIL_USER,
     GMAIL_APP_PASSWORD,
     ALERT_EMAIL_TO,
+    EMAIL_DIGEST_ENABLED,
     EMAIL_MIN_INTERVAL_SEC,
 )
 
+from alerts.priority import QUEUED, order_by_priority, split_expired
+from core.async_http import run_blocking
+from core.rate_limiter import acquire, consume, interval_bucket
+
 logger = logging.getLogger(__name__)
 
-_last_email_sent: float = 0
+_smtp: Optional[smtplib.SMTP_SSL] = None
+_smtp_lock = threading.Lock()
+_digest: List[Dict[str, Any]] = []  # {symbol, score, confidence, explanation, groq_analysis, ts, outbox_id}
+_delivered: List[int] = []  # outbox ids of queued alerts a digest delivered; collected by alerts.outbox
+_digest_lock = threading.Lock()
+
+
+def get_state() -> Dict[str, Any]:
+    """Undelivered digest for warm-restart checkpoints (rate limits persist in rate_buckets)."""
+    with _digest_lock:
+        return {"digest": [dict(d) for d in _digest]}
+
+
+def load_state(state: Dict[str, Any]) -> None:
+    """Restore digest from a checkpoint."""
+    with _digest_lock:
+        _digest[:] = [dict(d) for d in (state.get("digest") or [])]
 
 
 def _recipients_list(to: Optional[str] = None) -> List[str]:
@@ -29,12 +54,67 @@ def _recipients_list(to: Optional[str] = None) -> List[str]:
 
 
 def _rate_limit() -> bool:
-    global _last_email_sent
-    now = time.time()
-    if now - _last_email_sent < EMAIL_MIN_INTERVAL_SEC:
+    return acquire("email", *interval_bucket(EMAIL_MIN_INTERVAL_SEC))
+
+
+def _build_message(subject: str, body_text: str, recipients: List[str]) -> MIMEMultipart:
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = subject[:200]
+    msg["From"] = GMAIL_USER
+    msg["To"] = ", ".join(recipients)
+    msg.attach(MIMEText(body_text, "plain", "utf-8"))
+    return msg
+
+
+def _connect() -> smtplib.SMTP_SSL:
+    server = smtplib.SMTP_SSL("smtp.gmail.com", 465, timeout=30)
+    server.login(GMAIL_USER, GMAIL_APP_PASSWORD)
+    return server
+
+
+def _session_alive(server: smtplib.SMTP_SSL) -> bool:
+    try:
+        return server.noop()[0] == 250
+    except Exception:
         return False
-    _last_email_sent = now
-    return True
+
+
+def close_smtp() -> None:
+    """Close the persistent SMTP session (shutdown / --once)."""
+    global _smtp
+    with _smtp_lock:
+        if _smtp is not None:
+            try:
+                _smtp.quit()
+            except Exception:
+                pass
+        _smtp = None
+
+
+def _smtp_send(msg: MIMEMultipart, recipients: List[str]) -> None:
+    """Send over the persistent session; NOOP health check, one reconnect + retry on failure."""
+    global _smtp
+    with _smtp_lock:
+        for attempt in (1, 2):
+            if _smtp is None or not _session_alive(_smtp):
+                if _smtp is not None:
+                    try:
+                        _smtp.close()
+                    except Exception:
+                        pass
+                _smtp = _connect()
+            try:
+                _smtp.sendmail(GMAIL_USER, recipients, msg.as_string())
+                return
+            except (smtplib.SMTPServerDisconnected, smtplib.SMTPResponseException, OSError) as e:
+                try:
+                    _smtp.close()
+                except Exception:
+                    pass
+                _smtp = None
+                if attempt == 2:
+                    raise
+                logger.debug("SMTP session dropped (%s); reconnecting", e)
 
 
 def send_email(
@@ -51,14 +131,7 @@ def send_email(
         logger.debug("Email rate limit; skip")
         return False
     try:
-        msg = MIMEMultipart("alternative")
-        msg["Subject"] = subject[:200]
-        msg["From"] = GMAIL_USER
-        msg["To"] = ", ".join(recipients)
-        msg.attach(MIMEText(body_text, "plain", "utf-8"))
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465, timeout=30) as server:
-            server.login(GMAIL_USER, GMAIL_APP_PASSWORD)
-            server.sendmail(GMAIL_USER, recipients, msg.as_string())
+        _smtp_send(_build_message(subject, body_text, recipients), recipients)
         logger.info("Email sent to %s", recipients)
         return True
     except Exception as e:
@@ -66,15 +139,177 @@ def send_email(
         return False
 
 
-def send_friction_email(
-    symbol: str,
-    score: float,
-    explanation: str,
-    groq_analysis: Optional[str] = None,
+async def send_email_async(
+    subject: str,
+    body_text: str,
+    to: Optional[str] = None,
 ) -> bool:
-    """Send friction alert email to all ALERT_EMAIL_TO recipients."""
+    """Async send_email. Uses aiosmtplib if installed, else smtplib in a worker thread."""
+    recipients = _recipients_list(to)
+    if not GMAIL_USER or not GMAIL_APP_PASSWORD or not recipients:
+        logger.debug("Email not configured; skip")
+        return False
+    if not await run_blocking(_rate_limit):
+        logger.debug("Email rate limit; skip")
+        return False
+    msg = _build_message(subject, body_text, recipients)
+    try:
+        try:
+            import aiosmtplib
+        except ImportError:
+            aiosmtplib = None
+        if aiosmtplib is not None:
+            await aiosmtplib.send(
+                msg,
+                sender=GMAIL_USER,
+                recipients=recipients,
+                hostname="smtp.gmail.com",
+                port=465,
+                use_tls=True,
+                username=GMAIL_USER,
+                password=GMAIL_APP_PASSWORD,
+                timeout=30,
+            )
+        else:
+            await asyncio.wait_for(run_blocking(_smtp_send, msg, recipients), timeout=60)
+        logger.info("Email sent to %s", recipients)
+        return True
+    except Exception as e:
+        logger.warning("Email send failed: %s", e)
+        return False
+
+
+def _friction_email_content(symbol: str, score: float, explanation: str, groq_analysis: Optional[str]) -> tuple:
+    """(subject, body) for a friction alert."""
     subject = f"MNEMOS 2.1 Friction: {symbol} (score {score:.2f})"
     body = f"Symbol: {symbol}\nScore: {score}\n\n{explanation}"
     if groq_analysis:
         body += f"\n\nAI analysis: {groq_analysis}"
-    return send_email(subject, body)
+    return subject, body
+
+
+def send_friction_email(
+    symbol: str,
+    score: float,
+    explanation: str,
+    groq_analysis: Optional[str] = None,
+    confidence: Optional[float] = None,
+    outbox_id: Optional[int] = None,
+) -> Union[bool, str]:
+    """
+    Send friction alert email to all ALERT_EMAIL_TO recipients.
+    Digest mode: queue it and flush if the email interval allows; True if that flush sent it, else QUEUED.
+    """
+    if not EMAIL_DIGEST_ENABLED:
+        subject, body = _friction_email_content(symbol, score, explanation, groq_analysis)
+        return send_email(subject, body)
+    if not GMAIL_USER or not GMAIL_APP_PASSWORD or not _recipients_list():
+        logger.debug("Email not configured; skip")
+        return False
+    item = {
+        "symbol": symbol,
+        "score": float(score),
+        "confidence": confidence,
+        "explanation": explanation,
+        "groq_analysis": groq_analysis,
+        "ts": time.time(),
+        "outbox_id": outbox_id,
+    }
+    with _digest_lock:
+        _digest.append(item)
+    flush_email_digest()
+    with _digest_lock:
+        if not item.get("sent"):
+            return QUEUED
+        if outbox_id in _delivered:
+            _delivered.remove(outbox_id)  # reported by the return value instead
+    return True
+
+
+def pop_delivered() -> List[int]:
+    """Outbox ids of queued alerts emailed since the last call."""
+    with _digest_lock:
+        out = list(_delivered)
+        _delivered.clear()
+    return out
+
+
+def pending_outbox_ids() -> List[int]:
+    """Outbox ids still waiting in the digest."""
+    with _digest_lock:
+        return [d["outbox_id"] for d in _digest if d.get("outbox_id")]
+
+
+def attach_ai_note(symbol: str, note: str) -> bool:
+    """Add a late AI note to the symbol's queued digest entry. False if it was already emailed."""
+    with _digest_lock:
+        for d in _digest:
+            if d["symbol"] == symbol and not d.get("groq_analysis"):
+                d["groq_analysis"] = note
+                return True
+    return False
+
+
+def _digest_content(items: List[Dict[str, Any]]) -> tuple:
+    """(subject, body) for queued alerts, highest priority first."""
+    if len(items) == 1:
+        d = items[0]
+        return _friction_email_content(d["symbol"], d["score"], d["explanation"], d.get("groq_analysis"))
+    items = order_by_priority(items)
+    syms = ", ".join(d["symbol"] for d in items[:5]) + (" ..." if len(items) > 5 else "")
+    subject = f"MNEMOS 2.1 Friction digest: {len(items)} alerts ({syms})"
+    parts = []
+    for d in items:
+        stamp = time.strftime("%H:%M UTC", time.gmtime(d.get("ts") or time.time()))
+        part = f"{d['symbol']} - score {d['score']:.2f} ({stamp})\n{d['explanation']}"
+        if d.get("groq_analysis"):
+            part += f"\nAI analysis: {d['groq_analysis']}"
+        parts.append(part)
+    return subject, ("\n\n" + "-" * 40 + "\n\n").join(parts)
+
+
+def flush_email_digest(force: bool = False) -> bool:
+    """Send queued friction alerts as one email if the email bucket has a token (or force). True if sent."""
+    with _digest_lock:
+        fresh, expired = split_expired(_digest)
+        if expired:
+            logger.info("Email digest: dropped %d stale alert(s)", len(expired))
+        _digest[:] = fresh
+        if not _digest:
+            return False
+        if force:
+            consume("email", *interval_bucket(EMAIL_MIN_INTERVAL_SEC))
+        elif not _rate_limit():
+            return False
+        items = list(_digest)
+        _digest.clear()
+    recipients = _recipients_list()
+    subject, body = _digest_content(items)
+    try:
+        _smtp_send(_build_message(subject, body, recipients), recipients)
+        with _digest_lock:
+            for d in items:
+                d["sent"] = True
+                if d.get("outbox_id"):
+                    _delivered.append(d["outbox_id"])
+        logger.info("Email digest (%d alerts) sent to %s", len(items), recipients)
+        return True
+    except Exception as e:
+        logger.warning("Email digest send failed: %s", e)
+        with _digest_lock:
+            _digest[:0] = items  # retry at next flush
+        return False
+
+
+async def send_friction_email_async(
+    symbol: str,
+    score: float,
+    explanation: str,
+    groq_analysis: Optional[str] = None,
+    confidence: Optional[float] = None,
+) -> Union[bool, str]:
+    """Async send_friction_email (digest mode queues/flushes in a worker thread)."""
+    if EMAIL_DIGEST_ENABLED:
+        return await run_blocking(send_friction_email, symbol, score, explanation, groq_analysis, confidence)
+    subject, body = _friction_email_content(symbol, score, explanation, groq_analysis)
+    return await send_email_async(subject, body)
@@ -0,0 +1,205 @@
+"""
+MNEMOS 2.1 - Durable alert outbox: the tick only enqueues; background workers deliver
+(GROQ + Telegram + Email) with retries and exponential backoff, then record the dedup lock.
+An alert a channel only buffered (coalescing / digest) stays 'queued' until that channel's flush delivers it.
+Workers claim by priority (alerts.priority: severity, confidence, aging), not arrival order.
+Pending alerts survive restarts (SQLite alert_outbox table).
+"""
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from config.settings import (
+    ALERT_EXPIRY_MIN,
+    ALERT_MAX_ATTEMPTS,
+    ALERT_PRIORITY_AGING_CAP_MIN,
+    ALERT_PRIORITY_AGING_PER_MIN,
+    ALERT_PRIORITY_CONFIDENCE_WEIGHT,
+    ALERT_OUTBOX_WORKERS,
+    ALERT_RETRY_BASE_SEC,
+    ALERT_RETRY_MAX_SEC,
+)
+from alerts.dedup import can_send_alert, record_alert_sent, severity_from_score
+from alerts import email_alert, telegram_alert
+from alerts.dispatcher import deliver_friction, flush_pending_alerts
+from alerts.priority import QUEUED
+from storage.db import (
+    claim_next_alert,
+    cursor,
+    enqueue_alert,
+    expire_old_alerts,
+    has_pending_alert,
+    mark_alert_status,
+    mark_queued_alerts_sent,
+    requeue_queued_alerts,
+    requeue_stale_alerts,
+)
+
+logger = logging.getLogger(__name__)
+
+IDLE_POLL_SEC = 2.0
+STALE_SENDING_MIN = 10
+
+_stop = threading.Event()
+_wake = threading.Event()
+_workers: List[threading.Thread] = []
+
+
+def enqueue_friction(
+    symbol: str,
+    score: float,
+    explanation: str,
+    headline: Optional[str] = None,
+    signal_type: Optional[str] = None,
+    confidence: Optional[float] = None,
+) -> Optional[int]:
+    """Queue a friction alert if dedup allows and none is already pending. Returns outbox id or None."""
+    signal_type = signal_type or "unknown"
+    allowed, reason = can_send_alert(symbol, signal_type)
+    if not allowed:
+        logger.debug("Alert skipped (dedup): %s %s - %s", symbol, signal_type, reason)
+        return None
+    try:
+        with cursor() as cur:
+            if has_pending_alert(cur, symbol, signal_type):
+                return None
+            outbox_id = enqueue_alert(
+                cur, symbol, signal_type, score, explanation, headline,
+                severity=severity_from_score(score), confidence=confidence,
+            )
+    except Exception as e:
+        logger.warning("Alert enqueue failed %s: %s", symbol, e)
+        return None
+    _wake.set()
+    return outbox_id
+
+
+def _retry_at(attempts: int) -> str:
+    delay = min(ALERT_RETRY_MAX_SEC, ALERT_RETRY_BASE_SEC * (2 ** max(0, attempts - 1)))
+    return (datetime.utcnow() + timedelta(seconds=delay)).isoformat() + "Z"
+
+
+def deliver_next() -> bool:
+    """Claim and deliver one due alert. Returns False if the outbox had nothing due."""
+    now = datetime.utcnow()
+    expire_before = (now - timedelta(minutes=ALERT_EXPIRY_MIN)).isoformat() + "Z"
+    stale = (now - timedelta(minutes=STALE_SENDING_MIN)).isoformat() + "Z"
+    buffered = telegram_alert.pending_outbox_ids() + email_alert.pending_outbox_ids()
+    with cursor() as cur:
+        if requeue_stale_alerts(cur, stale):  # claimed by a worker that died mid-delivery
+            logger.info("Outbox: requeued stale 'sending' alerts")
+        if expire_old_alerts(cur, expire_before, buffered):
+            logger.info("Outbox: expired stale alerts")
+        row = claim_next_alert(
+            cur,
+            confidence_weight=ALERT_PRIORITY_CONFIDENCE_WEIGHT,
+            aging_per_min=ALERT_PRIORITY_AGING_PER_MIN,
+            aging_cap_min=ALERT_PRIORITY_AGING_CAP_MIN,
+        )
+    if row is None:
+        return False
+    outbox_id, symbol, signal_type = row["id"], row["symbol"], row["signal_type"]
+    allowed, reason = can_send_alert(symbol, signal_type)
+    if not allowed:
+        with cursor() as cur:
+            mark_alert_status(cur, outbox_id, "skipped", error=reason)
+        return True
+    error: Optional[str] = None
+    try:
+        delivered = deliver_friction(
+            symbol, row["score"], row["explanation"] or "", row["headline"], row["confidence"], outbox_id
+        )
+    except Exception as e:
+        delivered, error = False, str(e)
+    with cursor() as cur:
+        if delivered == QUEUED:
+            mark_alert_status(cur, outbox_id, "queued")  # settle_delivered() marks it sent
+            return True
+        if delivered:
+            mark_alert_status(cur, outbox_id, "sent")
+        elif row["attempts"] >= ALERT_MAX_ATTEMPTS:
+            mark_alert_status(cur, outbox_id, "failed", error=error or "no channel delivered")
+            logger.warning("Alert %s %s failed after %d attempts", symbol, signal_type, row["attempts"])
+        else:
+            mark_alert_status(cur, outbox_id, "pending", next_attempt_at=_retry_at(row["attempts"]),
+                              error=error or "no channel delivered")
+    if delivered:
+        record_alert_sent(symbol, signal_type)
+    return True
+
+
+def settle_delivered() -> int:
+    """Mark queued alerts the Telegram / email buffers have since delivered as sent. Returns count."""
+    ids = telegram_alert.pop_delivered() + email_alert.pop_delivered()
+    if not ids:
+        return 0
+    with cursor() as cur:
+        rows = mark_queued_alerts_sent(cur, ids)
+    for symbol, signal_type in rows:
+        record_alert_sent(symbol, signal_type)
+    return len(rows)
+
+
+def drain_outbox(max_items: int = 1000) -> int:
+    """Deliver due alerts inline until none are due (for --once). Returns number processed."""
+    n = 0
+    while n < max_items and deliver_next():
+        n += 1
+    settle_delivered()
+    return n
+
+
+def _worker_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        try:
+            busy = deliver_next()
+            if not busy:
+                flush_pending_alerts()
+            settle_delivered()
+            if busy:
+                continue
+        except Exception as e:
+            logger.warning("Outbox worker error: %s", e)
+        _wake.wait(IDLE_POLL_SEC)
+        _wake.clear()
+
+
+def start_workers(n: int = ALERT_OUTBOX_WORKERS) -> None:
+    """
+    Requeue alerts left 'sending' by a crash, and 'queued' ones no restored channel buffer holds, then start
+    n daemon delivery threads (idempotent). Restore the checkpoint first. Threads still finishing after
+    stop_workers() keep their own, already-set stop event, so they exit rather than join the new pool.
+    """
+    global _stop
+    _workers[:] = [t for t in _workers if t.is_alive()]
+    if _workers and not _stop.is_set():
+        return
+    try:
+        stale = (datetime.utcnow() - timedelta(minutes=STALE_SENDING_MIN)).isoformat() + "Z"
+        buffered = telegram_alert.pending_outbox_ids() + email_alert.pending_outbox_ids()
+        with cursor() as cur:
+            requeued = requeue_stale_alerts(cur, stale) + requeue_queued_alerts(cur, buffered)
+        if requeued:
+            logger.info("Outbox: requeued %d interrupted alerts", requeued)
+    except Exception as e:
+        logger.warning("Outbox requeue failed: %s", e)
+    _stop = threading.Event()
+    for i in range(n):
+        t = threading.Thread(target=_worker_loop, args=(_stop,), name=f"alert-outbox-{i}", daemon=True)
+        t.start()
+        _workers.append(t)
+    logger.info("Outbox: %d delivery worker(s) started", n)
+
+
+def stop_workers(timeout: float = 5.0) -> None:
+    """Signal workers to stop and wait briefly. Threads that outlive the wait stay in _workers."""
+    _stop.set()
+    _wake.set()
+    for t in _workers:
+        t.join(timeout)
+    _workers[:] = [t for t in _workers if t.is_alive()]
+    try:
+        settle_delivered()
+    except Exception as e:
+        logger.warning("Outbox settle failed: %s", e)
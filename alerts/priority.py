@@ -0,0 +1,57 @@
+"""
+MNEMOS 2.1 - Alert priority across channels: severity (from score) + confidence + aging, newest first on ties.
+Used by the outbox claim order and by the Telegram/email send buffers, so rate-limited channel
+capacity goes to the highest-value alert. Alerts older than ALERT_EXPIRY_MIN are dropped as stale.
+"""
+import time
+from typing import Any, Dict, List, Optional
+
+from config.settings import (
+    ALERT_EXPIRY_MIN,
+    ALERT_PRIORITY_AGING_CAP_MIN,
+    ALERT_PRIORITY_AGING_PER_MIN,
+    ALERT_PRIORITY_CONFIDENCE_WEIGHT,
+)
+from alerts.dedup import severity_from_score
+
+# Channel result when an alert was buffered for a later send window, not delivered yet
+QUEUED = "queued"
+
+
+def alert_priority(
+    score: float,
+    confidence: Optional[float],
+    created_ts: float,
+    now: Optional[float] = None,
+) -> float:
+    """Higher = deliver first. Aging (capped) keeps lower-severity alerts from starving."""
+    now = now if now is not None else time.time()
+    age_min = max(0.0, (now - created_ts) / 60.0)
+    return (
+        severity_from_score(score)
+        + ALERT_PRIORITY_CONFIDENCE_WEIGHT * float(confidence or 0.0)
+        + ALERT_PRIORITY_AGING_PER_MIN * min(age_min, ALERT_PRIORITY_AGING_CAP_MIN)
+    )
+
+
+def is_expired(created_ts: float, now: Optional[float] = None) -> bool:
+    """True if the alert is too old to be worth sending."""
+    now = now if now is not None else time.time()
+    return now - created_ts > ALERT_EXPIRY_MIN * 60
+
+
+def order_by_priority(items: List[Dict[str, Any]], now: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Sort buffered alerts ({score, confidence?, ts}) by priority desc, then newest first."""
+    now = now if now is not None else time.time()
+    return sorted(
+        items,
+        key=lambda d: (-alert_priority(d["score"], d.get("confidence"), d.get("ts", now), now), -d.get("ts", 0)),
+    )
+
+
+def split_expired(items: List[Dict[str, Any]], now: Optional[float] = None) -> tuple:
+    """(fresh, expired) buffered alerts."""
+    now = now if now is not None else time.time()
+    fresh = [d for d in items if not is_expired(d.get("ts", now), now)]
+    expired = [d for d in items if is_expired(d.get("ts", now), now)]
+    return fresh, expired
@@ -1,42 +1,78 @@
 """
-MNEMOS 2.0 - Telegram bot alerts. Rich formatted messages, rate limiting.
+MNEMOS 2.0 - Telegram bot alerts. Rich formatted messages, rate limiting (shared token buckets, core.rate_limiter).
+Coalescing: friction alerts are buffered and, at each send window, packed (highest severity first)
+into one message of up to 4096 chars over a persistent HTTPS connection, instead of being dropped.
 """
+import http.client
 import logging
+import threading
 import time
-from typing import Dict, Optional
+from typing import Any, Dict, List, Optional, Union
 
 from config.settings import (
     TELEGRAM_BOT_TOKEN,
     TELEGRAM_CHAT_ID,
+    TELEGRAM_COALESCE_ENABLED,
     TELEGRAM_MIN_INTERVAL_SEC,
     MAX_ALERTS_PER_SYMBOL_PER_HOUR,
 )
 
+from alerts.priority import QUEUED, order_by_priority, split_expired
+from core.async_http import http_post, run_blocking
+from core.rate_limiter import acquire, available, consume, interval_bucket, window_bucket
+
 logger = logging.getLogger(__name__)
 
-_last_sent: float = 0
-_per_symbol_count: Dict[str, list] = {}  # symbol -> list of timestamps
+TELEGRAM_HOST = "api.telegram.org"
+TELEGRAM_MAX_LEN = 4096
+
+_pending: List[Dict[str, Any]] = []  # coalescing buffer: {symbol, score, confidence, block, ts, outbox_id}
+_pending_lock = threading.Lock()
+_delivered: List[int] = []  # outbox ids of buffered alerts a flush delivered; collected by alerts.outbox
+_conn: Optional[http.client.HTTPSConnection] = None
+_conn_lock = threading.Lock()
+
+
+def get_state() -> Dict[str, Any]:
+    """Coalescing buffer for warm-restart checkpoints (rate limits persist in rate_buckets)."""
+    with _pending_lock:
+        return {"pending": [dict(p) for p in _pending]}
+
+
+def load_state(state: Dict[str, Any]) -> None:
+    """Restore coalescing buffer from a checkpoint."""
+    with _pending_lock:
+        _pending[:] = [dict(p) for p in (state.get("pending") or [])]
 
 
 def _rate_limit_global() -> bool:
-    global _last_sent
-    now = time.time()
-    if now - _last_sent < TELEGRAM_MIN_INTERVAL_SEC:
-        return False
-    _last_sent = now
-    return True
+    return acquire("telegram", *interval_bucket(TELEGRAM_MIN_INTERVAL_SEC))
+
+
+def _symbol_bucket(symbol: str) -> tuple:
+    return (f"telegram:{symbol}",) + window_bucket(MAX_ALERTS_PER_SYMBOL_PER_HOUR, 3600)
+
+
+def _symbol_tokens(symbol: str) -> int:
+    """Alerts this symbol may still send now."""
+    return int(available(*_symbol_bucket(symbol)) + 1e-9)
 
 
 def _rate_limit_symbol(symbol: str) -> bool:
-    now = time.time()
-    cutoff = now - 3600  # 1 hour
-    if symbol not in _per_symbol_count:
-        _per_symbol_count[symbol] = []
-    _per_symbol_count[symbol] = [t for t in _per_symbol_count[symbol] if t > cutoff]
-    if len(_per_symbol_count[symbol]) >= MAX_ALERTS_PER_SYMBOL_PER_HOUR:
-        return False
-    _per_symbol_count[symbol].append(now)
-    return True
+    return acquire(*_symbol_bucket(symbol))
+
+
+def _send_message_request(text: str, parse_mode: str) -> tuple:
+    """(url, urlencoded body) for sendMessage."""
+    import urllib.parse
+    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+    body = {
+        "chat_id": TELEGRAM_CHAT_ID,
+        "text": text[:4096],
+        "parse_mode": parse_mode,
+        "disable_web_page_preview": True,
+    }
+    return url, urllib.parse.urlencode(body).encode()
 
 
 def send_telegram(text: str, parse_mode: str = "HTML") -> bool:
@@ -48,39 +84,70 @@ def send_telegram(text: str, parse_mode: str = "HTML") -> bool:
         logger.debug("Telegram rate limit (global); skip")
         return False
     try:
-        import urllib.request
-        import urllib.parse
-        import json
-        url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-        body = {
-            "chat_id": TELEGRAM_CHAT_ID,
-            "text": text[:4096],
-            "parse_mode": parse_mode,
-            "disable_web_page_preview": True,
-        }
-        data = urllib.parse.urlencode(body).encode()
-        req = urllib.request.Request(url, data=data, method="POST")
-        with urllib.request.urlopen(req, timeout=15) as r:
-            if r.status == 200:
-                return True
-            logger.warning("Telegram API status %s", r.status)
-            return False
+        url, data = _send_message_request(text, parse_mode)
+        status = _post_keepalive(url, data)
+        if status == 200:
+            return True
+        logger.warning("Telegram API status %s", status)
+        return False
     except Exception as e:
         logger.warning("Telegram send failed: %s", e)
         return False
 
 
-def format_friction_alert(
+def _post_keepalive(url: str, data: bytes) -> int:
+    """POST over a persistent HTTPS connection to api.telegram.org; reconnect once if it dropped."""
+    global _conn
+    path = url.split(TELEGRAM_HOST, 1)[1]
+    headers = {"Content-Type": "application/x-www-form-urlencoded", "Connection": "keep-alive"}
+    with _conn_lock:
+        for attempt in (1, 2):
+            if _conn is None:
+                _conn = http.client.HTTPSConnection(TELEGRAM_HOST, timeout=15)
+            try:
+                _conn.request("POST", path, body=data, headers=headers)
+                r = _conn.getresponse()
+                r.read()
+                return r.status
+            except (http.client.HTTPException, OSError):
+                _conn.close()
+                _conn = None
+                if attempt == 2:
+                    raise
+    return 0
+
+
+async def send_telegram_async(text: str, parse_mode: str = "HTML") -> bool:
+    """Async send_telegram for the asyncio runtime. Same rate limits."""
+    if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
+        logger.debug("Telegram not configured; skip")
+        return False
+    if not await run_blocking(_rate_limit_global):
+        logger.debug("Telegram rate limit (global); skip")
+        return False
+    try:
+        url, data = _send_message_request(text, parse_mode)
+        status, _ = await http_post(
+            url, data, headers={"Content-Type": "application/x-www-form-urlencoded"}, timeout=15
+        )
+        if status == 200:
+            return True
+        logger.warning("Telegram API status %s", status)
+        return False
+    except Exception as e:
+        logger.warning("Telegram send failed: %s", e)
+        return False
+
+
+def _alert_block_lines(
     symbol: str,
     score: float,
     explanation: str,
     headline: Optional[str] = None,
     groq_analysis: Optional[str] = None,
-) -> str:
-    """Rich Telegram message for friction signal."""
+) -> List[str]:
     sym_clean = symbol.replace(".NS", "").replace("^", "")
     lines = [
-        f"<b>MNEMOS 2.1 – Friction</b>",
         f"<b>{sym_clean}</b>",
         f"Score: {score:.2f}",
         "",
@@ -90,19 +157,205 @@ def format_friction_alert(
         lines.append(f"<i>{headline[:100]}</i>")
     if groq_analysis:
         lines.append(f"\n<b>AI:</b> {groq_analysis[:200]}")
+    return lines
+
+
+def format_friction_alert(
+    symbol: str,
+    score: float,
+    explanation: str,
+    headline: Optional[str] = None,
+    groq_analysis: Optional[str] = None,
+) -> str:
+    """Rich Telegram message for friction signal."""
+    lines = [f"<b>MNEMOS 2.1 – Friction</b>"]
+    lines.extend(_alert_block_lines(symbol, score, explanation, headline, groq_analysis))
     return "\n".join(lines)
 
 
+def pack_alerts(pending: List[Dict[str, Any]], max_len: int = TELEGRAM_MAX_LEN) -> tuple:
+    """
+    Pack buffered alerts (highest priority first: severity, confidence, aging) into one message <= max_len.
+    Returns (text, packed_items, leftover_items).
+    """
+    sep = "\n\n"
+    packed: List[Dict[str, Any]] = []
+    leftover: List[Dict[str, Any]] = []
+    length = 0
+    for p in order_by_priority(pending):
+        header_len = len(_coalesced_header(len(packed) + 1)) + len(sep)
+        add = len(p["block"]) + (len(sep) if packed else 0)
+        if header_len + length + add <= max_len:
+            packed.append(p)
+            length += add
+        else:
+            leftover.append(p)
+    if len(packed) == 1:
+        return f"<b>MNEMOS 2.1 – Friction</b>\n{packed[0]['block']}", packed, leftover
+    body = sep.join(p["block"] for p in packed)
+    return f"{_coalesced_header(len(packed))}{sep}{body}", packed, leftover
+
+
+def _pull_eligible(pending: List[Dict[str, Any]]) -> tuple:
+    """(eligible, held): held = over the per-symbol hourly cap; they stay buffered and age."""
+    eligible: List[Dict[str, Any]] = []
+    held: List[Dict[str, Any]] = []
+    left: Dict[str, int] = {}
+    for p in order_by_priority(pending):
+        sym = p.get("symbol", "")
+        if sym:
+            if sym not in left:
+                left[sym] = _symbol_tokens(sym)
+            if left[sym] <= 0:
+                held.append(p)
+                continue
+            left[sym] -= 1
+        eligible.append(p)
+    return eligible, held
+
+
+def _coalesced_header(n: int) -> str:
+    return f"<b>MNEMOS 2.1 – Friction ({n} alerts)</b>"
+
+
+def flush_telegram(force: bool = False) -> bool:
+    """Send one packed message from the buffer if the global bucket has a token (or force). True if sent."""
+    with _pending_lock:
+        fresh, expired = split_expired(_pending)
+        if expired:
+            logger.info("Telegram: dropped %d stale alert(s)", len(expired))
+        eligible, held = _pull_eligible(fresh)
+        _pending[:] = fresh
+        if not eligible:
+            return False
+        if force:
+            consume("telegram", *interval_bucket(TELEGRAM_MIN_INTERVAL_SEC))
+        elif not _rate_limit_global():
+            return False
+        text, packed, leftover = pack_alerts(eligible)
+        _pending[:] = leftover + held
+    try:
+        url, data = _send_message_request(text, "HTML")
+        status = _post_keepalive(url, data)
+        if status == 200:
+            with _pending_lock:
+                for p in packed:
+                    p["sent"] = True
+                    if p.get("outbox_id"):
+                        _delivered.append(p["outbox_id"])
+            for p in packed:
+                if p.get("symbol"):
+                    consume(*_symbol_bucket(p["symbol"]))
+            logger.info("Telegram: sent %d coalesced alert(s); %d pending", len(packed), len(leftover) + len(held))
+            return True
+        logger.warning("Telegram API status %s", status)
+    except Exception as e:
+        logger.warning("Telegram send failed: %s", e)
+    with _pending_lock:
+        _pending[:0] = packed  # retry at next window
+    return False
+
+
 def send_friction_alert(
     symbol: str,
     score: float,
     explanation: str,
     headline: Optional[str] = None,
     groq_analysis: Optional[str] = None,
-) -> bool:
-    """Send friction alert if Telegram configured and rate limit allows (per-symbol)."""
-    if not _rate_limit_symbol(symbol):
+    confidence: Optional[float] = None,
+    outbox_id: Optional[int] = None,
+) -> Union[bool, str]:
+    """
+    Send friction alert if Telegram configured and rate limit allows (per-symbol).
+    Coalescing mode: buffer it (per-symbol cap applied when the buffer is pulled, by priority)
+    and flush if the send window is open; True if that flush delivered it, else QUEUED. outbox_id is
+    reported by pop_delivered() once a later flush delivers it.
+    """
+    if not TELEGRAM_COALESCE_ENABLED:
+        if not _rate_limit_symbol(symbol):
+            logger.debug("Telegram rate limit (symbol %s); skip", symbol)
+            return False
+        msg = format_friction_alert(symbol, score, explanation, headline, groq_analysis)
+        return send_telegram(msg)
+    if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
+        logger.debug("Telegram not configured; skip")
+        return False
+    block = "\n".join(_alert_block_lines(symbol, score, explanation, headline, groq_analysis))
+    item = {
+        "symbol": symbol,
+        "score": float(score),
+        "confidence": confidence,
+        "block": block,
+        "ts": time.time(),
+        "outbox_id": outbox_id,
+    }
+    with _pending_lock:
+        _pending.append(item)
+    flush_telegram()
+    with _pending_lock:
+        if not item.get("sent"):
+            return QUEUED
+        if outbox_id in _delivered:
+            _delivered.remove(outbox_id)  # reported by the return value instead
+    return True
+
+
+def pop_delivered() -> List[int]:
+    """Outbox ids of queued alerts delivered since the last call."""
+    with _pending_lock:
+        out = list(_delivered)
+        _delivered.clear()
+    return out
+
+
+def pending_outbox_ids() -> List[int]:
+    """Outbox ids still waiting in the buffer."""
+    with _pending_lock:
+        return [p["outbox_id"] for p in _pending if p.get("outbox_id")]
+
+
+def send_ai_note(symbol: str, score: float, note: str, confidence: Optional[float] = None) -> bool:
+    """
+    Follow-up AI note for an alert already sent or buffered: appended to the symbol's block if still buffered,
+    else buffered as its own block (not counted against the per-symbol cap) for the next send window.
+    Without coalescing it is sent at once if the global send window is open (the alert usually just used it).
+    """
+    if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
+        return False
+    sym_clean = symbol.replace(".NS", "").replace("^", "")
+    if not TELEGRAM_COALESCE_ENABLED:
+        if send_telegram(f"<b>MNEMOS 2.1 – AI note</b>\n<b>{sym_clean}</b>: {note[:200]}"):
+            return True
+    with _pending_lock:
+        for p in _pending:
+            if p.get("symbol") == symbol and "<b>AI:</b>" not in p["block"]:
+                p["block"] += f"\n\n<b>AI:</b> {note[:200]}"
+                return True
+        _pending.append({
+            "symbol": "",
+            "score": float(score),
+            "confidence": confidence,
+            "block": f"<b>{sym_clean}</b> AI note: {note[:200]}",
+            "ts": time.time(),
+        })
+    return True
+
+
+async def send_friction_alert_async(
+    symbol: str,
+    score: float,
+    explanation: str,
+    headline: Optional[str] = None,
+    groq_analysis: Optional[str] = None,
+    confidence: Optional[float] = None,
+) -> Union[bool, str]:
+    """Async send_friction_alert (coalescing mode buffers/flushes in a worker thread)."""
+    if TELEGRAM_COALESCE_ENABLED:
+        return await run_blocking(
+            send_friction_alert, symbol, score, explanation, headline, groq_analysis, confidence
+        )
+    if not await run_blocking(_rate_limit_symbol, symbol):
         logger.debug("Telegram rate limit (symbol %s); skip", symbol)
         return False
     msg = format_friction_alert(symbol, score, explanation, headline, groq_analysis)
-    return send_telegram(msg)
+    return await send_telegram_async(msg)
@@ -1,6 +1,8 @@
 """
 MNEMOS 2.1 - Performance attribution: track outcomes at +1D, +3D, +5D.
 Compute win rate, avg return, drawdown, latency. Store in SQLite.
+Aggregates come from a materialized cube (symbol x signal_type x horizon x week) that is folded forward
+incrementally from new outcome rows, so reads do not scale with outcome history.
 """
 import logging
 from datetime import datetime, timedelta
@@ -8,7 +10,15 @@ from typing import Dict, List, Optional, Tuple
 
 import pandas as pd
 
-from storage.db import cursor, insert_outcome
+from storage.db import (
+    advance_watermark,
+    cursor,
+    epoch_to_iso,
+    get_watermark,
+    insert_outcome,
+    merge_attribution_cells,
+    to_epoch,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +26,7 @@ logger = logging.getLogger(__name__)
 def get_latest_close_by_symbol(cur, symbol: str) -> Optional[Tuple[str, float]]:
     """(dt, close) for latest price row for symbol."""
     cur.execute(
-        "SELECT dt, close FROM prices WHERE symbol = ? AND close IS NOT NULL ORDER BY dt DESC LIMIT 1",
+        "SELECT dt, close FROM prices WHERE symbol = ? AND close IS NOT NULL ORDER BY dt_epoch DESC LIMIT 1",
         (symbol[:32],),
     )
     row = cur.fetchone()
@@ -26,10 +36,10 @@ def get_latest_close_by_symbol(cur, symbol: str) -> Optional[Tuple[str, float]]:
 
 
 def get_close_on_date(cur, symbol: str, dt_str: str) -> Optional[float]:
-    """Closest close on or after dt_str for symbol (for +1D, +3D, +5D). dt_str can be date or datetime."""
+    """Closest close on or after the market-local day of dt_str for symbol (for +1D, +3D, +5D)."""
     cur.execute(
-        "SELECT close FROM prices WHERE symbol = ? AND dt >= ? AND close IS NOT NULL ORDER BY dt ASC LIMIT 1",
-        (symbol[:32], dt_str[:10]),
+        "SELECT close FROM prices WHERE symbol = ? AND dt_epoch >= ? AND close IS NOT NULL ORDER BY dt_epoch ASC LIMIT 1",
+        (symbol[:32], to_epoch(dt_str[:10], market_local=True)),
     )
     row = cur.fetchone()
     return float(row[0]) if row else None
@@ -60,10 +70,9 @@ def update_outcomes_for_signal(signal_id: int, symbol: str, signal_dt: str, pric
         cur.execute("SELECT id FROM outcomes WHERE signal_id = ?", (signal_id,))
         if cur.fetchone():
             return
-        try:
-            base_dt = datetime.fromisoformat(signal_dt.replace("Z", "").split("+")[0].strip())
-        except Exception:
-            base_dt = datetime.utcnow()
+        # Signal day in market-local time (signal_dt is UTC; prices.dt is market-local)
+        epoch = to_epoch(signal_dt)
+        base_dt = datetime.fromisoformat(epoch_to_iso(epoch, market_local=True)) if epoch is not None else datetime.utcnow()
         # Simple: next 1, 3, 5 calendar days (then find closest trading data)
         d1 = (base_dt + timedelta(days=1)).strftime("%Y-%m-%d")
         d3 = (base_dt + timedelta(days=3)).strftime("%Y-%m-%d")
@@ -87,70 +96,171 @@ def update_outcomes_for_signal(signal_id: int, symbol: str, signal_dt: str, pric
         )
 
 
-def get_attribution_stats(symbol: Optional[str] = None, min_samples: int = 5) -> Dict:
+HORIZONS = (1, 3, 5)
+CUBE_WATERMARK = "attribution_cube"
+
+
+def _outcome_cells(df: pd.DataFrame) -> List[Tuple]:
     """
-    Aggregate win rate, avg return, drawdown, latency from outcomes.
-    symbol: optional filter. Returns dict with win_rate_1d, win_rate_3d, win_rate_5d,
-    avg_return_1d, avg_return_3d, avg_return_5d, max_drawdown_1d, sample_count.
+    Columnar outcome rows (id order) -> cube cells per (symbol, signal_type, horizon, week):
+    n, wins, sum, sum of squares, min, max and peak-to-trough drawdown, all vectorized.
     """
-    with cursor() as cur:
-        if symbol:
+    d = pd.to_datetime(df["signal_dt"].astype(str).str[:10], errors="coerce")
+    df = df.assign(week=(d - pd.to_timedelta(d.dt.weekday, unit="D")).dt.strftime("%Y-%m-%d"))
+    df = df[df["week"].notna()]
+    cells: List[Tuple] = []
+    keys = ["symbol", "signal_type", "week"]
+    for h in HORIZONS:
+        sub = df[keys + ["id"]].assign(ret=pd.to_numeric(df[f"return_{h}d"], errors="coerce"))
+        sub = sub[sub["ret"].notna()].sort_values("id")
+        if sub.empty:
+            continue
+        g = sub.groupby(keys, sort=False)["ret"]
+        sub = sub.assign(dd=g.cummax() - sub["ret"], sq=sub["ret"] ** 2, win=(sub["ret"] > 0).astype(int))
+        agg = sub.groupby(keys, sort=False).agg(
+            n=("ret", "size"), wins=("win", "sum"), sum_ret=("ret", "sum"), sum_sq=("sq", "sum"),
+            min_ret=("ret", "min"), max_ret=("ret", "max"), max_dd=("dd", "max"),
+        ).reset_index()
+        for r in agg.itertuples(index=False):
+            cells.append((r.symbol, r.signal_type, h, r.week, int(r.n), int(r.wins), float(r.sum_ret),
+                          float(r.sum_sq), float(r.min_ret), float(r.max_ret), float(r.max_dd)))
+    return cells
+
+
+def refresh_attribution_cube() -> int:
+    """Fold outcomes added since the last refresh into attribution_cube. Returns outcomes folded."""
+    try:
+        with cursor() as cur:
+            last = get_watermark(cur, CUBE_WATERMARK)
             cur.execute(
-                """SELECT return_1d, return_3d, return_5d FROM outcomes
-                   WHERE symbol = ? AND (return_1d IS NOT NULL OR return_3d IS NOT NULL OR return_5d IS NOT NULL)""",
-                (symbol[:32],),
+                """SELECT o.id, o.symbol, COALESCE(s.signal_type, ''), o.signal_dt,
+                          o.return_1d, o.return_3d, o.return_5d
+                   FROM outcomes o LEFT JOIN signals s ON s.id = o.signal_id
+                   WHERE o.id > ? ORDER BY o.id""",
+                (last,),
             )
-        else:
-            cur.execute(
-                """SELECT return_1d, return_3d, return_5d FROM outcomes
-                   WHERE return_1d IS NOT NULL OR return_3d IS NOT NULL OR return_5d IS NOT NULL"""
+            rows = cur.fetchall()
+            if not rows:
+                return 0
+            df = pd.DataFrame(
+                [tuple(r) for r in rows],
+                columns=["id", "symbol", "signal_type", "signal_dt", "return_1d", "return_3d", "return_5d"],
             )
+            if not advance_watermark(cur, CUBE_WATERMARK, last, int(df["id"].max())):
+                return 0  # another process folded these rows
+            merge_attribution_cells(cur, _outcome_cells(df))
+        return len(df)
+    except Exception as e:
+        logger.warning("Attribution cube refresh failed: %s", e)
+        return 0
+
+
+def _cube_filter(
+    symbol: Optional[str],
+    signal_type: Optional[str],
+    since_week: Optional[str],
+) -> Tuple[str, list]:
+    where, params = ["1 = 1"], []
+    if symbol:
+        where.append("symbol = ?")
+        params.append(symbol[:32])
+    if signal_type is not None:
+        where.append("signal_type = ?")
+        params.append(signal_type)
+    if since_week:
+        where.append("week >= ?")
+        params.append(since_week[:10])
+    return " AND ".join(where), params
+
+
+def _fold_drawdown(weeks: List[Tuple[float, float, float]]) -> Optional[float]:
+    """Chronological (max_ret, min_ret, max_dd) per week -> overall peak-to-trough drawdown."""
+    if not weeks:
+        return None
+    peak, dd = None, 0.0
+    for wmax, wmin, wdd in weeks:
+        dd = max(dd, wdd, (peak - wmin) if peak is not None else 0.0)
+        peak = wmax if peak is None else max(peak, wmax)
+    return dd
+
+
+def get_attribution_stats(
+    symbol: Optional[str] = None,
+    min_samples: int = 5,
+    signal_type: Optional[str] = None,
+    since_week: Optional[str] = None,
+) -> Dict:
+    """
+    Aggregate win rate, avg return, drawdown from the attribution cube (refreshed incrementally first).
+    symbol / signal_type / since_week (YYYY-MM-DD, week start) are optional filters. Returns dict with
+    win_rate_1d, win_rate_3d, win_rate_5d, avg_return_1d, avg_return_3d, avg_return_5d, max_drawdown_1d,
+    sample_count, plus intraday win_rate_/avg_return_/sample_count_ for 30m, 1h, close. Drawdown is folded week by week, so across symbols it is approximate within a week.
+    """
+    refresh_attribution_cube()
+    where, params = _cube_filter(symbol, signal_type, since_week)
+    with cursor() as cur:
+        cur.execute(
+            f"SELECT horizon, SUM(n), SUM(wins), SUM(sum_ret) FROM attribution_cube WHERE {where} GROUP BY horizon",
+            params,
+        )
+        by_h = {int(r[0]): (int(r[1]), int(r[2]), float(r[3])) for r in cur.fetchall()}
+        cur.execute(
+            f"""SELECT MAX(max_ret), MIN(min_ret), MAX(max_dd) FROM attribution_cube
+                WHERE {where} AND horizon = 1 GROUP BY week ORDER BY week""",
+            params,
+        )
+        weeks = [(float(r[0]), float(r[1]), float(r[2])) for r in cur.fetchall()]
+    # A row with any return always has its 1D return (earliest close), so the largest horizon count is the row count
+    sample_count = max((v[0] for v in by_h.values()), default=0)
+    out: Dict = {"sample_count": sample_count}
+    enough = sample_count > 0 and sample_count >= min_samples
+    for h in HORIZONS:
+        n, wins, total = by_h.get(h, (0, 0, 0.0))
+        out[f"win_rate_{h}d"] = round(wins / n * 100.0, 2) if enough and n else None
+        out[f"avg_return_{h}d"] = round(total / n, 2) if enough and n else None
+    dd = _fold_drawdown(weeks) if enough else None
+    out["max_drawdown_1d"] = round(dd, 2) if dd is not None else None
+    if signal_type is None and since_week is None:
+        try:
+            from analytics.intraday_outcomes import get_intraday_stats
+            out.update(get_intraday_stats(symbol=symbol, min_samples=min_samples))
+        except Exception as e:
+            logger.debug("Intraday stats: %s", e)
+    return out
+
+
+def get_attribution_rollup(
+    dims: List[str],
+    horizon: int = 1,
+    min_samples: int = 1,
+    since_week: Optional[str] = None,
+) -> List[Dict]:
+    """
+    Roll the cube up to any subset of symbol / signal_type / week for one horizon:
+    [{<dims>, win_rate, avg_return, std_return, sample_count}].
+    """
+    allowed = [d for d in dims if d in ("symbol", "signal_type", "week")]
+    refresh_attribution_cube()
+    where, params = _cube_filter(None, None, since_week)
+    cols = ", ".join(allowed) + ", " if allowed else ""
+    group = f"GROUP BY {', '.join(allowed)}" if allowed else ""
+    with cursor() as cur:
+        cur.execute(
+            f"""SELECT {cols}SUM(n), SUM(wins), SUM(sum_ret), SUM(sum_sq) FROM attribution_cube
+                WHERE {where} AND horizon = ? {group} HAVING SUM(n) >= ?""",
+            params + [int(horizon), int(min_samples)],
+        )
         rows = cur.fetchall()
-    if not rows or len(rows) < min_samples:
-        return {
-            "win_rate_1d": None,
-            "win_rate_3d": None,
-            "win_rate_5d": None,
-            "avg_return_1d": None,
-            "avg_return_3d": None,
-            "avg_return_5d": None,
-            "max_drawdown_1d": None,
-            "sample_count": len(rows),
-        }
-    r1 = [float(r[0]) for r in rows if r[0] is not None]
-    r3 = [float(r[1]) for r in rows if r[1] is not None]
-    r5 = [float(r[2]) for r in rows if r[2] is not None]
-
-    def win_rate(vals: List[float]) -> Optional[float]:
-        if not vals:
-            return None
-        return sum(1 for x in vals if x > 0) / len(vals) * 100.0
-
-    def avg(vals: List[float]) -> Optional[float]:
-        if not vals:
-            return None
-        return sum(vals) / len(vals)
-
-    def max_dd(vals: List[float]) -> Optional[float]:
-        if not vals:
-            return None
-        peak = vals[0]
-        md = 0.0
-        for x in vals:
-            if x > peak:
-                peak = x
-            dd = peak - x
-            if dd > md:
-                md = dd
-        return md
-
-    return {
-        "win_rate_1d": round(win_rate(r1), 2) if r1 else None,
-        "win_rate_3d": round(win_rate(r3), 2) if r3 else None,
-        "win_rate_5d": round(win_rate(r5), 2) if r5 else None,
-        "avg_return_1d": round(avg(r1), 2) if r1 else None,
-        "avg_return_3d": round(avg(r3), 2) if r3 else None,
-        "avg_return_5d": round(avg(r5), 2) if r5 else None,
-        "max_drawdown_1d": round(max_dd(r1), 2) if r1 else None,
-        "sample_count": len(rows),
-    }
+    result: List[Dict] = []
+    for r in rows:
+        n, wins, total, sq = int(r[-4]), int(r[-3]), float(r[-2]), float(r[-1])
+        mean = total / n
+        item = {d: r[i] for i, d in enumerate(allowed)}
+        item.update({
+            "win_rate": round(wins / n * 100.0, 2),
+            "avg_return": round(mean, 2),
+            "std_return": round(max(0.0, sq / n - mean * mean) ** 0.5, 2),
+            "sample_count": n,
+        })
+        result.append(item)
+    return result
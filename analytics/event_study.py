@@ -0,0 +1,151 @@
+"""
+MNEMOS 2.1 - Vectorized event study: forward returns of signals over trading days.
+The price store is loaded once as a (trading days x symbols) panel of daily close/high/low; each signal's
+bar is found with searchsorted, and returns, max favorable/adverse excursion and benchmark-relative
+returns for any horizons are computed for all signals in one NumPy pass.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from storage.bar_store import load_bars
+from storage.db import cursor, to_epoch
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_SYMBOL = "^NSEI"
+MARKET_TZ = "Asia/Kolkata"
+
+
+@dataclass
+class PricePanel:
+    """Daily bars aligned on one trading-day axis. close is forward-filled; high/low fall back to close."""
+    days: np.ndarray  # datetime64[D], sorted
+    symbols: List[str]
+    close: np.ndarray  # (n_days, n_symbols)
+    high: np.ndarray
+    low: np.ndarray
+
+    def column(self, symbol: str) -> int:
+        return self._index.get(symbol, -1)
+
+    def __post_init__(self) -> None:
+        self._index: Dict[str, int] = {s: i for i, s in enumerate(self.symbols)}
+
+
+def panel_from_bars(df: pd.DataFrame) -> PricePanel:
+    """Bars (symbol, datetime in market-local time, high, low, close) -> daily PricePanel."""
+    if df is None or df.empty:
+        empty = np.empty((0, 0))
+        return PricePanel(np.array([], dtype="datetime64[D]"), [], empty, empty, empty)
+    day = pd.to_datetime(df["datetime"]).dt.normalize()
+    bars = df.assign(day=day).sort_values(["symbol", "datetime"])
+    daily = bars.groupby(["day", "symbol"]).agg(close=("close", "last"), high=("high", "max"), low=("low", "min"))
+    close = daily["close"].unstack("symbol").sort_index()
+    high = daily["high"].unstack("symbol").reindex(index=close.index, columns=close.columns)
+    low = daily["low"].unstack("symbol").reindex(index=close.index, columns=close.columns)
+    high = high.fillna(close)
+    low = low.fillna(close)
+    return PricePanel(
+        days=close.index.values.astype("datetime64[D]"),
+        symbols=[str(c) for c in close.columns],
+        close=close.ffill().to_numpy(dtype=float),
+        high=high.to_numpy(dtype=float),
+        low=low.to_numpy(dtype=float),
+    )
+
+
+def load_price_panel(symbols: Optional[Sequence[str]] = None, since: Optional[str] = None) -> PricePanel:
+    """Load the bar store once as a daily PricePanel."""
+    bars = load_bars(symbols, since)
+    df = bars.rename(columns={"High": "high", "Low": "low", "Close": "close"})[["symbol", "datetime", "high", "low", "close"]]
+    return panel_from_bars(df)
+
+
+def signal_days(created_at: Sequence[str]) -> np.ndarray:
+    """Signal UTC ISO timestamps -> market-local trading dates (datetime64[D])."""
+    ts = pd.to_datetime(pd.Series(list(created_at), dtype="object"), utc=True, errors="coerce")
+    return ts.dt.tz_convert(MARKET_TZ).dt.tz_localize(None).dt.normalize().values.astype("datetime64[D]")
+
+
+def event_returns(
+    panel: PricePanel,
+    symbols: Sequence[str],
+    days: np.ndarray,
+    horizons: Sequence[int] = (1, 3, 5),
+    benchmark: Optional[str] = BENCHMARK_SYMBOL,
+) -> pd.DataFrame:
+    """
+    Per signal (symbol, day): entry = close of the last trading day <= day. For each horizon h (trading days):
+    ret_{h}d, mfe_{h}d / mae_{h}d (best high / worst low within days 1..h vs entry) and excess_{h}d
+    (minus benchmark return over the same days), all in percent. NaN where data is missing.
+    """
+    n = len(symbols)
+    horizons = sorted({int(h) for h in horizons if int(h) > 0})
+    out: Dict[str, np.ndarray] = {}
+    if n == 0 or not horizons:
+        return pd.DataFrame(index=range(n))
+    n_days = len(panel.days)
+    col = np.array([panel.column(s) for s in symbols], dtype=int)
+    row = np.searchsorted(panel.days, np.asarray(days, dtype="datetime64[D]"), side="right") - 1
+    valid = (col >= 0) & (row >= 0)
+    col_c, row_c = np.where(valid, col, 0), np.where(valid, row, 0)
+    if n_days == 0:
+        nan = np.full(n, np.nan)
+        return pd.DataFrame({f"{k}_{h}d": nan for h in horizons for k in ("ret", "mfe", "mae", "excess")})
+    entry = np.where(valid, panel.close[row_c, col_c], np.nan)
+    entry = np.where(entry > 0, entry, np.nan)
+
+    max_h = horizons[-1]
+    steps = np.arange(1, max_h + 1)
+    idx = row_c[:, None] + steps[None, :]  # (n, max_h)
+    inside = idx < n_days
+    idx_c = np.minimum(idx, n_days - 1)
+    cols = col_c[:, None]
+    fwd_close = np.where(inside, panel.close[idx_c, cols], np.nan)
+    run_high = np.fmax.accumulate(np.where(inside, panel.high[idx_c, cols], np.nan), axis=1)
+    run_low = np.fmin.accumulate(np.where(inside, panel.low[idx_c, cols], np.nan), axis=1)
+
+    b = panel.column(benchmark) if benchmark else -1
+    if b >= 0:
+        b_entry = panel.close[row_c, b]
+        b_fwd = np.where(inside, panel.close[idx_c, b], np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for h in horizons:
+            ret = (fwd_close[:, h - 1] / entry - 1.0) * 100.0
+            out[f"ret_{h}d"] = ret
+            out[f"mfe_{h}d"] = (run_high[:, h - 1] / entry - 1.0) * 100.0
+            out[f"mae_{h}d"] = (run_low[:, h - 1] / entry - 1.0) * 100.0
+            if b >= 0:
+                b_ret = (b_fwd[:, h - 1] / np.where(b_entry > 0, b_entry, np.nan) - 1.0) * 100.0
+                out[f"excess_{h}d"] = np.where(valid, ret - b_ret, np.nan)
+            else:
+                out[f"excess_{h}d"] = np.full(n, np.nan)
+    return pd.DataFrame(out)
+
+
+def run_event_study(
+    since_dt: str,
+    horizons: Sequence[int] = (1, 3, 5),
+    benchmark: Optional[str] = BENCHMARK_SYMBOL,
+    panel: Optional[PricePanel] = None,
+) -> pd.DataFrame:
+    """Signals since since_dt joined with their event-study forward returns (one vectorized pass)."""
+    with cursor() as cur:
+        cur.execute(
+            "SELECT id, symbol, created_at, COALESCE(signal_type, '') FROM signals WHERE created_epoch >= ? ORDER BY id",
+            (to_epoch(since_dt),),
+        )
+        rows = cur.fetchall()
+    sig = pd.DataFrame([tuple(r) for r in rows], columns=["signal_id", "symbol", "created_at", "signal_type"])
+    if sig.empty:
+        return sig
+    if panel is None:
+        syms = sorted(set(sig["symbol"]) | ({benchmark} if benchmark else set()))
+        lead_in = (pd.Timestamp(since_dt[:10]) - pd.Timedelta(days=10)).strftime("%Y-%m-%d")
+        panel = load_price_panel(syms, since=lead_in)
+    res = event_returns(panel, sig["symbol"].tolist(), signal_days(sig["created_at"]), horizons, benchmark)
+    return pd.concat([sig.reset_index(drop=True), res], axis=1)
@@ -0,0 +1,142 @@
+"""
+MNEMOS 2.1 - Intraday outcome tracking: +30m, +1h and +close returns of each signal from the stored 5m bars.
+Computed in bulk with as-of joins (last completed bar at or before each time; no lookahead) and kept in
+the compact intraday_outcomes table (one row per signal). Targets past the session close use the close.
+"""
+import logging
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config.settings import BAR_INTERVAL_MIN
+from engine.trading_calendar import session_for
+from storage.db import cursor, to_epoch, upsert_intraday_outcomes
+
+logger = logging.getLogger(__name__)
+
+MARKET_TZ = "Asia/Kolkata"
+INTRADAY_HORIZONS: Dict[str, Optional[int]] = {"30m": 30, "1h": 60, "close": None}  # minutes; None = close
+TRACK_DAYS = 3
+
+
+def _session_close(day: date) -> pd.Timestamp:
+    sess = session_for(day)
+    close = sess[1].replace(tzinfo=None) if sess else pd.Timestamp(day) + pd.Timedelta(hours=15, minutes=30)
+    return pd.Timestamp(close)
+
+
+def compute_intraday_returns(signals: pd.DataFrame, bars: pd.DataFrame) -> pd.DataFrame:
+    """
+    signals: signal_id, symbol, ts (market-local naive). bars: symbol, datetime (bar start, market-local), close.
+    Returns signal_id, price_at_signal, ret_30m, ret_1h, ret_close (percent; NaN until the horizon has passed
+    in the data or the session is over).
+    """
+    cols = ["signal_id", "price_at_signal"] + [f"ret_{k}" for k in INTRADAY_HORIZONS]
+    if signals.empty or bars.empty:
+        return pd.DataFrame(columns=cols)
+    b = bars[["symbol", "datetime", "close"]].dropna().copy()
+    b["end"] = pd.to_datetime(b["datetime"]) + pd.Timedelta(minutes=BAR_INTERVAL_MIN)
+    b["day"] = b["end"].dt.normalize()
+    b = b.sort_values("end")
+    last_end = b.groupby("symbol")["end"].max()
+
+    s = signals[["signal_id", "symbol", "ts"]].copy()
+    s["ts"] = pd.to_datetime(s["ts"])
+    s["day"] = s["ts"].dt.normalize()
+    closes = {d: _session_close(d.date()) for d in s["day"].unique()}
+    s["session_close"] = s["day"].map(closes)
+
+    def asof(at: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+        """(close, bar day) of the last completed bar ending at or before at, per signal."""
+        left = s[["symbol"]].assign(at=at.values, _i=np.arange(len(s))).sort_values("at")
+        m = pd.merge_asof(left, b[["symbol", "end", "close", "day"]], left_on="at", right_on="end",
+                          by="symbol", direction="backward")
+        m = m.sort_values("_i")
+        return m["close"].to_numpy(dtype=float), m["day"].to_numpy()
+
+    entry, entry_day = asof(s["ts"])
+    same_day = entry_day == s["day"].to_numpy()
+    entry = np.where(same_day & (s["ts"] <= s["session_close"]).to_numpy() & (entry > 0), entry, np.nan)
+    out = pd.DataFrame({"signal_id": s["signal_id"].to_numpy(), "price_at_signal": entry})
+    data_until = s["symbol"].map(last_end)
+    for key, minutes in INTRADAY_HORIZONS.items():
+        target = s["session_close"] if minutes is None else (s["ts"] + pd.Timedelta(minutes=minutes)).clip(
+            upper=s["session_close"]
+        )
+        px, _ = asof(target)
+        final = (data_until >= target).to_numpy()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[f"ret_{key}"] = np.where(final, (px / entry - 1.0) * 100.0, np.nan)
+    return out[cols]
+
+
+def update_intraday_outcomes(days: int = TRACK_DAYS) -> int:
+    """Compute intraday returns for recent signals that are not final yet; upsert them. Returns rows written."""
+    since = to_epoch(datetime.utcnow() - pd.Timedelta(days=days))
+    try:
+        with cursor() as cur:
+            cur.execute(
+                """SELECT s.id, s.symbol, s.created_at FROM signals s
+                   LEFT JOIN intraday_outcomes io ON io.signal_id = s.id
+                   WHERE s.created_epoch >= ? AND (io.signal_id IS NULL OR io.ret_close IS NULL)""",
+                (since,),
+            )
+            rows = cur.fetchall()
+            if not rows:
+                return 0
+            sig = pd.DataFrame([tuple(r) for r in rows], columns=["signal_id", "symbol", "created_at"])
+            sig["ts"] = (
+                pd.to_datetime(sig["created_at"], utc=True, errors="coerce")
+                .dt.tz_convert(MARKET_TZ).dt.tz_localize(None)
+            )
+            sig = sig[sig["ts"].notna()]
+            if sig.empty:
+                return 0
+            syms = sorted(sig["symbol"].unique())
+            cur.execute(
+                f"""SELECT symbol, dt, close FROM prices
+                    WHERE symbol IN ({','.join('?' * len(syms))}) AND dt_epoch >= ? AND close IS NOT NULL""",
+                syms + [to_epoch(sig["ts"].min().strftime("%Y-%m-%d"), market_local=True)],
+            )
+            bars = pd.DataFrame([tuple(r) for r in cur.fetchall()], columns=["symbol", "datetime", "close"])
+        if bars.empty:
+            return 0
+        bars["datetime"] = pd.to_datetime(bars["datetime"].str[:19], errors="coerce")
+        res = compute_intraday_returns(sig, bars.dropna(subset=["datetime"]))
+        res = res.merge(sig[["signal_id", "symbol", "created_at"]], on="signal_id")
+        res = res[res["price_at_signal"].notna()]
+        if res.empty:
+            return 0
+        records: List[Tuple] = [
+            (int(r.signal_id), r.symbol, r.created_at, float(r.price_at_signal),
+             *(None if pd.isna(v) else float(v) for v in (r.ret_30m, r.ret_1h, r.ret_close)))
+            for r in res.itertuples(index=False)
+        ]
+        with cursor() as cur:
+            upsert_intraday_outcomes(cur, records)
+        return len(records)
+    except Exception as e:
+        logger.warning("Intraday outcome update failed: %s", e)
+        return 0
+
+
+def get_intraday_stats(symbol: Optional[str] = None, min_samples: int = 5) -> Dict:
+    """win_rate_* / avg_return_* for 30m, 1h, close (SQL aggregates over intraday_outcomes)."""
+    parts = []
+    for key in INTRADAY_HORIZONS:
+        c = f"ret_{key}"
+        parts.append(f"COUNT({c}), SUM(CASE WHEN {c} > 0 THEN 1 ELSE 0 END), AVG({c})")
+    where, params = ("WHERE symbol = ?", [symbol[:32]]) if symbol else ("", [])
+    with cursor() as cur:
+        cur.execute(f"SELECT {', '.join(parts)} FROM intraday_outcomes {where}", params)
+        row = cur.fetchone()
+    out: Dict = {}
+    for i, key in enumerate(INTRADAY_HORIZONS):
+        n, wins, avg = row[3 * i], row[3 * i + 1], row[3 * i + 2]
+        ok = bool(n) and n >= max(1, min_samples)
+        out[f"win_rate_{key}"] = round(wins / n * 100.0, 2) if ok else None
+        out[f"avg_return_{key}"] = round(avg, 2) if ok else None
+        out[f"sample_count_{key}"] = int(n or 0)
+    return out
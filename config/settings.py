@@ -17,6 +17,9 @@ load_dotenv(_ROOT / ".env")
 DATA_DIR = Path(os.getenv("MNEMOS_DATA_DIR", str(_ROOT / "data")))
 DB_PATH = DATA_DIR / "mnemos.db"
 BACKUP_DIR = Path(os.getenv("MNEMOS_BACKUP_DIR", str(DATA_DIR / "backups")))
+BACKTEST_CACHE_DIR = Path(os.getenv("MNEMOS_BACKTEST_CACHE_DIR", str(DATA_DIR / "backtest_cache")))
+CONFIDENCE_ARCHIVE_DIR = Path(os.getenv("MNEMOS_CONFIDENCE_ARCHIVE_DIR", str(DATA_DIR / "confidence_archive")))
+BAR_STORE_DIR = Path(os.getenv("MNEMOS_BAR_STORE_DIR", str(DATA_DIR / "bars")))
 LOG_DIR = Path(os.getenv("MNEMOS_LOG_DIR", str(_ROOT / "logs")))
 REPORTS_DIR = Path(os.getenv("MNEMOS_REPORTS_DIR", str(_ROOT / "reports")))
 
@@ -110,30 +113,79 @@ ALERT_EMAIL_TO = os.getenv("ALERT_EMAIL_TO", GMAIL_USER or "")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
 GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
 GROQ_MAX_DAILY_CALLS = max(1, int(os.getenv("GROQ_MAX_DAILY_CALLS", "100")))
+# Endpoint override (e.g. a local stand-in server for tests)
+GROQ_API_URL = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
+# Response cache (normalized prompt hash -> text, SQLite) and batched follow-up notes
+GROQ_CACHE_TTL_HOURS = max(0, int(os.getenv("GROQ_CACHE_TTL_HOURS", "12")))
+GROQ_BATCH_SIZE = max(1, int(os.getenv("GROQ_BATCH_SIZE", "5")))
+GROQ_BATCH_WAIT_SEC = max(0.0, float(os.getenv("GROQ_BATCH_WAIT_SEC", "3")))
+# Send alerts immediately; the AI note follows (Telegram follow-up / email digest) when ready
+GROQ_ASYNC_NOTES = os.getenv("GROQ_ASYNC_NOTES", "1").strip().lower() in ("1", "true", "yes")
 
 # ----- Rate limiting -----
 TELEGRAM_MIN_INTERVAL_SEC = max(1, int(os.getenv("TELEGRAM_MIN_INTERVAL_SEC", "60")))
+# Buffer friction alerts and pack them into one message per send window instead of dropping them
+TELEGRAM_COALESCE_ENABLED = os.getenv("TELEGRAM_COALESCE_ENABLED", "1").strip().lower() in ("1", "true", "yes")
 EMAIL_MIN_INTERVAL_SEC = max(60, int(os.getenv("EMAIL_MIN_INTERVAL_SEC", "300")))
+# Token buckets: "sqlite" (shared by all instances on one DB, survives restarts) or "memory" (this process only)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "sqlite").strip().lower()
+# Batch friction alerts within EMAIL_MIN_INTERVAL_SEC into one digest email instead of dropping them
+EMAIL_DIGEST_ENABLED = os.getenv("EMAIL_DIGEST_ENABLED", "1").strip().lower() in ("1", "true", "yes")
 MAX_ALERTS_PER_SYMBOL_PER_HOUR = max(1, int(os.getenv("MAX_ALERTS_PER_SYMBOL_PER_HOUR", "3")))
 
+# ----- Alert outbox (tick enqueues; background workers deliver with retry/backoff) -----
+ALERT_OUTBOX_ENABLED = os.getenv("ALERT_OUTBOX_ENABLED", "1").strip().lower() in ("1", "true", "yes")
+ALERT_OUTBOX_WORKERS = max(1, int(os.getenv("ALERT_OUTBOX_WORKERS", "1")))
+ALERT_MAX_ATTEMPTS = max(1, int(os.getenv("ALERT_MAX_ATTEMPTS", "6")))
+ALERT_RETRY_BASE_SEC = max(1, int(os.getenv("ALERT_RETRY_BASE_SEC", "30")))
+ALERT_RETRY_MAX_SEC = max(60, int(os.getenv("ALERT_RETRY_MAX_SEC", "1800")))
+
+# ----- Alert priority (severity + confidence + aging) for outbox and channel buffers -----
+ALERT_PRIORITY_CONFIDENCE_WEIGHT = float(os.getenv("ALERT_PRIORITY_CONFIDENCE_WEIGHT", "2.0"))
+ALERT_PRIORITY_AGING_PER_MIN = float(os.getenv("ALERT_PRIORITY_AGING_PER_MIN", "0.05"))
+ALERT_PRIORITY_AGING_CAP_MIN = max(0, int(os.getenv("ALERT_PRIORITY_AGING_CAP_MIN", "60")))
+ALERT_EXPIRY_MIN = max(5, int(os.getenv("ALERT_EXPIRY_MIN", "240")))
+
 # ----- Signal de-dup -----
 SIGNAL_COOLDOWN_MINUTES = max(0, int(os.getenv("SIGNAL_COOLDOWN_MINUTES", "60")))
 ALERT_COOLDOWN_SYMBOL_MINUTES = max(0, int(os.getenv("ALERT_COOLDOWN_SYMBOL_MINUTES", "120")))
+ALERT_LOCK_CACHE_CHECK_SEC = max(0, int(os.getenv("ALERT_LOCK_CACHE_CHECK_SEC", "10")))
+
+# ----- Signal storage: all (every result each tick), nonzero (score > 0 only), transitions (per symbol: a signal
+# appearing, changing type or escalating severity). Zero-score ticks are always counted in tick_stats. -----
+SIGNAL_STORAGE_MODE = os.getenv("SIGNAL_STORAGE_MODE", "nonzero").strip().lower()
+if SIGNAL_STORAGE_MODE not in ("all", "nonzero", "transitions"):
+    SIGNAL_STORAGE_MODE = "nonzero"
 
 # ----- Polling -----
 POLL_INTERVAL_MARKET_MIN = max(1, int(os.getenv("POLL_INTERVAL_MARKET_MIN", "2")))
 POLL_INTERVAL_OFF_MIN = max(5, int(os.getenv("POLL_INTERVAL_OFF_MIN", "30")))
 
+# ----- Async runtime (main.py --async) -----
+ASYNC_HTTP_CONCURRENCY = max(1, int(os.getenv("ASYNC_HTTP_CONCURRENCY", "32")))
+
 # ----- Market hours (IST) -----
 MARKET_OPEN_HOUR = 9
 MARKET_OPEN_MIN = 15
 MARKET_CLOSE_HOUR = 15
 MARKET_CLOSE_MIN = 30
+# Market-local time (naive prices.dt) offset from UTC; IST has no DST
+MARKET_UTC_OFFSET_MIN = 330
+# Holidays + special sessions (Muhurat etc.); JSON, update yearly from NSE circular
+NSE_CALENDAR_PATH = Path(os.getenv("MNEMOS_NSE_CALENDAR", str(_ROOT / "config" / "nse_calendar.json")))
+# Align market-hours ticks to bar closes: tick at each BAR_INTERVAL_MIN boundary + BAR_CLOSE_DELAY_SEC
+ALIGN_TICKS_TO_BARS = os.getenv("ALIGN_TICKS_TO_BARS", "1").strip().lower() in ("1", "true", "yes")
+BAR_INTERVAL_MIN = max(1, int(os.getenv("BAR_INTERVAL_MIN", "5")))
+BAR_CLOSE_DELAY_SEC = max(0, int(os.getenv("BAR_CLOSE_DELAY_SEC", "20")))
 
 # ----- Friction & confidence -----
 FRICTION_ALERT_THRESHOLD = float(os.getenv("FRICTION_ALERT_THRESHOLD", "0.65"))
 CONFIDENCE_ALERT_THRESHOLD = float(os.getenv("CONFIDENCE_ALERT_THRESHOLD", "0.60"))
 CONFIDENCE_MIN_SAMPLES_FOR_WINRATE = max(5, int(os.getenv("CONFIDENCE_MIN_SAMPLES_FOR_WINRATE", "20")))
+# confidence_history tiers: tick rows for N days, then hourly rollups, folded to daily after M days
+CONFIDENCE_RAW_DAYS = max(1, int(os.getenv("CONFIDENCE_RAW_DAYS", "7")))
+CONFIDENCE_HOURLY_DAYS = max(CONFIDENCE_RAW_DAYS, int(os.getenv("CONFIDENCE_HOURLY_DAYS", "90")))
+CONFIDENCE_ARCHIVE_ENABLED = os.getenv("CONFIDENCE_ARCHIVE_ENABLED", "0").strip().lower() in ("1", "true", "yes")
 
 # ----- Risk governance -----
 MIN_LIQUIDITY_VOLUME = float(os.getenv("MIN_LIQUIDITY_VOLUME", "100000"))
@@ -147,8 +199,41 @@ WATCHDOG_MAX_MEMORY_MB = float(os.getenv("WATCHDOG_MAX_MEMORY_MB", "2048"))
 WATCHDOG_MAX_RESTARTS_PER_HOUR = max(1, int(os.getenv("WATCHDOG_MAX_RESTARTS_PER_HOUR", "5")))
 SUPERVISOR_RESTART_DELAY_SEC = max(5, int(os.getenv("SUPERVISOR_RESTART_DELAY_SEC", "30")))
 
-# ----- Drive backup -----
+# ----- Warm restart (checkpoint of in-memory state: bar cache, rate limits, heartbeat) -----
+CHECKPOINT_INTERVAL_TICKS = max(1, int(os.getenv("CHECKPOINT_INTERVAL_TICKS", "5")))
+CHECKPOINT_MAX_AGE_HOURS = max(1, int(os.getenv("CHECKPOINT_MAX_AGE_HOURS", "24")))
+# Daily bars: full history on cold start, then only the last N days per tick (merged into cache)
+DAILY_HISTORY_DAYS = max(10, int(os.getenv("DAILY_HISTORY_DAYS", "30")))
+DAILY_REFRESH_DAYS = max(1, int(os.getenv("DAILY_REFRESH_DAYS", "5")))
+
+# ----- Bar store (columnar OHLCV for analytical reads; SQLite keeps the hot window) -----
+# Bars older than N days live only in the columnar bar store (0 = keep all bars in SQLite too).
+# Must cover the outcome backfill window (30 days) plus the longest outcome horizon.
+PRICES_HOT_DAYS = max(0, int(os.getenv("PRICES_HOT_DAYS", "45")))
+# Retention (daily compaction): intraday bars older than N days become daily bars; heartbeats and per-tick
+# stats older than M days become hourly counts per status / hourly sums (0 = keep forever)
+BAR_INTRADAY_DAYS = max(0, int(os.getenv("BAR_INTRADAY_DAYS", "365")))
+HEARTBEAT_RAW_DAYS = max(0, int(os.getenv("HEARTBEAT_RAW_DAYS", "14")))
+TICK_STATS_RAW_DAYS = max(0, int(os.getenv("TICK_STATS_RAW_DAYS", "14")))
+# Existing DBs switch to incremental auto-vacuum with one full VACUUM after a daily compaction, only if the
+# file is at most N MB (0 = never automatically; run storage.compaction.enable_incremental_vacuum(force=True))
+AUTO_VACUUM_CONVERT_MAX_MB = max(0, int(os.getenv("AUTO_VACUUM_CONVERT_MAX_MB", "512")))
+
+# ----- Backups (online snapshots, deduplicated chunks; local + Drive) -----
 DRIVE_BACKUP_FOLDER_NAME = os.getenv("DRIVE_BACKUP_FOLDER_NAME", "mnemos_backups")
+# DB pages copied per backup step; the collector can write between steps
+BACKUP_PAGES_PER_STEP = max(1, int(os.getenv("BACKUP_PAGES_PER_STEP", "256")))
+# Keep the last N snapshots, plus the newest per day for D days and per week for W weeks
+BACKUP_KEEP_LAST = max(1, int(os.getenv("BACKUP_KEEP_LAST", "24")))
+BACKUP_KEEP_DAILY = max(0, int(os.getenv("BACKUP_KEEP_DAILY", "7")))
+BACKUP_KEEP_WEEKLY = max(0, int(os.getenv("BACKUP_KEEP_WEEKLY", "8")))
+
+# ----- Replay backtester (offline; process pool over symbol shards, 0 = one per CPU) -----
+REPLAY_WORKERS = max(0, int(os.getenv("REPLAY_WORKERS", "0")))
+# Backtest exports stream signals in chunks of this many rows (bounds memory regardless of date range)
+BACKTEST_CHUNK_ROWS = max(100, int(os.getenv("BACKTEST_CHUNK_ROWS", "5000")))
+# Cached backtest / replay results kept per scope; older entries and their .npz files are evicted
+BACKTEST_CACHE_MAX_ENTRIES = max(1, int(os.getenv("BACKTEST_CACHE_MAX_ENTRIES", "50")))
 
 # ----- Reporting -----
 WEEKLY_REPORT_DAY = int(os.getenv("WEEKLY_REPORT_DAY", "0"))  # 0=Monday
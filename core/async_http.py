@@ -0,0 +1,104 @@
+"""
+MNEMOS 2.1 - Async HTTP for the asyncio runtime (Yahoo, RSS, Telegram, GROQ).
+Uses aiohttp when installed (one shared session, bounded concurrency); otherwise runs urllib in threads.
+Every call has its own timeout and is cancellable.
+"""
+import asyncio
+import functools
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from config.settings import ASYNC_HTTP_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+_session: Any = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(ASYNC_HTTP_CONCURRENCY)
+    return _semaphore
+
+
+async def _get_session() -> Any:
+    """Shared aiohttp ClientSession, or None if aiohttp is not installed."""
+    global _session
+    if _session is not None and not _session.closed:
+        return _session
+    try:
+        import aiohttp
+    except ImportError:
+        return None
+    _session = aiohttp.ClientSession()
+    return _session
+
+
+async def close_session() -> None:
+    """Close the shared session (call on shutdown)."""
+    global _session, _semaphore
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+    _semaphore = None
+
+
+def _urllib_request(
+    method: str,
+    url: str,
+    data: Optional[bytes],
+    headers: Dict[str, str],
+    timeout: float,
+) -> Tuple[int, bytes]:
+    import urllib.error
+    import urllib.request
+    req = urllib.request.Request(url, data=data, method=method, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as r:
+            return r.status, r.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read() or b""
+
+
+async def http_request(
+    method: str,
+    url: str,
+    data: Optional[bytes] = None,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 15,
+) -> Tuple[int, bytes]:
+    """(status, body) for one request. Raises asyncio.TimeoutError after timeout seconds."""
+    headers = headers or {}
+    async with _get_semaphore():
+        session = await _get_session()
+        if session is None:
+            return await asyncio.wait_for(
+                run_blocking(_urllib_request, method, url, data, headers, timeout),
+                timeout=timeout,
+            )
+
+        async def _do() -> Tuple[int, bytes]:
+            async with session.request(method, url, data=data, headers=headers) as r:
+                return r.status, await r.read()
+
+        return await asyncio.wait_for(_do(), timeout=timeout)
+
+
+async def http_get(url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 15) -> Tuple[int, bytes]:
+    return await http_request("GET", url, headers=headers, timeout=timeout)
+
+
+async def http_post(
+    url: str,
+    data: bytes,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 15,
+) -> Tuple[int, bytes]:
+    return await http_request("POST", url, data=data, headers=headers, timeout=timeout)
+
+
+async def run_blocking(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run blocking work (pandas, SQLite, smtplib) in the default executor (asyncio.to_thread needs 3.9)."""
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(fn, *args, **kwargs))
@@ -67,3 +67,81 @@ def fetch_daily_for_features(
 ) -> pd.DataFrame:
     """Daily OHLCV for feature engineering (volatility, volume ratio, etc.)."""
     return fetch_ohlcv(symbols, period=f"{days}d", interval="1d")
+
+
+# ----- Async (asyncio runtime): Yahoo chart API, one request per symbol, run concurrently -----
+YAHOO_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?range={period}&interval={interval}"
+_YAHOO_HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; Mnemos/2.0)"}
+
+
+def _chart_json_to_frame(symbol: str, payload: dict, interval: str) -> pd.DataFrame:
+    """Yahoo chart JSON -> same columns as fetch_ohlcv (auto-adjusted for daily bars)."""
+    result = ((payload.get("chart") or {}).get("result") or [None])[0]
+    if not result or not result.get("timestamp"):
+        return pd.DataFrame()
+    quote = (result.get("indicators", {}).get("quote") or [{}])[0]
+    df = pd.DataFrame({
+        "Open": quote.get("open"),
+        "High": quote.get("high"),
+        "Low": quote.get("low"),
+        "Close": quote.get("close"),
+        "Volume": quote.get("volume"),
+    })
+    adj = (result.get("indicators", {}).get("adjclose") or [{}])[0].get("adjclose")
+    if adj is not None:
+        ratio = pd.Series(adj, dtype=float) / df["Close"].astype(float)
+        for col in ("Open", "High", "Low", "Close"):
+            df[col] = df[col].astype(float) * ratio
+    tz = (result.get("meta") or {}).get("exchangeTimezoneName") or "Asia/Kolkata"
+    ts = pd.to_datetime(result["timestamp"], unit="s", utc=True).tz_convert(tz).tz_localize(None)
+    if interval == "1d":
+        ts = ts.normalize()
+    df["Date"] = ts
+    df["datetime"] = ts
+    df["symbol"] = symbol
+    return df.dropna(subset=["Close"]).reset_index(drop=True)
+
+
+async def _fetch_chart_async(symbol: str, period: str, interval: str) -> pd.DataFrame:
+    import json
+    from urllib.parse import quote
+    from core.async_http import http_get
+    url = YAHOO_CHART_URL.format(symbol=quote(symbol), period=period, interval=interval)
+    try:
+        status, raw = await http_get(url, headers=_YAHOO_HEADERS, timeout=20)
+        if status != 200:
+            logger.warning("Fetch failed for %s: HTTP %s", symbol, status)
+            return pd.DataFrame()
+        return _chart_json_to_frame(symbol, json.loads(raw.decode()), interval)
+    except Exception as e:
+        logger.warning("Fetch failed for %s: %s", symbol, e)
+        return pd.DataFrame()
+
+
+async def fetch_ohlcv_async(
+    symbols: List[str],
+    period: str = "1d",
+    interval: str = "5m",
+) -> pd.DataFrame:
+    """
+    Async fetch_ohlcv: all symbols concurrently. If the chart API yields nothing,
+    falls back to yfinance in a worker thread.
+    """
+    import asyncio
+    if not symbols:
+        return pd.DataFrame()
+    frames = await asyncio.gather(*(_fetch_chart_async(s, period, interval) for s in symbols))
+    frames = [f for f in frames if f is not None and not f.empty]
+    if frames:
+        return pd.concat(frames, ignore_index=True)
+    logger.warning("Async chart fetch empty; falling back to yfinance")
+    from core.async_http import run_blocking
+    return await run_blocking(fetch_ohlcv, symbols, period, interval)
+
+
+async def fetch_latest_bars_async(symbols: List[str], interval_min: int = 5) -> pd.DataFrame:
+    return await fetch_ohlcv_async(symbols, period="1d", interval="5m")
+
+
+async def fetch_daily_for_features_async(symbols: List[str], days: int = 30) -> pd.DataFrame:
+    return await fetch_ohlcv_async(symbols, period=f"{days}d", interval="1d")
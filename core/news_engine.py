@@ -17,12 +17,12 @@ logger = logging.getLogger(__name__)
 GOOGLE_NEWS_INDIA = "https://news.google.com/rss?hl=en-IN&gl=IN&ceid=IN:en"
 # Search RSS (query in q param)
 GOOGLE_NEWS_SEARCH_TMPL = "https://news.google.com/rss/search?hl=en-IN&gl=IN&ceid=IN:en&q={query}"
+_RSS_HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; Mnemos/2.0)"}
 
 
 def _fetch_rss(url: str, timeout: int = 15) -> Optional[feedparser.FeedParserDict]:
     try:
-        headers = {"User-Agent": "Mozilla/5.0 (compatible; Mnemos/2.0)"}
-        r = requests.get(url, headers=headers, timeout=timeout)
+        r = requests.get(url, headers=_RSS_HEADERS, timeout=timeout)
         r.raise_for_status()
         return feedparser.parse(r.content)
     except Exception as e:
@@ -30,12 +30,21 @@ def _fetch_rss(url: str, timeout: int = 15) -> Optional[feedparser.FeedParserDic
         return None
 
 
-def get_top_headlines_india(max_items: int = 5) -> List[dict]:
-    """
-    Top India business/market headlines from Google News India.
-    Returns list of {title, link, published, summary}.
-    """
-    feed = _fetch_rss(GOOGLE_NEWS_INDIA)
+async def _fetch_rss_async(url: str, timeout: int = 15) -> Optional[feedparser.FeedParserDict]:
+    """Async _fetch_rss (parsing runs in a worker thread)."""
+    try:
+        from core.async_http import http_get, run_blocking
+        status, content = await http_get(url, headers=_RSS_HEADERS, timeout=timeout)
+        if status >= 400:
+            raise RuntimeError(f"HTTP {status}")
+        return await run_blocking(feedparser.parse, content)
+    except Exception as e:
+        logger.warning("RSS fetch failed for %s: %s", url[:60], e)
+        return None
+
+
+def _feed_to_headlines(feed: Optional[feedparser.FeedParserDict], max_items: int) -> List[dict]:
+    """Feed entries -> list of {title, link, published, summary}."""
     if not feed or not feed.entries:
         return []
     out: List[dict] = []
@@ -51,22 +60,25 @@ def get_top_headlines_india(max_items: int = 5) -> List[dict]:
     return out
 
 
+def get_top_headlines_india(max_items: int = 5) -> List[dict]:
+    """
+    Top India business/market headlines from Google News India.
+    Returns list of {title, link, published, summary}.
+    """
+    return _feed_to_headlines(_fetch_rss(GOOGLE_NEWS_INDIA), max_items)
+
+
 def get_headlines_for_query(query: str, max_items: int = 5) -> List[dict]:
     """Headlines for a search query (e.g. company name or symbol)."""
     url = GOOGLE_NEWS_SEARCH_TMPL.format(query=quote_plus(query))
-    feed = _fetch_rss(url)
-    if not feed or not feed.entries:
-        return []
-    out: List[dict] = []
-    for e in feed.entries[:max_items]:
-        title = (e.get("title") or "").strip()
-        link = e.get("link") or ""
-        published = e.get("published") or ""
-        summary = (e.get("summary") or "")[:200].strip()
-        summary = re.sub(r"<[^>]+>", "", summary)
-        if title:
-            out.append({"title": title, "link": link, "published": published, "summary": summary})
-    return out
+    return _feed_to_headlines(_fetch_rss(url), max_items)
+
+
+def _symbol_query(symbol: str) -> Optional[str]:
+    base = symbol.replace(".NS", "").replace(".BO", "").strip()
+    if not base:
+        return None
+    return f"{base} India stock market"
 
 
 def get_headlines_for_symbol(symbol: str, max_items: int = 5) -> List[dict]:
@@ -74,8 +86,16 @@ def get_headlines_for_symbol(symbol: str, max_items: int = 5) -> List[dict]:
     Headlines for a ticker. Strips .NS and uses company name hint.
     For NSE symbols we search the base name (e.g. RELIANCE -> "Reliance India stock").
     """
-    base = symbol.replace(".NS", "").replace(".BO", "").strip()
-    if not base:
+    query = _symbol_query(symbol)
+    if not query:
         return []
-    query = f"{base} India stock market"
     return get_headlines_for_query(query, max_items=max_items)
+
+
+async def get_headlines_for_symbol_async(symbol: str, max_items: int = 5) -> List[dict]:
+    """Async get_headlines_for_symbol."""
+    query = _symbol_query(symbol)
+    if not query:
+        return []
+    url = GOOGLE_NEWS_SEARCH_TMPL.format(query=quote_plus(query))
+    return _feed_to_headlines(await _fetch_rss_async(url), max_items)
@@ -0,0 +1,97 @@
+"""
+MNEMOS 2.1 - Token-bucket rate limiter shared by every outbound channel (Telegram, email, GROQ).
+Buckets live in SQLite (rate_buckets) and are refilled and taken in one atomic UPDATE, so several
+MNEMOS instances on the same DB share provider limits and limits survive restarts.
+RATE_LIMIT_BACKEND=memory keeps buckets in this process only (checkpointed with engine state).
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, List
+
+from config.settings import RATE_LIMIT_BACKEND
+
+logger = logging.getLogger(__name__)
+
+_mem: Dict[str, List[float]] = {}  # name -> [tokens, updated_at]
+_mem_lock = threading.Lock()
+
+
+def get_state() -> Dict[str, Any]:
+    """In-memory buckets for warm-restart checkpoints (SQLite buckets persist on their own)."""
+    with _mem_lock:
+        return {"buckets": {k: list(v) for k, v in _mem.items()}}
+
+
+def load_state(state: Dict[str, Any]) -> None:
+    """Restore in-memory buckets from a checkpoint."""
+    with _mem_lock:
+        _mem.clear()
+        _mem.update({k: list(v) for k, v in (state.get("buckets") or {}).items()})
+
+
+def _mem_refill(name: str, capacity: float, per_sec: float, now: float) -> List[float]:
+    b = _mem.setdefault(name, [float(capacity), now])
+    b[0] = min(capacity, b[0] + max(0.0, now - b[1]) * per_sec)
+    b[1] = now
+    return b
+
+
+def _mem_take(name: str, capacity: float, per_sec: float, cost: float, now: float, force: bool) -> bool:
+    with _mem_lock:
+        b = _mem_refill(name, capacity, per_sec, now)
+        if force:
+            b[0] = max(0.0, b[0] - cost)
+            return True
+        if b[0] < cost:
+            return False
+        b[0] -= cost
+        return True
+
+
+def _take(name: str, capacity: float, per_sec: float, cost: float, force: bool) -> bool:
+    if capacity <= 0:
+        return False
+    now = time.time()
+    if RATE_LIMIT_BACKEND != "memory":
+        try:
+            from storage.db import cursor, take_rate_tokens
+            with cursor() as cur:
+                return take_rate_tokens(cur, name, capacity, per_sec, cost, now, force=force)
+        except Exception as e:
+            logger.warning("Rate limiter (sqlite) failed for %s, using in-memory bucket: %s", name, e)
+    return _mem_take(name, capacity, per_sec, cost, now, force)
+
+
+def acquire(name: str, capacity: float, per_sec: float, cost: float = 1.0) -> bool:
+    """Take cost tokens from bucket name (capacity, refill per_sec). False if not enough tokens."""
+    return _take(name, capacity, per_sec, cost, force=False)
+
+
+def consume(name: str, capacity: float, per_sec: float, cost: float = 1.0) -> None:
+    """Record usage that already happened (bucket may drain to 0)."""
+    _take(name, capacity, per_sec, cost, force=True)
+
+
+def available(name: str, capacity: float, per_sec: float) -> float:
+    """Tokens currently available in bucket name, without taking any."""
+    now = time.time()
+    if RATE_LIMIT_BACKEND != "memory":
+        try:
+            from storage.db import cursor, peek_rate_tokens
+            with cursor() as cur:
+                return peek_rate_tokens(cur, name, capacity, per_sec, now)
+        except Exception as e:
+            logger.warning("Rate limiter (sqlite) failed for %s, using in-memory bucket: %s", name, e)
+    with _mem_lock:
+        return _mem_refill(name, capacity, per_sec, now)[0]
+
+
+def interval_bucket(min_interval_sec: float) -> tuple:
+    """(capacity, per_sec) for 'at most one every min_interval_sec'."""
+    return 1.0, 1.0 / max(1e-9, float(min_interval_sec))
+
+
+def window_bucket(max_count: float, window_sec: float) -> tuple:
+    """(capacity, per_sec) for 'about max_count per window_sec' (burst up to max_count)."""
+    return float(max_count), float(max_count) / max(1e-9, float(window_sec))
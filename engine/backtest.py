@@ -1,26 +1,30 @@
 """
 MNEMOS 2.1 - Backtesting framework: replay historical signals, evaluate rule effectiveness, rank patterns, CSV + report.
+Results are cached by (date range, signal/outcome watermark); overlapping runs only compute the missing range.
+Exports stream: signals are read in keyset-paginated chunks, joined with outcomes per chunk and written out as they
+come, with per-type aggregates kept on the fly (memory bounded by the chunk size, not the range).
 """
 import csv
 import json
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from storage.db import cursor
-from config.settings import REPORTS_DIR
+from storage.db import EPOCH_MAX, cursor, signal_range_watermark, to_epoch
+from config.settings import BACKTEST_CHUNK_ROWS, REPORTS_DIR
+from engine import backtest_cache
 
 logger = logging.getLogger(__name__)
 
 
-def load_signals_since(since_dt: str) -> List[Dict[str, Any]]:
-    """Load signals from DB since given ISO datetime."""
+def load_signals_since(since_dt: str, until_dt: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Load signals from DB since given ISO datetime (and before until_dt, if given)."""
     with cursor() as cur:
         cur.execute(
             """SELECT id, symbol, score, explanation, signals_json, created_at, signal_type, confidence
-               FROM signals WHERE created_at >= ? ORDER BY created_at""",
-            (since_dt,),
+               FROM signals WHERE created_epoch >= ? AND created_epoch < ? ORDER BY created_epoch, id""",
+            (to_epoch(since_dt) or 0, to_epoch(until_dt) or EPOCH_MAX),
         )
         rows = cur.fetchall()
     return [
@@ -52,54 +56,123 @@ def load_outcomes_for_signals(signal_ids: List[int]) -> Dict[int, Dict[str, Any]
     return {r[0]: {"return_1d": r[1], "return_3d": r[2], "return_5d": r[3]} for r in rows}
 
 
-def run_backtest(since_dt: str) -> Dict[str, Any]:
+def iter_signal_chunks(
+    since_dt: str, until_dt: Optional[str] = None, chunk_size: int = BACKTEST_CHUNK_ROWS
+) -> Iterator[List[Dict[str, Any]]]:
     """
-    Replay signals since since_dt, join outcomes, compute rule-level stats.
-    Returns summary dict and list of signal-level rows for CSV.
+    Signal-level rows (signal joined with its outcome) for [since_dt, until_dt) in (created_epoch, id) order,
+    chunk_size rows at a time. Keyset pagination: each chunk is one short read, no connection held in between.
     """
-    signals = load_signals_since(since_dt)
-    if not signals:
-        return {"signals_count": 0, "by_type": {}, "rows": []}
-    signal_ids = [s["id"] for s in signals]
-    outcomes = load_outcomes_for_signals(signal_ids)
-    rows: List[Dict[str, Any]] = []
-    for s in signals:
-        o = outcomes.get(s["id"], {})
-        rows.append({
-            "signal_id": s["id"],
-            "symbol": s["symbol"],
-            "score": s["score"],
-            "signal_type": s["signal_type"],
-            "confidence": s["confidence"],
-            "created_at": s["created_at"],
-            "return_1d": o.get("return_1d"),
-            "return_3d": o.get("return_3d"),
-            "return_5d": o.get("return_5d"),
-        })
-    # By signal_type
-    from collections import defaultdict
-    by_type: Dict[str, List[float]] = defaultdict(list)
+    last: Tuple[int, int] = (to_epoch(since_dt) or 0, -1)
+    until_e = to_epoch(until_dt) or EPOCH_MAX
+    while True:
+        with cursor() as cur:
+            cur.execute(
+                """SELECT id, symbol, score, signal_type, confidence, created_at, created_epoch FROM signals
+                   WHERE (created_epoch, id) > (?, ?) AND created_epoch < ? ORDER BY created_epoch, id LIMIT ?""",
+                (last[0], last[1], until_e, max(1, chunk_size)),
+            )
+            signals = cur.fetchall()
+        if not signals:
+            return
+        outcomes = load_outcomes_for_signals([r[0] for r in signals])
+        rows: List[Dict[str, Any]] = []
+        for r in signals:
+            o = outcomes.get(r[0], {})
+            rows.append({
+                "signal_id": r[0],
+                "symbol": r[1],
+                "score": r[2],
+                "signal_type": r[3] or "unknown",
+                "confidence": r[4],
+                "created_at": r[5],
+                "return_1d": o.get("return_1d"),
+                "return_3d": o.get("return_3d"),
+                "return_5d": o.get("return_5d"),
+            })
+        yield rows
+        if len(signals) < chunk_size:
+            return
+        last = (signals[-1][6], signals[-1][0])
+
+
+def _signal_rows(since_dt: str, until_dt: str) -> List[Dict[str, Any]]:
+    """Signal-level rows (signal joined with its outcome) for [since_dt, until_dt)."""
+    return [r for chunk in iter_signal_chunks(since_dt, until_dt) for r in chunk]
+
+
+def _accumulate(agg: Dict[str, List[float]], rows: Iterable[Dict[str, Any]]) -> None:
+    """Fold rows into per-type running [count, wins, sum] of return_1d."""
     for r in rows:
-        if r.get("return_1d") is not None:
-            by_type[r["signal_type"]].append(r["return_1d"])
-    summary_by_type: Dict[str, Dict[str, float]] = {}
-    for st, returns in by_type.items():
-        if len(returns) < 1:
-            continue
-        wr = sum(1 for x in returns if x > 0) / len(returns) * 100.0
-        summary_by_type[st] = {
-            "win_rate_1d": round(wr, 2),
-            "avg_return_1d": round(sum(returns) / len(returns), 2),
-            "sample_count": len(returns),
+        ret = r.get("return_1d")
+        if ret is not None:
+            a = agg.setdefault(r["signal_type"], [0, 0, 0.0])
+            a[0] += 1
+            a[1] += ret > 0
+            a[2] += ret
+
+
+def _by_type(agg: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+    return {
+        st: {
+            "win_rate_1d": round(wins / n * 100.0, 2),
+            "avg_return_1d": round(total / n, 2),
+            "sample_count": int(n),
         }
+        for st, (n, wins, total) in agg.items()
+    }
+
+
+def _summarize_rows(rows: List[Dict[str, Any]], since_dt: str) -> Dict[str, Any]:
+    agg: Dict[str, List[float]] = {}
+    _accumulate(agg, rows)
     return {
-        "signals_count": len(signals),
+        "signals_count": len(rows),
         "since": since_dt,
-        "by_type": summary_by_type,
+        "by_type": _by_type(agg),
         "rows": rows,
     }
 
 
+def run_backtest(since_dt: str, until_dt: Optional[str] = None, use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Replay signals in [since_dt, until_dt) (until defaults to now), join outcomes, compute rule-level stats.
+    Returns summary dict and list of signal-level rows for CSV, plus cache_key / cached.
+    Cached: an unchanged range returns at once; cached sub-ranges whose signals and outcomes are unchanged are
+    reused and only the rest is queried.
+    """
+    started = datetime.utcnow().isoformat() + "Z"
+    with cursor() as cur:
+        # An open-ended run is keyed on until=None: its watermark already changes with every new signal / outcome
+        watermark = signal_range_watermark(cur, since_dt, until_dt)
+        scope = backtest_cache.scope_key("signals")
+        key = backtest_cache.cache_key(scope, since_dt, until_dt, watermark)
+        if until_dt is None:
+            # Whole seconds (created_epoch is in seconds); the segment's watermark is re-checked before any reuse
+            until_dt = (datetime.utcnow().replace(microsecond=0) + timedelta(seconds=1)).isoformat() + "Z"
+            watermark = signal_range_watermark(cur, since_dt, until_dt)  # what the stored segment covers
+    if use_cache:
+        hit = backtest_cache.lookup(scope, key)
+        if hit is not None:
+            return {**hit, "cache_key": key, "cached": True}
+
+    def range_watermark(a: str, b: str) -> Tuple[int, int, int]:
+        with cursor() as c:
+            return signal_range_watermark(c, a, b)
+
+    reused, gaps = backtest_cache.reusable_segments(scope, since_dt, until_dt, range_watermark) if use_cache \
+        else ([], [(since_dt, until_dt)])
+    rows = [r for part in reused for r in part]
+    for a, b in gaps:
+        rows.extend(_signal_rows(a, b))
+    rows.sort(key=lambda r: (r["created_at"], r["signal_id"]))
+    result = _summarize_rows(rows, since_dt)
+    result["until"] = until_dt
+    if use_cache:
+        backtest_cache.store(scope, key, since_dt, until_dt, watermark, result, started)
+    return {**result, "cache_key": key, "cached": False}
+
+
 def write_backtest_csv(result: Dict[str, Any], path: Path) -> None:
     """Write backtest result rows to CSV."""
     path.parent.mkdir(parents=True, exist_ok=True)
@@ -113,6 +186,97 @@ def write_backtest_csv(result: Dict[str, Any], path: Path) -> None:
     logger.info("Backtest CSV written: %s", path)
 
 
+def write_rows_csv(chunks: Iterable[List[Dict[str, Any]]], path: Path) -> int:
+    """Stream row chunks to CSV (file created on the first non-empty chunk). Returns rows written."""
+    n = 0
+    f = None
+    try:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            if f is None:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                f = open(path, "w", newline="", encoding="utf-8")
+                w = csv.DictWriter(f, fieldnames=list(chunk[0].keys()), extrasaction="ignore")
+                w.writeheader()
+            w.writerows(chunk)
+            n += len(chunk)
+    finally:
+        if f is not None:
+            f.close()
+    return n
+
+
+def write_rows_parquet(chunks: Iterable[List[Dict[str, Any]]], path: Path) -> int:
+    """Stream row chunks to Parquet, one row group per chunk (needs pyarrow). Returns rows written."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    n = 0
+    writer = None
+    try:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            table = pa.Table.from_pylist(chunk, schema=_signal_row_schema(pa) if "signal_id" in chunk[0] else None)
+            if writer is None:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                writer = pq.ParquetWriter(str(path), table.schema, compression="zstd")
+            writer.write_table(table.cast(writer.schema))
+            n += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return n
+
+
+def _signal_row_schema(pa: Any) -> Any:
+    # Explicit types so a chunk whose returns are all still pending (None) matches the others
+    return pa.schema([
+        ("signal_id", pa.int64()), ("symbol", pa.string()), ("score", pa.float64()), ("signal_type", pa.string()),
+        ("confidence", pa.float64()), ("created_at", pa.string()), ("return_1d", pa.float64()),
+        ("return_3d", pa.float64()), ("return_5d", pa.float64()),
+    ])
+
+
+def stream_backtest(
+    since_dt: str,
+    path: Path,
+    until_dt: Optional[str] = None,
+    fmt: str = "csv",
+    chunk_size: int = BACKTEST_CHUNK_ROWS,
+) -> Dict[str, Any]:
+    """
+    Stream signal-level rows for [since_dt, until_dt) to CSV or Parquet while aggregating by type on the fly.
+    Returns the run_backtest summary shape without rows, plus the written path (None if no signals).
+    Falls back to CSV when pyarrow is not installed.
+    """
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            logger.warning("pyarrow not installed; writing CSV instead of Parquet")
+            fmt, path = "csv", path.with_suffix(".csv")
+    agg: Dict[str, List[float]] = {}
+
+    def tapped() -> Iterator[List[Dict[str, Any]]]:
+        for chunk in iter_signal_chunks(since_dt, until_dt, chunk_size):
+            _accumulate(agg, chunk)
+            yield chunk
+
+    n = (write_rows_parquet if fmt == "parquet" else write_rows_csv)(tapped(), path)
+    if n:
+        logger.info("Backtest %s streamed: %s (%d rows)", fmt, path, n)
+    return {
+        "signals_count": n,
+        "since": since_dt,
+        "until": until_dt,
+        "by_type": _by_type(agg),
+        "rows": [],
+        "path": str(path) if n else None,
+    }
+
+
 def write_backtest_report(result: Dict[str, Any], path: Path) -> None:
     """Write Markdown report."""
     path.parent.mkdir(parents=True, exist_ok=True)
@@ -132,11 +296,31 @@ def write_backtest_report(result: Dict[str, Any], path: Path) -> None:
     logger.info("Backtest report written: %s", path)
 
 
-def run_and_export_backtest(since_dt: str, output_dir: Optional[Path] = None) -> Dict[str, Any]:
-    """Run backtest and export CSV + report. Returns result dict."""
+def export_once(result: Dict[str, Any], output_dir: Path, prefix: str) -> None:
+    """Write CSV + report named after the result's cache key; skip if that result was already exported."""
+    name = f"{prefix}_{result.get('cache_key') or datetime.utcnow().strftime('%Y%m%d_%H%M%S')}"
+    csv_path, md_path = output_dir / f"{name}.csv", output_dir / f"{name}.md"
+    if result.get("cache_key") and md_path.exists() and (csv_path.exists() or not result.get("rows")):
+        logger.info("Backtest unchanged; report already at %s", md_path)
+        return
+    write_backtest_csv(result, csv_path)
+    write_backtest_report(result, md_path)
+
+
+def run_and_export_backtest(since_dt: str, output_dir: Optional[Path] = None, fmt: str = "csv") -> Dict[str, Any]:
+    """
+    Stream backtest rows to CSV (or Parquet) and write the report. Returns the summary (rows are not kept).
+    Files are named after the range / signal-outcome watermark key; an unchanged export is not written again.
+    """
     output_dir = output_dir or REPORTS_DIR
-    result = run_backtest(since_dt)
-    ts = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-    write_backtest_csv(result, output_dir / f"backtest_{ts}.csv")
-    write_backtest_report(result, output_dir / f"backtest_{ts}.md")
-    return result
+    with cursor() as cur:
+        watermark = signal_range_watermark(cur, since_dt, None)
+    key = backtest_cache.cache_key(backtest_cache.scope_key("export", {"fmt": fmt}), since_dt, None, watermark)
+    summary_path = output_dir / f"backtest_{key}.json"
+    if summary_path.exists():  # written last, so the export is complete
+        logger.info("Backtest unchanged; export already at %s", summary_path.with_suffix(".md"))
+        return {**json.loads(summary_path.read_text(encoding="utf-8")), "cache_key": key, "cached": True}
+    result = stream_backtest(since_dt, output_dir / f"backtest_{key}.{'parquet' if fmt == 'parquet' else 'csv'}", fmt=fmt)
+    write_backtest_report(result, summary_path.with_suffix(".md"))
+    summary_path.write_text(json.dumps(result, default=str), encoding="utf-8")
+    return {**result, "cache_key": key, "cached": False}
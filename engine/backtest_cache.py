@@ -0,0 +1,220 @@
+"""
+MNEMOS 2.1 - Content-addressed backtest result cache.
+Key = hash(scope (kind + strategy config), rule-set version, data watermark, date range). Summaries are kept in
+backtest_runs.summary_json (scope / cache_key columns), row-level results (or a whole replay frame) in
+compressed columnar .npz files.
+"""
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config.settings import BACKTEST_CACHE_DIR, BACKTEST_CACHE_MAX_ENTRIES
+from storage.db import (
+    cursor,
+    delete_backtest_runs,
+    get_backtest_cache,
+    get_stale_backtest_cache,
+    insert_backtest_cache,
+)
+
+logger = logging.getLogger(__name__)
+
+_ROOT = Path(__file__).resolve().parent.parent
+# Code a replay's results depend on; any edit here changes the rule-set version
+RULESET_FILES = (
+    "core/feature_engineering.py",
+    "engine/friction_engine.py",
+    "engine/confidence_engine.py",
+    "engine/replay.py",
+    "risk/governance.py",
+)
+_ruleset: Optional[str] = None
+
+
+def _digest(obj: Any) -> str:
+    return hashlib.sha1(json.dumps(obj, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def ruleset_version() -> str:
+    """Hash of the feature / rule / confidence / risk source (computed once per process)."""
+    global _ruleset
+    if _ruleset is None:
+        h = hashlib.sha1()
+        for rel in RULESET_FILES:
+            try:
+                h.update((_ROOT / rel).read_bytes())
+            except OSError:
+                h.update(rel.encode("utf-8"))
+        _ruleset = h.hexdigest()[:12]
+    return _ruleset
+
+
+def scope_key(kind: str, config: Optional[Dict[str, Any]] = None) -> str:
+    """Entries that can be compared / combined: same kind and strategy config."""
+    return f"{kind}:{_digest(config or {})[:12]}"
+
+
+def cache_key(scope: str, since: str, until: Optional[str], watermark: Sequence[Any], ruleset: str = "") -> str:
+    return _digest([scope, since, until, list(watermark), ruleset])[:24]
+
+
+def _column(values: List[Any]) -> np.ndarray:
+    if values and all(isinstance(v, (bool, np.bool_)) for v in values):
+        return np.asarray(values, dtype=bool)
+    if all(isinstance(v, (int, np.integer)) and not isinstance(v, bool) for v in values):
+        return np.asarray(values, dtype=np.int64)
+    if all(v is None or isinstance(v, (int, float, np.number)) for v in values):
+        return np.asarray([np.nan if v is None else v for v in values], dtype=np.float64)
+    return np.asarray(["" if v is None else str(v) for v in values], dtype=str)
+
+
+def save_rows(key: str, rows: List[Dict[str, Any]]) -> str:
+    """Rows -> compressed columnar file named after the key. Returns the file name."""
+    BACKTEST_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    name = f"{key}.npz"
+    cols = list(rows[0].keys()) if rows else []
+    arrays = {f"c{i}": _column([r.get(c) for r in rows]) for i, c in enumerate(cols)}
+    np.savez_compressed(BACKTEST_CACHE_DIR / name, _columns=np.asarray(cols, dtype=str), **arrays)
+    return name
+
+
+def load_rows(name: str) -> Optional[List[Dict[str, Any]]]:
+    """Compressed columnar file -> rows (NaN back to None). None if the file is gone or unreadable."""
+    try:
+        with np.load(BACKTEST_CACHE_DIR / name, allow_pickle=False) as z:
+            cols = [str(c) for c in z["_columns"]]
+            data = [z[f"c{i}"] for i in range(len(cols))]
+    except Exception as e:
+        logger.debug("Backtest cache file %s unreadable: %s", name, e)
+        return None
+    out: List[Dict[str, Any]] = []
+    n = len(data[0]) if data else 0
+    for j in range(n):
+        row = {}
+        for c, arr in zip(cols, data):
+            v = arr[j].item()
+            row[c] = None if isinstance(v, float) and v != v else v
+        out.append(row)
+    return out
+
+
+def save_frame(key: str, df: pd.DataFrame) -> str:
+    """Frame -> compressed columnar file named after the key (text columns as unicode). Returns the file name."""
+    BACKTEST_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    name = f"{key}.frame.npz"
+    arrays = {}
+    for i, c in enumerate(df.columns):
+        arr = df[c].to_numpy()
+        arrays[f"c{i}"] = df[c].fillna("").to_numpy(dtype=str) if arr.dtype == object else arr
+    np.savez_compressed(BACKTEST_CACHE_DIR / name, _columns=np.asarray(list(df.columns), dtype=str), **arrays)
+    return name
+
+
+def load_frame(name: str) -> Optional[pd.DataFrame]:
+    """Compressed columnar file -> frame. None if the file is gone or unreadable."""
+    try:
+        with np.load(BACKTEST_CACHE_DIR / name, allow_pickle=False) as z:
+            return pd.DataFrame({str(c): z[f"c{i}"] for i, c in enumerate(z["_columns"])})
+    except Exception as e:
+        logger.debug("Backtest cache file %s unreadable: %s", name, e)
+        return None
+
+
+def latest(scope: str) -> Optional[Dict[str, Any]]:
+    """Newest cached entry of a scope (since, until, watermark, rows_file, summary), or None."""
+    with cursor() as cur:
+        entries = get_backtest_cache(cur, scope, 1)
+    return json.loads(entries[0][2]) if entries else None
+
+
+def lookup(scope: str, key: str) -> Optional[Dict[str, Any]]:
+    """Cached result for an exact key (summary + rows), or None."""
+    with cursor() as cur:
+        entries = get_backtest_cache(cur, scope)
+    for _, k, raw in entries:
+        if k != key:
+            continue
+        entry = json.loads(raw)
+        rows = load_rows(entry["rows_file"])
+        if rows is not None:
+            return {**entry["summary"], "rows": rows}
+    return None
+
+
+def store(
+    scope: str,
+    key: str,
+    since: str,
+    until: Optional[str],
+    watermark: Sequence[Any],
+    result: Dict[str, Any],
+    started_at: str,
+    frame: Optional[pd.DataFrame] = None,
+) -> None:
+    """Cache a result: rows (or frame) to the columnar file, the rest to backtest_runs.summary_json."""
+    try:
+        rows_file = save_frame(key, frame) if frame is not None else save_rows(key, result.get("rows", []))
+        summary = {k: v for k, v in result.items() if k != "rows"}
+        entry = {"kind": "cache", "since": since, "until": until, "watermark": list(watermark),
+                 "rows_file": rows_file, "summary": summary}
+        with cursor() as cur:
+            insert_backtest_cache(cur, scope, key, started_at, json.dumps(entry, default=str))
+        evict(scope)
+    except Exception as e:
+        logger.warning("Backtest cache store failed: %s", e)
+
+
+def evict(scope: str, keep: Optional[int] = None) -> int:
+    """Drop a scope's entries beyond the newest keep (BACKTEST_CACHE_MAX_ENTRIES), and their row files.
+    Returns entries dropped."""
+    keep = BACKTEST_CACHE_MAX_ENTRIES if keep is None else keep
+    with cursor() as cur:
+        stale = get_stale_backtest_cache(cur, scope, keep)
+        delete_backtest_runs(cur, [run_id for run_id, _, _ in stale])
+        live = {k for _, k, _ in get_backtest_cache(cur, scope, keep)}
+    for _, k, raw in stale:
+        if k not in live:  # the same key may have been stored again since
+            (BACKTEST_CACHE_DIR / json.loads(raw)["rows_file"]).unlink(missing_ok=True)
+    return len(stale)
+
+
+def reusable_segments(
+    scope: str,
+    since: str,
+    until: str,
+    watermark_fn: Callable[[str, str], Sequence[Any]],
+) -> Tuple[List[List[Dict[str, Any]]], List[Tuple[str, str]]]:
+    """
+    Cached entries inside [since, until) whose data watermark is unchanged, picked left to right without overlap.
+    Returns (row lists of the reused entries, missing sub-ranges still to compute).
+    """
+    with cursor() as cur:
+        entries = get_backtest_cache(cur, scope)
+    cands = []
+    for _, _, raw in entries:
+        e = json.loads(raw)
+        if e.get("until") and since <= e["since"] < e["until"] <= until:
+            cands.append(e)
+    cands.sort(key=lambda e: e["until"], reverse=True)
+    cands.sort(key=lambda e: e["since"])  # earliest start first, longest span first among equal starts
+    reused: List[List[Dict[str, Any]]] = []
+    gaps: List[Tuple[str, str]] = []
+    pos = since
+    for e in cands:
+        if e["since"] < pos or list(watermark_fn(e["since"], e["until"])) != e["watermark"]:
+            continue
+        rows = load_rows(e["rows_file"])
+        if rows is None:
+            continue
+        if pos < e["since"]:
+            gaps.append((pos, e["since"]))
+        reused.append(rows)
+        pos = e["until"]
+    if pos < until:
+        gaps.append((pos, until))
+    return reused, gaps
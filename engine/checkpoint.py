@@ -0,0 +1,87 @@
+"""
+MNEMOS 2.1 - Warm-restart checkpoints: snapshot in-memory engine state (bar cache, alert buffers,
+heartbeat throttle, tick watermark) into a compressed SQLite blob; restore on startup.
+Each stateful module exposes get_state() / load_state(state).
+"""
+import importlib
+import logging
+import pickle
+import time
+import zlib
+from typing import Any, Dict
+
+from config.settings import CHECKPOINT_MAX_AGE_HOURS
+from storage.db import cursor, get_checkpoint, upsert_checkpoint
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = "engine"
+CHECKPOINT_FORMAT = 1
+
+# Modules whose get_state()/load_state() are checkpointed
+STATEFUL_MODULES = [
+    "engine.orchestrator",
+    "alerts.telegram_alert",
+    "alerts.email_alert",
+    "core.rate_limiter",
+    "engine.uptime",
+    "health.daily_heartbeat",
+]
+
+
+def collect_state() -> Dict[str, Any]:
+    """State of every stateful module, keyed by module name."""
+    state: Dict[str, Any] = {}
+    for name in STATEFUL_MODULES:
+        try:
+            state[name] = importlib.import_module(name).get_state()
+        except Exception as e:
+            logger.warning("Checkpoint: get_state failed for %s: %s", name, e)
+    return state
+
+
+def save_checkpoint() -> bool:
+    """Snapshot engine state to SQLite. Returns True on success."""
+    try:
+        blob = zlib.compress(
+            pickle.dumps(
+                {"format": CHECKPOINT_FORMAT, "saved_at": time.time(), "state": collect_state()},
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        )
+        with cursor() as cur:
+            upsert_checkpoint(cur, CHECKPOINT_NAME, blob)
+        logger.debug("Checkpoint saved (%d bytes)", len(blob))
+        return True
+    except Exception as e:
+        logger.warning("Checkpoint save failed: %s", e)
+        return False
+
+
+def restore_checkpoint() -> bool:
+    """Restore engine state from the last checkpoint if present and fresh. Returns True if restored."""
+    try:
+        with cursor() as cur:
+            blob = get_checkpoint(cur, CHECKPOINT_NAME)
+        if not blob:
+            return False
+        data = pickle.loads(zlib.decompress(blob))
+    except Exception as e:
+        logger.warning("Checkpoint load failed: %s", e)
+        return False
+    if data.get("format") != CHECKPOINT_FORMAT:
+        logger.info("Checkpoint format %s not supported; starting cold", data.get("format"))
+        return False
+    age_sec = time.time() - float(data.get("saved_at") or 0)
+    if age_sec > CHECKPOINT_MAX_AGE_HOURS * 3600:
+        logger.info("Checkpoint is %.1f h old; starting cold", age_sec / 3600)
+        return False
+    for name, state in (data.get("state") or {}).items():
+        if name not in STATEFUL_MODULES:
+            continue
+        try:
+            importlib.import_module(name).load_state(state)
+        except Exception as e:
+            logger.warning("Checkpoint: load_state failed for %s: %s", name, e)
+    logger.info("Warm restart: state restored from checkpoint (%.0f s old)", age_sec)
+    return True
@@ -6,6 +6,8 @@ import logging
 from datetime import datetime
 from typing import Dict, List, Optional
 
+import numpy as np
+
 from config.settings import (
     CONFIDENCE_ALERT_THRESHOLD,
     CONFIDENCE_MIN_SAMPLES_FOR_WINRATE,
@@ -15,6 +17,15 @@ from storage.db import cursor, insert_confidence
 
 logger = logging.getLogger(__name__)
 
+# Composite weights: friction primary, then liquidity/data quality, volatility (risk), win rate
+CONFIDENCE_WEIGHTS: Dict[str, float] = {
+    "friction": 0.35,
+    "liquidity": 0.15,
+    "volatility": 0.15,
+    "data_quality": 0.15,
+    "win_rate": 0.20,
+}
+
 
 def _clip(x: float) -> float:
     return max(0.0, min(1.0, x))
@@ -56,6 +67,23 @@ def win_rate_component(symbol: Optional[str] = None) -> float:
     return _clip(wr / 100.0)
 
 
+def combine_confidence(friction_score, liq, vol, dq, wr, weights: Optional[Dict[str, float]] = None):
+    """
+    Weighted composite of the components, clipped to 0-1. Pure and NumPy-friendly (scalars or arrays),
+    shared with the replay backtester and parameter sweeps.
+    """
+    w = weights or CONFIDENCE_WEIGHTS
+    return np.clip(
+        w["friction"] * np.clip(friction_score, 0.0, 1.0)
+        + w["liquidity"] * liq
+        + w["volatility"] * vol
+        + w["data_quality"] * dq
+        + w["win_rate"] * wr,
+        0.0,
+        1.0,
+    )
+
+
 def compute_confidence(
     symbol: str,
     friction_score: float,
@@ -71,15 +99,7 @@ def compute_confidence(
     vol = volatility_score(feats)
     dq = data_quality_score(feats)
     wr = win_rate_component(symbol)
-    # Weights: friction primary, then liquidity/data quality, volatility (risk), win rate
-    confidence = (
-        0.35 * _clip(friction_score)
-        + 0.15 * liq
-        + 0.15 * vol
-        + 0.15 * dq
-        + 0.20 * wr
-    )
-    confidence = _clip(confidence)
+    confidence = float(combine_confidence(friction_score, liq, vol, dq, wr))
     try:
         with cursor() as cur:
             insert_confidence(
@@ -23,11 +23,24 @@ class FrictionResult:
     signal_type: str = "unknown"  # panic_selling, silent_accumulation, sector_lag, news_underreaction, overreaction
 
 
+# Rule constants (percent / volume-ratio cut-offs); overridable per call for parameter sweeps
+RULE_PARAMS: Dict[str, float] = {
+    "panic_drop_pct": 2.0,
+    "panic_volume_ratio": 1.5,
+    "accumulation_max_gain_pct": 1.5,
+    "accumulation_max_volume_ratio": 0.8,
+    "sector_lag_pct": 1.0,
+    "underreaction_max_move_pct": 1.0,
+    "overreaction_move_pct": 4.0,
+    "overreaction_volatility_pct": 2.0,
+}
+
+
 def _clip(x: float) -> float:
     return max(0.0, min(1.0, x))
 
 
-def _panic_selling_score(feats: Dict[str, float]) -> tuple[float, List[str]]:
+def _panic_selling_score(feats: Dict[str, float], p: Dict[str, float] = RULE_PARAMS) -> tuple[float, List[str]]:
     """
     Large negative return + high volume => panic selling.
     """
@@ -36,15 +49,15 @@ def _panic_selling_score(feats: Dict[str, float]) -> tuple[float, List[str]]:
     vol_ratio = feats.get("volume_ratio", 0.0)
     if ret_1d != ret_1d or vol_ratio != vol_ratio:
         return 0.0, out
-    # Panic: down >2% and volume >1.5x
-    if ret_1d < -2.0 and vol_ratio > 1.5:
+    # Panic: down >2% and volume >1.5x (defaults)
+    if ret_1d < -p["panic_drop_pct"] and vol_ratio > p["panic_volume_ratio"]:
         s = _clip(0.3 + abs(ret_1d) / 50.0 + (vol_ratio - 1.0) / 4.0)
         out.append(f"Panic selling: {ret_1d:.2f}% drop, vol {vol_ratio:.2f}x avg")
         return _clip(s), out
     return 0.0, out
 
 
-def _silent_accumulation_score(feats: Dict[str, float]) -> tuple[float, List[str]]:
+def _silent_accumulation_score(feats: Dict[str, float], p: Dict[str, float] = RULE_PARAMS) -> tuple[float, List[str]]:
     """
     Price up slightly + low volume => accumulation.
     """
@@ -54,13 +67,14 @@ def _silent_accumulation_score(feats: Dict[str, float]) -> tuple[float, List[str
     vol_ratio = feats.get("volume_ratio", 0.0)
     if ret_1d != ret_1d:
         return 0.0, out
-    if 0 < ret_1d < 1.5 and (vol_ratio != vol_ratio or vol_ratio < 0.8):
+    low_volume = vol_ratio != vol_ratio or vol_ratio < p["accumulation_max_volume_ratio"]
+    if 0 < ret_1d < p["accumulation_max_gain_pct"] and low_volume:
         out.append(f"Silent accumulation: +{ret_1d:.2f}% on below-avg volume")
         return _clip(0.4 + ret_5d / 50.0 if ret_5d == ret_5d else 0.4), out
     return 0.0, out
 
 
-def _sector_lag_score(feats: Dict[str, float]) -> tuple[float, List[str]]:
+def _sector_lag_score(feats: Dict[str, float], p: Dict[str, float] = RULE_PARAMS) -> tuple[float, List[str]]:
     """
     Sector relative strength negative => lagging sector.
     """
@@ -68,7 +82,7 @@ def _sector_lag_score(feats: Dict[str, float]) -> tuple[float, List[str]]:
     rel = feats.get("sector_relative_1d", 0.0)
     if rel != rel:
         return 0.0, out
-    if rel < -1.0:
+    if rel < -p["sector_lag_pct"]:
         out.append(f"Sector lag: {rel:.2f}% vs peers")
         return _clip(0.3 + abs(rel) / 30.0), out
     return 0.0, out
@@ -78,6 +92,7 @@ def _news_underreaction_score(
     symbol: str,
     feats: Dict[str, float],
     headlines: List[dict],
+    p: Dict[str, float] = RULE_PARAMS,
 ) -> tuple[float, List[str]]:
     """
     Recent negative news but price not down much => underreaction.
@@ -90,7 +105,7 @@ def _news_underreaction_score(
     if ret_1d != ret_1d:
         return 0.0, out
     # Heuristic: news exists, price move < 1% => possible underreaction
-    if abs(ret_1d) < 1.0 and len(headlines) >= 1:
+    if abs(ret_1d) < p["underreaction_max_move_pct"] and len(headlines) >= 1:
         titles = [h.get("title", "")[:60] for h in headlines[:2]]
         out.append("News vs price: limited move despite headlines")
         for t in titles:
@@ -100,7 +115,7 @@ def _news_underreaction_score(
     return 0.0, out
 
 
-def _overreaction_score(feats: Dict[str, float]) -> tuple[float, List[str]]:
+def _overreaction_score(feats: Dict[str, float], p: Dict[str, float] = RULE_PARAMS) -> tuple[float, List[str]]:
     """
     Large single-day move (up or down) + high volatility => overreaction.
     """
@@ -109,10 +124,10 @@ def _overreaction_score(feats: Dict[str, float]) -> tuple[float, List[str]]:
     vol_pct = feats.get("volatility_pct", 0.0)
     if ret_1d != ret_1d:
         return 0.0, out
-    if abs(ret_1d) > 4.0:
+    if abs(ret_1d) > p["overreaction_move_pct"]:
         out.append(f"Overreaction: {ret_1d:.2f}% in 1d")
         s = 0.3 + min(abs(ret_1d) / 25.0, 0.4)
-        if vol_pct == vol_pct and vol_pct > 2.0:
+        if vol_pct == vol_pct and vol_pct > p["overreaction_volatility_pct"]:
             s += 0.1
         return _clip(s), out
     return 0.0, out
@@ -122,35 +137,42 @@ def compute_friction(
     symbol: str,
     feats: Dict[str, float],
     headlines: Optional[List[dict]] = None,
+    fetch_if_missing: bool = True,
+    params: Optional[Dict[str, float]] = None,
 ) -> FrictionResult:
     """
     Compute single friction score and explanation for one symbol.
+    fetch_if_missing=False: never fetch news here (caller already did, e.g. async runtime).
+    params: overrides for RULE_PARAMS (replay / parameter sweeps).
     """
-    headlines = headlines or get_headlines_for_symbol(symbol, max_items=3)
+    p = {**RULE_PARAMS, **params} if params else RULE_PARAMS
+    if not headlines and fetch_if_missing:
+        headlines = get_headlines_for_symbol(symbol, max_items=3)
+    headlines = headlines or []
     all_signals: List[str] = []
     scores: List[float] = []
 
-    s1, sig1 = _panic_selling_score(feats)
+    s1, sig1 = _panic_selling_score(feats, p)
     if s1 > 0:
         scores.append(s1)
         all_signals.extend(sig1)
 
-    s2, sig2 = _silent_accumulation_score(feats)
+    s2, sig2 = _silent_accumulation_score(feats, p)
     if s2 > 0:
         scores.append(s2)
         all_signals.extend(sig2)
 
-    s3, sig3 = _sector_lag_score(feats)
+    s3, sig3 = _sector_lag_score(feats, p)
     if s3 > 0:
         scores.append(s3)
         all_signals.extend(sig3)
 
-    s4, sig4 = _news_underreaction_score(symbol, feats, headlines)
+    s4, sig4 = _news_underreaction_score(symbol, feats, headlines, p)
     if s4 > 0:
         scores.append(s4)
         all_signals.extend(sig4)
 
-    s5, sig5 = _overreaction_score(feats)
+    s5, sig5 = _overreaction_score(feats, p)
     if s5 > 0:
         scores.append(s5)
         all_signals.extend(sig5)
@@ -195,3 +217,31 @@ def compute_friction_batch(
             logger.warning("Friction compute failed for %s: %s", symbol, e)
             results.append(FrictionResult(symbol=symbol, score=0.0, explanation=str(e), signals=[], signal_type="unknown"))
     return results
+
+
+async def compute_friction_batch_async(
+    features_by_symbol: Dict[str, Dict[str, float]],
+    fetch_news: bool = True,
+) -> List[FrictionResult]:
+    """Async compute_friction_batch: news for all symbols fetched concurrently, then scored."""
+    import asyncio
+    from core.news_engine import get_headlines_for_symbol_async
+    symbols = list(features_by_symbol.keys())
+    headlines_by_symbol: Dict[str, List[dict]] = {}
+    if fetch_news:
+        fetched = await asyncio.gather(
+            *(get_headlines_for_symbol_async(s, max_items=3) for s in symbols),
+            return_exceptions=True,
+        )
+        headlines_by_symbol = {s: h for s, h in zip(symbols, fetched) if isinstance(h, list)}
+    results: List[FrictionResult] = []
+    for symbol in symbols:
+        try:
+            r = compute_friction(
+                symbol, features_by_symbol[symbol], headlines_by_symbol.get(symbol), fetch_if_missing=False
+            )
+            results.append(r)
+        except Exception as e:
+            logger.warning("Friction compute failed for %s: %s", symbol, e)
+            results.append(FrictionResult(symbol=symbol, score=0.0, explanation=str(e), signals=[], signal_type="unknown"))
+    return results
@@ -1,84 +1,270 @@
 """
 MNEMOS 2.1 - GROQ API (free Llama) analysis on signal/market data.
-Uses GROQ_API_KEY; rate-limited to preserve free tier.
+Uses GROQ_API_KEY; rate-limited (shared token bucket, GROQ_MAX_DAILY_CALLS per day) to preserve free tier.
+Responses are cached in SQLite by normalized prompt hash (GROQ_CACHE_TTL_HOURS). Signal notes can be
+queued: a background thread batches up to GROQ_BATCH_SIZE signals into one request and hands each
+note to a callback, so alerts never wait on the LLM.
 """
+import hashlib
 import logging
+import queue
+import re
+import threading
 import time
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, List, Optional, Tuple
 
-from config.settings import GROQ_API_KEY, GROQ_MODEL, GROQ_MAX_DAILY_CALLS
+from config.settings import (
+    GROQ_API_KEY,
+    GROQ_API_URL,
+    GROQ_BATCH_SIZE,
+    GROQ_BATCH_WAIT_SEC,
+    GROQ_CACHE_TTL_HOURS,
+    GROQ_MAX_DAILY_CALLS,
+    GROQ_MODEL,
+)
+from core.rate_limiter import acquire, window_bucket
 
 logger = logging.getLogger(__name__)
 
-_call_times: list = []
-_calls_today: int = 0
-_last_date: Optional[str] = None
+# Follow-up note queue: (symbol, score, explanation, on_note)
+_notes: "queue.Queue[Tuple[str, float, str, Callable[[str], None]]]" = queue.Queue()
+_note_thread: Optional[threading.Thread] = None
+_note_thread_lock = threading.Lock()
 
 
 def _rate_limit() -> bool:
-    """True if we can make a call (under daily limit)."""
-    global _calls_today, _last_date
-    today = datetime.utcnow().strftime("%Y-%m-%d")
-    if _last_date != today:
-        _last_date = today
-        _calls_today = 0
-    if _calls_today >= GROQ_MAX_DAILY_CALLS:
-        return False
-    return True
+    """Take one call from the shared GROQ bucket. False if the daily budget is spent."""
+    return acquire("groq", *window_bucket(GROQ_MAX_DAILY_CALLS, 86400))
 
 
-def get_analysis(prompt: str, max_tokens: int = 256) -> Optional[str]:
-    """
-    Call GROQ with Llama model. Returns analysis text or None on failure/rate limit.
-    Prompt should be short; response is truncated to max_tokens.
-    """
-    if not GROQ_API_KEY or not prompt.strip():
+GROQ_URL = GROQ_API_URL
+
+
+def _normalize_prompt(prompt: str) -> str:
+    """Lowercase, collapse whitespace, round decimals to 1 place, so near-identical prompts share a key."""
+    text = re.sub(r"\s+", " ", prompt.strip().lower())
+    return re.sub(r"\d+\.\d+", lambda m: f"{float(m.group()):.1f}", text)
+
+
+def _cache_key(prompt: str, max_tokens: int) -> str:
+    return hashlib.sha256(f"{GROQ_MODEL}|{max_tokens}|{_normalize_prompt(prompt)}".encode("utf-8")).hexdigest()
+
+
+def _cache_get(key: str) -> Optional[str]:
+    if GROQ_CACHE_TTL_HOURS <= 0:
         return None
+    try:
+        from storage.db import cursor, get_groq_cache
+        since = (datetime.utcnow() - timedelta(hours=GROQ_CACHE_TTL_HOURS)).isoformat() + "Z"
+        with cursor() as cur:
+            return get_groq_cache(cur, key, since)
+    except Exception as e:
+        logger.debug("GROQ cache read failed: %s", e)
+        return None
+
+
+def _cache_put(key: str, text: str) -> None:
+    if GROQ_CACHE_TTL_HOURS <= 0:
+        return
+    try:
+        from storage.db import cursor, put_groq_cache
+        with cursor() as cur:
+            put_groq_cache(cur, key, text)
+    except Exception as e:
+        logger.debug("GROQ cache write failed: %s", e)
+
+
+def _request_parts(prompt: str, max_tokens: int) -> tuple:
+    """(json body bytes, headers) for a chat completion."""
+    import json
+    payload = {
+        "model": GROQ_MODEL,
+        "messages": [{"role": "user", "content": prompt[:2000]}],
+        "max_tokens": max(50, min(max_tokens, 512)),
+        "temperature": 0.3,
+    }
+    headers = {
+        "Authorization": f"Bearer {GROQ_API_KEY}",
+        "Content-Type": "application/json",
+    }
+    return json.dumps(payload).encode("utf-8"), headers
+
+
+def _parse_response(raw: bytes, limit: int = 500) -> Optional[str]:
+    """Extract the completion text (truncated to limit chars)."""
+    import json
+    out = json.loads(raw.decode())
+    choices = out.get("choices", [])
+    if not choices:
+        return None
+    text = (choices[0].get("message") or {}).get("content", "").strip()
+    return text[:limit] if text else None
+
+
+def _post(prompt: str, max_tokens: int, limit: int = 500) -> Optional[str]:
+    """One uncached, rate-limited chat completion."""
     if not _rate_limit():
         logger.debug("GROQ daily limit reached; skip")
         return None
     try:
         import urllib.request
-        import json
-        url = "https://api.groq.com/openai/v1/chat/completions"
-        payload = {
-            "model": GROQ_MODEL,
-            "messages": [{"role": "user", "content": prompt[:2000]}],
-            "max_tokens": max(50, min(max_tokens, 512)),
-            "temperature": 0.3,
-        }
-        data = json.dumps(payload).encode("utf-8")
-        req = urllib.request.Request(
-            url,
-            data=data,
-            method="POST",
-            headers={
-                "Authorization": f"Bearer {GROQ_API_KEY}",
-                "Content-Type": "application/json",
-            },
-        )
+        data, headers = _request_parts(prompt, max_tokens)
+        req = urllib.request.Request(GROQ_URL, data=data, method="POST", headers=headers)
         with urllib.request.urlopen(req, timeout=30) as r:
             if r.status != 200:
                 logger.warning("GROQ API status %s", r.status)
                 return None
-            out = json.loads(r.read().decode())
-        global _calls_today
-        _calls_today += 1
-        choices = out.get("choices", [])
-        if not choices:
+            raw = r.read()
+        return _parse_response(raw, limit)
+    except Exception as e:
+        logger.warning("GROQ request failed: %s", e)
+        return None
+
+
+def get_analysis(prompt: str, max_tokens: int = 256) -> Optional[str]:
+    """
+    Call GROQ with Llama model. Returns analysis text or None on failure/rate limit.
+    Prompt should be short; response is truncated to max_tokens. Served from cache when possible.
+    """
+    if not GROQ_API_KEY or not prompt.strip():
+        return None
+    key = _cache_key(prompt, max_tokens)
+    cached = _cache_get(key)
+    if cached:
+        return cached
+    text = _post(prompt, max_tokens)
+    if text:
+        _cache_put(key, text)
+    return text
+
+
+async def get_analysis_async(prompt: str, max_tokens: int = 256) -> Optional[str]:
+    """Async get_analysis for the asyncio runtime."""
+    from core.async_http import http_post, run_blocking
+    if not GROQ_API_KEY or not prompt.strip():
+        return None
+    key = _cache_key(prompt, max_tokens)
+    cached = await run_blocking(_cache_get, key)
+    if cached:
+        return cached
+    if not await run_blocking(_rate_limit):
+        logger.debug("GROQ daily limit reached; skip")
+        return None
+    try:
+        data, headers = _request_parts(prompt, max_tokens)
+        status, raw = await http_post(GROQ_URL, data, headers=headers, timeout=30)
+        if status != 200:
+            logger.warning("GROQ API status %s", status)
             return None
-        text = (choices[0].get("message") or {}).get("content", "").strip()
-        return text[:500] if text else None
+        text = _parse_response(raw)
     except Exception as e:
         logger.warning("GROQ request failed: %s", e)
         return None
+    if text:
+        await run_blocking(_cache_put, key, text)
+    return text
 
 
-def analyze_signal(symbol: str, score: float, explanation: str) -> Optional[str]:
-    """One-line LLM take on a friction signal for inclusion in alerts."""
-    prompt = (
+def _signal_prompt(symbol: str, score: float, explanation: str) -> str:
+    return (
         f"In one short sentence (under 25 words), what might this Indian market signal mean for a trader? "
         f"Symbol: {symbol}, Friction score: {score:.2f}. Context: {explanation[:200]}"
     )
-    return get_analysis(prompt, max_tokens=80)
+
+
+def analyze_signal(symbol: str, score: float, explanation: str) -> Optional[str]:
+    """One-line LLM take on a friction signal for inclusion in alerts."""
+    return get_analysis(_signal_prompt(symbol, score, explanation), max_tokens=80)
+
+
+async def analyze_signal_async(symbol: str, score: float, explanation: str) -> Optional[str]:
+    """Async analyze_signal."""
+    return await get_analysis_async(_signal_prompt(symbol, score, explanation), max_tokens=80)
+
+
+def _batch_prompt(items: List[Tuple[str, float, str]]) -> str:
+    lines = [
+        f"For each numbered Indian market signal, give one short sentence (under 25 words) on what it might "
+        f"mean for a trader. Reply with exactly {len(items)} lines formatted '<n>. <sentence>'.",
+    ]
+    for i, (symbol, score, explanation) in enumerate(items, 1):
+        lines.append(f"{i}. Symbol: {symbol}, Friction score: {score:.2f}. Context: {explanation[:150]}")
+    return "\n".join(lines)
+
+
+def _split_batch(text: str, n: int) -> List[Optional[str]]:
+    """Numbered reply lines -> list of n notes (None where missing)."""
+    notes: List[Optional[str]] = [None] * n
+    for line in text.splitlines():
+        m = re.match(r"^\s*(\d+)\s*[.):-]\s*(.+)$", line)
+        if m and 1 <= int(m.group(1)) <= n:
+            notes[int(m.group(1)) - 1] = m.group(2).strip()[:500]
+    return notes
+
+
+def analyze_signals_batch(items: List[Tuple[str, float, str]]) -> List[Optional[str]]:
+    """
+    Notes for several (symbol, score, explanation) signals: cached ones are reused, the rest are asked
+    in one request and the reply is split (each note cached under its single-signal prompt).
+    """
+    if not GROQ_API_KEY or not items:
+        return [None] * len(items)
+    keys = [_cache_key(_signal_prompt(*it), 80) for it in items]
+    notes: List[Optional[str]] = [_cache_get(k) for k in keys]
+    missing = [i for i, n in enumerate(notes) if not n]
+    if len(missing) == 1:
+        notes[missing[0]] = analyze_signal(*items[missing[0]])
+    elif missing:
+        prompt = _batch_prompt([items[i] for i in missing])
+        text = _post(prompt, max_tokens=min(512, 40 * len(missing) + 20), limit=4000)
+        for i, note in zip(missing, _split_batch(text or "", len(missing))):
+            if note:
+                notes[i] = note
+                _cache_put(keys[i], note)
+    return notes
+
+
+def _note_worker() -> None:
+    while True:
+        batch = [_notes.get()]
+        deadline = time.time() + GROQ_BATCH_WAIT_SEC
+        while len(batch) < GROQ_BATCH_SIZE:
+            try:
+                batch.append(_notes.get(timeout=max(0.0, deadline - time.time())))
+            except queue.Empty:
+                break
+        try:
+            notes = analyze_signals_batch([(sym, score, expl) for sym, score, expl, _ in batch])
+            for (_, _, _, on_note), note in zip(batch, notes):
+                if note:
+                    try:
+                        on_note(note)
+                    except Exception as e:
+                        logger.warning("GROQ note delivery failed: %s", e)
+        except Exception as e:
+            logger.warning("GROQ note batch failed: %s", e)
+        finally:
+            for _ in batch:
+                _notes.task_done()
+
+
+def queue_signal_note(symbol: str, score: float, explanation: str, on_note: Callable[[str], None]) -> bool:
+    """Ask for a note in the background; on_note(text) is called when it arrives. False if GROQ is off."""
+    global _note_thread
+    if not GROQ_API_KEY:
+        return False
+    with _note_thread_lock:
+        if _note_thread is None or not _note_thread.is_alive():
+            _note_thread = threading.Thread(target=_note_worker, name="groq-notes", daemon=True)
+            _note_thread.start()
+    _notes.put((symbol, float(score), explanation, on_note))
+    return True
+
+
+def wait_for_notes(timeout: float = 60.0) -> bool:
+    """Block until queued notes are processed (for --once and shutdown). True if the queue drained."""
+    deadline = time.time() + timeout
+    while _notes.unfinished_tasks and time.time() < deadline:
+        time.sleep(0.05)
+    return not _notes.unfinished_tasks
@@ -6,13 +6,18 @@ import json
 import logging
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import pandas as pd
 
 from config.settings import (
+    ALERT_OUTBOX_ENABLED,
+    CHECKPOINT_INTERVAL_TICKS,
     CONFIDENCE_ALERT_THRESHOLD,
+    DAILY_HISTORY_DAYS,
+    DAILY_REFRESH_DAYS,
     FRICTION_ALERT_THRESHOLD,
+    SIGNAL_STORAGE_MODE,
     get_watchlist,
 )
 from core.data_fetcher import fetch_daily_for_features, fetch_latest_bars
@@ -20,12 +25,19 @@ from core.feature_engineering import build_features_for_symbols
 from engine.friction_engine import FrictionResult, compute_friction_batch
 from engine.uptime import log_heartbeat
 from engine.confidence_engine import compute_confidence, should_alert_by_confidence
-from alerts.dispatcher import dispatch_friction
-from alerts.dedup import infer_signal_type, severity_from_score
-from storage.db import cursor, init_db, insert_prices, insert_signal
+from engine.groq_analysis import wait_for_notes
+from alerts.dispatcher import dispatch_friction, flush_pending_alerts
+from alerts.email_alert import close_smtp
+from alerts.outbox import drain_outbox, enqueue_friction, settle_delivered, start_workers, stop_workers
+from alerts.dedup import in_signal_cooldown, infer_signal_type, severity_from_score
+from storage.db import cursor, init_db, insert_prices, insert_signal, insert_tick_stats, to_epoch
 from storage.backup import run_backups
+from storage.bar_store import sync_from_db
+from storage.compaction import run_compaction
+from storage.confidence_rollup import roll_up_confidence
 from risk.governance import apply_risk_filters
 from analytics.attribution import update_outcomes_for_signal
+from analytics.intraday_outcomes import update_intraday_outcomes
 from health.daily_heartbeat import maybe_send_daily_heartbeat
 from reports.generator import run_weekly_report_and_deliver, run_monthly_report_and_deliver
 from config.settings import WEEKLY_REPORT_DAY, MONTHLY_REPORT_DAY
@@ -36,20 +48,86 @@ logger = logging.getLogger(__name__)
 DRIVE_MOUNT_PATH: Optional[Path] = None
 
 
+# In-memory daily bar cache (checkpointed) and tick watermark
+_daily_cache: Optional[pd.DataFrame] = None
+_tick_count: int = 0
+_last_tick_ts: Optional[str] = None
+# Last result per symbol as (signal_type, severity), None when its score was 0 (transitions storage mode)
+_signal_state: Dict[str, Optional[Tuple[str, int]]] = {}
+
+
 def set_drive_mount(path: Optional[Path]) -> None:
     global DRIVE_MOUNT_PATH
     DRIVE_MOUNT_PATH = path
 
 
+def get_state() -> Dict[str, Any]:
+    """Bar cache + tick watermark + per-symbol signal state for warm-restart checkpoints."""
+    return {
+        "daily_cache": _daily_cache,
+        "tick_count": _tick_count,
+        "last_tick_ts": _last_tick_ts,
+        "signal_state": dict(_signal_state),
+    }
+
+
+def load_state(state: Dict[str, Any]) -> None:
+    """Restore bar cache + tick watermark + per-symbol signal state from a checkpoint."""
+    global _daily_cache, _tick_count, _last_tick_ts
+    cache = state.get("daily_cache")
+    _daily_cache = cache if isinstance(cache, pd.DataFrame) and not cache.empty else None
+    _tick_count = int(state.get("tick_count") or 0)
+    _last_tick_ts = state.get("last_tick_ts")
+    _signal_state.clear()
+    _signal_state.update(state.get("signal_state") or {})
+
+
+def _daily_fetch_plan(symbols: List[str]) -> Tuple[List[str], List[str]]:
+    """(symbols to refresh with DAILY_REFRESH_DAYS, symbols needing full DAILY_HISTORY_DAYS)."""
+    if _daily_cache is None or _daily_cache.empty:
+        return [], list(symbols)
+    cached = set(_daily_cache["symbol"].unique())
+    return [s for s in symbols if s in cached], [s for s in symbols if s not in cached]
+
+
+def _merge_daily_cache(frames: List[pd.DataFrame], symbols: List[str]) -> pd.DataFrame:
+    """Merge freshly fetched daily bars into the cache; return bars for symbols (last DAILY_HISTORY_DAYS each)."""
+    global _daily_cache
+    parts = [f for f in frames if f is not None and not f.empty and "datetime" in f.columns]
+    if _daily_cache is not None:
+        parts.insert(0, _daily_cache)
+    if not parts:
+        return pd.DataFrame()
+    merged = pd.concat(parts, ignore_index=True)
+    merged = merged.drop_duplicates(subset=["symbol", "datetime"], keep="last")
+    merged = merged.sort_values(["symbol", "datetime"]).groupby("symbol", sort=False).tail(DAILY_HISTORY_DAYS)
+    _daily_cache = merged.reset_index(drop=True)
+    return _daily_cache[_daily_cache["symbol"].isin(symbols)]
+
+
+def _fetch_daily_cached(symbols: List[str]) -> pd.DataFrame:
+    """Daily bars via cache: short refresh for cached symbols, full history for new ones."""
+    refresh, full = _daily_fetch_plan(symbols)
+    frames: List[pd.DataFrame] = []
+    if refresh:
+        try:
+            frames.append(fetch_daily_for_features(refresh, days=DAILY_REFRESH_DAYS))
+        except Exception as e:
+            logger.warning("Fetch daily refresh failed: %s", e)
+    if full:
+        frames.append(fetch_daily_for_features(full, days=DAILY_HISTORY_DAYS))
+    return _merge_daily_cache(frames, symbols)
+
+
 def _outcome_backfill() -> None:
     """Update outcomes for signals that have no outcome yet; use latest price at or before signal time."""
-    since = (datetime.utcnow() - timedelta(days=30)).isoformat() + "Z"
+    since = to_epoch(datetime.utcnow() - timedelta(days=30))
     with cursor() as cur:
         cur.execute(
-            """SELECT s.id, s.symbol, s.created_at
+            """SELECT s.id, s.symbol, s.created_at, s.created_epoch
              FROM signals s
              LEFT JOIN outcomes o ON o.signal_id = s.id
-             WHERE s.created_at >= ? AND o.id IS NULL""",
+             WHERE s.created_epoch >= ? AND o.id IS NULL""",
             (since,),
         )
         rows = cur.fetchall()
@@ -57,8 +135,8 @@ def _outcome_backfill() -> None:
         signal_id, symbol, created_at = r[0], r[1], r[2]
         with cursor() as c2:
             c2.execute(
-                "SELECT close FROM prices WHERE symbol = ? AND dt <= ? ORDER BY dt DESC LIMIT 1",
-                (symbol, created_at),
+                "SELECT close FROM prices WHERE symbol = ? AND dt_epoch <= ? ORDER BY dt_epoch DESC LIMIT 1",
+                (symbol, r[3]),
             )
             row2 = c2.fetchone()
         price_at_signal = float(row2[0]) if row2 and row2[0] is not None else None
@@ -84,12 +162,13 @@ def _tick() -> None:
         if df_latest is not None and not df_latest.empty:
             with cursor() as cur:
                 insert_prices(cur, df_latest)
+            sync_from_db()
     except Exception as e:
         logger.warning("Fetch latest failed: %s", e)
 
-    # 2) Daily for features
+    # 2) Daily for features (cached; only recent days refetched once warm)
     try:
-        df_daily = fetch_daily_for_features(symbols, days=30)
+        df_daily = _fetch_daily_cached(symbols)
     except Exception as e:
         logger.warning("Fetch daily failed: %s", e)
         df_daily = pd.DataFrame()
@@ -113,40 +192,191 @@ def _tick() -> None:
 
     # 6) Confidence, store, alert
     now_dt = datetime.utcnow().isoformat() + "Z"
+    n_stored = 0
     for r in results:
-        confidence = compute_confidence(r.symbol, r.score, features_by_symbol.get(r.symbol, {}), now_dt)
-        severity = severity_from_score(r.score)
-        signal_type = getattr(r, "signal_type", None) or infer_signal_type(r.signals)
-        try:
-            with cursor() as cur:
-                signal_id = insert_signal(
-                    cur,
-                    r.symbol,
-                    r.score,
-                    r.explanation,
-                    json.dumps(r.signals),
-                    signal_type=signal_type,
-                    confidence=confidence,
-                    severity=severity,
-                )
-            # Outcome backfill: we need price_at_signal. Use latest close from daily for this symbol.
-            sub = df_daily[df_daily["symbol"] == r.symbol] if not df_daily.empty else pd.DataFrame()
-            if not sub.empty and "Close" in sub.columns:
-                price_at_signal = float(sub["Close"].iloc[-1])
-                if price_at_signal > 0:
-                    update_outcomes_for_signal(signal_id, r.symbol, now_dt, price_at_signal)
-        except Exception as e:
-            logger.warning("Insert signal failed %s: %s", r.symbol, e)
+        stored = _store_result(r, features_by_symbol, df_daily, now_dt)
+        if stored is None:
             continue
-
+        confidence, signal_type, was_stored = stored
+        n_stored += was_stored
         # Alert only if both friction and confidence above threshold, and dedup allows
-        if r.score >= FRICTION_ALERT_THRESHOLD and should_alert_by_confidence(confidence):
+        if _is_alert_candidate(r, confidence, signal_type):
             headline = r.signals[0] if r.signals else None
-            dispatch_friction(r.symbol, r.score, r.explanation, headline, signal_type)
+            if ALERT_OUTBOX_ENABLED:
+                enqueue_friction(r.symbol, r.score, r.explanation, headline, signal_type, confidence)
+            else:
+                dispatch_friction(r.symbol, r.score, r.explanation, headline, signal_type, confidence)
+
+    _record_tick_stats(now_dt, results, n_stored)
+
+    # 7) Intraday outcomes (+30m, +1h, +close) for recent signals from the 5m bars
+    update_intraday_outcomes()
 
     log_heartbeat("ok", f"friction_computed={len(results)}")
 
 
+def _is_alert_candidate(r: FrictionResult, confidence: float, signal_type: str) -> bool:
+    """Friction and confidence above threshold, and not within SIGNAL_COOLDOWN_MINUTES (in-memory check)."""
+    if r.score < FRICTION_ALERT_THRESHOLD or not should_alert_by_confidence(confidence):
+        return False
+    if in_signal_cooldown(r.symbol, signal_type):
+        logger.debug("Signal cooldown: %s %s", r.symbol, signal_type)
+        return False
+    return True
+
+
+def _should_store(symbol: str, score: float, signal_type: str, severity: int) -> bool:
+    """
+    Whether a result is persisted under SIGNAL_STORAGE_MODE: every result (all), score > 0 (nonzero), or
+    only when a signal appears, changes type or escalates severity for the symbol (transitions).
+    """
+    if SIGNAL_STORAGE_MODE == "all":
+        return True
+    prev = _signal_state.get(symbol)
+    _signal_state[symbol] = (signal_type, severity) if score > 0 else None
+    if score <= 0:
+        return False
+    if SIGNAL_STORAGE_MODE != "transitions":
+        return True
+    return prev is None or prev[0] != signal_type or severity > prev[1]
+
+
+def _record_tick_stats(now_dt: str, results: List[FrictionResult], stored: int) -> None:
+    """Per-tick counters; zero-score results are summarized here rather than stored."""
+    try:
+        with cursor() as cur:
+            insert_tick_stats(
+                cur,
+                to_epoch(now_dt),
+                len(results),
+                sum(1 for r in results if r.score > 0),
+                stored,
+                max((r.score for r in results), default=None),
+            )
+    except Exception as e:
+        logger.warning("Tick stats failed: %s", e)
+
+
+def _store_result(
+    r: FrictionResult,
+    features_by_symbol: Dict[str, Dict[str, float]],
+    df_daily: pd.DataFrame,
+    now_dt: str,
+) -> Optional[Tuple[float, str, bool]]:
+    """
+    Confidence + insert signal + outcome row for one result (if SIGNAL_STORAGE_MODE keeps it).
+    Returns (confidence, signal_type, stored) or None on failure.
+    """
+    confidence = compute_confidence(r.symbol, r.score, features_by_symbol.get(r.symbol, {}), now_dt)
+    severity = severity_from_score(r.score)
+    signal_type = getattr(r, "signal_type", None) or infer_signal_type(r.signals)
+    if not _should_store(r.symbol, r.score, signal_type, severity):
+        return confidence, signal_type, False
+    try:
+        with cursor() as cur:
+            signal_id = insert_signal(
+                cur,
+                r.symbol,
+                r.score,
+                r.explanation,
+                json.dumps(r.signals),
+                signal_type=signal_type,
+                confidence=confidence,
+                severity=severity,
+            )
+        # Outcome backfill: we need price_at_signal. Use latest close from daily for this symbol.
+        sub = df_daily[df_daily["symbol"] == r.symbol] if not df_daily.empty else pd.DataFrame()
+        if not sub.empty and "Close" in sub.columns:
+            price_at_signal = float(sub["Close"].iloc[-1])
+            if price_at_signal > 0:
+                update_outcomes_for_signal(signal_id, r.symbol, now_dt, price_at_signal)
+    except Exception as e:
+        logger.warning("Insert signal failed %s: %s", r.symbol, e)
+        return None
+    return confidence, signal_type, True
+
+
+async def _tick_async() -> None:
+    """Async _tick: network I/O concurrent on the event loop; pandas/SQLite in worker threads."""
+    import asyncio
+    from core.async_http import run_blocking
+    from core.data_fetcher import fetch_daily_for_features_async, fetch_latest_bars_async
+    from engine.friction_engine import compute_friction_batch_async
+    from alerts.dispatcher import dispatch_friction_async
+
+    symbols = get_watchlist()
+    if not symbols:
+        logger.warning("Watchlist empty; skip tick")
+        return
+
+    await run_blocking(log_heartbeat, "tick_start", f"symbols={len(symbols)}")
+
+    # 1+2) Latest bars and daily history (cached) fetched concurrently
+    refresh, full = _daily_fetch_plan(symbols)
+    latest, daily_refresh, daily_full = await asyncio.gather(
+        fetch_latest_bars_async(symbols, interval_min=5),
+        fetch_daily_for_features_async(refresh, days=DAILY_REFRESH_DAYS),
+        fetch_daily_for_features_async(full, days=DAILY_HISTORY_DAYS),
+        return_exceptions=True,
+    )
+    if isinstance(latest, Exception):
+        logger.warning("Fetch latest failed: %s", latest)
+    elif latest is not None and not latest.empty:
+        def _store_prices() -> None:
+            with cursor() as cur:
+                insert_prices(cur, latest)
+            sync_from_db()
+        await run_blocking(_store_prices)
+    daily_frames = []
+    for part in (daily_refresh, daily_full):
+        if isinstance(part, Exception):
+            logger.warning("Fetch daily failed: %s", part)
+        else:
+            daily_frames.append(part)
+    df_daily = await run_blocking(_merge_daily_cache, daily_frames, symbols)
+    if df_daily is None or df_daily.empty:
+        await run_blocking(log_heartbeat, "no_data", "daily fetch empty")
+        return
+
+    # 3+4) Features and risk filter
+    features_by_symbol = await run_blocking(build_features_for_symbols, df_daily, symbols, 20)
+    if not features_by_symbol:
+        await run_blocking(log_heartbeat, "no_features", "build_features empty")
+        return
+    symbols_passed = apply_risk_filters(symbols, features_by_symbol)
+    features_by_symbol = {k: v for k, v in features_by_symbol.items() if k in symbols_passed}
+
+    # 5) Friction (news for all symbols concurrently)
+    results = await compute_friction_batch_async(features_by_symbol, fetch_news=True)
+
+    # 6) Store in a worker thread; alerts go out concurrently
+    now_dt = datetime.utcnow().isoformat() + "Z"
+    alerts = []
+    n_stored = 0
+    for r in results:
+        stored = await run_blocking(_store_result, r, features_by_symbol, df_daily, now_dt)
+        if stored is None:
+            continue
+        confidence, signal_type, was_stored = stored
+        n_stored += was_stored
+        if _is_alert_candidate(r, confidence, signal_type):
+            headline = r.signals[0] if r.signals else None
+            if ALERT_OUTBOX_ENABLED:
+                await run_blocking(
+                    enqueue_friction, r.symbol, r.score, r.explanation, headline, signal_type, confidence
+                )
+            else:
+                alerts.append(
+                    dispatch_friction_async(r.symbol, r.score, r.explanation, headline, signal_type, confidence)
+                )
+    if alerts:
+        await asyncio.gather(*alerts, return_exceptions=True)
+    await run_blocking(_record_tick_stats, now_dt, results, n_stored)
+
+    await run_blocking(update_intraday_outcomes)
+    await run_blocking(log_heartbeat, "ok", f"friction_computed={len(results)}")
+
+
 def run_backup_cycle() -> None:
     """Run local + optional Drive backup."""
     try:
@@ -158,12 +388,14 @@ def run_backup_cycle() -> None:
 
 
 def run_daily_tasks(tick_count: int) -> None:
-    """Daily heartbeat, outcome backfill, weekly/monthly reports."""
+    """Daily heartbeat, outcome backfill, confidence rollup, compaction (incl. hot price pruning), weekly/monthly reports."""
     maybe_send_daily_heartbeat()
     try:
         _outcome_backfill()
     except Exception as e:
         logger.warning("Outcome backfill failed: %s", e)
+    roll_up_confidence()
+    run_compaction()
     now = datetime.utcnow()
     if now.weekday() == WEEKLY_REPORT_DAY and now.hour == 4:
         try:
@@ -181,24 +413,86 @@ def run_once() -> None:
     """Single run (for testing or cron-style)."""
     init_db()
     _tick()
+    if ALERT_OUTBOX_ENABLED:
+        drain_outbox()
+    wait_for_notes()
+    flush_pending_alerts(force=True)
+    if ALERT_OUTBOX_ENABLED:
+        settle_delivered()
+    close_smtp()
 
 
 def run_forever(backup_interval_ticks: int = 20, daily_task_interval_ticks: int = 60) -> None:
     """Run adaptive loop forever. Backup and daily tasks on intervals."""
     init_db()
+    from engine.checkpoint import restore_checkpoint, save_checkpoint
     from engine.scheduler import run_adaptive_loop
 
-    tick_count = [0]
+    restore_checkpoint()
+    if ALERT_OUTBOX_ENABLED:
+        start_workers()
 
     def on_tick() -> None:
-        tick_count[0] += 1
+        global _tick_count, _last_tick_ts
+        _tick_count += 1
         _tick()
-        if tick_count[0] % backup_interval_ticks == 0:
+        _last_tick_ts = datetime.utcnow().isoformat() + "Z"
+        flush_pending_alerts()
+        if _tick_count % backup_interval_ticks == 0:
             run_backup_cycle()
-        if tick_count[0] % daily_task_interval_ticks == 0:
-            run_daily_tasks(tick_count[0])
+        if _tick_count % daily_task_interval_ticks == 0:
+            run_daily_tasks(_tick_count)
+        if _tick_count % CHECKPOINT_INTERVAL_TICKS == 0:
+            save_checkpoint()
 
     def on_error(exc: Exception) -> None:
         log_heartbeat("error", str(exc)[:200])
 
-    run_adaptive_loop(on_tick, on_error=on_error)
+    try:
+        run_adaptive_loop(on_tick, on_error=on_error)
+    finally:
+        stop_workers()
+        wait_for_notes(timeout=10)  # late AI notes land in the buffers that get checkpointed
+        close_smtp()
+        save_checkpoint()
+
+
+async def run_forever_async(
+    backup_interval_ticks: int = 20,
+    daily_task_interval_ticks: int = 60,
+    tick_timeout_sec: float = 600,
+) -> None:
+    """Asyncio run_forever: same cadence and side tasks; blocking jobs run in worker threads."""
+    from core.async_http import close_session, run_blocking
+    from engine.checkpoint import restore_checkpoint, save_checkpoint
+    from engine.scheduler import run_adaptive_loop_async
+
+    await run_blocking(init_db)
+    await run_blocking(restore_checkpoint)
+    if ALERT_OUTBOX_ENABLED:
+        start_workers()
+
+    async def on_tick() -> None:
+        global _tick_count, _last_tick_ts
+        _tick_count += 1
+        await _tick_async()
+        _last_tick_ts = datetime.utcnow().isoformat() + "Z"
+        await run_blocking(flush_pending_alerts)
+        if _tick_count % backup_interval_ticks == 0:
+            await run_blocking(run_backup_cycle)
+        if _tick_count % daily_task_interval_ticks == 0:
+            await run_blocking(run_daily_tasks, _tick_count)
+        if _tick_count % CHECKPOINT_INTERVAL_TICKS == 0:
+            await run_blocking(save_checkpoint)
+
+    def on_error(exc: Exception) -> None:
+        log_heartbeat("error", str(exc)[:200])
+
+    try:
+        await run_adaptive_loop_async(on_tick, on_error=on_error, tick_timeout_sec=tick_timeout_sec)
+    finally:
+        stop_workers()
+        wait_for_notes(timeout=10)  # late AI notes land in the buffers that get checkpointed
+        close_smtp()
+        save_checkpoint()
+        await close_session()
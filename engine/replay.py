@@ -0,0 +1,461 @@
+"""
+MNEMOS 2.1 - Historical replay backtester: re-runs features -> risk filter -> friction -> confidence over the
+local bar store, one point-in-time tick at a time, so a rule or threshold change can be evaluated on past data.
+Features for every tick come from one vectorized pass along the time axis (the values build_features_for_symbols
+gives on the bars visible at that tick); rule scoring runs in a process pool over symbol shards.
+Fully offline: bars come from the prices table (or a supplied frame); news is not replayed.
+"""
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config.settings import (
+    BAR_INTERVAL_MIN,
+    CONFIDENCE_ALERT_THRESHOLD,
+    CONFIDENCE_MIN_SAMPLES_FOR_WINRATE,
+    FRICTION_ALERT_THRESHOLD,
+    MARKET_CLOSE_HOUR,
+    MARKET_CLOSE_MIN,
+    REPLAY_WORKERS,
+    REPORTS_DIR,
+    SIGNAL_COOLDOWN_MINUTES,
+    SIGNAL_STORAGE_MODE,
+)
+from analytics.event_study import BENCHMARK_SYMBOL, event_returns, panel_from_bars
+from engine import backtest_cache
+from engine.backtest import export_once
+from engine.confidence_engine import combine_confidence
+from alerts.dedup import severity_from_score
+from storage.bar_store import load_bars
+from storage.db import cursor, price_range_watermark
+
+logger = logging.getLogger(__name__)
+
+OHLCV = ["Open", "High", "Low", "Close", "Volume"]
+FEATURES = ["price_change_1d_pct", "price_change_5d_pct", "volume_ratio", "volatility_pct", "sector_relative_1d"]
+HORIZONS = (1, 3, 5)
+
+
+def replay_config(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Strategy config (same keys as strategy_versions.config_json) with live defaults filled in."""
+    cfg = {
+        "friction_threshold": FRICTION_ALERT_THRESHOLD,
+        "confidence_threshold": CONFIDENCE_ALERT_THRESHOLD,
+        "lookback_days": 20,
+        "cooldown_minutes": SIGNAL_COOLDOWN_MINUTES,
+        "min_samples_winrate": CONFIDENCE_MIN_SAMPLES_FOR_WINRATE,
+        "rule_params": None,  # overrides for friction_engine.RULE_PARAMS
+        "confidence_weights": None,  # replaces confidence_engine.CONFIDENCE_WEIGHTS
+        "storage_mode": SIGNAL_STORAGE_MODE,  # which results feed the win rate, as stored live
+    }
+    cfg.update({k: v for k, v in (config or {}).items() if v is not None})
+    return cfg
+
+
+def load_bar_history(
+    symbols: Optional[Sequence[str]] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+) -> pd.DataFrame:
+    """Bars from the bar store and recent SQLite bars (symbol, datetime, Open, High, Low, Close, Volume)."""
+    return load_bars(symbols, since, until)
+
+
+def daily_bars(bars: pd.DataFrame) -> pd.DataFrame:
+    """Intraday or daily bars -> one completed bar per symbol and day (symbol, day, OHLCV)."""
+    b = bars.dropna(subset=["Close"]).sort_values(["symbol", "datetime"])
+    b = b.assign(day=pd.to_datetime(b["datetime"]).dt.normalize())
+    daily = b.groupby(["symbol", "day"], sort=True).agg(
+        Open=("Open", "first"), High=("High", "max"), Low=("Low", "min"), Close=("Close", "last"),
+        Volume=("Volume", lambda v: v.sum(min_count=1)),
+    )
+    return daily.reset_index()
+
+
+def tick_snapshots(bars: pd.DataFrame, daily: pd.DataFrame, tick: str = "daily") -> pd.DataFrame:
+    """
+    The current day's bar as visible at each tick (symbol, day, tick, Close, Volume).
+    daily: one tick per session close. intraday: one tick per bar end, with the day's bar built only from
+    the bars completed so far (running close and volume).
+    """
+    if tick == "daily":
+        close_at = pd.Timedelta(hours=MARKET_CLOSE_HOUR, minutes=MARKET_CLOSE_MIN)
+        return daily[["symbol", "day", "Close", "Volume"]].assign(tick=daily["day"] + close_at)
+    if tick != "intraday":
+        raise ValueError(f"tick must be 'daily' or 'intraday', got {tick!r}")
+    b = bars.dropna(subset=["Close"]).sort_values(["symbol", "datetime"])
+    b = b.assign(day=pd.to_datetime(b["datetime"]).dt.normalize())
+    volume = b.groupby(["symbol", "day"], sort=False)["Volume"].cumsum()
+    return pd.DataFrame({
+        "symbol": b["symbol"].to_numpy(),
+        "day": b["day"].to_numpy(),
+        "Close": b["Close"].to_numpy(dtype=float),
+        "Volume": volume.to_numpy(dtype=float),
+        "tick": (pd.to_datetime(b["datetime"]) + pd.Timedelta(minutes=BAR_INTERVAL_MIN)).to_numpy(),
+    })
+
+
+def _history_stats(daily: pd.DataFrame, lookback_days: int) -> pd.DataFrame:
+    """Per (symbol, day): what the completed days strictly before `day` contribute to each feature."""
+    d = daily.sort_values(["symbol", "day"]).reset_index(drop=True)
+    g = d.groupby("symbol", sort=False)
+    ret = d["Close"] / g["Close"].shift(1) - 1.0
+    vol_n = max(1, lookback_days - 1)  # rolling volume mean = previous days + the current bar
+    ret_n = max(1, min(10, lookback_days + 4) - 1)  # volatility window = previous returns + the current one
+
+    def prior(s: pd.Series, n: int, how: str) -> pd.Series:
+        return s.groupby(d["symbol"], sort=False).transform(
+            lambda x: getattr(x.rolling(n, min_periods=1), how)().shift(1)
+        )
+
+    return pd.DataFrame({
+        "symbol": d["symbol"],
+        "day": d["day"],
+        "n_prev": g.cumcount(),
+        "close_1": g["Close"].shift(1),
+        "close_5": g["Close"].shift(5),
+        "vol_sum": prior(d["Volume"], vol_n, "sum"),
+        "vol_cnt": prior(d["Volume"], vol_n, "count"),
+        "ret_sum": prior(ret, ret_n, "sum"),
+        "ret_sq": prior(ret * ret, ret_n, "sum"),
+        "ret_cnt": prior(ret, ret_n, "count"),
+    })
+
+
+def replay_features(daily: pd.DataFrame, snaps: pd.DataFrame, lookback_days: int = 20) -> pd.DataFrame:
+    """
+    Features for every snapshot in one pass: the visible series is the completed days before the snapshot's day
+    plus the snapshot itself. Sector-relative strength is against the symbols that have a bar at the same tick.
+    """
+    s = snaps.merge(_history_stats(daily, lookback_days), on=["symbol", "day"], how="left")
+    cur_c, cur_v = s["Close"].to_numpy(dtype=float), s["Volume"].to_numpy(dtype=float)
+    n_prev = s["n_prev"].fillna(0).to_numpy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        c1, c5 = s["close_1"].to_numpy(dtype=float), s["close_5"].to_numpy(dtype=float)
+        ret1 = np.where((n_prev >= 1) & (c1 != 0), (cur_c - c1) / c1 * 100.0, np.nan)
+        ret5 = np.where((n_prev >= 5) & (c5 != 0), (cur_c - c5) / c5 * 100.0, np.nan)
+
+        mean_v = (s["vol_sum"].fillna(0).to_numpy() + cur_v) / (s["vol_cnt"].fillna(0).to_numpy() + 1)
+        vr = np.where(mean_v == 0, np.nan, cur_v / mean_v)
+        vr = np.where(cur_v == 0, 0.0, vr)
+        vr = np.where(n_prev >= 1, vr, np.nan)
+
+        r = cur_c / c1 - 1.0
+        k = s["ret_cnt"].fillna(0).to_numpy() + 1
+        total = s["ret_sum"].fillna(0).to_numpy() + r
+        sq = s["ret_sq"].fillna(0).to_numpy() + r * r
+        var = np.maximum(sq - total * total / k, 0.0) / (k - 1)
+        vol = np.where(n_prev >= 2, np.sqrt(var) * 100.0, np.nan)
+
+    out = s[["symbol", "day", "tick", "Close"]].copy()
+    out["price_change_1d_pct"] = ret1
+    out["price_change_5d_pct"] = ret5
+    out["volume_ratio"] = vr
+    out["volatility_pct"] = vol
+    out["sector_relative_1d"] = ret1 - out.groupby("tick")["price_change_1d_pct"].transform("mean").to_numpy()
+    return out.sort_values(["tick", "symbol"]).reset_index(drop=True)
+
+
+def _score_shard(shard: Tuple[np.ndarray, np.ndarray, np.ndarray, Optional[Dict[str, float]]]) -> List[Tuple]:
+    """
+    Risk filter + friction rules + confidence components for one symbol shard (runs in a worker process).
+    Returns (row, passed, score, signal_type, liquidity, volatility, data_quality) per row.
+    """
+    from engine.confidence_engine import data_quality_score, liquidity_score, volatility_score
+    from engine.friction_engine import compute_friction
+    from risk.governance import apply_risk_filters
+
+    rows, symbols, values, rule_params = shard
+    out: List[Tuple] = []
+    for i, sym, vals in zip(rows, symbols, values):
+        feats = features_dict(vals)
+        if not apply_risk_filters([sym], {sym: feats}):
+            out.append((int(i), False, 0.0, "", 0.0, 0.0, 0.0))
+            continue
+        r = compute_friction(sym, feats, headlines=[], fetch_if_missing=False, params=rule_params)
+        out.append((int(i), True, r.score, r.signal_type, liquidity_score(feats), volatility_score(feats),
+                    data_quality_score(feats)))
+    return out
+
+
+def features_dict(vals: np.ndarray) -> Dict[str, float]:
+    """One row of FEATURES values -> the feats dict build_features_for_symbols would produce."""
+    feats = {k: float(v) for k, v in zip(FEATURES[:4], vals[:4])}
+    if vals[4] == vals[4]:
+        feats["sector_relative_1d"] = float(vals[4])
+    return feats
+
+
+def score_ticks(
+    feats: pd.DataFrame,
+    workers: Optional[int] = None,
+    rule_params: Optional[Dict[str, float]] = None,
+) -> pd.DataFrame:
+    """Run the rule pipeline for every (tick, symbol), sharded by symbol across a process pool."""
+    workers = workers if workers is not None else (REPLAY_WORKERS or os.cpu_count() or 1)
+    symbols = sorted(feats["symbol"].unique())
+    n_shards = max(1, min(workers, len(symbols)))
+    shard_of = {s: i % n_shards for i, s in enumerate(symbols)}
+    keys = feats["symbol"].map(shard_of).to_numpy()
+    values = feats[FEATURES].to_numpy(dtype=float)
+    sym = feats["symbol"].to_numpy()
+    shards = []
+    for k in range(n_shards):
+        idx = np.flatnonzero(keys == k)
+        shards.append((idx, sym[idx], values[idx], rule_params))
+    results: List[List[Tuple]] = []
+    if n_shards > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=n_shards) as pool:
+                results = list(pool.map(_score_shard, shards))
+        except Exception as e:
+            logger.warning("Replay process pool failed (%s); scoring in-process", e)
+            results = []
+    if not results:
+        results = [_score_shard(sh) for sh in shards]
+    cols = ["row", "passed", "score", "signal_type", "liquidity", "volatility", "data_quality"]
+    scored = pd.DataFrame([t for part in results for t in part], columns=cols).set_index("row").sort_index()
+    return feats.join(scored)
+
+
+def storage_mask(df: pd.DataFrame, mode: str = SIGNAL_STORAGE_MODE) -> np.ndarray:
+    """Rows the live tick would persist as signals under a SIGNAL_STORAGE_MODE (orchestrator._should_store)."""
+    passed = df["passed"].to_numpy(dtype=bool)
+    if mode == "all":
+        return passed
+    nonzero = passed & (df["score"].to_numpy(dtype=float) > 0)
+    if mode != "transitions":
+        return nonzero
+    sub = df.loc[passed, ["symbol", "tick", "signal_type", "score"]].sort_values(["symbol", "tick"], kind="stable")
+    sub["nz"] = sub["score"] > 0
+    sub["sev"] = [severity_from_score(x) for x in sub["score"]]
+    g = sub.groupby("symbol", sort=False)
+    prev_nz = g["nz"].shift(1, fill_value=False).astype(bool)
+    edge = sub["nz"] & (~prev_nz | (g["signal_type"].shift(1) != sub["signal_type"]) | (sub["sev"] > g["sev"].shift(1)))
+    return edge.reindex(df.index, fill_value=False).to_numpy(dtype=bool)
+
+
+def _point_in_time_win_rate(
+    df: pd.DataFrame, day_idx: np.ndarray, min_samples: int, stored: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Per row, the symbol's 1D win rate (0-1) over earlier stored ticks whose 1D outcome was already known
+    (outcome day strictly before the row's day); 0.5 below min_samples, as in the live win-rate component.
+    stored: rows persisted as signals (default: every evaluated tick).
+    """
+    wr = np.full(len(df), 0.5)
+    ret = df["return_1d"].to_numpy(dtype=float)
+    stored = df["passed"].to_numpy(dtype=bool) if stored is None else stored
+    for _, pos in df.groupby("symbol", sort=False).indices.items():
+        known = pos[stored[pos] & ~np.isnan(ret[pos])]
+        if len(known) == 0:
+            continue
+        order = np.argsort(day_idx[known] + 1, kind="stable")
+        known_day = (day_idx[known] + 1)[order]
+        wins = np.concatenate([[0], np.cumsum(ret[known][order] > 0)])
+        n = np.searchsorted(known_day, day_idx[pos], side="left")
+        ok = n >= max(1, min_samples)
+        wr[pos] = np.where(ok, wins[n] / np.maximum(n, 1), 0.5)
+    return wr
+
+
+def cooldown_mask(
+    symbols: np.ndarray, types: np.ndarray, ticks: np.ndarray, mask: np.ndarray, minutes: int
+) -> np.ndarray:
+    """Clear alerts within `minutes` of the previous kept alert for the same (symbol, signal_type). ticks in minutes."""
+    if minutes <= 0 or not mask.any():
+        return mask
+    keep = mask.copy()
+    last: Dict[Tuple[Any, Any], float] = {}
+    idx = np.flatnonzero(mask)
+    for i in idx[np.argsort(ticks[idx], kind="stable")]:
+        key = (symbols[i], types[i])
+        if key in last and ticks[i] - last[key] < minutes:
+            keep[i] = False
+        else:
+            last[key] = ticks[i]
+    return keep
+
+
+def alert_metrics(returns_1d: np.ndarray) -> Dict[str, Any]:
+    """Count, 1D win rate / average return (percent) and t-statistic of the alerts' 1D returns."""
+    r = returns_1d[~np.isnan(returns_1d)]
+    n = len(r)
+    sd = float(r.std(ddof=1)) if n > 1 else 0.0
+    return {
+        "sample_count": n,
+        "win_rate_1d": round(float((r > 0).mean() * 100.0), 2) if n else None,
+        "avg_return_1d": round(float(r.mean()), 2) if n else None,
+        "t_stat_1d": round(float(r.mean() / sd * np.sqrt(n)), 3) if sd > 0 else None,
+    }
+
+
+def _bar_range(since: str, until: Optional[str], lookback: int) -> Tuple[str, Optional[str]]:
+    """Stored-bar range a replay of [since, until) reads: lookback lead-in and forward-return tail."""
+    lead_in = (pd.Timestamp(since[:10]) - pd.Timedelta(days=lookback * 2 + 20)).strftime("%Y-%m-%d")
+    if not until:
+        return lead_in, None
+    return lead_in, (pd.Timestamp(until[:10]) + pd.Timedelta(days=max(HORIZONS) * 2 + 10)).strftime("%Y-%m-%d")
+
+
+def replay_frame(
+    since: str,
+    until: Optional[str] = None,
+    config: Optional[Dict[str, Any]] = None,
+    tick: str = "daily",
+    symbols: Optional[Sequence[str]] = None,
+    bars: Optional[pd.DataFrame] = None,
+    workers: Optional[int] = None,
+    benchmark: Optional[str] = BENCHMARK_SYMBOL,
+) -> pd.DataFrame:
+    """
+    One row per evaluated (tick, symbol) in [since, until): features, risk pass, friction score / signal_type,
+    confidence components, point-in-time win rate, confidence and forward returns (return_{h}d, from the tick price).
+    bars: cached bars to replay (symbol, datetime, OHLCV); default is the local prices table.
+    """
+    cfg = replay_config(config)
+    lookback = int(cfg["lookback_days"])
+    start = pd.Timestamp(since[:10])
+    end = pd.Timestamp(until[:10]) if until else None
+    if bars is None:
+        lead_in, tail = _bar_range(since, until, lookback)
+        bars = load_bar_history(sorted(set(symbols) | {benchmark}) if symbols and benchmark else symbols, lead_in, tail)
+    elif symbols:
+        bars = bars[bars["symbol"].isin(set(symbols) | {benchmark})]
+    if bars is None or bars.empty:
+        return pd.DataFrame()
+
+    daily = daily_bars(bars)
+    snaps = tick_snapshots(bars, daily, tick)
+    if benchmark and not (symbols and benchmark in symbols):
+        snaps = snaps[snaps["symbol"] != benchmark]
+    feats = replay_features(daily, snaps, lookback)
+    in_range = feats["day"] >= start
+    if end is not None:
+        in_range &= feats["day"] < end
+    feats = feats[in_range].reset_index(drop=True)
+    if feats.empty:
+        return pd.DataFrame()
+    df = score_ticks(feats, workers, cfg.get("rule_params"))
+
+    panel = panel_from_bars(daily.rename(columns={"day": "datetime", "High": "high", "Low": "low", "Close": "close"}))
+    days = df["day"].to_numpy().astype("datetime64[D]")
+    fwd = event_returns(panel, df["symbol"].tolist(), days, HORIZONS, benchmark)
+    entry = np.array([panel.close[r, panel.column(s)] if r >= 0 else np.nan for r, s in
+                      zip(np.searchsorted(panel.days, days, side="right") - 1, df["symbol"])])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        factor = entry / df["Close"].to_numpy(dtype=float)  # rebase from the day's close to the tick price
+        for h in HORIZONS:
+            df[f"return_{h}d"] = ((1.0 + fwd[f"ret_{h}d"].to_numpy() / 100.0) * factor - 1.0) * 100.0
+
+    return apply_confidence(df, cfg)
+
+
+def apply_confidence(df: pd.DataFrame, config: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """
+    (Re)compute a replay frame's point-in-time win rate and confidence in place. Days are ordered by the frame's
+    own trading days, so pieces replayed separately and concatenated in time order score like one replay.
+    """
+    cfg = replay_config(config)
+    day_idx = df["day"].rank(method="dense").to_numpy(dtype=np.int64) - 1
+    df["win_rate"] = _point_in_time_win_rate(df, day_idx, int(cfg["min_samples_winrate"]),
+                                             storage_mask(df, cfg["storage_mode"]))
+    conf = combine_confidence(df["score"].to_numpy(dtype=float), df["liquidity"].to_numpy(dtype=float),
+                              df["volatility"].to_numpy(dtype=float), df["data_quality"].to_numpy(dtype=float),
+                              df["win_rate"].to_numpy(dtype=float), cfg.get("confidence_weights"))
+    df["confidence"] = np.where(df["passed"].to_numpy(dtype=bool), np.round(conf, 3), 0.0)
+    return df
+
+
+def summarize_replay(df: pd.DataFrame, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Alerts of a replay frame under the config thresholds + cooldown -> run_backtest-shaped result."""
+    cfg = replay_config(config)
+    result: Dict[str, Any] = {"signals_count": 0, "config": cfg, "ticks": 0, "evaluated": 0, "by_type": {}, "rows": []}
+    if df.empty:
+        return result
+    mask = (df["passed"].to_numpy(dtype=bool) & (df["score"].to_numpy() >= cfg["friction_threshold"])
+            & (df["confidence"].to_numpy() >= cfg["confidence_threshold"]))
+    minutes = (df["tick"].to_numpy().astype("datetime64[m]").astype("int64")).astype(float)
+    mask = cooldown_mask(df["symbol"].to_numpy(), df["signal_type"].to_numpy(), minutes, mask,
+                         int(cfg["cooldown_minutes"]))
+    alerts = df[mask]
+    rows: List[Dict[str, Any]] = [
+        {
+            "symbol": a.symbol,
+            "tick": a.tick.isoformat(),
+            "score": a.score,
+            "signal_type": a.signal_type,
+            "confidence": a.confidence,
+            "price": a.Close,
+            **{f"return_{h}d": None if pd.isna(getattr(a, f"return_{h}d")) else round(getattr(a, f"return_{h}d"), 4)
+               for h in HORIZONS},
+        }
+        for a in alerts.itertuples(index=False)
+    ]
+    by_type: Dict[str, Dict[str, Any]] = {}
+    for st, grp in alerts.groupby("signal_type"):
+        m = alert_metrics(grp["return_1d"].to_numpy(dtype=float))
+        if m["sample_count"]:
+            by_type[st] = {k: m[k] for k in ("win_rate_1d", "avg_return_1d", "sample_count")}
+    overall = alert_metrics(alerts["return_1d"].to_numpy(dtype=float))
+    result.update({
+        "signals_count": len(rows),
+        "ticks": int(df["tick"].nunique()),
+        "evaluated": int(df["passed"].sum()),
+        "win_rate_1d": overall["win_rate_1d"],
+        "avg_return_1d": overall["avg_return_1d"],
+        "t_stat_1d": overall["t_stat_1d"],
+        "by_type": by_type,
+        "rows": rows,
+    })
+    return result
+
+
+def run_replay(
+    since: str,
+    until: Optional[str] = None,
+    config: Optional[Dict[str, Any]] = None,
+    tick: str = "daily",
+    symbols: Optional[Sequence[str]] = None,
+    bars: Optional[pd.DataFrame] = None,
+    workers: Optional[int] = None,
+    benchmark: Optional[str] = BENCHMARK_SYMBOL,
+    use_cache: bool = True,
+) -> Dict[str, Any]:
+    """
+    Replay ticks in [since, until) through the live pipeline with `config` (thresholds, rule_params,
+    confidence_weights). Returns the run_backtest result shape (signals_count, by_type, rows) plus replay totals.
+    Replays of the stored bars are cached by (config, rule-set version, bar watermark, range); passed-in bars are not.
+    """
+    key = scope = watermark = None
+    if use_cache and bars is None:
+        cfg = replay_config(config)
+        scope = backtest_cache.scope_key("replay", {"config": cfg, "tick": tick, "benchmark": benchmark,
+                                                    "symbols": sorted(symbols) if symbols else None})
+        with cursor() as cur:
+            watermark = price_range_watermark(cur, *_bar_range(since, until, int(cfg["lookback_days"])))
+        key = backtest_cache.cache_key(scope, since, until, watermark, backtest_cache.ruleset_version())
+        hit = backtest_cache.lookup(scope, key)
+        if hit is not None:
+            return {**hit, "cache_key": key, "cached": True}
+    started = datetime.utcnow().isoformat() + "Z"
+    df = replay_frame(since, until, config, tick, symbols, bars, workers, benchmark)
+    result = summarize_replay(df, config)
+    result.update({"since": since, "until": until, "tick": tick})
+    if key is not None:
+        backtest_cache.store(scope, key, since, until, watermark, result, started)
+    return {**result, "cache_key": key, "cached": False}
+
+
+def run_and_export_replay(since: str, output_dir: Optional[Path] = None, **kwargs: Any) -> Dict[str, Any]:
+    """Run a replay and export CSV + Markdown report (same writers as the signal backtest)."""
+    output_dir = output_dir or REPORTS_DIR
+    result = run_replay(since, **kwargs)
+    export_once(result, output_dir, "replay")
+    return result
@@ -1,45 +1,67 @@
 """
 MNEMOS 2.0 - Adaptive polling: market hours 2-3 min, off hours 30 min.
-Auto-resume on failure.
+Calendar-aware (NSE holidays/special sessions); market-hours ticks aligned just after bar closes;
+deep sleep across weekends and holidays. Auto-resume on failure.
 """
 import logging
+import math
 import time
 from datetime import datetime
-from typing import Callable, Optional
-
-import pytz
+from typing import Awaitable, Callable, Optional
 
 from config.settings import (
-    MARKET_OPEN_HOUR,
-    MARKET_OPEN_MIN,
-    MARKET_CLOSE_HOUR,
-    MARKET_CLOSE_MIN,
+    ALIGN_TICKS_TO_BARS,
+    BAR_CLOSE_DELAY_SEC,
+    BAR_INTERVAL_MIN,
     POLL_INTERVAL_MARKET_MIN,
     POLL_INTERVAL_OFF_MIN,
 )
+from engine.trading_calendar import IST, next_session_open, session_for, to_ist
 
 logger = logging.getLogger(__name__)
-IST = pytz.timezone("Asia/Kolkata")
 
 
 def is_market_hours(utc_now: Optional[datetime] = None) -> bool:
-    """True if NSE market is open (IST 9:15 - 15:30)."""
+    """True if NSE market is open (IST 9:15 - 15:30 on trading days, or a special session)."""
+    if utc_now is None:
+        utc_now = datetime.utcnow()
+    now_ist = to_ist(utc_now)
+    sess = session_for(now_ist.date())
+    return sess is not None and sess[0] <= now_ist < sess[1]
+
+
+def next_tick_delay_seconds(utc_now: Optional[datetime] = None) -> int:
+    """
+    Seconds until the next tick.
+    Market hours: just after the next bar close (or fixed interval if alignment disabled).
+    Trading day, outside session: off-hours interval, but wake for the open.
+    Weekend/holiday: deep sleep until the next session open.
+    """
     if utc_now is None:
         utc_now = datetime.utcnow()
-    now_ist = pytz.utc.localize(utc_now).astimezone(IST)
-    open_minutes = MARKET_OPEN_HOUR * 60 + MARKET_OPEN_MIN
-    close_minutes = MARKET_CLOSE_HOUR * 60 + MARKET_CLOSE_MIN
-    current_minutes = now_ist.hour * 60 + now_ist.minute
-    if now_ist.weekday() >= 5:  # Sat, Sun
-        return False
-    return open_minutes <= current_minutes < close_minutes
+    now_ist = to_ist(utc_now)
+    sess = session_for(now_ist.date())
+    if sess and sess[0] <= now_ist < sess[1]:
+        if not ALIGN_TICKS_TO_BARS:
+            return POLL_INTERVAL_MARKET_MIN * 60
+        bar_sec = BAR_INTERVAL_MIN * 60
+        elapsed = (now_ist - sess[0]).total_seconds()
+        k = math.floor((elapsed - BAR_CLOSE_DELAY_SEC) / bar_sec) + 1
+        target = min(k * bar_sec, (sess[1] - sess[0]).total_seconds()) + BAR_CLOSE_DELAY_SEC
+        return max(1, int(math.ceil(target - elapsed)))
+    off_sec = POLL_INTERVAL_OFF_MIN * 60
+    nxt = next_session_open(utc_now)
+    if nxt is None:
+        return off_sec
+    until_open = int(math.ceil((nxt - now_ist).total_seconds())) + BAR_CLOSE_DELAY_SEC
+    if sess is None:
+        return max(1, until_open)
+    return max(1, min(off_sec, until_open))
 
 
 def get_poll_interval_seconds() -> int:
-    """Current poll interval in seconds (market vs off hours)."""
-    if is_market_hours():
-        return POLL_INTERVAL_MARKET_MIN * 60
-    return POLL_INTERVAL_OFF_MIN * 60
+    """Current poll interval in seconds (market vs off hours, calendar-aware)."""
+    return next_tick_delay_seconds()
 
 
 def run_adaptive_loop(
@@ -66,5 +88,42 @@ def run_adaptive_loop(
                 except Exception:
                     pass
         interval = get_poll_interval_seconds()
-        logger.debug("Next tick in %s s (market=%s)", interval, is_market_hours())
+        if interval > POLL_INTERVAL_OFF_MIN * 60:
+            wake = time.time() + interval
+            logger.info("Market closed (weekend/holiday); sleeping %s s until %s", interval,
+                        datetime.fromtimestamp(wake, IST).strftime("%Y-%m-%d %H:%M IST"))
+        else:
+            logger.debug("Next tick in %s s (market=%s)", interval, is_market_hours())
         time.sleep(interval)
+
+
+async def run_adaptive_loop_async(
+    tick_coro: Callable[[], Awaitable[None]],
+    on_error: Optional[Callable[[Exception], None]] = None,
+    max_iterations: Optional[int] = None,
+    tick_timeout_sec: Optional[float] = None,
+) -> None:
+    """
+    Async run_adaptive_loop: await tick_coro every adaptive interval (asyncio.sleep, cancellable).
+    tick_timeout_sec: cancel a tick that runs longer than this.
+    """
+    import asyncio
+    count = 0
+    while True:
+        try:
+            await asyncio.wait_for(tick_coro(), timeout=tick_timeout_sec)
+            count += 1
+            if max_iterations is not None and count >= max_iterations:
+                break
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception("Scheduler tick failed: %s", e)
+            if on_error:
+                try:
+                    on_error(e)
+                except Exception:
+                    pass
+        interval = get_poll_interval_seconds()
+        logger.debug("Next tick in %s s (market=%s)", interval, is_market_hours())
+        await asyncio.sleep(interval)
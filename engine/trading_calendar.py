@@ -0,0 +1,89 @@
+"""
+MNEMOS 2.1 - NSE trading calendar: holidays and special sessions from a local JSON file.
+Weekends are closed unless listed as a special session (e.g. Muhurat trading).
+"""
+import json
+import logging
+from datetime import date, datetime, time as dtime, timedelta
+from typing import Dict, Optional, Set, Tuple
+
+import pytz
+
+from config.settings import (
+    MARKET_OPEN_HOUR,
+    MARKET_OPEN_MIN,
+    MARKET_CLOSE_HOUR,
+    MARKET_CLOSE_MIN,
+    NSE_CALENDAR_PATH,
+)
+
+logger = logging.getLogger(__name__)
+IST = pytz.timezone("Asia/Kolkata")
+
+_holidays: Optional[Set[date]] = None
+_special_sessions: Dict[date, Tuple[dtime, dtime]] = {}
+
+
+def _parse_hhmm(s: str) -> dtime:
+    h, m = s.strip().split(":")
+    return dtime(int(h), int(m))
+
+
+def load_calendar(force: bool = False) -> None:
+    """Load holidays and special sessions from NSE_CALENDAR_PATH (once). Missing file = weekdays only."""
+    global _holidays, _special_sessions
+    if _holidays is not None and not force:
+        return
+    holidays: Set[date] = set()
+    special: Dict[date, Tuple[dtime, dtime]] = {}
+    try:
+        raw = json.loads(NSE_CALENDAR_PATH.read_text(encoding="utf-8"))
+        for d in raw.get("holidays", []):
+            holidays.add(date.fromisoformat(d))
+        for d, sess in (raw.get("special_sessions") or {}).items():
+            special[date.fromisoformat(d)] = (_parse_hhmm(sess["open"]), _parse_hhmm(sess["close"]))
+        logger.info("NSE calendar loaded: %d holidays, %d special sessions", len(holidays), len(special))
+    except FileNotFoundError:
+        logger.warning("NSE calendar not found at %s; using weekdays only", NSE_CALENDAR_PATH)
+    except Exception as e:
+        logger.warning("NSE calendar load failed (%s); using weekdays only", e)
+    _holidays = holidays
+    _special_sessions = special
+
+
+def session_for(day: date) -> Optional[Tuple[datetime, datetime]]:
+    """(open, close) as aware IST datetimes for the given IST date, or None if market closed."""
+    load_calendar()
+    if day in _special_sessions:
+        open_t, close_t = _special_sessions[day]
+    elif day.weekday() >= 5 or day in (_holidays or set()):
+        return None
+    else:
+        open_t = dtime(MARKET_OPEN_HOUR, MARKET_OPEN_MIN)
+        close_t = dtime(MARKET_CLOSE_HOUR, MARKET_CLOSE_MIN)
+    return (
+        IST.localize(datetime.combine(day, open_t)),
+        IST.localize(datetime.combine(day, close_t)),
+    )
+
+
+def is_trading_day(day: date) -> bool:
+    """True if NSE has a session (regular or special) on this IST date."""
+    return session_for(day) is not None
+
+
+def to_ist(utc_now: datetime) -> datetime:
+    """Naive UTC (as used across MNEMOS) -> aware IST."""
+    return pytz.utc.localize(utc_now).astimezone(IST)
+
+
+def next_session_open(utc_now: datetime, max_days: int = 30) -> Optional[datetime]:
+    """First session open (aware IST) strictly after utc_now, looking ahead up to max_days."""
+    now_ist = to_ist(utc_now)
+    day = now_ist.date()
+    for _ in range(max_days + 1):
+        sess = session_for(day)
+        if sess and sess[0] > now_ist:
+            return sess[0]
+        day += timedelta(days=1)
+    return None
@@ -7,7 +7,7 @@ import sys
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from storage.db import cursor, insert_heartbeat
 
@@ -17,6 +17,17 @@ _LAST_HEARTBEAT: float = 0
 HEARTBEAT_INTERVAL_SEC = 120
 
 
+def get_state() -> Dict[str, Any]:
+    """Heartbeat throttle state for warm-restart checkpoints."""
+    return {"last_heartbeat": _LAST_HEARTBEAT}
+
+
+def load_state(state: Dict[str, Any]) -> None:
+    """Restore heartbeat throttle state from a checkpoint."""
+    global _LAST_HEARTBEAT
+    _LAST_HEARTBEAT = float(state.get("last_heartbeat") or 0)
+
+
 def log_heartbeat(status: str = "ok", message: Optional[str] = None) -> None:
     """Write heartbeat to DB and optionally stdout (for Colab visibility)."""
     global _LAST_HEARTBEAT
@@ -3,16 +3,27 @@ MNEMOS 2.1 - Daily heartbeat to Telegram: uptime summary, restart count, last st
 """
 import logging
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from config.settings import DAILY_HEARTBEAT_HOUR_UTC, TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
-from storage.db import cursor
+from storage.db import cursor, get_heartbeat_counts, to_epoch
 
 logger = logging.getLogger(__name__)
 
 _LAST_DAILY_SENT: Optional[datetime] = None
 
 
+def get_state() -> Dict[str, Any]:
+    """Last daily heartbeat time for warm-restart checkpoints."""
+    return {"last_daily_sent": _LAST_DAILY_SENT}
+
+
+def load_state(state: Dict[str, Any]) -> None:
+    """Restore last daily heartbeat time from a checkpoint."""
+    global _LAST_DAILY_SENT
+    _LAST_DAILY_SENT = state.get("last_daily_sent")
+
+
 def _send_telegram(text: str) -> bool:
     if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
         return False
@@ -41,14 +52,13 @@ def _get_heartbeat_summary() -> str:
     lines: list[str] = []
     try:
         with cursor() as cur:
-            cur.execute("SELECT status, COUNT(*) FROM heartbeats WHERE ts >= ? GROUP BY status", (since,))
-            for row in cur.fetchall():
-                lines.append(f"  {row[0]}: {row[1]}")
+            for status, n in get_heartbeat_counts(cur, to_epoch(since)).items():
+                lines.append(f"  {status}: {n}")
             cur.execute("SELECT COUNT(*) FROM restarts WHERE ts >= ?", (since,))
             r = cur.fetchone()
             restarts = r[0] if r else 0
             lines.append(f"  Restarts (24h): {restarts}")
-            cur.execute("SELECT ts, status, message FROM heartbeats ORDER BY ts DESC LIMIT 1")
+            cur.execute("SELECT ts, status, message FROM heartbeats ORDER BY ts_epoch DESC, id DESC LIMIT 1")
             last = cur.fetchone()
             if last:
                 lines.append(f"  Last: {last[1]} - {last[2] or ''}")
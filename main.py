@@ -7,6 +7,7 @@ Usage:
   python main.py --once      -> single tick then exit
   python main.py --test      -> 2 symbols, one tick, exit
   python main.py --no-supervisor -> run forever without supervisor (for Colab)
+  python main.py --async     -> asyncio runtime (concurrent I/O); combine with --no-supervisor
 """
 import argparse
 import logging
@@ -61,6 +62,7 @@ def main() -> None:
     parser.add_argument("--once", action="store_true", help="Run single tick then exit")
     parser.add_argument("--test", action="store_true", help="Test run: 2 symbols, one tick, exit")
     parser.add_argument("--no-supervisor", action="store_true", help="Do not use supervisor (for Colab)")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Asyncio runtime (run_forever_async)")
     args = parser.parse_args()
 
     _startup_checks()
@@ -78,12 +80,16 @@ def main() -> None:
         run_once()
         return
 
-    from engine.orchestrator import run_forever
+    from engine.orchestrator import run_forever, run_forever_async
     from health.supervisor import run_supervised
 
-    logger.info("Starting MNEMOS 2.1 (adaptive loop)")
+    logger.info("Starting MNEMOS 2.1 (adaptive loop%s)", ", asyncio" if args.use_async else "")
 
     def run_loop() -> None:
+        if args.use_async:
+            import asyncio
+            asyncio.run(run_forever_async(backup_interval_ticks=20, daily_task_interval_ticks=60))
+            return
         run_forever(backup_interval_ticks=20, daily_task_interval_ticks=60)
 
     if args.no_supervisor:
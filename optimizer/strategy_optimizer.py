@@ -1,13 +1,31 @@
 """
 MNEMOS 2.1 - Strategy optimizer: auto-tune thresholds, promote high-performing rules, deprecate weak rules, version strategies.
+Parameter sweeps (grid / random) over thresholds, rule constants and confidence weights, evaluated on the replay.
 """
+import hashlib
+import itertools
 import json
 import logging
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from analytics.attribution import get_attribution_stats
-from storage.db import cursor
+import numpy as np
+
+from analytics.attribution import get_attribution_rollup, get_attribution_stats
+from config.settings import REPLAY_WORKERS
+from storage.db import (
+    advance_watermark,
+    cursor,
+    get_walk_forward_stats,
+    get_watermark,
+    insert_backtest_runs,
+    price_range_watermark,
+    replace_walk_forward_stats,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -67,32 +85,475 @@ def suggest_thresholds() -> Dict[str, float]:
 
 def rank_rules_by_performance() -> List[Dict[str, Any]]:
     """
-    Rank signal types by win rate (from outcomes joined to signals.signal_type).
-    Returns list of {signal_type, win_rate_1d, sample_count}.
+    Rank signal types by win rate (attribution cube, 1D horizon).
+    Returns list of {signal_type, win_rate_1d, avg_return_1d, sample_count}.
+    """
+    result: List[Dict[str, Any]] = [
+        {
+            "signal_type": r["signal_type"],
+            "win_rate_1d": r["win_rate"],
+            "avg_return_1d": r["avg_return"],
+            "sample_count": r["sample_count"],
+        }
+        for r in get_attribution_rollup(["signal_type"], horizon=1, min_samples=5)
+        if r["signal_type"]
+    ]
+    result.sort(key=lambda x: (x["win_rate_1d"], x["sample_count"]), reverse=True)
+    return result
+
+
+# ----- Parameter sweep -----
+# Keys: friction_threshold / confidence_threshold, weights.<confidence component>, rules.<friction RULE_PARAMS key>.
+# Values: a list to pick from, or a (low, high) tuple sampled uniformly (random search only).
+SWEEP_SPACE: Dict[str, Any] = {
+    "friction_threshold": [0.5, 0.55, 0.6, 0.65, 0.7, 0.75],
+    "confidence_threshold": [0.5, 0.55, 0.6, 0.65, 0.7],
+    "weights.friction": [0.25, 0.35, 0.45],
+    "weights.liquidity": [0.1, 0.15, 0.2],
+    "weights.volatility": [0.1, 0.15, 0.2],
+    "weights.data_quality": [0.1, 0.15],
+    "weights.win_rate": [0.1, 0.2, 0.3],
+    "rules.panic_drop_pct": [1.5, 2.0, 3.0],
+    "rules.panic_volume_ratio": [1.3, 1.5, 2.0],
+    "rules.accumulation_max_gain_pct": [1.0, 1.5, 2.0],
+    "rules.accumulation_max_volume_ratio": [0.7, 0.8, 0.9],
+    "rules.sector_lag_pct": [0.75, 1.0, 1.5],
+    "rules.overreaction_move_pct": [3.0, 4.0, 5.0],
+    "rules.overreaction_volatility_pct": [1.5, 2.0, 3.0],
+}
+SWEEP_COMBOS_PER_RULE_SET = 10  # random search: threshold/weight draws evaluated per (expensive) rule re-scoring
+
+# Replay matrix columns (shared with sweep workers)
+_COLS = ["price_change_1d_pct", "price_change_5d_pct", "volume_ratio", "volatility_pct", "sector_relative_1d",
+         "passed", "liquidity", "volatility", "data_quality", "win_rate", "return_1d", "tick_min", "symbol_code",
+         "day_idx"]
+_C = {c: i for i, c in enumerate(_COLS)}
+
+# Worker state: replay matrix attached from shared memory once per process
+_sweep_shm = None
+_sweep_matrix: Optional[np.ndarray] = None
+_sweep_symbols: List[str] = []
+_sweep_cooldown: int = 0
+
+
+def _candidate_config(flat: Dict[str, float]) -> Dict[str, Any]:
+    """
+    Flat sweep candidate -> full strategy config (replay_config keys), live defaults for anything not swept;
+    confidence weights normalized to sum 1.
+    """
+    from engine.confidence_engine import CONFIDENCE_WEIGHTS
+    from engine.friction_engine import RULE_PARAMS
+    from engine.replay import replay_config
+    base = replay_config()
+    weights = dict(CONFIDENCE_WEIGHTS)
+    weights.update({k[8:]: float(v) for k, v in flat.items() if k.startswith("weights.")})
+    total = sum(weights.values()) or 1.0
+    rules = dict(RULE_PARAMS)
+    rules.update({k[6:]: float(v) for k, v in flat.items() if k.startswith("rules.")})
+    return {
+        "friction_threshold": float(flat.get("friction_threshold", base["friction_threshold"])),
+        "confidence_threshold": float(flat.get("confidence_threshold", base["confidence_threshold"])),
+        "confidence_weights": {k: round(v / total, 4) for k, v in weights.items()},
+        "rule_params": rules,
+    }
+
+
+def _draw(rng: random.Random, values: Any) -> float:
+    if isinstance(values, tuple):
+        return round(rng.uniform(values[0], values[1]), 4)
+    return rng.choice(list(values))
+
+
+def sweep_candidates(
+    space: Optional[Dict[str, Any]] = None,
+    method: str = "random",
+    n_candidates: int = 200,
+    seed: int = 0,
+) -> List[Tuple[Dict[str, float], List[Dict[str, Any]]]]:
+    """
+    Candidates grouped by rule constants: [(rule_params, [alert config, ...]), ...]. Rule re-scoring is the
+    costly part, so random search draws SWEEP_COMBOS_PER_RULE_SET threshold/weight combos per rule set.
+    The live defaults are always the first candidate (baseline).
     """
+    space = dict(SWEEP_SPACE if space is None else space)
+    rule_keys = sorted(k for k in space if k.startswith("rules."))
+    alert_keys = sorted(k for k in space if not k.startswith("rules."))
+    groups: Dict[Tuple, List[Dict[str, Any]]] = {(): [_candidate_config({})]}
+    if method == "grid":
+        for values in itertools.product(*(space[k] for k in rule_keys + alert_keys)):
+            flat = dict(zip(rule_keys + alert_keys, values))
+            cfg = _candidate_config(flat)
+            groups.setdefault(tuple(sorted(cfg["rule_params"].items())), []).append(cfg)
+    elif method == "random":
+        rng = random.Random(seed)
+        n_sets = max(1, math.ceil(n_candidates / SWEEP_COMBOS_PER_RULE_SET))
+        left = n_candidates
+        for _ in range(n_sets):
+            rules = {k: _draw(rng, space[k]) for k in rule_keys}
+            for _ in range(min(SWEEP_COMBOS_PER_RULE_SET, left)):
+                cfg = _candidate_config({**rules, **{k: _draw(rng, space[k]) for k in alert_keys}})
+                groups.setdefault(tuple(sorted(cfg["rule_params"].items())), []).append(cfg)
+                left -= 1
+    else:
+        raise ValueError(f"method must be 'grid' or 'random', got {method!r}")
+    return [(dict(key), cfgs) for key, cfgs in groups.items()]
+
+
+def _sweep_attach(shm_name: Optional[str], shape: Tuple[int, int], symbols: List[str], cooldown: int,
+                  matrix: Optional[np.ndarray] = None) -> None:
+    """Pool initializer: map the replay matrix from shared memory (or take it directly in-process)."""
+    global _sweep_shm, _sweep_matrix, _sweep_symbols, _sweep_cooldown
+    if shm_name:
+        from multiprocessing import shared_memory
+        _sweep_shm = shared_memory.SharedMemory(name=shm_name)  # the parent owns and unlinks the block
+        matrix = np.ndarray(shape, dtype=np.float64, buffer=_sweep_shm.buf)
+    _sweep_matrix = matrix
+    _sweep_symbols = symbols
+    _sweep_cooldown = cooldown
+
+
+def _sweep_task(task: Tuple[Dict[str, float], List[Dict[str, Any]], bool]) -> List[Dict[str, Any]]:
+    """
+    Re-score friction with one rule set, then evaluate each threshold/weight combo vectorized.
+    by_day: instead of metrics, return per-day sufficient statistics (n, wins, sum, sum of squares of 1D returns).
+    The win-rate component is the baseline replay's (which ticks are stored barely moves with the rule set).
+    """
+    from engine.confidence_engine import combine_confidence
+    from engine.friction_engine import compute_friction
+    from engine.replay import alert_metrics, cooldown_mask, features_dict
+
+    rule_params, combos, by_day = task
+    m = _sweep_matrix
+    passed = m[:, _C["passed"]] > 0
+    score = np.zeros(len(m))
+    types = np.full(len(m), "", dtype=object)
+    feats = m[:, :5]
+    codes = m[:, _C["symbol_code"]].astype(int)
+    for i in np.flatnonzero(passed):
+        r = compute_friction(_sweep_symbols[codes[i]], features_dict(feats[i]), headlines=[],
+                             fetch_if_missing=False, params=rule_params)
+        score[i], types[i] = r.score, r.signal_type
+    out: List[Dict[str, Any]] = []
+    for cfg in combos:
+        conf = np.round(combine_confidence(score, m[:, _C["liquidity"]], m[:, _C["volatility"]],
+                                           m[:, _C["data_quality"]], m[:, _C["win_rate"]],
+                                           cfg["confidence_weights"]), 3)
+        mask = passed & (score >= cfg["friction_threshold"]) & (conf >= cfg["confidence_threshold"])
+        mask = cooldown_mask(codes, types, m[:, _C["tick_min"]], mask, _sweep_cooldown)
+        if not by_day:
+            out.append({"config": cfg, **alert_metrics(m[mask, _C["return_1d"]])})
+            continue
+        ret = m[:, _C["return_1d"]]
+        sel = mask & ~np.isnan(ret)
+        day, r = m[sel, _C["day_idx"]].astype(int), ret[sel]
+        n_days = int(m[:, _C["day_idx"]].max()) + 1 if len(m) else 0
+        stats = np.stack([np.bincount(day, weights=w, minlength=n_days)
+                          for w in (np.ones(len(r)), (r > 0).astype(float), r, r * r)], axis=1)
+        out.append({"config": cfg, "day_stats": stats})
+    return out
+
+
+def _replay_matrix(df) -> Tuple[np.ndarray, List[str]]:
+    symbols = sorted(df["symbol"].unique())
+    code = {s: i for i, s in enumerate(symbols)}
+    m = np.empty((len(df), len(_COLS)), dtype=np.float64)
+    for c in _COLS[:-3]:
+        m[:, _C[c]] = df[c].to_numpy(dtype=float)
+    m[:, _C["tick_min"]] = df["tick"].to_numpy().astype("datetime64[m]").astype("int64")
+    m[:, _C["symbol_code"]] = df["symbol"].map(code).to_numpy()
+    m[:, _C["day_idx"]] = df["day"].rank(method="dense").to_numpy() - 1
+    return m, symbols
+
+
+def _run_sweep_tasks(
+    tasks: List, matrix: np.ndarray, symbols: List[str], cooldown: int, workers: int, by_day: bool = False
+) -> List[Dict]:
+    """Fan tasks out over a process pool; the replay matrix goes through shared memory, not per-task pickles."""
+    tasks = [(rules, combos, by_day) for rules, combos in tasks]
+    if workers > 1 and len(tasks) > 1:
+        from multiprocessing import shared_memory
+        shm = None
+        try:
+            shm = shared_memory.SharedMemory(create=True, size=max(1, matrix.nbytes))
+            np.ndarray(matrix.shape, dtype=np.float64, buffer=shm.buf)[:] = matrix
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=_sweep_attach,
+                                     initargs=(shm.name, matrix.shape, symbols, cooldown)) as pool:
+                return [r for part in pool.map(_sweep_task, tasks) for r in part]
+        except Exception as e:
+            logger.warning("Sweep process pool failed (%s); evaluating in-process", e)
+        finally:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+    _sweep_attach(None, matrix.shape, symbols, cooldown, matrix)
+    return [r for task in tasks for r in _sweep_task(task)]
+
+
+def sweep_parameters(
+    since: str,
+    until: Optional[str] = None,
+    space: Optional[Dict[str, Any]] = None,
+    method: str = "random",
+    n_candidates: int = 200,
+    seed: int = 0,
+    min_signals: int = 20,
+    workers: Optional[int] = None,
+    tick: str = "daily",
+    symbols: Optional[Sequence[str]] = None,
+    bars: Any = None,
+    save_best: bool = True,
+    name: str = "friction_sweep",
+) -> Dict[str, Any]:
+    """
+    Evaluate every candidate on the replay over [since, until): features, risk filter and confidence components
+    are replayed once; candidates only re-score the rules and re-apply weights/thresholds.
+    Objective: t-statistic of the alerts' 1D returns (candidates with fewer than min_signals alerts are not ranked).
+    Each candidate is stored in backtest_runs; the best is saved via save_strategy_version (inactive).
+    """
+    from engine.replay import replay_config, replay_frame
+
+    started = datetime.utcnow().isoformat() + "Z"
+    workers = workers if workers is not None else (REPLAY_WORKERS or os.cpu_count() or 1)
+    base = replay_config()
+    df = replay_frame(since, until, None, tick, symbols, bars, workers)
+    tasks = sweep_candidates(space, method, n_candidates, seed)
+    result: Dict[str, Any] = {"since": since, "until": until, "method": method, "candidates": 0, "best": None,
+                              "top": [], "strategy_version_id": None}
+    if df.empty:
+        return result
+    matrix, syms = _replay_matrix(df)
+    runs = _run_sweep_tasks(tasks, matrix, syms, int(base["cooldown_minutes"]), workers)
+    for r in runs:
+        r["objective"] = r["t_stat_1d"] if r["sample_count"] >= min_signals else None
+    ranked = sorted(runs, key=lambda r: (r["objective"] is not None, r["objective"] or 0.0, r["sample_count"]),
+                    reverse=True)
+    best = ranked[0] if ranked and ranked[0]["objective"] is not None else None
+    finished = datetime.utcnow().isoformat() + "Z"
+    version_id = None
+    if best is not None and save_best:
+        version_id = save_strategy_version(name, best["config"], active=False)
+    meta = {"kind": "sweep", "sweep_started_at": started, "since": since, "until": until, "tick": tick}
     with cursor() as cur:
-        cur.execute("""
-            SELECT s.signal_type, o.return_1d
-            FROM outcomes o
-            JOIN signals s ON s.id = o.signal_id
-            WHERE o.return_1d IS NOT NULL AND s.signal_type IS NOT NULL AND s.signal_type != ''
-        """)
+        insert_backtest_runs(cur, [
+            (version_id if r is best else None, started, finished, json.dumps({**meta, **r}))
+            for r in runs
+        ])
+    logger.info("Sweep: %d candidates in %s..%s, best objective %s", len(runs), started, finished,
+                best["objective"] if best else None)
+    result.update({"candidates": len(runs), "best": best, "top": ranked[:10], "strategy_version_id": version_id})
+    return result
+
+
+# ----- Walk-forward optimization -----
+WALK_FORWARD_REFIT_DAYS = 5  # trailing days re-evaluated each run (1D outcomes and late bars settle)
+
+
+def _window_metrics(stats: np.ndarray) -> Dict[str, Any]:
+    """(n, wins, sum, sum of squares) of 1D returns -> alert_metrics-style dict."""
+    n, wins, total, sq = (float(x) for x in stats)
+    var = (sq - total * total / n) / (n - 1) if n > 1 else 0.0
+    return {
+        "sample_count": int(n),
+        "win_rate_1d": round(wins / n * 100.0, 2) if n else None,
+        "avg_return_1d": round(total / n, 2) if n else None,
+        "t_stat_1d": round(total / n / math.sqrt(var) * math.sqrt(n), 3) if var > 0 else None,
+    }
+
+
+def _t_stats(stats: np.ndarray, min_signals: int) -> np.ndarray:
+    """Vectorized t-statistic per candidate from (n_candidates, 4) sums; -inf when not rankable."""
+    n, _, total, sq = stats.T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var = (sq - total * total / n) / (n - 1)
+        t = total / n / np.sqrt(var) * np.sqrt(n)
+    return np.where((n >= max(2, min_signals)) & (var > 0), t, -np.inf)
+
+
+def _walk_forward_key(since: str, tick: str, symbols: Optional[Sequence[str]], space: Optional[Dict[str, Any]],
+                      method: str, n_candidates: int, seed: int) -> str:
+    from engine.replay import replay_config
+    spec = {"since": since[:10], "tick": tick, "symbols": sorted(symbols) if symbols else None,
+            "space": space, "method": method, "n": n_candidates, "seed": seed, "base": replay_config()}
+    return hashlib.sha1(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def _walk_forward_frame(run_key: str, since: str, until: Optional[str], tick: str,
+                        symbols: Optional[Sequence[str]], workers: int):
+    """
+    Replay frame of a walk-forward run over the stored bars, cached per run_key with the bar watermark. A re-run
+    keeps the cached rows before the last WALK_FORWARD_REFIT_DAYS trading days (at least the longest return
+    horizon plus the possibly unfinished last day) if no bar they read changed, and replays only from there;
+    replay_frame loads the lookback lead-in before that day itself.
+    """
+    import pandas as pd
+    from engine import backtest_cache
+    from engine.replay import HORIZONS, _bar_range, apply_confidence, replay_config, replay_frame
+
+    started = datetime.utcnow().isoformat() + "Z"
+    lead_in = _bar_range(since, until, int(replay_config()["lookback_days"]))[0]
+    ruleset = backtest_cache.ruleset_version()
+    scope = backtest_cache.scope_key("walk_forward_frame", {"run_key": run_key})
+
+    def watermark(last_day: str) -> List[Any]:
+        with cursor() as cur:
+            return [ruleset, *price_range_watermark(cur, lead_in, last_day)]
+
+    kept, resume = None, since
+    entry = backtest_cache.latest(scope)
+    if entry and (entry["until"] is None or (until is not None and entry["until"] <= until)):
+        cached = backtest_cache.load_frame(entry["rows_file"])
+        if cached is not None and entry["watermark"] == watermark(entry["summary"]["last_day"]):
+            days = np.sort(cached["day"].unique())
+            overlap = max(WALK_FORWARD_REFIT_DAYS, max(HORIZONS) + 1)
+            if len(days) > overlap:
+                resume = str(days[-overlap])[:10]
+                cut = cached["day"] < days[-overlap]
+                if until:
+                    cut &= cached["day"] < pd.Timestamp(until[:10])
+                kept = cached[cut]
+    fresh = replay_frame(resume, until, None, tick, symbols, None, workers) if not until or resume < until else None
+    frames = [f for f in (kept, fresh) if f is not None and len(f)]
+    if not frames:
+        return pd.DataFrame()
+    df = apply_confidence(pd.concat(frames, ignore_index=True))
+    last_day = str(df["day"].max())[:10]
+    mark = watermark(last_day)
+    backtest_cache.store(scope, backtest_cache.cache_key(scope, since, until, mark), since, until, mark,
+                         {"last_day": last_day, "resumed_from": resume}, started, frame=df)
+    logger.info("Walk-forward %s: replayed from %s (%d cached rows kept)", run_key, resume,
+                0 if kept is None else len(kept))
+    return df
+
+
+def _saved_walk_forward_folds(name: str) -> set:
+    """(run_key, train_start, test_end, config) of fold winners already versioned under name."""
+    with cursor() as cur:
+        cur.execute("SELECT config_json FROM strategy_versions WHERE name = ?", (name[:64],))
         rows = cur.fetchall()
-    from collections import defaultdict
-    by_type: Dict[str, List[float]] = defaultdict(list)
-    for row in rows:
-        by_type[row[0]].append(float(row[1]))
-    result: List[Dict[str, Any]] = []
-    for sig_type, returns in by_type.items():
-        if len(returns) < 5:
+    saved = set()
+    for (raw,) in rows:
+        try:
+            cfg = json.loads(raw)
+            wf = cfg.pop("walk_forward")
+            saved.add((wf["run_key"], wf["train"][0], wf["test"][1], json.dumps(cfg, sort_keys=True)))
+        except Exception:
             continue
-        wr = sum(1 for r in returns if r > 0) / len(returns) * 100.0
-        avg = sum(returns) / len(returns)
-        result.append({
-            "signal_type": sig_type,
-            "win_rate_1d": round(wr, 2),
-            "avg_return_1d": round(avg, 2),
-            "sample_count": len(returns),
-        })
-    result.sort(key=lambda x: (x["win_rate_1d"], x["sample_count"]), reverse=True)
+    return saved
+
+
+def walk_forward(
+    since: str,
+    until: Optional[str] = None,
+    train_days: int = 120,
+    test_days: int = 20,
+    space: Optional[Dict[str, Any]] = None,
+    method: str = "random",
+    n_candidates: int = 200,
+    seed: int = 0,
+    min_signals: int = 20,
+    workers: Optional[int] = None,
+    tick: str = "daily",
+    symbols: Optional[Sequence[str]] = None,
+    bars: Any = None,
+    name: str = "walk_forward",
+) -> Dict[str, Any]:
+    """
+    Rolling walk-forward over trading days from since: fit on train_days, pick the best sweep candidate,
+    score it out of sample on the next test_days, step by test_days.
+    Incremental: per-day sufficient statistics (n, wins, sum, sum of squares of alert 1D returns) of every
+    candidate are kept in walk_forward_stats, so a re-run only re-scores days after the run's watermark
+    (minus WALK_FORWARD_REFIT_DAYS) and every window is a prefix-sum difference. The replay frame of the stored
+    bars is cached the same way (_walk_forward_frame). Keep since fixed across runs (the point-in-time win rates
+    start there). Each fold's winner is versioned under name; the last is active.
+    """
+    from engine.replay import replay_config, replay_frame
+
+    started = datetime.utcnow().isoformat() + "Z"
+    workers = workers if workers is not None else (REPLAY_WORKERS or os.cpu_count() or 1)
+    run_key = _walk_forward_key(since, tick, symbols, space, method, n_candidates, seed)
+    result: Dict[str, Any] = {"run_key": run_key, "since": since, "until": until, "folds": [],
+                              "out_of_sample": None, "baseline_out_of_sample": None}
+    if bars is None:
+        df = _walk_forward_frame(run_key, since, until, tick, symbols, workers)
+    else:
+        df = replay_frame(since, until, None, tick, symbols, bars, workers)
+    if df.empty:
+        return result
+    tasks = sweep_candidates(space, method, n_candidates, seed)
+    configs = [cfg for _, cfgs in tasks for cfg in cfgs]
+    matrix, syms = _replay_matrix(df)
+    days = np.array(sorted(df["day"].unique()), dtype="datetime64[D]")
+    day_str = [str(d) for d in days]
+
+    watermark_name = f"walk_forward:{run_key}"
+    with cursor() as cur:
+        mark = get_watermark(cur, watermark_name)  # last scored day, as days since the epoch
+    done = int(np.searchsorted(days.astype("int64"), mark, side="right")) if mark else 0
+    fresh_from = max(0, done - WALK_FORWARD_REFIT_DAYS)
+    fresh = matrix[:, _C["day_idx"]] >= fresh_from
+    if fresh.any():
+        runs = _run_sweep_tasks(tasks, matrix[fresh], syms, int(replay_config()["cooldown_minutes"]), workers,
+                                by_day=True)
+        rows = [
+            (c, day_str[d], int(st[0]), int(st[1]), float(st[2]), float(st[3]))
+            for c, r in enumerate(runs)
+            for d, st in enumerate(r["day_stats"])
+            if d >= fresh_from and st[0] > 0
+        ]
+        with cursor() as cur:
+            replace_walk_forward_stats(cur, run_key, day_str[fresh_from], rows)
+            if not advance_watermark(cur, watermark_name, mark, int(days[-1].astype("int64"))):
+                logger.warning("Walk-forward %s: watermark moved by another run", run_key)
+    logger.info("Walk-forward %s: re-scored %d of %d days", run_key, len(days) - fresh_from, len(days))
+
+    stats = np.zeros((len(configs), len(days) + 1, 4))  # prefix sums over days
+    index = {d: i for i, d in enumerate(day_str)}
+    with cursor() as cur:
+        for c, day, n, wins, total, sq in get_walk_forward_stats(cur, run_key):
+            if c < len(configs) and day in index:
+                stats[c, index[day] + 1] += (n, wins, total, sq)
+    stats = np.cumsum(stats, axis=1)
+
+    folds: List[Dict[str, Any]] = []
+    oos = np.zeros(4)
+    baseline = np.zeros(4)
+    start = 0
+    while start + train_days < len(days):
+        test_end = min(start + train_days + test_days, len(days))
+        train = stats[:, start + train_days] - stats[:, start]
+        t = _t_stats(train, min_signals)
+        if np.isfinite(t.max()):
+            best = int(np.argmax(t))
+            test = stats[best, test_end] - stats[best, start + train_days]
+            base_test = stats[0, test_end] - stats[0, start + train_days]
+            oos += test
+            baseline += base_test
+            folds.append({
+                "fold": len(folds) + 1,
+                "train": [day_str[start], day_str[start + train_days - 1]],
+                "test": [day_str[start + train_days], day_str[test_end - 1]],
+                "config": configs[best],
+                "train_metrics": _window_metrics(train[best]),
+                "test_metrics": _window_metrics(test),
+                "baseline_test_metrics": _window_metrics(base_test),
+            })
+        start += test_days
+
+    saved = _saved_walk_forward_folds(name)
+    for f in folds:
+        key = (run_key, f["train"][0], f["test"][1], json.dumps(f["config"], sort_keys=True))
+        if key in saved:
+            continue
+        config = {**f["config"], "walk_forward": {"run_key": run_key, "fold": f["fold"], "train": f["train"],
+                                                  "test": f["test"], "train_metrics": f["train_metrics"]}}
+        f["strategy_version_id"] = save_strategy_version(name, config, active=f is folds[-1])
+    result.update({
+        "folds": folds,
+        "out_of_sample": _window_metrics(oos) if folds else None,
+        "baseline_out_of_sample": _window_metrics(baseline) if folds else None,
+    })
+    with cursor() as cur:
+        insert_backtest_runs(cur, [(folds[-1].get("strategy_version_id") if folds else None, started,
+                                    datetime.utcnow().isoformat() + "Z",
+                                    json.dumps({"kind": "walk_forward", **result}))])
     return result
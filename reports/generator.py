@@ -8,7 +8,7 @@ from typing import Any, Dict, List, Optional
 
 from analytics.attribution import get_attribution_stats
 from config.settings import REPORTS_DIR
-from storage.db import cursor
+from storage.db import cursor, get_heartbeat_counts, to_epoch
 
 logger = logging.getLogger(__name__)
 
@@ -16,19 +16,16 @@ logger = logging.getLogger(__name__)
 def _get_signal_counts_since(since_dt: str) -> List[tuple]:
     with cursor() as cur:
         cur.execute(
-            "SELECT symbol, COUNT(*) FROM signals WHERE created_at >= ? GROUP BY symbol ORDER BY COUNT(*) DESC LIMIT 20",
-            (since_dt,),
+            "SELECT symbol, COUNT(*) FROM signals WHERE created_epoch >= ? AND score > 0 GROUP BY symbol "
+            "ORDER BY COUNT(*) DESC LIMIT 20",
+            (to_epoch(since_dt),),
         )
         return cur.fetchall()
 
 
 def _get_heartbeat_summary_since(since_dt: str) -> Dict[str, int]:
     with cursor() as cur:
-        cur.execute(
-            "SELECT status, COUNT(*) FROM heartbeats WHERE ts >= ? GROUP BY status",
-            (since_dt,),
-        )
-        return dict(cur.fetchall())
+        return get_heartbeat_counts(cur, to_epoch(since_dt))
 
 
 def generate_weekly_report() -> str:
@@ -72,6 +69,12 @@ def generate_monthly_report() -> str:
         f"- Max drawdown 1D: {stats.get('max_drawdown_1d')}%",
         f"- Sample count: {stats.get('sample_count')}",
         "",
+        "## Intraday outcomes",
+        "",
+        f"- Win rate +30m: {stats.get('win_rate_30m')}% (avg {stats.get('avg_return_30m')}%, n={stats.get('sample_count_30m')})",
+        f"- Win rate +1h: {stats.get('win_rate_1h')}% (avg {stats.get('avg_return_1h')}%, n={stats.get('sample_count_1h')})",
+        f"- Win rate to close: {stats.get('win_rate_close')}% (avg {stats.get('avg_return_close')}%, n={stats.get('sample_count_close')})",
+        "",
         "## Signal activity (top 20 symbols)",
         "",
     ]
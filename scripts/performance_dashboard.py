@@ -23,11 +23,11 @@ def main() -> None:
     stats = get_attribution_stats(min_samples=0)
     with cursor() as cur:
         cur.execute(
-            "SELECT symbol, score, confidence, signal_type, created_at FROM signals ORDER BY created_at DESC LIMIT 20"
+            "SELECT symbol, score, confidence, signal_type, created_at FROM signals ORDER BY created_epoch DESC, id DESC LIMIT 20"
         )
         signals = [dict(zip(["symbol", "score", "confidence", "signal_type", "created_at"], row)) for row in cur.fetchall()]
         cur.execute(
-            "SELECT ts, status, message FROM heartbeats ORDER BY ts DESC LIMIT 10"
+            "SELECT ts, status, message FROM heartbeats ORDER BY ts_epoch DESC, id DESC LIMIT 10"
         )
         heartbeats = [dict(zip(["ts", "status", "message"], row)) for row in cur.fetchall()]
 
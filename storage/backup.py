@@ -1,57 +1,213 @@
 """
-MNEMOS 2.0 - Automatic SQLite backups to local dir and optional Google Drive.
+MNEMOS 2.1 - Online, deduplicated, compressed backups to a local dir and optional Google Drive.
+A consistent DB snapshot is taken with the SQLite backup API a few pages per step (the writer keeps going between
+steps), then it and the bar store files are cut into fixed-size chunks. Each chunk is stored once, zlib-compressed
+and named by its hash; a snapshot is a JSON manifest of chunk hashes per file. Only chunks that changed since any
+kept snapshot are written or copied to Drive. Old snapshots are thinned by a last / daily / weekly schedule.
 No secrets in code; Drive mount path from env or default.
 """
+import hashlib
+import json
 import logging
+import os
 import shutil
-from datetime import datetime
+import sqlite3
+import zlib
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
-from config.settings import BACKUP_DIR, DB_PATH, DRIVE_BACKUP_FOLDER_NAME
-from storage.db import ensure_data_dir
+from config.settings import (
+    BACKUP_DIR,
+    BACKUP_KEEP_DAILY,
+    BACKUP_KEEP_LAST,
+    BACKUP_KEEP_WEEKLY,
+    BACKUP_PAGES_PER_STEP,
+    BAR_STORE_DIR,
+    DB_PATH,
+    DRIVE_BACKUP_FOLDER_NAME,
+)
+from storage.db import ensure_data_dir, get_connection
 
 logger = logging.getLogger(__name__)
 
+CHUNK_BYTES = 256 * 1024
+STEP_SLEEP_SEC = 0.01
+_STAMP = "%Y%m%d_%H%M%S"
+
+
+def _chunk_path(root: Path, digest: str) -> Path:
+    return root / "chunks" / digest[:2] / f"{digest}.z"
+
+
+def _manifests(root: Path) -> List[Path]:
+    """Snapshot manifests, oldest first."""
+    return sorted((root / "snapshots").glob("mnemos_*.json"))
+
+
+def _iter_chunks(path: Path) -> Iterator[bytes]:
+    with open(path, "rb") as fh:
+        while True:
+            block = fh.read(CHUNK_BYTES)
+            if not block:
+                return
+            yield block
+
+
+def _put_chunks(root: Path, path: Path) -> Tuple[List[str], int]:
+    """Store a file's chunks under root (new ones only). Returns (chunk hashes, bytes written)."""
+    digests, written = [], 0
+    for block in _iter_chunks(path):
+        digest = hashlib.sha256(block).hexdigest()
+        dest = _chunk_path(root, digest)
+        if not dest.exists():
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            tmp = dest.with_suffix(".tmp")
+            tmp.write_bytes(zlib.compress(block, 6))
+            os.replace(tmp, dest)
+            written += dest.stat().st_size
+        digests.append(digest)
+    return digests, written
+
+
+def snapshot_db(dest: Path) -> Path:
+    """Consistent copy of the live DB via the backup API, BACKUP_PAGES_PER_STEP pages per step."""
+    src = get_connection()
+    dst = sqlite3.connect(str(dest))
+    try:
+        src.backup(dst, pages=BACKUP_PAGES_PER_STEP, sleep=STEP_SLEEP_SEC)
+    finally:
+        dst.close()
+        src.close()
+    return dest
+
+
+def _bar_store_files() -> List[Tuple[str, Path]]:
+    if not BAR_STORE_DIR.exists():
+        return []
+    return [(f"bars/{p.name}", p) for p in sorted(BAR_STORE_DIR.iterdir()) if p.is_file() and p.suffix != ".tmp"]
+
+
+def kept_snapshots(stamps: List[datetime], now: datetime) -> Set[datetime]:
+    """Retention: the BACKUP_KEEP_LAST newest, plus the newest per day / ISO week for the last N days / weeks."""
+    newest = sorted(stamps, reverse=True)
+    keep = set(newest[:BACKUP_KEEP_LAST])
+    days: Dict[object, datetime] = {}
+    weeks: Dict[object, datetime] = {}
+    for s in newest:
+        if s >= now - timedelta(days=BACKUP_KEEP_DAILY):
+            days.setdefault(s.date(), s)
+        if s >= now - timedelta(weeks=BACKUP_KEEP_WEEKLY):
+            weeks.setdefault(s.isocalendar()[:2], s)
+    return keep | set(days.values()) | set(weeks.values())
+
+
+def _stamp(manifest: Path) -> Optional[datetime]:
+    try:
+        return datetime.strptime(manifest.stem[len("mnemos_"):], _STAMP)
+    except ValueError:
+        return None
+
+
+def prune_snapshots(root: Path = BACKUP_DIR, now: Optional[datetime] = None) -> int:
+    """Drop manifests outside the retention schedule, then chunks no kept manifest uses. Returns manifests dropped."""
+    manifests = {m: _stamp(m) for m in _manifests(root)}
+    keep = kept_snapshots([s for s in manifests.values() if s], now or datetime.utcnow())
+    dropped = 0
+    for m, s in manifests.items():
+        if s and s not in keep:
+            m.unlink()
+            dropped += 1
+    used: Set[str] = set()
+    for m in _manifests(root):
+        for entry in json.loads(m.read_text(encoding="utf-8"))["files"].values():
+            used.update(entry["chunks"])
+    for chunk in (root / "chunks").glob("*/*.z"):
+        if chunk.stem not in used:
+            chunk.unlink()
+    return dropped
+
+
+def restore_snapshot(manifest: Path, dest_dir: Path) -> List[Path]:
+    """Rebuild a snapshot's files (mnemos.db, bars/...) under dest_dir from the chunks next to the manifest."""
+    root = manifest.parent.parent
+    files = json.loads(manifest.read_text(encoding="utf-8"))["files"]
+    out = []
+    for name, entry in files.items():
+        path = dest_dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as fh:
+            for digest in entry["chunks"]:
+                block = zlib.decompress(_chunk_path(root, digest).read_bytes())
+                if hashlib.sha256(block).hexdigest() != digest:
+                    raise ValueError(f"Corrupt backup chunk {digest}")
+                fh.write(block)
+        out.append(path)
+    return out
+
 
 def backup_to_local() -> Optional[Path]:
-    """Copy DB to BACKUP_DIR with timestamp. Returns path or None."""
+    """Snapshot DB and bar store into BACKUP_DIR (changed chunks only), apply retention. Returns manifest or None."""
     if not DB_PATH.exists():
         logger.warning("No DB file to backup: %s", DB_PATH)
         return None
     ensure_data_dir()
-    BACKUP_DIR.mkdir(parents=True, exist_ok=True)
-    ts = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-    dest = BACKUP_DIR / f"mnemos_{ts}.db"
+    (BACKUP_DIR / "snapshots").mkdir(parents=True, exist_ok=True)
+    now = datetime.utcnow()
+    staging = BACKUP_DIR / "staging.db"
     try:
-        shutil.copy2(DB_PATH, dest)
-        logger.info("Backup created: %s", dest)
+        snapshot_db(staging)
+        files, written = {}, 0
+        for name, path in [("mnemos.db", staging)] + _bar_store_files():
+            chunks, n = _put_chunks(BACKUP_DIR, path)
+            files[name] = {"size": path.stat().st_size, "chunks": chunks}
+            written += n
+        dest = BACKUP_DIR / "snapshots" / f"mnemos_{now.strftime(_STAMP)}.json"
+        tmp = dest.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"created_at": now.isoformat() + "Z", "files": files}), encoding="utf-8")
+        os.replace(tmp, dest)
+        logger.info("Backup created: %s (%d compressed bytes new)", dest, written)
+        prune_snapshots(BACKUP_DIR, now)
         return dest
     except Exception as e:
         logger.error("Backup failed: %s", e)
         return None
+    finally:
+        staging.unlink(missing_ok=True)
 
 
 def backup_to_drive(drive_mount_path: Optional[Path] = None) -> Optional[Path]:
     """
-    Copy DB to Google Drive folder. On Colab use /content/drive/MyDrive/...
-    drive_mount_path: e.g. Path("/content/drive/MyDrive"). Pass from Colab after mount.
+    Mirror the local backup store (manifests + chunks) to the Google Drive folder, copying only what Drive lacks.
+    On Colab use /content/drive/MyDrive/... drive_mount_path: e.g. Path("/content/drive/MyDrive").
     """
     if drive_mount_path is None:
         drive_mount_path = Path("/content/drive/MyDrive")
     if not drive_mount_path.exists():
         logger.warning("Drive not mounted at %s; skip Drive backup", drive_mount_path)
         return None
-    if not DB_PATH.exists():
+    local = _manifests(BACKUP_DIR)
+    if not local:
         return None
     folder = drive_mount_path / DRIVE_BACKUP_FOLDER_NAME
-    folder.mkdir(parents=True, exist_ok=True)
-    ts = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-    dest = folder / f"mnemos_{ts}.db"
     try:
-        shutil.copy2(DB_PATH, dest)
-        logger.info("Drive backup created: %s", dest)
-        return dest
+        copied = 0
+        for m in local:  # chunks before the manifest that needs them
+            target = folder / "snapshots" / m.name
+            if target.exists():
+                continue
+            for entry in json.loads(m.read_text(encoding="utf-8"))["files"].values():
+                for digest in entry["chunks"]:
+                    dest = _chunk_path(folder, digest)
+                    if not dest.exists():
+                        dest.parent.mkdir(parents=True, exist_ok=True)
+                        shutil.copyfile(_chunk_path(BACKUP_DIR, digest), dest)
+                        copied += 1
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(m, target)
+        prune_snapshots(folder)
+        logger.info("Drive backup synced: %s (%d chunks copied)", folder, copied)
+        return folder / "snapshots" / local[-1].name
     except Exception as e:
         logger.error("Drive backup failed: %s", e)
         return None
@@ -0,0 +1,278 @@
+"""
+MNEMOS 2.1 - Columnar bar store for analytical reads over long ranges (replay backtests, event study).
+One raw float64 file per OHLCV field laid out as (bar times x symbols), plus an int64 file of bar start epochs;
+reads memory-map them, so a date range over all symbols is a view with no copy. New bars are copied in from the
+SQLite prices table by id (watermark "bar_store") right after each ingest; SQLite keeps only the last
+PRICES_HOT_DAYS of bars (pruned by storage.compaction), which covers the recent-window lookups (outcome
+maturation, intraday outcomes).
+Single writer (the collector); readers only see rows once meta.json counts them. A rewrite keeps the previous
+generation's files until the next one, so readers in other processes holding the old meta can still open them.
+"""
+import json
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from config.settings import (
+    BAR_STORE_DIR,
+    MARKET_OPEN_HOUR,
+    MARKET_OPEN_MIN,
+    MARKET_UTC_OFFSET_MIN,
+)
+from storage.db import (
+    advance_watermark,
+    cursor,
+    get_prices_after,
+    get_prices_daily,
+    get_watermark,
+    to_epoch,
+)
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("open", "high", "low", "close", "volume")
+OHLCV = ["Open", "High", "Low", "Close", "Volume"]
+SYNC_WATERMARK = "bar_store"
+SYNC_BATCH_ROWS = 200_000
+_MIN_WIDTH = 16
+_SESSION_OPEN_SEC = MARKET_OPEN_HOUR * 3600 + MARKET_OPEN_MIN * 60
+
+
+@dataclass
+class BarPanel:
+    """Bars on one time axis. Field arrays are (n_times, n_symbols), NaN where a symbol has no bar."""
+    times: np.ndarray  # datetime64[s], market-local bar starts, sorted
+    symbols: List[str]
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+
+def _path(name: str, gen: int, ext: str) -> Path:
+    return BAR_STORE_DIR / f"{name}.{gen}.{ext}"
+
+
+def read_meta() -> Optional[Dict[str, Any]]:
+    """{"symbols", "width", "rows", "gen"} or None if the store is empty."""
+    try:
+        return json.loads((BAR_STORE_DIR / "meta.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(meta: Dict[str, Any]) -> None:
+    tmp = BAR_STORE_DIR / "meta.json.tmp"
+    tmp.write_text(json.dumps(meta), encoding="utf-8")
+    os.replace(tmp, BAR_STORE_DIR / "meta.json")
+
+
+def _map_times(meta: Dict[str, Any], mode: str = "r") -> np.ndarray:
+    if not meta["rows"]:
+        return np.empty(0, dtype=np.int64)
+    return np.memmap(_path("t", meta["gen"], "i8"), dtype=np.int64, mode=mode, shape=(meta["rows"],))
+
+
+def _map_field(meta: Dict[str, Any], field: str, mode: str = "r") -> np.ndarray:
+    if not meta["rows"]:
+        return np.empty((0, meta["width"]), dtype=np.float64)
+    return np.memmap(_path(field, meta["gen"], "f8"), dtype=np.float64, mode=mode,
+                     shape=(meta["rows"], meta["width"]))
+
+
+def _rewrite(meta: Dict[str, Any], times: np.ndarray, data: Dict[str, np.ndarray], width: int) -> Dict[str, Any]:
+    """
+    Write a new generation of files (new width or out-of-order rows), switch meta, then drop the generation
+    before the one just replaced.
+    """
+    BAR_STORE_DIR.mkdir(parents=True, exist_ok=True)
+    new = {**meta, "width": width, "rows": int(len(times)), "gen": meta["gen"] + 1}
+    np.ascontiguousarray(times, dtype=np.int64).tofile(_path("t", new["gen"], "i8"))
+    for f in FIELDS:
+        block = np.full((len(times), width), np.nan)
+        block[:, : data[f].shape[1]] = data[f]
+        block.tofile(_path(f, new["gen"], "f8"))
+    _write_meta(new)
+    for name, ext in [("t", "i8")] + [(f, "f8") for f in FIELDS]:
+        try:
+            _path(name, meta["gen"] - 1, ext).unlink()
+        except OSError:
+            pass
+    return new
+
+
+def write_bars(symbols: Sequence[str], epochs: np.ndarray, values: np.ndarray) -> int:
+    """
+    Upsert bars given as parallel arrays (symbol, UTC epoch of bar start, (n, 5) OHLCV), later entries winning.
+    Existing bar times are updated in place, newer ones appended; anything else rewrites the store.
+    """
+    if len(epochs) == 0:
+        return 0
+    frame = pd.DataFrame({"symbol": list(symbols), "t": np.asarray(epochs, dtype=np.int64)})
+    keep = ~frame.duplicated(["symbol", "t"], keep="last").to_numpy()
+    syms = frame["symbol"].to_numpy()[keep]
+    t = frame["t"].to_numpy()[keep]
+    values = np.asarray(values, dtype=np.float64)[keep]
+    BAR_STORE_DIR.mkdir(parents=True, exist_ok=True)
+    meta = read_meta() or {"symbols": [], "width": 0, "rows": 0, "gen": 0}
+    index = {s: i for i, s in enumerate(meta["symbols"])}
+    for s in pd.unique(syms):
+        if s not in index:
+            index[s] = len(meta["symbols"])
+            meta["symbols"].append(str(s))
+    cols = np.array([index[s] for s in syms], dtype=np.int64)
+    old_t = np.array(_map_times(meta))
+    new_t = np.setdiff1d(t, old_t)
+    width = meta["width"]
+    if len(meta["symbols"]) > width or (len(new_t) and len(old_t) and new_t[0] <= old_t[-1]):
+        # Widen for new symbols / merge in earlier bar times: full rewrite (rare once the watchlist settles)
+        width = max(width * 2, len(meta["symbols"]), _MIN_WIDTH) if len(meta["symbols"]) > width else width
+        times = np.union1d(old_t, t)
+        pos = np.searchsorted(times, old_t)
+        data = {}
+        for f in FIELDS:
+            block = np.full((len(times), meta["width"]), np.nan)
+            block[pos] = _map_field(meta, f)
+            data[f] = block
+        meta = _rewrite(meta, times, data, width)
+    elif len(new_t):
+        # Cut off rows an interrupted append left past meta["rows"] before appending after them
+        block = np.full((len(new_t), width), np.nan)
+        for f in FIELDS:
+            os.truncate(_path(f, meta["gen"], "f8"), meta["rows"] * width * 8)
+            with open(_path(f, meta["gen"], "f8"), "ab") as fh:
+                block.tofile(fh)
+        os.truncate(_path("t", meta["gen"], "i8"), meta["rows"] * 8)
+        with open(_path("t", meta["gen"], "i8"), "ab") as fh:
+            new_t.astype(np.int64).tofile(fh)
+        meta = {**meta, "rows": meta["rows"] + len(new_t)}
+    rows = np.searchsorted(np.array(_map_times(meta)), t)
+    for i, f in enumerate(FIELDS):
+        arr = _map_field(meta, f, mode="r+")
+        arr[rows, cols] = values[:, i]
+        arr.flush()
+    _write_meta(meta)
+    return int(len(t))
+
+
+def sync_from_db(batch: int = SYNC_BATCH_ROWS) -> int:
+    """Copy bars written to SQLite since the last sync into the store. Returns bars copied."""
+    total = 0
+    try:
+        while True:
+            with cursor() as cur:
+                last = get_watermark(cur, SYNC_WATERMARK)
+                rows = get_prices_after(cur, last, limit=batch)
+            if not rows:
+                break
+            ids, syms, epochs, *vals = zip(*rows)
+            values = np.array([[np.nan if v is None else v for v in col] for col in vals], dtype=np.float64).T
+            total += write_bars(syms, np.asarray(epochs, dtype=np.int64), values)
+            with cursor() as cur:
+                if not advance_watermark(cur, SYNC_WATERMARK, last, int(ids[-1])):
+                    logger.warning("Bar store watermark moved by another writer; stopping sync")
+                    break
+            if len(rows) < batch:
+                break
+    except Exception as e:
+        logger.warning("Bar store sync failed: %s", e)
+    return total
+
+
+def drop_before(before_epoch: int) -> int:
+    """Drop stored bars that start before before_epoch (rewrites the store). Returns bar times dropped."""
+    meta = read_meta()
+    if not meta or not meta["rows"]:
+        return 0
+    t = np.array(_map_times(meta))
+    k = int(np.searchsorted(t, before_epoch))
+    if k:
+        _rewrite(meta, t[k:], {f: np.array(_map_field(meta, f)[k:]) for f in FIELDS}, meta["width"])
+    return k
+
+
+def load_panel(
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    symbols: Optional[Sequence[str]] = None,
+) -> BarPanel:
+    """
+    Stored bars with market-local dt in [since, until) as a BarPanel. With all symbols the field arrays are
+    read-only views of the mapped files; picking a symbol subset gathers those columns (one copy).
+    """
+    try:
+        return _load_panel(since, until, symbols)
+    except FileNotFoundError:  # two rewrites since we read meta: retry on the current generation
+        return _load_panel(since, until, symbols)
+
+
+def _load_panel(since: Optional[str], until: Optional[str], symbols: Optional[Sequence[str]]) -> BarPanel:
+    meta = read_meta()
+    if not meta or not meta["rows"]:
+        empty = np.empty((0, 0))
+        return BarPanel(np.array([], dtype="datetime64[s]"), [], empty, empty, empty, empty, empty)
+    t = _map_times(meta)
+    lo = np.searchsorted(t, to_epoch(since[:10], market_local=True)) if since else 0
+    hi = np.searchsorted(t, to_epoch(until[:10], market_local=True)) if until else len(t)
+    names = list(meta["symbols"])
+    cols = slice(0, len(names))
+    if symbols is not None:
+        index = {s: i for i, s in enumerate(names)}
+        picked = [s for s in symbols if s in index]
+        cols, names = [index[s] for s in picked], picked
+    times = (np.asarray(t[lo:hi]) + MARKET_UTC_OFFSET_MIN * 60).astype("datetime64[s]")
+    fields = {f: _map_field(meta, f)[lo:hi, cols] for f in FIELDS}
+    return BarPanel(times, names, **fields)
+
+
+def _long_frame(rows: List[tuple], offset_sec: int) -> pd.DataFrame:
+    """(..., symbol, epoch, O, H, L, C, V) rows -> long bars at market-local epoch + offset_sec."""
+    part = pd.DataFrame([r[-7:] for r in rows], columns=["symbol", "t"] + OHLCV)
+    t = part.pop("t").to_numpy(np.int64) + MARKET_UTC_OFFSET_MIN * 60 + offset_sec
+    part.insert(1, "datetime", t.astype("datetime64[s]").astype("datetime64[ns]"))
+    return part[part["Close"].notna()]
+
+
+def load_bars(
+    symbols: Optional[Sequence[str]] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    include_daily: bool = True,
+) -> pd.DataFrame:
+    """
+    Long bars (symbol, datetime, Open, High, Low, Close, Volume) from the store plus SQLite bars not synced yet,
+    one row per (symbol, bar) with a close, sorted by symbol and time. With include_daily, days whose intraday
+    bars were downsampled (prices_daily) come back as one bar at the session open.
+    """
+    panel = load_panel(since, until, symbols)
+    ti, si = np.nonzero(~np.isnan(panel.close))
+    rank = np.argsort(np.argsort(np.asarray(panel.symbols, dtype=object)))
+    order = np.lexsort((ti, rank[si]))  # by symbol, then time: already the output order
+    ti, si = ti[order], si[order]
+    stored = pd.DataFrame({"symbol": np.asarray(panel.symbols, dtype=object)[si],
+                           "datetime": panel.times[ti].astype("datetime64[ns]")})
+    for f, col in zip(FIELDS, OHLCV):
+        stored[col] = getattr(panel, f)[ti, si]
+    window = dict(
+        symbols=list(symbols) if symbols else None,
+        since_epoch=to_epoch(since[:10], market_local=True) if since else None,
+        until_epoch=to_epoch(until[:10], market_local=True) if until else None,
+    )
+    with cursor() as cur:
+        daily = get_prices_daily(cur, **window) if include_daily else []
+        hot = get_prices_after(cur, get_watermark(cur, SYNC_WATERMARK), **window)
+    if not daily and not hot:
+        return stored
+    # Order matters for the de-duplication below: daily bars first, then the store, then unsynced bars
+    frames = [f for f in (_long_frame(daily, _SESSION_OPEN_SEC), stored, _long_frame(hot, 0)) if len(f)]
+    if not frames:
+        return stored
+    merged = pd.concat(frames, ignore_index=True)
+    merged = merged.drop_duplicates(["symbol", "datetime"], keep="last")
+    return merged.sort_values(["symbol", "datetime"]).reset_index(drop=True)
@@ -0,0 +1,184 @@
+"""
+MNEMOS 2.1 - Retention and compaction, run with the daily tasks. SQLite bars older than PRICES_HOT_DAYS that the
+bar store holds leave SQLite; intraday bars older than BAR_INTRADAY_DAYS become one daily bar per symbol
+(prices_daily) and leave the bar store and SQLite; heartbeats older than HEARTBEAT_RAW_DAYS become hourly counts
+per status (heartbeat_hourly), and per-tick stats older than TICK_STATS_RAW_DAYS hourly sums (tick_stats_hourly);
+GROQ responses older than GROQ_CACHE_TTL_HOURS leave the cache. Deletes run in batches, one short transaction
+each, then an incremental vacuum hands the freed pages back, so the DB file and backups stay bounded.
+DBs created before incremental auto-vacuum are converted once, after a compaction, if small enough; until then
+freed pages are reused by SQLite but the file does not shrink.
+"""
+import logging
+import shutil
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from config.settings import (
+    AUTO_VACUUM_CONVERT_MAX_MB,
+    BAR_INTRADAY_DAYS,
+    GROQ_CACHE_TTL_HOURS,
+    HEARTBEAT_RAW_DAYS,
+    MARKET_UTC_OFFSET_MIN,
+    PRICES_HOT_DAYS,
+    TICK_STATS_RAW_DAYS,
+)
+from storage import bar_store
+from storage.db import (
+    cursor,
+    delete_groq_cache_before,
+    delete_prices_before,
+    get_watermark,
+    incremental_vacuum,
+    roll_up_heartbeats,
+    roll_up_tick_stats,
+    to_epoch,
+    upsert_prices_daily,
+)
+
+logger = logging.getLogger(__name__)
+
+DELETE_BATCH_ROWS = 5000
+DOWNSAMPLE_CHUNK_DAYS = 30  # bounds memory when a long history is downsampled for the first time
+
+
+def _daily_rows(bars: pd.DataFrame) -> List[Tuple]:
+    """Long intraday bars -> (symbol, day, day_epoch, O, H, L, C, V, bars) per symbol and market-local day."""
+    b = bars.assign(day=bars["datetime"].dt.normalize())
+    d = b.groupby(["symbol", "day"], sort=True).agg(
+        Open=("Open", "first"), High=("High", "max"), Low=("Low", "min"), Close=("Close", "last"),
+        Volume=("Volume", lambda v: v.sum(min_count=1)), bars=("Close", "size"),
+    ).reset_index()
+    return [
+        (r.symbol, r.day.strftime("%Y-%m-%d"), to_epoch(r.day.strftime("%Y-%m-%d"), market_local=True),
+         *(None if pd.isna(v) else float(v) for v in (r.Open, r.High, r.Low, r.Close, r.Volume)), int(r.bars))
+        for r in d.itertuples(index=False)
+    ]
+
+
+def _delete_batched(delete, *args) -> int:
+    """Call delete(cur, *args, limit=DELETE_BATCH_ROWS) in its own transaction until a batch comes back short."""
+    total = 0
+    while True:
+        with cursor() as cur:
+            n = delete(cur, *args, limit=DELETE_BATCH_ROWS)
+        total += n
+        if n < DELETE_BATCH_ROWS:
+            return total
+
+
+def prune_hot_prices(now: Optional[datetime] = None, hot_days: int = PRICES_HOT_DAYS) -> int:
+    """Sync, then drop SQLite bars older than hot_days that the bar store already holds. Returns rows deleted."""
+    if hot_days <= 0:
+        return 0
+    bar_store.sync_from_db()
+    before = to_epoch((now or datetime.utcnow()) - timedelta(days=hot_days))
+    with cursor() as cur:
+        synced = get_watermark(cur, bar_store.SYNC_WATERMARK)
+    deleted = _delete_batched(delete_prices_before, before, synced)
+    if deleted:
+        logger.info("Pruned %d SQLite bars older than %d days (kept in bar store)", deleted, hot_days)
+    return deleted
+
+
+def downsample_prices(now: Optional[datetime] = None, keep_days: int = BAR_INTRADAY_DAYS) -> int:
+    """Fold intraday bars of market-local days older than keep_days into prices_daily. Returns bars folded."""
+    if keep_days <= 0:
+        return 0
+    local_now = (now or datetime.utcnow()) + timedelta(minutes=MARKET_UTC_OFFSET_MIN)
+    cutoff = (local_now - timedelta(days=keep_days)).strftime("%Y-%m-%d")
+    cutoff_epoch = to_epoch(cutoff, market_local=True)
+    bar_store.sync_from_db()
+    with cursor() as cur:
+        cur.execute("SELECT MIN(dt_epoch) FROM prices")
+        oldest = [cur.fetchone()[0]]
+    panel = bar_store.load_panel(until=cutoff)
+    if len(panel.times):
+        oldest.append(to_epoch(str(panel.times[0])[:10], market_local=True))
+    oldest = [e for e in oldest if e is not None]
+    if not oldest or min(oldest) >= cutoff_epoch:
+        return 0
+    folded = 0
+    start = pd.Timestamp(min(oldest) + MARKET_UTC_OFFSET_MIN * 60, unit="s").normalize()
+    while start < pd.Timestamp(cutoff):
+        end = min(start + pd.Timedelta(days=DOWNSAMPLE_CHUNK_DAYS), pd.Timestamp(cutoff))
+        bars = bar_store.load_bars(since=start.strftime("%Y-%m-%d"), until=end.strftime("%Y-%m-%d"),
+                                   include_daily=False)
+        if not bars.empty:
+            with cursor() as cur:
+                upsert_prices_daily(cur, _daily_rows(bars))
+            folded += len(bars)
+        start = end
+    # Daily bars are committed first: a crash below only leaves intraday bars that the next run folds again
+    bar_store.drop_before(cutoff_epoch)
+    _delete_batched(delete_prices_before, cutoff_epoch, None)
+    logger.info("Downsampled %d intraday bars before %s to daily bars", folded, cutoff)
+    return folded
+
+
+def compact_heartbeats(now: Optional[datetime] = None, keep_days: int = HEARTBEAT_RAW_DAYS) -> int:
+    """Fold heartbeats older than keep_days (whole hours) into hourly counts. Returns rows folded."""
+    if keep_days <= 0:
+        return 0
+    before = to_epoch(((now or datetime.utcnow()) - timedelta(days=keep_days)).strftime("%Y-%m-%dT%H:00:00"))
+    return _delete_batched(roll_up_heartbeats, before)
+
+
+def compact_tick_stats(now: Optional[datetime] = None, keep_days: int = TICK_STATS_RAW_DAYS) -> int:
+    """Fold per-tick stats older than keep_days (whole hours) into hourly sums. Returns rows folded."""
+    if keep_days <= 0:
+        return 0
+    before = to_epoch(((now or datetime.utcnow()) - timedelta(days=keep_days)).strftime("%Y-%m-%dT%H:00:00"))
+    return _delete_batched(roll_up_tick_stats, before)
+
+
+def purge_groq_cache(now: Optional[datetime] = None, ttl_hours: int = GROQ_CACHE_TTL_HOURS) -> int:
+    """Drop GROQ responses lookups can no longer hit (all of them with the cache off). Returns rows deleted."""
+    before = ((now or datetime.utcnow()) - timedelta(hours=max(0, ttl_hours))).isoformat() + "Z"
+    return _delete_batched(delete_groq_cache_before, before)
+
+
+def enable_incremental_vacuum(force: bool = False) -> bool:
+    """
+    Switch an existing DB to auto_vacuum=INCREMENTAL: one full VACUUM (exclusive lock, rewrites the file, needs
+    about the DB size again in free disk). Skipped unless force, or the file is at most AUTO_VACUUM_CONVERT_MAX_MB
+    with room to spare. Returns True if converted.
+    """
+    with cursor() as cur:
+        cur.execute("PRAGMA auto_vacuum")
+        if int(cur.fetchone()[0]) == 2:
+            return False
+        cur.execute("PRAGMA page_count")
+        pages = int(cur.fetchone()[0])
+        cur.execute("PRAGMA page_size")
+        size = pages * int(cur.fetchone()[0])
+        cur.execute("PRAGMA database_list")
+        path = Path(cur.fetchone()[2])
+        if not force:
+            if size > AUTO_VACUUM_CONVERT_MAX_MB * 1024 * 1024 or shutil.disk_usage(path.parent).free < 2 * size:
+                logger.info("DB is %d MB; run storage.compaction.enable_incremental_vacuum(force=True) in a "
+                            "maintenance window to let compaction shrink the file", size // (1024 * 1024))
+                return False
+        cur.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        cur.execute("VACUUM")
+    logger.info("DB switched to incremental auto-vacuum (%d MB before)", size // (1024 * 1024))
+    return True
+
+
+def run_compaction(now: Optional[datetime] = None) -> Dict[str, int]:
+    """Apply all retention policies, then return freed pages to the file system."""
+    out = {"hot_pruned": 0, "bars": 0, "heartbeats": 0, "tick_stats": 0, "groq_cache": 0, "pages_freed": 0}
+    try:
+        out["hot_pruned"] = prune_hot_prices(now)
+        out["bars"] = downsample_prices(now)
+        out["heartbeats"] = compact_heartbeats(now)
+        out["tick_stats"] = compact_tick_stats(now)
+        out["groq_cache"] = purge_groq_cache(now)
+        with cursor() as cur:
+            out["pages_freed"] = incremental_vacuum(cur)
+        enable_incremental_vacuum()
+    except Exception as e:
+        logger.warning("Compaction failed: %s", e)
+    return out
@@ -0,0 +1,73 @@
+"""
+MNEMOS 2.1 - Tiered confidence_history: tick rows for CONFIDENCE_RAW_DAYS, then per-symbol hourly rollups
+(min / max / mean), folded into daily rollups after CONFIDENCE_HOURLY_DAYS. Raw rows can be archived to
+compressed columnar files before they are dropped. Incremental: each run only folds rows that aged out.
+"""
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from config.settings import (
+    CONFIDENCE_ARCHIVE_DIR,
+    CONFIDENCE_ARCHIVE_ENABLED,
+    CONFIDENCE_HOURLY_DAYS,
+    CONFIDENCE_RAW_DAYS,
+)
+from storage.db import cursor, rollup_confidence_daily, rollup_confidence_hourly, to_epoch
+
+logger = logging.getLogger(__name__)
+
+_ARCHIVE_COLUMNS = ("id", "symbol", "dt", "confidence", "friction_score", "liquidity_score", "volatility_score",
+                    "data_quality_score", "win_rate_component")
+
+
+def _archive_raw(cur, before_epoch: int, max_id: int) -> Optional[Path]:
+    """Write the raw rows about to be rolled up to confidence_<first id>_<last id>.npz."""
+    cur.execute(
+        f"SELECT {', '.join(_ARCHIVE_COLUMNS)} FROM confidence_history WHERE dt_epoch < ? AND id <= ? ORDER BY id",
+        (before_epoch, max_id),
+    )
+    rows = cur.fetchall()
+    if not rows:
+        return None
+    cols = list(zip(*rows))
+    arrays = {}
+    for name, values in zip(_ARCHIVE_COLUMNS, cols):
+        if name in ("symbol", "dt"):
+            arrays[name] = np.asarray(values, dtype=str)
+        elif name == "id":
+            arrays[name] = np.asarray(values, dtype=np.int64)
+        else:
+            arrays[name] = np.asarray([np.nan if v is None else v for v in values], dtype=np.float32)
+    CONFIDENCE_ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    path = CONFIDENCE_ARCHIVE_DIR / f"confidence_{rows[0][0]}_{rows[-1][0]}.npz"
+    np.savez_compressed(path, **arrays)
+    return path
+
+
+def roll_up_confidence(now: Optional[datetime] = None, archive: bool = CONFIDENCE_ARCHIVE_ENABLED) -> Dict[str, int]:
+    """
+    Fold tick rows older than CONFIDENCE_RAW_DAYS (whole hours) into hourly rollups, and hourly rollups older
+    than CONFIDENCE_HOURLY_DAYS (whole days) into daily ones. Returns {"raw": rows folded, "hourly": buckets folded}.
+    """
+    now = now or datetime.utcnow()
+    raw_before = to_epoch((now - timedelta(days=CONFIDENCE_RAW_DAYS)).strftime("%Y-%m-%dT%H:00:00"))
+    hourly_before = (now - timedelta(days=CONFIDENCE_HOURLY_DAYS)).strftime("%Y-%m-%d")
+    out = {"raw": 0, "hourly": 0}
+    try:
+        with cursor() as cur:
+            cur.execute("SELECT MAX(id) FROM confidence_history WHERE dt_epoch < ?", (raw_before,))
+            max_id = cur.fetchone()[0]
+            if max_id is not None:
+                if archive:
+                    path = _archive_raw(cur, raw_before, max_id)
+                    if path:
+                        logger.info("Confidence history archived: %s", path)
+                out["raw"] = rollup_confidence_hourly(cur, raw_before, max_id)
+            out["hourly"] = rollup_confidence_daily(cur, hourly_before)
+    except Exception as e:
+        logger.warning("Confidence rollup failed: %s", e)
+    return out
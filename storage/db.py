@@ -1,22 +1,63 @@
 """
 MNEMOS 2.1 - SQLite storage: prices, signals, summaries, outcomes, confidence, dedup, restarts.
 Parameterized queries only; no raw input in SQL.
+Time-series tables keep their ISO text columns for display and an INTEGER epoch-second twin (*_epoch) for
+range scans, ordering and indexes; convert at the edges with to_epoch / epoch_to_iso.
 """
 import logging
 import sqlite3
 from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Generator, List, Optional, Tuple
+from typing import Any, Dict, Generator, List, Optional, Tuple
 
 import pandas as pd
 
-from config.settings import DB_PATH, DATA_DIR
+from config.settings import DB_PATH, DATA_DIR, MARKET_UTC_OFFSET_MIN
 
 logger = logging.getLogger(__name__)
 
-# Schema version for migrations
+# Schema version of init_schema + run_migrations; later versions are steps in storage.migrations
 SCHEMA_VERSION = 2
+EPOCH_MAX = 253402300799  # 9999-12-31T23:59:59Z, open upper bound
+
+
+def to_epoch(value: Any, market_local: bool = False) -> Optional[int]:
+    """
+    ISO string / datetime / Timestamp -> epoch seconds (None if empty or unparseable). Values without a zone are
+    UTC, or market-local time with market_local (prices.dt). Date-only values are midnight.
+    """
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    try:
+        ts = pd.Timestamp(value)
+    except (ValueError, TypeError):
+        return None
+    if pd.isna(ts):
+        return None
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+        if market_local:
+            ts = ts - pd.Timedelta(minutes=MARKET_UTC_OFFSET_MIN)
+    return int(ts.timestamp())
+
+
+def epoch_to_iso(epoch: Optional[int], market_local: bool = False) -> Optional[str]:
+    """Epoch seconds -> ISO UTC with Z, or naive market-local ISO with market_local."""
+    if epoch is None:
+        return None
+    if market_local:
+        return (pd.Timestamp(int(epoch) + MARKET_UTC_OFFSET_MIN * 60, unit="s")).isoformat()
+    return pd.Timestamp(int(epoch), unit="s").isoformat() + "Z"
+
+
+def epoch_sql(expr: str, market_local: bool = False) -> str:
+    """SQL twin of to_epoch for an ISO text expression."""
+    e = f"CAST(strftime('%s', {expr}) AS INTEGER)"
+    if not market_local:
+        return e
+    return (f"(CASE WHEN {expr} GLOB '*[Zz]' OR {expr} GLOB '*[+-][0-9][0-9]:[0-9][0-9]' THEN {e} "
+            f"ELSE {e} - {MARKET_UTC_OFFSET_MIN * 60} END)")
 
 
 def ensure_data_dir() -> None:
@@ -61,7 +102,6 @@ def init_schema(cur: sqlite3.Cursor) -> None:
             created_at TEXT NOT NULL
         )
     """)
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_prices_symbol_dt ON prices(symbol, dt)")
     cur.execute("""
         CREATE TABLE IF NOT EXISTS signals (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -76,7 +116,6 @@ def init_schema(cur: sqlite3.Cursor) -> None:
         )
     """)
     cur.execute("CREATE INDEX IF NOT EXISTS idx_signals_symbol_created ON signals(symbol, created_at)")
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_signals_created ON signals(created_at)")
     cur.execute("""
         CREATE TABLE IF NOT EXISTS summaries (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -94,7 +133,6 @@ def init_schema(cur: sqlite3.Cursor) -> None:
             message TEXT
         )
     """)
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_heartbeats_ts ON heartbeats(ts)")
     # ----- 2.1: outcomes (performance attribution) -----
     cur.execute("""
         CREATE TABLE IF NOT EXISTS outcomes (
@@ -113,7 +151,6 @@ def init_schema(cur: sqlite3.Cursor) -> None:
             FOREIGN KEY (signal_id) REFERENCES signals(id)
         )
     """)
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_outcomes_signal_id ON outcomes(signal_id)")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_outcomes_symbol ON outcomes(symbol)")
     # ----- 2.1: confidence history -----
     cur.execute("""
@@ -130,7 +167,26 @@ def init_schema(cur: sqlite3.Cursor) -> None:
             created_at TEXT NOT NULL
         )
     """)
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_confidence_symbol_dt ON confidence_history(symbol, dt)")
+    # Older confidence_history rolled up per symbol x hour / day (min, max, sums for means)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS confidence_rollup (
+            symbol TEXT NOT NULL,
+            resolution TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            n INTEGER NOT NULL,
+            conf_min REAL,
+            conf_max REAL,
+            conf_sum REAL,
+            friction_min REAL,
+            friction_max REAL,
+            friction_sum REAL,
+            liquidity_sum REAL,
+            volatility_sum REAL,
+            data_quality_sum REAL,
+            win_rate_sum REAL,
+            PRIMARY KEY (symbol, resolution, bucket)
+        )
+    """)
     # ----- 2.1: alert lock (de-dup cooldown) -----
     cur.execute("""
         CREATE TABLE IF NOT EXISTS alert_lock (
@@ -170,6 +226,8 @@ def init_schema(cur: sqlite3.Cursor) -> None:
             started_at TEXT NOT NULL,
             finished_at TEXT,
             summary_json TEXT,
+            scope TEXT,
+            cache_key TEXT,
             FOREIGN KEY (strategy_version_id) REFERENCES strategy_versions(id)
         )
     """)
@@ -185,6 +243,151 @@ def init_schema(cur: sqlite3.Cursor) -> None:
         )
     """)
     cur.execute("CREATE INDEX IF NOT EXISTS idx_report_jobs_kind ON report_jobs(kind)")
+    # ----- 2.1: alert outbox (durable delivery queue) -----
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS alert_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            symbol TEXT NOT NULL,
+            signal_type TEXT NOT NULL,
+            score REAL NOT NULL,
+            explanation TEXT,
+            headline TEXT,
+            severity INTEGER,
+            confidence REAL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at TEXT NOT NULL,
+            last_error TEXT,
+            created_at TEXT NOT NULL,
+            sent_at TEXT
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_alert_outbox_status_next ON alert_outbox(status, next_attempt_at)")
+    # ----- 2.1: warm-restart checkpoints (compressed engine state) -----
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS checkpoints (
+            name TEXT PRIMARY KEY,
+            payload BLOB NOT NULL,
+            created_at TEXT NOT NULL
+        )
+    """)
+    # ----- 2.1: GROQ response cache (normalized prompt hash -> text) -----
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS groq_cache (
+            prompt_hash TEXT PRIMARY KEY,
+            response TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        )
+    """)
+    # ----- 2.1: token buckets shared by all processes (core.rate_limiter) -----
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS rate_buckets (
+            name TEXT PRIMARY KEY,
+            tokens REAL NOT NULL,
+            updated_at REAL NOT NULL
+        )
+    """)
+    # ----- 2.1: intraday outcomes (+30m, +1h, +close from 5m bars; one compact row per signal) -----
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS intraday_outcomes (
+            signal_id INTEGER PRIMARY KEY,
+            symbol TEXT NOT NULL,
+            signal_dt TEXT NOT NULL,
+            price_at_signal REAL NOT NULL,
+            ret_30m REAL,
+            ret_1h REAL,
+            ret_close REAL
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_intraday_outcomes_symbol ON intraday_outcomes(symbol)")
+    # ----- 2.1: retention tiers (intraday bars -> daily bars, heartbeats -> hourly counts per status) -----
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS prices_daily (
+            symbol TEXT NOT NULL,
+            day TEXT NOT NULL,
+            day_epoch INTEGER NOT NULL,
+            open REAL,
+            high REAL,
+            low REAL,
+            close REAL,
+            volume REAL,
+            bars INTEGER NOT NULL,
+            PRIMARY KEY (symbol, day_epoch)
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS heartbeat_hourly (
+            hour_epoch INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            n INTEGER NOT NULL,
+            PRIMARY KEY (hour_epoch, status)
+        )
+    """)
+    # ----- 2.1: per-tick counters (zero-score results are counted here instead of stored as signals) -----
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS tick_stats (
+            ts_epoch INTEGER PRIMARY KEY,
+            evaluated INTEGER NOT NULL,
+            nonzero INTEGER NOT NULL,
+            stored INTEGER NOT NULL,
+            max_score REAL
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS tick_stats_hourly (
+            hour_epoch INTEGER PRIMARY KEY,
+            ticks INTEGER NOT NULL,
+            evaluated INTEGER NOT NULL,
+            nonzero INTEGER NOT NULL,
+            stored INTEGER NOT NULL,
+            max_score REAL
+        )
+    """)
+    # ----- 2.1: attribution cube (symbol x signal_type x horizon x week, refreshed incrementally) -----
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS attribution_cube (
+            symbol TEXT NOT NULL,
+            signal_type TEXT NOT NULL,
+            horizon INTEGER NOT NULL,
+            week TEXT NOT NULL,
+            n INTEGER NOT NULL,
+            wins INTEGER NOT NULL,
+            sum_ret REAL NOT NULL,
+            sum_sq REAL NOT NULL,
+            min_ret REAL NOT NULL,
+            max_ret REAL NOT NULL,
+            max_dd REAL NOT NULL,
+            PRIMARY KEY (symbol, signal_type, horizon, week)
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_attribution_cube_horizon_week ON attribution_cube(horizon, week)")
+    # ----- 2.1: watermarks for incremental materializations -----
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS watermarks (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+    """)
+    # ----- 2.1: walk-forward sufficient statistics (per run, sweep candidate and day) -----
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS walk_forward_stats (
+            run_key TEXT NOT NULL,
+            candidate INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            n INTEGER NOT NULL,
+            wins INTEGER NOT NULL,
+            ret_sum REAL NOT NULL,
+            ret_sq REAL NOT NULL,
+            PRIMARY KEY (run_key, candidate, day)
+        )
+    """)
+    # ----- 2.1: cache versions (cross-process invalidation of in-memory caches) -----
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS cache_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        )
+    """)
     _ensure_schema_version(cur, SCHEMA_VERSION)
     logger.info("Schema initialized (v%d)", SCHEMA_VERSION)
 
@@ -213,10 +416,26 @@ def run_migrations(cur: sqlite3.Cursor) -> None:
         cur.execute("ALTER TABLE signals ADD COLUMN severity INTEGER")
     except sqlite3.OperationalError:
         pass
+    # alert_outbox priority inputs
+    try:
+        cur.execute("ALTER TABLE alert_outbox ADD COLUMN severity INTEGER")
+    except sqlite3.OperationalError:
+        pass
+    try:
+        cur.execute("ALTER TABLE alert_outbox ADD COLUMN confidence REAL")
+    except sqlite3.OperationalError:
+        pass
+    # backtest result cache (content-addressed entries in backtest_runs)
+    for col in ("scope", "cache_key"):
+        try:
+            cur.execute(f"ALTER TABLE backtest_runs ADD COLUMN {col} TEXT")
+        except sqlite3.OperationalError:
+            pass
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_backtest_runs_scope ON backtest_runs(scope, cache_key)")
 
 
 def insert_prices(cur: sqlite3.Cursor, df: pd.DataFrame) -> int:
-    """Insert OHLCV rows. df must have columns: symbol, datetime, Open, High, Low, Close, Volume."""
+    """Insert OHLCV rows (a re-fetched bar replaces the stored one). df columns: symbol, datetime, Open..Volume."""
     if df is None or df.empty:
         return 0
     now = datetime.utcnow().isoformat() + "Z"
@@ -230,8 +449,9 @@ def insert_prices(cur: sqlite3.Cursor, df: pd.DataFrame) -> int:
         c = float(row.get("Close", 0)) if pd.notna(row.get("Close")) else None
         v = float(row.get("Volume", 0)) if pd.notna(row.get("Volume")) else None
         cur.execute(
-            "INSERT INTO prices (symbol, dt, open, high, low, close, volume, created_at) VALUES (?,?,?,?,?,?,?,?)",
-            (sym, dt, o, h, l, c, v, now),
+            """INSERT OR REPLACE INTO prices (symbol, dt, dt_epoch, open, high, low, close, volume, created_at)
+               VALUES (?,?,?,?,?,?,?,?,?)""",
+            (sym, dt, to_epoch(dt, market_local=True), o, h, l, c, v, now),
         )
         count += 1
     return count
@@ -251,10 +471,10 @@ def insert_signal(
     now = datetime.utcnow().isoformat() + "Z"
     sym = str(symbol)[:32]
     cur.execute(
-        """INSERT INTO signals (symbol, score, explanation, signals_json, created_at, signal_type, confidence, severity)
-           VALUES (?,?,?,?,?,?,?,?)""",
+        """INSERT INTO signals (symbol, score, explanation, signals_json, created_at, created_epoch, signal_type,
+           confidence, severity) VALUES (?,?,?,?,?,?,?,?,?)""",
         (sym, float(score), explanation[:2000] if explanation else "", signals_json[:5000] if signals_json else "[]",
-         now, (signal_type or "")[:32], confidence, severity),
+         now, to_epoch(now), (signal_type or "")[:32], confidence, severity),
     )
     return cur.lastrowid or 0
 
@@ -268,7 +488,10 @@ def insert_summary(cur: sqlite3.Cursor, kind: str, payload: str) -> None:
 def insert_heartbeat(cur: sqlite3.Cursor, status: str, message: Optional[str] = None) -> None:
     """Log heartbeat."""
     now = datetime.utcnow().isoformat() + "Z"
-    cur.execute("INSERT INTO heartbeats (ts, status, message) VALUES (?,?,?)", (now, status[:64], (message or "")[:500]))
+    cur.execute(
+        "INSERT INTO heartbeats (ts, ts_epoch, status, message) VALUES (?,?,?,?)",
+        (now, to_epoch(now), status[:64], (message or "")[:500]),
+    )
 
 
 def insert_outcome(
@@ -284,13 +507,13 @@ def insert_outcome(
     outcome_3d_dt: Optional[str] = None,
     outcome_5d_dt: Optional[str] = None,
 ) -> None:
-    """Insert performance outcome for a signal."""
+    """Insert performance outcome for a signal (ignored if the signal already has one)."""
     now = datetime.utcnow().isoformat() + "Z"
     cur.execute(
-        """INSERT INTO outcomes (signal_id, symbol, signal_dt, price_at_signal, return_1d, return_3d, return_5d,
-           outcome_1d_dt, outcome_3d_dt, outcome_5d_dt, created_at)
-           VALUES (?,?,?,?,?,?,?,?,?,?,?)""",
-        (signal_id, symbol[:32], signal_dt, price_at_signal, return_1d, return_3d, return_5d,
+        """INSERT OR IGNORE INTO outcomes (signal_id, symbol, signal_dt, signal_epoch, price_at_signal, return_1d, return_3d,
+           return_5d, outcome_1d_dt, outcome_3d_dt, outcome_5d_dt, created_at)
+           VALUES (?,?,?,?,?,?,?,?,?,?,?,?)""",
+        (signal_id, symbol[:32], signal_dt, to_epoch(signal_dt), price_at_signal, return_1d, return_3d, return_5d,
          outcome_1d_dt, outcome_3d_dt, outcome_5d_dt, now),
     )
 
@@ -309,10 +532,99 @@ def insert_confidence(
     """Insert confidence history row."""
     now = datetime.utcnow().isoformat() + "Z"
     cur.execute(
-        """INSERT INTO confidence_history (symbol, dt, confidence, friction_score, liquidity_score,
+        """INSERT INTO confidence_history (symbol, dt, dt_epoch, confidence, friction_score, liquidity_score,
            volatility_score, data_quality_score, win_rate_component, created_at)
-           VALUES (?,?,?,?,?,?,?,?,?)""",
-        (symbol[:32], dt, confidence, friction_score, liquidity_score, volatility_score, data_quality_score, win_rate_component, now),
+           VALUES (?,?,?,?,?,?,?,?,?,?)""",
+        (symbol[:32], dt, to_epoch(dt), confidence, friction_score, liquidity_score, volatility_score, data_quality_score,
+         win_rate_component, now),
+    )
+
+
+_ROLLUP_MIN_MAX = ("conf_min", "conf_max", "friction_min", "friction_max")
+_ROLLUP_SUMS = ("n", "conf_sum", "friction_sum", "liquidity_sum", "volatility_sum", "data_quality_sum", "win_rate_sum")
+
+
+def _merge_confidence_rollup(cur: sqlite3.Cursor, resolution: str, select_sql: str, params: Tuple) -> None:
+    """Upsert grouped rollup rows (select_sql yields symbol, bucket, n, min/max/sum columns), merging into buckets."""
+    cols = ("n", "conf_min", "conf_max", "conf_sum", "friction_min", "friction_max", "friction_sum",
+            "liquidity_sum", "volatility_sum", "data_quality_sum", "win_rate_sum")
+    merge = [f"{c} = {c} + excluded.{c}" for c in _ROLLUP_SUMS] + [
+        f"{c} = {c[-3:]}(COALESCE({c}, excluded.{c}), COALESCE(excluded.{c}, {c}))" for c in _ROLLUP_MIN_MAX
+    ]
+    cur.execute(
+        f"""INSERT INTO confidence_rollup (symbol, resolution, bucket, {', '.join(cols)})
+            SELECT symbol, '{resolution}', bucket, {', '.join(cols)} FROM ({select_sql}) WHERE true
+            ON CONFLICT(symbol, resolution, bucket) DO UPDATE SET {', '.join(merge)}""",
+        params,
+    )
+
+
+def rollup_confidence_hourly(cur: sqlite3.Cursor, before_epoch: int, max_id: int) -> int:
+    """Fold confidence_history rows (dt_epoch < before_epoch, id <= max_id) into hourly rollups and delete them."""
+    where = "WHERE dt_epoch < ? AND id <= ?"
+    _merge_confidence_rollup(
+        cur,
+        "hour",
+        f"""SELECT symbol, substr(dt, 1, 13) AS bucket, COUNT(*) AS n,
+                   MIN(confidence) AS conf_min, MAX(confidence) AS conf_max, SUM(confidence) AS conf_sum,
+                   MIN(friction_score) AS friction_min, MAX(friction_score) AS friction_max,
+                   SUM(friction_score) AS friction_sum, SUM(liquidity_score) AS liquidity_sum,
+                   SUM(volatility_score) AS volatility_sum, SUM(data_quality_score) AS data_quality_sum,
+                   SUM(win_rate_component) AS win_rate_sum
+            FROM confidence_history {where} GROUP BY symbol, substr(dt, 1, 13)""",
+        (before_epoch, max_id),
+    )
+    cur.execute(f"DELETE FROM confidence_history {where}", (before_epoch, max_id))
+    return cur.rowcount or 0
+
+
+def rollup_confidence_daily(cur: sqlite3.Cursor, before_day: str) -> int:
+    """Fold hourly rollups of days before before_day (YYYY-MM-DD) into daily rollups and delete them."""
+    _merge_confidence_rollup(
+        cur,
+        "day",
+        """SELECT symbol, substr(bucket, 1, 10) AS bucket, SUM(n) AS n,
+                  MIN(conf_min) AS conf_min, MAX(conf_max) AS conf_max, SUM(conf_sum) AS conf_sum,
+                  MIN(friction_min) AS friction_min, MAX(friction_max) AS friction_max,
+                  SUM(friction_sum) AS friction_sum, SUM(liquidity_sum) AS liquidity_sum,
+                  SUM(volatility_sum) AS volatility_sum, SUM(data_quality_sum) AS data_quality_sum,
+                  SUM(win_rate_sum) AS win_rate_sum
+           FROM confidence_rollup WHERE resolution = 'hour' AND bucket < ? GROUP BY symbol, substr(bucket, 1, 10)""",
+        (before_day,),
+    )
+    cur.execute("DELETE FROM confidence_rollup WHERE resolution = 'hour' AND bucket < ?", (before_day,))
+    return cur.rowcount or 0
+
+
+def get_confidence_series(
+    cur: sqlite3.Cursor, symbol: str, since: Optional[str] = None, resolution: str = "day"
+) -> List[Tuple]:
+    """
+    (bucket, n, mean, min, max, friction mean) of a symbol's confidence per hour or day from the day of since,
+    across tick rows and rollups. Buckets already rolled up to days stay daily at hour resolution.
+    """
+    width = 13 if resolution == "hour" else 10
+    sym = symbol[:32]
+    cur.execute(
+        f"""SELECT substr(bucket, 1, {width}) AS b, SUM(n), SUM(conf_sum) / SUM(n), MIN(conf_min), MAX(conf_max),
+                   SUM(friction_sum) / SUM(n)
+            FROM (
+                SELECT substr(dt, 1, 13) AS bucket, 1 AS n, confidence AS conf_sum, confidence AS conf_min,
+                       confidence AS conf_max, friction_score AS friction_sum
+                FROM confidence_history WHERE symbol = ?
+                UNION ALL
+                SELECT bucket, n, conf_sum, conf_min, conf_max, friction_sum FROM confidence_rollup WHERE symbol = ?
+            ) WHERE bucket >= ? GROUP BY b ORDER BY b""",
+        (sym, sym, (since or "")[:10]),
+    )
+    return [tuple(r) for r in cur.fetchall()]
+
+
+def insert_backtest_runs(cur: sqlite3.Cursor, runs: List[Tuple]) -> None:
+    """Insert backtest runs: (strategy_version_id, started_at, finished_at, summary_json) per row."""
+    cur.executemany(
+        "INSERT INTO backtest_runs (strategy_version_id, started_at, finished_at, summary_json) VALUES (?,?,?,?)",
+        runs,
     )
 
 
@@ -325,6 +637,377 @@ def upsert_alert_lock(cur: sqlite3.Cursor, symbol: str, signal_type: str) -> Non
     )
 
 
+def get_all_alert_locks(cur: sqlite3.Cursor) -> List[Tuple[str, str, str]]:
+    """All (symbol, signal_type, last_alert_ts) rows."""
+    cur.execute("SELECT symbol, signal_type, last_alert_ts FROM alert_lock")
+    return [(r[0], r[1], r[2]) for r in cur.fetchall()]
+
+
+def bump_cache_version(cur: sqlite3.Cursor, name: str) -> int:
+    """Increment and return the version of a named cache (other processes reload on change)."""
+    cur.execute(
+        "INSERT INTO cache_versions (name, version) VALUES (?, 1) "
+        "ON CONFLICT(name) DO UPDATE SET version = version + 1",
+        (name[:64],),
+    )
+    return get_cache_version(cur, name)
+
+
+def get_cache_version(cur: sqlite3.Cursor, name: str) -> int:
+    """Current version of a named cache (0 if never bumped)."""
+    cur.execute("SELECT version FROM cache_versions WHERE name = ?", (name[:64],))
+    row = cur.fetchone()
+    return int(row[0]) if row else 0
+
+
+def take_rate_tokens(
+    cur: sqlite3.Cursor,
+    name: str,
+    capacity: float,
+    per_sec: float,
+    cost: float,
+    now: float,
+    force: bool = False,
+) -> bool:
+    """
+    Refill the bucket to now and take cost tokens in one atomic UPDATE. True if taken.
+    force: take regardless (floored at 0), for usage recorded after the fact.
+    """
+    cur.execute(
+        "INSERT OR IGNORE INTO rate_buckets (name, tokens, updated_at) VALUES (?,?,?)",
+        (name[:96], float(capacity), now),
+    )
+    refill = "MIN(:cap, tokens + MAX(0, :now - updated_at) * :rate)"
+    if force:
+        sql = f"UPDATE rate_buckets SET tokens = MAX(0, {refill} - :cost), updated_at = :now WHERE name = :name"
+    else:
+        sql = (
+            f"UPDATE rate_buckets SET tokens = {refill} - :cost, updated_at = :now "
+            f"WHERE name = :name AND {refill} >= :cost"
+        )
+    cur.execute(sql, {"cap": float(capacity), "now": now, "rate": float(per_sec), "cost": float(cost), "name": name[:96]})
+    return cur.rowcount == 1
+
+
+def peek_rate_tokens(cur: sqlite3.Cursor, name: str, capacity: float, per_sec: float, now: float) -> float:
+    """Tokens currently available in a bucket (full if it has never been used)."""
+    cur.execute(
+        "SELECT MIN(?, tokens + MAX(0, ? - updated_at) * ?) FROM rate_buckets WHERE name = ?",
+        (float(capacity), now, float(per_sec), name[:96]),
+    )
+    row = cur.fetchone()
+    return float(row[0]) if row else float(capacity)
+
+
+def upsert_intraday_outcomes(cur: sqlite3.Cursor, records: List[Tuple]) -> None:
+    """(signal_id, symbol, signal_dt, price_at_signal, ret_30m, ret_1h, ret_close); known returns are kept."""
+    cur.executemany(
+        """INSERT INTO intraday_outcomes (signal_id, symbol, signal_dt, price_at_signal, ret_30m, ret_1h, ret_close)
+           VALUES (?,?,?,?,?,?,?)
+           ON CONFLICT(signal_id) DO UPDATE SET
+               ret_30m = COALESCE(ret_30m, excluded.ret_30m),
+               ret_1h = COALESCE(ret_1h, excluded.ret_1h),
+               ret_close = COALESCE(ret_close, excluded.ret_close)""",
+        [(r[0], str(r[1])[:32], r[2], r[3], r[4], r[5], r[6]) for r in records],
+    )
+
+
+def insert_tick_stats(
+    cur: sqlite3.Cursor, ts_epoch: int, evaluated: int, nonzero: int, stored: int, max_score: Optional[float]
+) -> None:
+    """Per-tick counters: results evaluated, with score > 0, persisted to signals; highest score."""
+    cur.execute(
+        "INSERT OR REPLACE INTO tick_stats (ts_epoch, evaluated, nonzero, stored, max_score) VALUES (?,?,?,?,?)",
+        (int(ts_epoch), int(evaluated), int(nonzero), int(stored), max_score),
+    )
+
+
+def roll_up_tick_stats(cur: sqlite3.Cursor, before_epoch: int, limit: int) -> int:
+    """Fold up to limit tick_stats rows older than before_epoch (oldest first) into hourly sums and delete them."""
+    cur.execute(
+        "SELECT MAX(ts_epoch) FROM (SELECT ts_epoch FROM tick_stats WHERE ts_epoch < ? ORDER BY ts_epoch LIMIT ?)",
+        (before_epoch, int(limit)),
+    )
+    last = cur.fetchone()[0]
+    if last is None:
+        return 0
+    cur.execute(
+        """INSERT INTO tick_stats_hourly (hour_epoch, ticks, evaluated, nonzero, stored, max_score)
+           SELECT ts_epoch - ts_epoch % 3600, COUNT(*), SUM(evaluated), SUM(nonzero), SUM(stored), MAX(max_score)
+           FROM tick_stats WHERE ts_epoch <= ? GROUP BY 1
+           ON CONFLICT(hour_epoch) DO UPDATE SET ticks = ticks + excluded.ticks,
+               evaluated = evaluated + excluded.evaluated, nonzero = nonzero + excluded.nonzero,
+               stored = stored + excluded.stored, max_score = MAX(COALESCE(max_score, excluded.max_score),
+               COALESCE(excluded.max_score, max_score))""",
+        (last,),
+    )
+    cur.execute("DELETE FROM tick_stats WHERE ts_epoch <= ?", (last,))
+    return cur.rowcount
+
+
+def get_watermark(cur: sqlite3.Cursor, name: str) -> int:
+    """Last processed id for a named incremental job (0 if never run)."""
+    cur.execute("SELECT value FROM watermarks WHERE name = ?", (name[:64],))
+    row = cur.fetchone()
+    return int(row[0]) if row else 0
+
+
+def advance_watermark(cur: sqlite3.Cursor, name: str, old: int, new: int) -> bool:
+    """Compare-and-set watermark old -> new. False if another process moved it first."""
+    if old == 0:
+        cur.execute("INSERT OR IGNORE INTO watermarks (name, value) VALUES (?, 0)", (name[:64],))
+    cur.execute("UPDATE watermarks SET value = ? WHERE name = ? AND value = ?", (new, name[:64], old))
+    return cur.rowcount == 1
+
+
+def replace_walk_forward_stats(cur: sqlite3.Cursor, run_key: str, from_day: str, rows: List[Tuple]) -> None:
+    """Replace a run's stats from from_day on with rows of (candidate, day, n, wins, ret_sum, ret_sq)."""
+    cur.execute("DELETE FROM walk_forward_stats WHERE run_key = ? AND day >= ?", (run_key, from_day))
+    cur.executemany(
+        "INSERT INTO walk_forward_stats (run_key, candidate, day, n, wins, ret_sum, ret_sq) VALUES (?,?,?,?,?,?,?)",
+        [(run_key, *r) for r in rows],
+    )
+
+
+def insert_backtest_cache(
+    cur: sqlite3.Cursor, scope: str, cache_key: str, started_at: str, summary_json: str
+) -> int:
+    """Store a cached backtest result (summary in summary_json). Returns run id."""
+    now = datetime.utcnow().isoformat() + "Z"
+    cur.execute(
+        """INSERT INTO backtest_runs (started_at, finished_at, summary_json, scope, cache_key)
+           VALUES (?,?,?,?,?)""",
+        (started_at, now, summary_json, scope, cache_key),
+    )
+    return cur.lastrowid or 0
+
+
+def get_backtest_cache(cur: sqlite3.Cursor, scope: str, limit: int = 50) -> List[Tuple[int, str, str]]:
+    """(id, cache_key, summary_json) of cached results for a scope, newest first."""
+    cur.execute(
+        "SELECT id, cache_key, summary_json FROM backtest_runs WHERE scope = ? ORDER BY id DESC LIMIT ?",
+        (scope, limit),
+    )
+    return [tuple(r) for r in cur.fetchall()]
+
+
+def get_stale_backtest_cache(cur: sqlite3.Cursor, scope: str, keep: int) -> List[Tuple[int, str, str]]:
+    """(id, cache_key, summary_json) of a scope's cached results beyond the newest keep."""
+    cur.execute(
+        """SELECT id, cache_key, summary_json FROM backtest_runs WHERE scope = ?
+           ORDER BY id DESC LIMIT -1 OFFSET ?""",
+        (scope, max(0, keep)),
+    )
+    return [tuple(r) for r in cur.fetchall()]
+
+
+def delete_backtest_runs(cur: sqlite3.Cursor, run_ids: List[int]) -> None:
+    if run_ids:
+        cur.execute(f"DELETE FROM backtest_runs WHERE id IN ({','.join('?' * len(run_ids))})", run_ids)
+
+
+def signal_range_watermark(cur: sqlite3.Cursor, since: str, until: Optional[str]) -> Tuple[int, int, int]:
+    """(count, max signal id, max outcome id) of signals created in [since, until) (open-ended if until is None);
+    changes when either does."""
+    cur.execute(
+        """SELECT COUNT(*), COALESCE(MAX(s.id), 0), COALESCE(MAX(o.id), 0) FROM signals s
+           LEFT JOIN outcomes o ON o.signal_id = s.id WHERE s.created_epoch >= ? AND s.created_epoch < ?""",
+        (to_epoch(since) or 0, to_epoch(until) or EPOCH_MAX),
+    )
+    row = cur.fetchone()
+    return int(row[0]), int(row[1]), int(row[2])
+
+
+def price_range_watermark(
+    cur: sqlite3.Cursor, since: Optional[str], until: Optional[str]
+) -> Tuple[int, int, int]:
+    """(count, max id) of price bars and count of daily bars with dt in [since, until); changes when bars are
+    added, re-fetched or downsampled."""
+    lo = to_epoch(since, market_local=True) or 0
+    hi = to_epoch(until, market_local=True) or EPOCH_MAX
+    cur.execute("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM prices WHERE dt_epoch >= ? AND dt_epoch < ?", (lo, hi))
+    row = cur.fetchone()
+    cur.execute("SELECT COUNT(*) FROM prices_daily WHERE day_epoch >= ? AND day_epoch < ?", (lo, hi))
+    return int(row[0]), int(row[1]), int(cur.fetchone()[0])
+
+
+def get_prices_after(
+    cur: sqlite3.Cursor,
+    after_id: int,
+    limit: Optional[int] = None,
+    symbols: Optional[List[str]] = None,
+    since_epoch: Optional[int] = None,
+    until_epoch: Optional[int] = None,
+) -> List[Tuple]:
+    """(id, symbol, dt_epoch, open, high, low, close, volume) of bars with id > after_id, in id order."""
+    where, params = ["id > ?", "dt_epoch IS NOT NULL"], [after_id]
+    if symbols:
+        where.append(f"symbol IN ({','.join('?' * len(symbols))})")
+        params.extend(s[:32] for s in symbols)
+    if since_epoch is not None:
+        where.append("dt_epoch >= ?")
+        params.append(since_epoch)
+    if until_epoch is not None:
+        where.append("dt_epoch < ?")
+        params.append(until_epoch)
+    sql = f"SELECT id, symbol, dt_epoch, open, high, low, close, volume FROM prices WHERE {' AND '.join(where)} ORDER BY id"
+    if limit:
+        sql += f" LIMIT {int(limit)}"
+    cur.execute(sql, params)
+    return [tuple(r) for r in cur.fetchall()]
+
+
+def delete_prices_before(
+    cur: sqlite3.Cursor, before_epoch: int, max_id: Optional[int] = None, limit: Optional[int] = None
+) -> int:
+    """Drop bars older than before_epoch (only id <= max_id if given; at most limit rows). Returns rows deleted."""
+    where, params = "dt_epoch < ?", [before_epoch]
+    if max_id is not None:
+        where += " AND id <= ?"
+        params.append(max_id)
+    if limit:
+        cur.execute(f"DELETE FROM prices WHERE id IN (SELECT id FROM prices WHERE {where} ORDER BY id LIMIT ?)",
+                    params + [int(limit)])
+    else:
+        cur.execute(f"DELETE FROM prices WHERE {where}", params)
+    return cur.rowcount
+
+
+def upsert_prices_daily(cur: sqlite3.Cursor, rows: List[Tuple]) -> None:
+    """Upsert daily bars (symbol, day, day_epoch, open, high, low, close, volume, intraday bars folded)."""
+    cur.executemany(
+        """INSERT OR REPLACE INTO prices_daily (symbol, day, day_epoch, open, high, low, close, volume, bars)
+           VALUES (?,?,?,?,?,?,?,?,?)""",
+        rows,
+    )
+
+
+def get_prices_daily(
+    cur: sqlite3.Cursor,
+    symbols: Optional[List[str]] = None,
+    since_epoch: Optional[int] = None,
+    until_epoch: Optional[int] = None,
+) -> List[Tuple]:
+    """(symbol, day_epoch, open, high, low, close, volume) of downsampled daily bars."""
+    where, params = ["1 = 1"], []
+    if symbols:
+        where.append(f"symbol IN ({','.join('?' * len(symbols))})")
+        params.extend(s[:32] for s in symbols)
+    if since_epoch is not None:
+        where.append("day_epoch >= ?")
+        params.append(since_epoch)
+    if until_epoch is not None:
+        where.append("day_epoch < ?")
+        params.append(until_epoch)
+    cur.execute(
+        f"SELECT symbol, day_epoch, open, high, low, close, volume FROM prices_daily WHERE {' AND '.join(where)}",
+        params,
+    )
+    return [tuple(r) for r in cur.fetchall()]
+
+
+def roll_up_heartbeats(cur: sqlite3.Cursor, before_epoch: int, limit: int) -> int:
+    """Fold up to limit heartbeats older than before_epoch (oldest first) into hourly counts and delete them."""
+    cur.execute(
+        "SELECT MAX(id) FROM (SELECT id FROM heartbeats WHERE ts_epoch < ? ORDER BY id LIMIT ?)",
+        (before_epoch, int(limit)),
+    )
+    max_id = cur.fetchone()[0]
+    if max_id is None:
+        return 0
+    cur.execute(
+        """INSERT INTO heartbeat_hourly (hour_epoch, status, n)
+           SELECT ts_epoch - ts_epoch % 3600, status, COUNT(*) FROM heartbeats WHERE ts_epoch < ? AND id <= ?
+           GROUP BY 1, 2
+           ON CONFLICT(hour_epoch, status) DO UPDATE SET n = n + excluded.n""",
+        (before_epoch, max_id),
+    )
+    cur.execute("DELETE FROM heartbeats WHERE ts_epoch < ? AND id <= ?", (before_epoch, max_id))
+    return cur.rowcount
+
+
+def get_heartbeat_counts(cur: sqlite3.Cursor, since_epoch: int) -> Dict[str, int]:
+    """Heartbeats per status since since_epoch, raw rows plus hourly counts (whole hours from since_epoch)."""
+    cur.execute(
+        """SELECT status, SUM(n) FROM (
+               SELECT status, COUNT(*) AS n FROM heartbeats WHERE ts_epoch >= ? GROUP BY status
+               UNION ALL
+               SELECT status, SUM(n) AS n FROM heartbeat_hourly WHERE hour_epoch >= ? GROUP BY status
+           ) GROUP BY status""",
+        (since_epoch, since_epoch),
+    )
+    return {r[0]: int(r[1]) for r in cur.fetchall()}
+
+
+def incremental_vacuum(cur: sqlite3.Cursor, pages: int = 0) -> int:
+    """Return up to pages free pages (0 = all) to the file system; needs auto_vacuum=INCREMENTAL. Returns pages freed."""
+    cur.execute("PRAGMA freelist_count")
+    before = int(cur.fetchone()[0])
+    # executescript steps the pragma to completion; execute() would free a single page
+    cur.connection.executescript(f"PRAGMA incremental_vacuum({int(pages)});" if pages else "PRAGMA incremental_vacuum;")
+    cur.execute("PRAGMA freelist_count")
+    return before - int(cur.fetchone()[0])
+
+
+def get_walk_forward_stats(cur: sqlite3.Cursor, run_key: str) -> List[Tuple]:
+    """(candidate, day, n, wins, ret_sum, ret_sq) rows of a walk-forward run."""
+    cur.execute(
+        "SELECT candidate, day, n, wins, ret_sum, ret_sq FROM walk_forward_stats WHERE run_key = ?",
+        (run_key,),
+    )
+    return [tuple(r) for r in cur.fetchall()]
+
+
+def merge_attribution_cells(cur: sqlite3.Cursor, cells: List[Tuple]) -> None:
+    """
+    Fold new (symbol, signal_type, horizon, week, n, wins, sum_ret, sum_sq, min_ret, max_ret, max_dd)
+    cells into attribution_cube. New rows are later than existing ones, so drawdown folds as
+    max(old_dd, new_dd, old_max - new_min).
+    """
+    cur.executemany(
+        """INSERT INTO attribution_cube (symbol, signal_type, horizon, week, n, wins, sum_ret, sum_sq,
+           min_ret, max_ret, max_dd) VALUES (?,?,?,?,?,?,?,?,?,?,?)
+           ON CONFLICT(symbol, signal_type, horizon, week) DO UPDATE SET
+               n = n + excluded.n,
+               wins = wins + excluded.wins,
+               sum_ret = sum_ret + excluded.sum_ret,
+               sum_sq = sum_sq + excluded.sum_sq,
+               max_dd = MAX(max_dd, excluded.max_dd, max_ret - excluded.min_ret),
+               min_ret = MIN(min_ret, excluded.min_ret),
+               max_ret = MAX(max_ret, excluded.max_ret)""",
+        cells,
+    )
+
+
+def get_groq_cache(cur: sqlite3.Cursor, prompt_hash: str, since_ts: str) -> Optional[str]:
+    """Cached GROQ response created at or after since_ts, or None."""
+    cur.execute(
+        "SELECT response FROM groq_cache WHERE prompt_hash = ? AND created_at >= ?",
+        (prompt_hash, since_ts),
+    )
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def put_groq_cache(cur: sqlite3.Cursor, prompt_hash: str, response: str) -> None:
+    """Store a GROQ response under its prompt hash."""
+    now = datetime.utcnow().isoformat() + "Z"
+    cur.execute(
+        "INSERT OR REPLACE INTO groq_cache (prompt_hash, response, created_at) VALUES (?,?,?)",
+        (prompt_hash, response[:2000], now),
+    )
+
+
+def delete_groq_cache_before(cur: sqlite3.Cursor, before_ts: str, limit: Optional[int] = None) -> int:
+    """Drop cached GROQ responses created before before_ts (at most limit rows). Returns rows deleted."""
+    if limit:
+        cur.execute("DELETE FROM groq_cache WHERE rowid IN (SELECT rowid FROM groq_cache WHERE created_at < ? LIMIT ?)",
+                    (before_ts, int(limit)))
+    else:
+        cur.execute("DELETE FROM groq_cache WHERE created_at < ?", (before_ts,))
+    return cur.rowcount
+
+
 def get_alert_lock(cur: sqlite3.Cursor, symbol: str, signal_type: str) -> Optional[str]:
     """Return last_alert_ts for (symbol, signal_type) or None."""
     cur.execute("SELECT last_alert_ts FROM alert_lock WHERE symbol = ? AND signal_type = ?", (symbol[:32], signal_type[:32]))
@@ -345,9 +1028,163 @@ def get_restart_count_since(cur: sqlite3.Cursor, since_ts: str) -> int:
     return row[0] if row else 0
 
 
+def enqueue_alert(
+    cur: sqlite3.Cursor,
+    symbol: str,
+    signal_type: str,
+    score: float,
+    explanation: str,
+    headline: Optional[str] = None,
+    severity: Optional[int] = None,
+    confidence: Optional[float] = None,
+) -> int:
+    """Add a pending alert to the outbox. Returns outbox id."""
+    now = datetime.utcnow().isoformat() + "Z"
+    cur.execute(
+        """INSERT INTO alert_outbox (symbol, signal_type, score, explanation, headline, severity, confidence,
+           status, attempts, next_attempt_at, created_at) VALUES (?,?,?,?,?,?,?,'pending',0,?,?)""",
+        (symbol[:32], signal_type[:32], float(score), (explanation or "")[:2000], (headline or "")[:500] or None,
+         severity, confidence, now, now),
+    )
+    return cur.lastrowid or 0
+
+
+def has_pending_alert(cur: sqlite3.Cursor, symbol: str, signal_type: str) -> bool:
+    """True if an undelivered outbox row exists for (symbol, signal_type)."""
+    cur.execute(
+        """SELECT 1 FROM alert_outbox WHERE symbol = ? AND signal_type = ? AND status IN ('pending','sending','queued')
+           LIMIT 1""",
+        (symbol[:32], signal_type[:32]),
+    )
+    return cur.fetchone() is not None
+
+
+def claim_next_alert(
+    cur: sqlite3.Cursor,
+    confidence_weight: float = 0.0,
+    aging_per_min: float = 0.0,
+    aging_cap_min: float = 0.0,
+) -> Optional[sqlite3.Row]:
+    """
+    Atomically move the highest-priority due pending alert to 'sending' and return it (or None).
+    Priority = severity + confidence_weight * confidence + aging_per_min * min(age_min, aging_cap_min);
+    ties go to the newest alert.
+    """
+    now = datetime.utcnow().isoformat() + "Z"
+    cur.execute(
+        """SELECT id FROM alert_outbox WHERE status = 'pending' AND next_attempt_at <= ?
+           ORDER BY COALESCE(severity, 1) + ? * COALESCE(confidence, 0)
+                    + ? * MIN(MAX((julianday(?) - julianday(created_at)) * 1440.0, 0), ?) DESC,
+                    created_at DESC, id DESC
+           LIMIT 1""",
+        (now, confidence_weight, aging_per_min, now, aging_cap_min),
+    )
+    row = cur.fetchone()
+    if not row:
+        return None
+    cur.execute(
+        "UPDATE alert_outbox SET status = 'sending', attempts = attempts + 1, next_attempt_at = ? WHERE id = ? AND status = 'pending'",
+        (now, row[0]),
+    )
+    if cur.rowcount != 1:
+        return None  # claimed by another worker
+    cur.execute("SELECT * FROM alert_outbox WHERE id = ?", (row[0],))
+    return cur.fetchone()
+
+
+def mark_alert_status(
+    cur: sqlite3.Cursor,
+    outbox_id: int,
+    status: str,
+    next_attempt_at: Optional[str] = None,
+    error: Optional[str] = None,
+) -> None:
+    """Update outbox row: 'sent' | 'queued' (in a channel buffer) | 'pending' (retry at next_attempt_at) | 'failed' |
+    'skipped' | 'expired'."""
+    now = datetime.utcnow().isoformat() + "Z"
+    cur.execute(
+        """UPDATE alert_outbox SET status = ?, next_attempt_at = COALESCE(?, next_attempt_at), last_error = ?,
+           sent_at = CASE WHEN ? = 'sent' THEN ? ELSE sent_at END WHERE id = ?""",
+        (status, next_attempt_at, (error or "")[:500] or None, status, now, outbox_id),
+    )
+
+
+def expire_old_alerts(cur: sqlite3.Cursor, older_than: str, keep_ids: Optional[List[int]] = None) -> int:
+    """
+    Mark pending / queued alerts created before older_than as 'expired', except keep_ids (queued in a channel
+    buffer, which delivers or drops them on its own clock). Returns count.
+    """
+    keep_ids = keep_ids or []
+    where = f" AND id NOT IN ({','.join('?' * len(keep_ids))})" if keep_ids else ""
+    cur.execute(
+        f"UPDATE alert_outbox SET status = 'expired' WHERE status IN ('pending','queued') AND created_at < ?{where}",
+        [older_than] + keep_ids,
+    )
+    return cur.rowcount
+
+
+def mark_queued_alerts_sent(cur: sqlite3.Cursor, outbox_ids: List[int]) -> List[Tuple[str, str]]:
+    """
+    Mark 'queued' (or since 'expired') rows a channel has now delivered as 'sent'. Returns their
+    (symbol, signal_type).
+    """
+    if not outbox_ids:
+        return []
+    marks = ",".join("?" * len(outbox_ids))
+    held = f"status IN ('queued','expired') AND id IN ({marks})"
+    cur.execute(f"SELECT symbol, signal_type FROM alert_outbox WHERE {held}", outbox_ids)
+    rows = [(r[0], r[1]) for r in cur.fetchall()]
+    cur.execute(
+        f"UPDATE alert_outbox SET status = 'sent', sent_at = ? WHERE {held}",
+        [datetime.utcnow().isoformat() + "Z"] + list(outbox_ids),
+    )
+    return rows
+
+
+def requeue_queued_alerts(cur: sqlite3.Cursor, keep_ids: List[int]) -> int:
+    """Return 'queued' rows no channel buffer holds any more (lost in a crash) to 'pending'. Returns count."""
+    where = f" AND id NOT IN ({','.join('?' * len(keep_ids))})" if keep_ids else ""
+    cur.execute(
+        f"UPDATE alert_outbox SET status = 'pending', next_attempt_at = ? WHERE status = 'queued'{where}",
+        [datetime.utcnow().isoformat() + "Z"] + list(keep_ids),
+    )
+    return cur.rowcount
+
+
+def requeue_stale_alerts(cur: sqlite3.Cursor, older_than: str) -> int:
+    """Return 'sending' rows claimed before older_than (crashed worker) to 'pending'. Returns count."""
+    cur.execute(
+        "UPDATE alert_outbox SET status = 'pending' WHERE status = 'sending' AND next_attempt_at < ?",
+        (older_than,),
+    )
+    return cur.rowcount
+
+
+def upsert_checkpoint(cur: sqlite3.Cursor, name: str, payload: bytes) -> None:
+    """Store (replace) a named checkpoint blob."""
+    now = datetime.utcnow().isoformat() + "Z"
+    cur.execute(
+        "INSERT OR REPLACE INTO checkpoints (name, payload, created_at) VALUES (?,?,?)",
+        (name[:64], sqlite3.Binary(payload), now),
+    )
+
+
+def get_checkpoint(cur: sqlite3.Cursor, name: str) -> Optional[bytes]:
+    """Return checkpoint blob or None."""
+    cur.execute("SELECT payload FROM checkpoints WHERE name = ?", (name[:64],))
+    row = cur.fetchone()
+    return bytes(row[0]) if row else None
+
+
 def init_db() -> None:
     """Create DB and schema; run migrations."""
     ensure_data_dir()
     with cursor() as cur:
+        cur.execute("PRAGMA page_count")
+        if not cur.fetchone()[0]:
+            # Only settable before the first table; existing DBs are converted by storage.compaction
+            cur.execute("PRAGMA auto_vacuum = INCREMENTAL")
         init_schema(cur)
         run_migrations(cur)
+    from storage.migrations import migrate
+    migrate()
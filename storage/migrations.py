@@ -0,0 +1,286 @@
+"""
+MNEMOS 2.1 - Versioned schema migrations on top of the init_schema / run_migrations baseline.
+Steps run in version order, each recorded in schema_version once applied. Data backfills run in id-range batches,
+one short transaction each, so a large DB upgrades without holding the write lock for the whole table; the final
+DDL runs in one transaction that also catches rows written meanwhile. Each step lists the queries it exists for,
+and is rolled back unless EXPLAIN QUERY PLAN shows them using the new index.
+"""
+import logging
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+from storage.db import cursor, epoch_sql
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH_ROWS = 50_000
+
+# (table, ISO text column, epoch column, naive values are market-local time)
+EPOCH_COLUMNS = (
+    ("prices", "dt", "dt_epoch", True),
+    ("signals", "created_at", "created_epoch", False),
+    ("outcomes", "signal_dt", "signal_epoch", False),
+    ("heartbeats", "ts", "ts_epoch", False),
+    ("confidence_history", "dt", "dt_epoch", False),
+)
+
+Backfill = Callable[[sqlite3.Cursor, int, int], None]  # (cur, after id, up to id)
+Boundary = Callable[[sqlite3.Cursor, int], None]  # (cur, last id the batches covered)
+
+
+@dataclass(frozen=True)
+class Migration:
+    """One schema step: prepare (cheap DDL) -> batched backfills -> apply (DDL) -> query-plan checks."""
+    version: int
+    name: str
+    prepare: Optional[Callable[[sqlite3.Cursor], None]] = None
+    backfills: Tuple[Tuple[str, Backfill], ...] = ()
+    boundary: Tuple[Tuple[str, Boundary], ...] = ()  # fix-ups across old / new rows, run with the catch-up
+    apply: Optional[Callable[[sqlite3.Cursor], None]] = None
+    plans: Tuple[Tuple[str, str], ...] = ()  # (query, index it must use)
+
+
+# ----- v3: INTEGER epoch twins of the text time columns -----
+
+def _epoch_prepare(cur: sqlite3.Cursor) -> None:
+    for table, col, ecol, local in EPOCH_COLUMNS:
+        try:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN {ecol} INTEGER")
+        except sqlite3.OperationalError:
+            pass
+        # Keep the twin in sync for writers that only set the text column
+        expr = epoch_sql(f"NEW.{col}", local)
+        cur.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_{ecol}_insert AFTER INSERT ON {table}
+            WHEN NEW.{ecol} IS NULL BEGIN UPDATE {table} SET {ecol} = {expr} WHERE id = NEW.id; END""")
+        cur.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_{ecol}_update AFTER UPDATE OF {col} ON {table}
+            BEGIN UPDATE {table} SET {ecol} = {expr} WHERE id = NEW.id; END""")
+
+
+def _epoch_backfill(table: str, col: str, ecol: str, local: bool) -> Backfill:
+    def run(cur: sqlite3.Cursor, lo: int, hi: int) -> None:
+        cur.execute(
+            f"UPDATE {table} SET {ecol} = {epoch_sql(col, local)} WHERE id > ? AND id <= ? AND {ecol} IS NULL",
+            (lo, hi),
+        )
+    return run
+
+
+def _epoch_apply(cur: sqlite3.Cursor) -> None:
+    for name in ("idx_prices_symbol_dt", "idx_signals_created", "idx_heartbeats_ts", "idx_confidence_symbol_dt"):
+        cur.execute(f"DROP INDEX IF EXISTS {name}")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_prices_symbol_epoch ON prices(symbol, dt_epoch)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_signals_created_epoch ON signals(created_epoch)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_heartbeats_ts_epoch ON heartbeats(ts_epoch)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_confidence_symbol_epoch ON confidence_history(symbol, dt_epoch)")
+
+
+# ----- v4: one outcome per signal -----
+
+def _outcomes_dedupe(cur: sqlite3.Cursor, lo: int, hi: int) -> None:
+    """Drop later duplicate outcomes of a signal (insert_outcome keeps the first)."""
+    cur.execute(
+        """DELETE FROM outcomes WHERE id > ? AND id <= ? AND EXISTS (
+               SELECT 1 FROM outcomes o2 WHERE o2.signal_id = outcomes.signal_id AND o2.id < outcomes.id)""",
+        (lo, hi),
+    )
+
+
+def _outcomes_unique(cur: sqlite3.Cursor) -> None:
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_outcomes_signal_unique ON outcomes(signal_id)")
+    cur.execute("DROP INDEX IF EXISTS idx_outcomes_signal_id")
+
+
+# ----- v5: one bar per (symbol, bar time) -----
+
+def _prices_dedupe(cur: sqlite3.Cursor, lo: int, hi: int) -> None:
+    """Drop bars superseded by a later re-fetch of the same (symbol, bar time); readers already keep the last."""
+    cur.execute(
+        """DELETE FROM prices WHERE id > ? AND id <= ? AND dt_epoch IS NOT NULL AND EXISTS (
+               SELECT 1 FROM prices p2 WHERE p2.symbol = prices.symbol AND p2.dt_epoch = prices.dt_epoch
+               AND p2.id > prices.id)""",
+        (lo, hi),
+    )
+
+
+def _prices_dedupe_boundary(cur: sqlite3.Cursor, top: int) -> None:
+    """Drop already-scanned bars that a bar written during the batches re-fetched (the newer row wins)."""
+    cur.execute(
+        """DELETE FROM prices WHERE id IN (
+               SELECT p1.id FROM prices p2 JOIN prices p1 ON p1.symbol = p2.symbol AND p1.dt_epoch = p2.dt_epoch
+               WHERE p2.id > ? AND p1.id <= ?)""",
+        (top, top),
+    )
+
+
+def _prices_unique(cur: sqlite3.Cursor) -> None:
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_prices_symbol_epoch_unique ON prices(symbol, dt_epoch)")
+    cur.execute("DROP INDEX IF EXISTS idx_prices_symbol_epoch")
+
+
+# ----- v6: partial index over real (non-zero) signals -----
+
+def _signals_nonzero(cur: sqlite3.Cursor) -> None:
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_signals_nonzero ON signals(symbol, created_epoch) WHERE score > 0")
+
+
+# ----- v7: covering index for the outcome / intraday backfill scans -----
+
+def _signals_cover(cur: sqlite3.Cursor) -> None:
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_signals_created_cover ON signals(created_epoch, symbol, created_at)")
+    cur.execute("DROP INDEX IF EXISTS idx_signals_created_epoch")
+
+
+# ----- v8: tick_stats keyed on an INTEGER epoch (rowid) instead of ISO text -----
+
+def _tick_stats_epoch(cur: sqlite3.Cursor) -> None:
+    """Rebuild a pre-v8 tick_stats (ts TEXT PRIMARY KEY); init_schema already creates the new shape."""
+    cur.execute("PRAGMA table_info(tick_stats)")
+    if "ts" not in {r[1] for r in cur.fetchall()}:
+        return
+    cur.execute("""CREATE TABLE tick_stats_v8 (ts_epoch INTEGER PRIMARY KEY, evaluated INTEGER NOT NULL,
+        nonzero INTEGER NOT NULL, stored INTEGER NOT NULL, max_score REAL)""")
+    cur.execute(f"""INSERT OR REPLACE INTO tick_stats_v8 (ts_epoch, evaluated, nonzero, stored, max_score)
+        SELECT {epoch_sql("ts")}, evaluated, nonzero, stored, max_score FROM tick_stats WHERE ts IS NOT NULL
+        ORDER BY ts""")
+    cur.execute("DROP TABLE tick_stats")
+    cur.execute("ALTER TABLE tick_stats_v8 RENAME TO tick_stats")
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        3,
+        "epoch_columns",
+        prepare=_epoch_prepare,
+        backfills=tuple((t, _epoch_backfill(t, c, e, local)) for t, c, e, local in EPOCH_COLUMNS),
+        apply=_epoch_apply,
+        plans=(
+            ("SELECT close FROM prices WHERE symbol = ? AND dt_epoch <= ? ORDER BY dt_epoch DESC LIMIT 1",
+             "idx_prices_symbol_epoch"),
+            ("SELECT id FROM signals WHERE created_epoch >= ? AND created_epoch < ?", "idx_signals_created_epoch"),
+        ),
+    ),
+    Migration(
+        4,
+        "outcomes_unique_signal",
+        backfills=(("outcomes", _outcomes_dedupe),),
+        apply=_outcomes_unique,
+        plans=(("SELECT id FROM outcomes WHERE signal_id = ?", "idx_outcomes_signal_unique"),),
+    ),
+    Migration(
+        5,
+        "prices_unique_bar",
+        backfills=(("prices", _prices_dedupe),),
+        boundary=(("prices", _prices_dedupe_boundary),),
+        apply=_prices_unique,
+        plans=(
+            ("SELECT close FROM prices WHERE symbol = ? AND dt_epoch >= ? AND close IS NOT NULL "
+             "ORDER BY dt_epoch ASC LIMIT 1", "idx_prices_symbol_epoch_unique"),
+        ),
+    ),
+    Migration(
+        6,
+        "signals_nonzero_partial",
+        apply=_signals_nonzero,
+        plans=(
+            ("SELECT symbol, COUNT(*) FROM signals WHERE created_epoch >= ? AND score > 0 GROUP BY symbol "
+             "ORDER BY COUNT(*) DESC LIMIT 20", "idx_signals_nonzero"),
+        ),
+    ),
+    Migration(
+        7,
+        "signals_backfill_cover",
+        apply=_signals_cover,
+        plans=(
+            ("""SELECT s.id, s.symbol, s.created_at, s.created_epoch FROM signals s
+                LEFT JOIN outcomes o ON o.signal_id = s.id WHERE s.created_epoch >= ? AND o.id IS NULL""",
+             "COVERING INDEX idx_signals_created_cover"),
+            ("""SELECT s.id, s.symbol, s.created_at, s.created_epoch FROM signals s
+                LEFT JOIN outcomes o ON o.signal_id = s.id WHERE s.created_epoch >= ? AND o.id IS NULL""",
+             "COVERING INDEX idx_outcomes_signal_unique"),
+        ),
+    ),
+    Migration(
+        8,
+        "tick_stats_epoch_key",
+        apply=_tick_stats_epoch,
+        plans=(
+            ("SELECT ts_epoch FROM tick_stats WHERE ts_epoch < ? ORDER BY ts_epoch LIMIT ?", "INTEGER PRIMARY KEY"),
+        ),
+    ),
+]
+
+
+def schema_version(cur: sqlite3.Cursor) -> int:
+    cur.execute("SELECT MAX(version) FROM schema_version")
+    row = cur.fetchone()
+    return int(row[0] or 0)
+
+
+def query_plan(cur: sqlite3.Cursor, sql: str) -> List[str]:
+    """EXPLAIN QUERY PLAN detail lines (placeholders bound to NULL)."""
+    cur.execute(f"EXPLAIN QUERY PLAN {sql}", (None,) * sql.count("?"))
+    return [str(r[-1]) for r in cur.fetchall()]
+
+
+def _check_plans(cur: sqlite3.Cursor, m: Migration) -> None:
+    for sql, index in m.plans:
+        plan = query_plan(cur, sql)
+        if not any(index in line for line in plan):
+            raise RuntimeError(f"migration {m.version} ({m.name}): query does not use {index}: {plan}")
+
+
+def _max_id(cur: sqlite3.Cursor, table: str) -> int:
+    cur.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+    return int(cur.fetchone()[0])
+
+
+def _run_backfills(m: Migration, batch: int) -> List[int]:
+    """Each backfill over its table's ids in batches, one transaction per batch. Returns the last id covered."""
+    tops: List[int] = []
+    for table, fill in m.backfills:
+        with cursor() as cur:
+            top = _max_id(cur, table)
+        lo = 0
+        while lo < top:
+            with cursor() as cur:
+                fill(cur, lo, min(lo + batch, top))
+            lo += batch
+        tops.append(top)
+    return tops
+
+
+def migrate(batch: int = BACKFILL_BATCH_ROWS) -> List[int]:
+    """Apply pending migrations in order. Returns versions applied; stops at the first failing step."""
+    with cursor() as cur:
+        current = schema_version(cur)
+    applied: List[int] = []
+    for m in MIGRATIONS:
+        if m.version <= current:
+            continue
+        try:
+            if m.prepare:
+                with cursor() as cur:
+                    m.prepare(cur)
+            tops = _run_backfills(m, max(1, batch))
+            with cursor() as cur:
+                # sqlite3 runs DDL outside a transaction unless one is open; take the write lock for the whole step
+                cur.execute("BEGIN IMMEDIATE")
+                # Rows written since the batches, then old rows they clash with, under the same lock as the DDL
+                for (table, fill), top in zip(m.backfills, tops):
+                    fill(cur, top, _max_id(cur, table))
+                covered = {table: top for (table, _), top in zip(m.backfills, tops)}
+                for table, fix in m.boundary:
+                    fix(cur, covered[table])
+                if m.apply:
+                    m.apply(cur)
+                _check_plans(cur, m)
+                cur.execute("INSERT INTO schema_version (version, applied_at) VALUES (?,?)",
+                            (m.version, datetime.utcnow().isoformat() + "Z"))
+        except Exception as e:
+            logger.warning("Migration %d (%s) failed: %s", m.version, m.name, e)
+            break
+        logger.info("Migration %d (%s) applied", m.version, m.name)
+        applied.append(m.version)
+    return applied
@@ -0,0 +1,15 @@
+"""MNEMOS 2.1 - Shared test fixtures."""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+@pytest.fixture
+def tmp_db(tmp_path, monkeypatch):
+    """storage.db pointed at a fresh, initialized mnemos.db under tmp_path. Returns the storage.db module."""
+    import storage.db as db
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "mnemos.db")
+    db.init_db()
+    return db
@@ -0,0 +1,50 @@
+"""MNEMOS 2.1 - Tests for the asyncio runtime helpers."""
+import asyncio
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def test_chart_json_to_frame():
+    from core.data_fetcher import _chart_json_to_frame
+    payload = {"chart": {"result": [{
+        "meta": {"exchangeTimezoneName": "Asia/Kolkata"},
+        "timestamp": [1735097400, 1735270200],
+        "indicators": {
+            "quote": [{"open": [10, 11], "high": [12, 12], "low": [9, 10], "close": [11, None], "volume": [100, 200]}],
+        },
+    }]}}
+    df = _chart_json_to_frame("TCS.NS", payload, "1d")
+    assert list(df["Close"]) == [11]
+    assert df["symbol"].iloc[0] == "TCS.NS"
+    assert str(df["datetime"].iloc[0]) == "2024-12-25 00:00:00"
+
+def test_http_request_concurrent():
+    from core.async_http import close_session, http_get
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(b"pong")
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    async def run():
+        try:
+            return await asyncio.gather(*(http_get(url, timeout=5) for _ in range(5)))
+        finally:
+            await close_session()
+
+    try:
+        out = asyncio.run(run())
+    finally:
+        server.shutdown()
+    assert all(status == 200 and body == b"pong" for status, body in out)
@@ -0,0 +1,30 @@
+"""MNEMOS 2.1 - Tests for the incremental attribution cube."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def _add(db, symbol, signal_type, day, r1, r3=None):
+    with db.cursor() as cur:
+        sid = db.insert_signal(cur, symbol, 0.7, "x", signal_type=signal_type)
+        db.insert_outcome(cur, sid, symbol, f"2025-01-{day:02d}T05:00:00Z", 100.0, return_1d=r1, return_3d=r3)
+
+def test_cube_matches_naive_stats_and_refreshes_incrementally(tmp_db):
+    db = tmp_db
+    from analytics import attribution
+    from optimizer.strategy_optimizer import rank_rules_by_performance
+    r1 = [2.0, -1.0, 3.0, -4.0, 1.0, 0.5]
+    for i, r in enumerate(r1):
+        _add(db, "TCS.NS" if i % 2 else "INFY.NS", "panic_selling" if i < 4 else "overreaction", 6 + i * 3, r, r * 2)
+    stats = attribution.get_attribution_stats(min_samples=1)
+    assert stats["sample_count"] == 6
+    assert stats["win_rate_1d"] == round(4 / 6 * 100, 2)
+    assert stats["avg_return_1d"] == round(sum(r1) / 6, 2)
+    assert stats["avg_return_3d"] == round(sum(r1) * 2 / 6, 2)
+    assert stats["max_drawdown_1d"] == 7.0  # peak 3.0 -> trough -4.0
+    assert attribution.refresh_attribution_cube() == 0  # nothing new
+    _add(db, "TCS.NS", "panic_selling", 27, -2.0)
+    assert attribution.get_attribution_stats(symbol="TCS.NS", min_samples=1)["sample_count"] == 4
+    assert attribution.get_attribution_stats(symbol="TCS.NS", min_samples=10)["win_rate_1d"] is None
+    ranked = rank_rules_by_performance()
+    assert [r["signal_type"] for r in ranked] == ["panic_selling"] and ranked[0]["sample_count"] == 5
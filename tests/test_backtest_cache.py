@@ -0,0 +1,62 @@
+"""MNEMOS 2.1 - Tests for the content-addressed backtest cache."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def _setup(db, tmp_path, monkeypatch):
+    from engine import backtest, backtest_cache
+    monkeypatch.setattr(backtest_cache, "BACKTEST_CACHE_DIR", tmp_path / "cache")
+    with db.cursor() as cur:
+        for day in range(1, 21):
+            sid = db.insert_signal(cur, "A.NS", 0.8, "x", signal_type="panic_selling", confidence=0.7)
+            cur.execute("UPDATE signals SET created_at = ? WHERE id = ?", (f"2025-01-{day:02d}T05:00:00Z", sid))
+            db.insert_outcome(cur, sid, "A.NS", f"2025-01-{day:02d}", 100.0, return_1d=1.0 if day % 2 else -0.5)
+    return db, backtest
+
+def test_exact_hit_and_partial_reuse(tmp_db, tmp_path, monkeypatch):
+    db, backtest = _setup(tmp_db, tmp_path, monkeypatch)
+    first = backtest.run_backtest("2025-01-01", "2025-01-11")
+    assert not first["cached"] and first["signals_count"] == 10
+    again = backtest.run_backtest("2025-01-01", "2025-01-11")
+    assert again["cached"] and again["rows"] == first["rows"] and again["by_type"] == first["by_type"]
+    queried = []
+    real = backtest._signal_rows
+    monkeypatch.setattr(backtest, "_signal_rows", lambda a, b: queried.append((a, b)) or real(a, b))
+    wider = backtest.run_backtest("2025-01-01", "2025-01-21")
+    assert queried == [("2025-01-11", "2025-01-21")]
+    fresh = backtest.run_backtest("2025-01-01", "2025-01-21", use_cache=False)
+    assert wider["rows"] == fresh["rows"] and wider["by_type"] == fresh["by_type"]
+
+def test_new_outcome_invalidates(tmp_db, tmp_path, monkeypatch):
+    db, backtest = _setup(tmp_db, tmp_path, monkeypatch)
+    first = backtest.run_backtest("2025-01-01", "2025-01-11")
+    with db.cursor() as cur:
+        sid = db.insert_signal(cur, "B.NS", 0.9, "y", signal_type="panic_selling", confidence=0.8)
+        cur.execute("UPDATE signals SET created_at = ? WHERE id = ?", ("2025-01-05T06:00:00Z", sid))
+        db.insert_outcome(cur, sid, "B.NS", "2025-01-05", 50.0, return_1d=2.0)
+    second = backtest.run_backtest("2025-01-01", "2025-01-11")
+    assert not second["cached"] and second["signals_count"] == first["signals_count"] + 1
+    assert second["cache_key"] != first["cache_key"]
+
+def test_open_ended_run_hits_cache(tmp_db, tmp_path, monkeypatch):
+    db, backtest = _setup(tmp_db, tmp_path, monkeypatch)
+    first = backtest.run_backtest("2025-01-01")
+    second = backtest.run_backtest("2025-01-01")
+    assert not first["cached"] and second["cached"] and second["cache_key"] == first["cache_key"]
+    assert len(list((tmp_path / "cache").glob("*.npz"))) == 1
+    with db.cursor() as cur:
+        db.insert_signal(cur, "B.NS", 0.9, "y", signal_type="panic_selling", confidence=0.8)
+    third = backtest.run_backtest("2025-01-01")
+    assert not third["cached"] and third["signals_count"] == first["signals_count"] + 1
+
+def test_old_entries_and_files_are_evicted(tmp_db, tmp_path, monkeypatch):
+    db, backtest = _setup(tmp_db, tmp_path, monkeypatch)
+    from engine import backtest_cache
+    monkeypatch.setattr(backtest_cache, "BACKTEST_CACHE_MAX_ENTRIES", 2)
+    for day in range(2, 6):
+        backtest.run_backtest("2025-01-01", f"2025-01-{day:02d}")
+    assert len(list((tmp_path / "cache").glob("*.npz"))) == 2
+    with db.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM backtest_runs WHERE scope IS NOT NULL")
+        assert cur.fetchone()[0] == 2
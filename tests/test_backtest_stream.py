@@ -0,0 +1,38 @@
+"""MNEMOS 2.1 - Tests for the streaming backtest export."""
+import csv
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def test_stream_matches_in_memory_backtest(tmp_db, tmp_path):
+    db = tmp_db
+    from engine import backtest
+    with db.cursor() as cur:
+        for i in range(23):
+            sid = db.insert_signal(cur, f"S{i % 5}.NS", 0.8, "x", signal_type=("panic_selling", "overreaction")[i % 2])
+            cur.execute("UPDATE signals SET created_at = ? WHERE id = ?", (f"2025-01-{1 + i // 3:02d}T05:00:00Z", sid))
+            if i % 4:
+                db.insert_outcome(cur, sid, f"S{i % 5}.NS", "2025-01-01", 100.0, return_1d=(i % 7) - 3.0)
+    full = backtest.run_backtest("2025-01-02", "2025-01-08", use_cache=False)
+    res = backtest.stream_backtest("2025-01-02", tmp_path / "out.csv", "2025-01-08", chunk_size=4)
+    assert res["signals_count"] == full["signals_count"] == 18 and res["by_type"] == full["by_type"]
+    with open(tmp_path / "out.csv", encoding="utf-8") as f:
+        ids = [int(r["signal_id"]) for r in csv.DictReader(f)]
+    assert ids == [r["signal_id"] for r in full["rows"]]  # ties on created_at across chunk edges kept once
+    empty = backtest.stream_backtest("2026-01-01", tmp_path / "none.csv", fmt="parquet")
+    assert empty["signals_count"] == 0 and empty["path"] is None and not (tmp_path / "none.csv").exists()
+
+def test_repeat_export_writes_nothing_new(tmp_db, tmp_path):
+    db = tmp_db
+    from engine import backtest
+    with db.cursor() as cur:
+        db.insert_signal(cur, "A.NS", 0.8, "x", signal_type="panic_selling")
+    first = backtest.run_and_export_backtest("2025-01-01", tmp_path / "out")
+    files = sorted((tmp_path / "out").iterdir())
+    again = backtest.run_and_export_backtest("2025-01-01", tmp_path / "out")
+    assert not first["cached"] and again["cached"] and sorted((tmp_path / "out").iterdir()) == files
+    assert again["signals_count"] == first["signals_count"] == 1 and len(files) == 3
+    with db.cursor() as cur:
+        db.insert_signal(cur, "B.NS", 0.9, "y", signal_type="panic_selling")
+    assert backtest.run_and_export_backtest("2025-01-01", tmp_path / "out")["signals_count"] == 2
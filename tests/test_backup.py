@@ -0,0 +1,85 @@
+"""MNEMOS 2.1 - Tests for deduplicated snapshot backups."""
+import json
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def _setup(db, tmp_path, monkeypatch):
+    from storage import backup
+    monkeypatch.setattr(backup, "DB_PATH", db.DB_PATH)
+    monkeypatch.setattr(backup, "BACKUP_DIR", tmp_path / "backups")
+    monkeypatch.setattr(backup, "BAR_STORE_DIR", tmp_path / "bars")
+    monkeypatch.setattr(backup, "BACKUP_PAGES_PER_STEP", 2)
+    monkeypatch.setattr(backup, "CHUNK_BYTES", 4096)
+    with db.cursor() as cur:
+        for i in range(300):
+            db.insert_heartbeat(cur, "tick_start", "x" * 200 + str(i))
+    (tmp_path / "bars").mkdir()
+    (tmp_path / "bars" / "meta.json").write_text('{"rows": 0}')
+    return db, backup
+
+def test_snapshot_restores_db_and_bar_store(tmp_db, tmp_path, monkeypatch):
+    _, backup = _setup(tmp_db, tmp_path, monkeypatch)
+    manifest = backup.backup_to_local()
+    assert manifest is not None and not (tmp_path / "backups" / "staging.db").exists()
+    backup.restore_snapshot(manifest, tmp_path / "restored")
+    conn = sqlite3.connect(str(tmp_path / "restored" / "mnemos.db"))
+    assert conn.execute("SELECT COUNT(*) FROM heartbeats").fetchone()[0] == 300
+    conn.close()
+    assert (tmp_path / "restored" / "bars" / "meta.json").read_text() == '{"rows": 0}'
+
+def test_second_snapshot_stores_only_changed_chunks(tmp_db, tmp_path, monkeypatch):
+    db, backup = _setup(tmp_db, tmp_path, monkeypatch)
+    first = backup.backup_to_local()
+    chunks = set((tmp_path / "backups" / "chunks").glob("*/*.z"))
+    with db.cursor() as cur:
+        db.insert_heartbeat(cur, "tick_end", "one more")
+    later = type("Later", (datetime,), {"utcnow": staticmethod(lambda: datetime(2099, 1, 1))})
+    monkeypatch.setattr(backup, "datetime", later)  # distinct snapshot name
+    assert backup.backup_to_local().name == "mnemos_20990101_000000.json" and first.exists()
+    new = set((tmp_path / "backups" / "chunks").glob("*/*.z")) - chunks
+    assert 0 < len(new) < len(chunks) / 4
+
+def test_retention_keeps_last_daily_and_weekly(monkeypatch):
+    from storage import backup
+    monkeypatch.setattr(backup, "BACKUP_KEEP_LAST", 2)
+    monkeypatch.setattr(backup, "BACKUP_KEEP_DAILY", 3)
+    monkeypatch.setattr(backup, "BACKUP_KEEP_WEEKLY", 2)
+    now = datetime(2025, 3, 20, 12)
+    stamps = [datetime(2025, 3, d, h) for d in range(1, 21) for h in (6, 11)]
+    keep = backup.kept_snapshots(stamps, now)
+    assert {datetime(2025, 3, 20, 11), datetime(2025, 3, 20, 6)} <= keep
+    assert {datetime(2025, 3, 19, 11), datetime(2025, 3, 18, 11)} <= keep  # newest per day
+    assert {datetime(2025, 3, 16, 11), datetime(2025, 3, 9, 11)} <= keep  # newest per ISO week (Sundays)
+    assert len(keep) == 6
+
+def test_drive_mirror_copies_only_missing(tmp_db, tmp_path, monkeypatch):
+    _, backup = _setup(tmp_db, tmp_path, monkeypatch)
+    manifest = backup.backup_to_local()
+    drive = tmp_path / "drive"
+    drive.mkdir()
+    mirrored = backup.backup_to_drive(drive)
+    assert mirrored.read_text() == manifest.read_text()
+    backup.restore_snapshot(mirrored, tmp_path / "from_drive")
+    conn = sqlite3.connect(str(tmp_path / "from_drive" / "mnemos.db"))
+    assert conn.execute("SELECT COUNT(*) FROM heartbeats").fetchone()[0] == 300
+    conn.close()
+    assert backup.backup_to_drive(tmp_path / "not_mounted") is None
+
+def test_pruned_snapshots_release_their_chunks(tmp_db, tmp_path, monkeypatch):
+    db, backup = _setup(tmp_db, tmp_path, monkeypatch)
+    monkeypatch.setattr(backup, "BACKUP_KEEP_LAST", 1)
+    monkeypatch.setattr(backup, "BACKUP_KEEP_DAILY", 0)
+    monkeypatch.setattr(backup, "BACKUP_KEEP_WEEKLY", 0)
+    first = backup.backup_to_local()
+    with db.cursor() as cur:
+        cur.execute("DELETE FROM heartbeats")
+    later = type("Later", (datetime,), {"utcnow": staticmethod(lambda: datetime(2099, 1, 1))})
+    monkeypatch.setattr(backup, "datetime", later)
+    second = backup.backup_to_local()
+    assert not first.exists() and backup._manifests(tmp_path / "backups") == [second]
+    stored = {p.stem for p in (tmp_path / "backups" / "chunks").glob("*/*.z")}
+    assert stored == {d for f in json.loads(second.read_text())["files"].values() for d in f["chunks"]}
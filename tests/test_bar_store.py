@@ -0,0 +1,81 @@
+"""MNEMOS 2.1 - Tests for the columnar bar store."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def _setup(db, tmp_path, monkeypatch):
+    from storage import bar_store
+    monkeypatch.setattr(bar_store, "BAR_STORE_DIR", tmp_path / "bars")
+    return db, bar_store
+
+def _bars(symbol, times, close):
+    return pd.DataFrame({"symbol": symbol, "datetime": pd.to_datetime(times), "Open": close, "High": close,
+                         "Low": close, "Close": close, "Volume": 1000.0})
+
+def test_sync_appends_updates_and_maps_views(tmp_db, tmp_path, monkeypatch):
+    db, bar_store = _setup(tmp_db, tmp_path, monkeypatch)
+    times = pd.date_range("2025-01-02 09:15", periods=6, freq="5min")
+    with db.cursor() as cur:
+        db.insert_prices(cur, _bars("A.NS", times, np.arange(6.0)))
+    assert bar_store.sync_from_db() == 6
+    with db.cursor() as cur:
+        db.insert_prices(cur, _bars("A.NS", times[-1:], [50.0]))  # re-fetched last bar
+        db.insert_prices(cur, _bars("B.NS", times[2:], [7.0] * 4))  # new symbol
+        db.insert_prices(cur, _bars("A.NS", ["2025-01-02 09:45"], [8.0]))  # next bar
+    bar_store.sync_from_db()
+    panel = bar_store.load_panel("2025-01-02", "2025-01-03")
+    assert panel.symbols == ["A.NS", "B.NS"] and panel.close.shape == (7, 2)
+    assert isinstance(panel.close, np.memmap) and not panel.close.flags.owndata
+    assert list(panel.close[:, 0]) == [0.0, 1.0, 2.0, 3.0, 4.0, 50.0, 8.0]
+    assert np.isnan(panel.close[0, 1]) and panel.close[2, 1] == 7.0
+    assert str(panel.times[0]) == "2025-01-02T09:15:00"
+
+def test_earlier_bars_rewrite_and_hot_rows_merge(tmp_db, tmp_path, monkeypatch):
+    db, bar_store = _setup(tmp_db, tmp_path, monkeypatch)
+    with db.cursor() as cur:
+        db.insert_prices(cur, _bars("A.NS", ["2025-01-03 09:15"], [2.0]))
+    bar_store.sync_from_db()
+    with db.cursor() as cur:
+        db.insert_prices(cur, _bars("A.NS", ["2025-01-02 09:15"], [1.0]))
+    bar_store.sync_from_db()
+    with db.cursor() as cur:
+        db.insert_prices(cur, _bars("A.NS", ["2025-01-06 09:15"], [3.0]))  # not synced yet
+    df = bar_store.load_bars(["A.NS"], "2025-01-01")
+    assert list(df["Close"]) == [1.0, 2.0, 3.0]
+    assert bar_store.read_meta()["gen"] == 2  # first write + one out-of-order rewrite
+
+def test_interrupted_append_is_cut_off_by_the_next_write(tmp_db, tmp_path, monkeypatch):
+    _, bar_store = _setup(tmp_db, tmp_path, monkeypatch)
+    ohlcv = np.ones((2, 5))
+    bar_store.write_bars(["A.NS", "A.NS"], np.array([100, 200]), ohlcv)
+    real = bar_store._write_meta
+    def die_once(meta):
+        monkeypatch.setattr(bar_store, "_write_meta", real)
+        raise OSError("disk full")
+    monkeypatch.setattr(bar_store, "_write_meta", die_once)
+    try:
+        bar_store.write_bars(["A.NS"], np.array([300]), ohlcv[:1] * 3)
+    except OSError:
+        pass
+    assert bar_store.read_meta()["rows"] == 2
+    assert bar_store.write_bars(["A.NS", "A.NS"], np.array([300, 400]), ohlcv * 4) == 2
+    panel = bar_store.load_panel()
+    assert np.diff(panel.times.astype(np.int64)).tolist() == [100, 100, 100]
+    assert panel.close[:, 0].tolist() == [1.0, 1.0, 4.0, 4.0]
+
+def test_rewrite_keeps_the_previous_generation_for_open_readers(tmp_db, tmp_path, monkeypatch):
+    _, bar_store = _setup(tmp_db, tmp_path, monkeypatch)
+    ohlcv = np.ones((1, 5))
+    bar_store.write_bars(["A.NS"], np.array([200]), ohlcv)
+    stale = bar_store.read_meta()
+    bar_store.write_bars(["A.NS"], np.array([100]), ohlcv * 2)  # earlier bar: rewrite to the next generation
+    assert bar_store._map_times(stale).tolist() == [200]  # old meta still readable
+    bar_store.write_bars(["A.NS"], np.array([50]), ohlcv * 3)
+    assert not bar_store._path("t", stale["gen"], "i8").exists()
+    reads = [stale]
+    monkeypatch.setattr(bar_store, "read_meta", lambda real=bar_store.read_meta: reads.pop() if reads else real())
+    assert bar_store.load_panel().close[:, 0].tolist() == [3.0, 2.0, 1.0]  # retried with fresh meta
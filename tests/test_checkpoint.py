@@ -0,0 +1,36 @@
+"""MNEMOS 2.1 - Tests for warm-restart checkpoints."""
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def test_checkpoint_roundtrip(tmp_db):
+    from alerts import telegram_alert
+    from engine import checkpoint, orchestrator
+
+    cache = pd.DataFrame({"symbol": ["TCS.NS"], "datetime": [pd.Timestamp("2025-01-02")], "Close": [4100.0]})
+    orchestrator.load_state({"daily_cache": cache, "tick_count": 7})
+    pending = [{"symbol": "TCS.NS", "score": 0.8, "confidence": 0.5, "block": "<b>TCS</b>", "ts": 1.0}]
+    telegram_alert.load_state({"pending": pending})
+    assert checkpoint.save_checkpoint()
+
+    orchestrator.load_state({})
+    telegram_alert.load_state({})
+    assert checkpoint.restore_checkpoint()
+    assert orchestrator._tick_count == 7
+    assert orchestrator._daily_cache["Close"].iloc[0] == 4100.0
+    assert telegram_alert.get_state()["pending"] == pending
+    telegram_alert.load_state({})
+
+def test_daily_cache_merge_refreshes_last_bar():
+    from engine import orchestrator
+    orchestrator.load_state({})
+    old = pd.DataFrame({"symbol": ["A.NS"] * 2, "datetime": pd.to_datetime(["2025-01-01", "2025-01-02"]), "Close": [1.0, 2.0]})
+    orchestrator._merge_daily_cache([old], ["A.NS"])
+    assert orchestrator._daily_fetch_plan(["A.NS", "B.NS"]) == (["A.NS"], ["B.NS"])
+    fresh = pd.DataFrame({"symbol": ["A.NS"] * 2, "datetime": pd.to_datetime(["2025-01-02", "2025-01-03"]), "Close": [2.5, 3.0]})
+    out = orchestrator._merge_daily_cache([fresh], ["A.NS"])
+    assert list(out["Close"]) == [1.0, 2.5, 3.0]
+    orchestrator.load_state({})
@@ -0,0 +1,114 @@
+"""MNEMOS 2.1 - Tests for retention and compaction."""
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def _setup(db, tmp_path, monkeypatch):
+    from storage import bar_store, compaction
+    monkeypatch.setattr(bar_store, "BAR_STORE_DIR", tmp_path / "bars")
+    monkeypatch.setattr(compaction, "DELETE_BATCH_ROWS", 3)
+    return db, bar_store, compaction
+
+def test_old_intraday_bars_become_daily_bars(tmp_db, tmp_path, monkeypatch):
+    db, bar_store, compaction = _setup(tmp_db, tmp_path, monkeypatch)
+    times = list(pd.date_range("2025-01-02 09:15", periods=4, freq="5min")) + [pd.Timestamp("2025-03-03 09:15")]
+    bars = pd.DataFrame({"symbol": "A.NS", "datetime": times, "Open": [1.0, 2, 3, 4, 9], "High": [5.0, 6, 7, 8, 9],
+                         "Low": [0.5, 1, 2, 3, 9], "Close": [2.0, 3, 4, 4.5, 9], "Volume": 10.0})
+    with db.cursor() as cur:
+        db.insert_prices(cur, bars)
+    before = bar_store.load_bars(["A.NS"], "2025-01-01", "2025-01-03")
+    assert compaction.downsample_prices(datetime(2025, 3, 10), keep_days=30) == 4
+    with db.cursor() as cur:
+        cur.execute("SELECT day, open, high, low, close, volume, bars FROM prices_daily")
+        assert [tuple(r) for r in cur.fetchall()] == [("2025-01-02", 1.0, 8.0, 0.5, 4.5, 40.0, 4)]
+        cur.execute("SELECT COUNT(*) FROM prices")
+        assert cur.fetchone()[0] == 1
+    after = bar_store.load_bars(["A.NS"])
+    assert list(after["datetime"].astype(str)) == ["2025-01-02 09:15:00", "2025-03-03 09:15:00"]
+    assert after["Close"].iloc[0] == before["Close"].iloc[-1] and len(bar_store.load_panel().times) == 1
+    with db.cursor() as cur:
+        assert db.price_range_watermark(cur, "2025-01-01", "2025-01-03")[2] == 1
+
+def test_prune_keeps_hot_window_in_sqlite_in_batches(tmp_db, tmp_path, monkeypatch):
+    db, bar_store, compaction = _setup(tmp_db, tmp_path, monkeypatch)
+    times = list(pd.date_range("2025-01-02 09:15", periods=7, freq="5min")) + [pd.Timestamp("2025-03-03 09:15")]
+    with db.cursor() as cur:
+        db.insert_prices(cur, pd.DataFrame({"symbol": "A.NS", "datetime": times, "Close": [1.0] * 7 + [2.0]}))
+    batches = []
+    real = db.delete_prices_before
+    monkeypatch.setattr(compaction, "delete_prices_before", lambda *a, **k: batches.append(k["limit"]) or real(*a, **k))
+    assert compaction.prune_hot_prices(datetime(2025, 3, 10), hot_days=30) == 7
+    assert batches == [3, 3, 3]
+    with db.cursor() as cur:
+        cur.execute("SELECT close FROM prices")
+        assert [r[0] for r in cur.fetchall()] == [2.0]
+    assert list(bar_store.load_bars(["A.NS"])["Close"]) == [1.0] * 7 + [2.0]
+
+def test_heartbeats_fold_to_hourly_counts_in_batches(tmp_db, tmp_path, monkeypatch):
+    db, _, compaction = _setup(tmp_db, tmp_path, monkeypatch)
+    with db.cursor() as cur:
+        for i, status in enumerate(["tick_start"] * 5 + ["no_data"] * 2):
+            db.insert_heartbeat(cur, status)
+            cur.execute("UPDATE heartbeats SET ts = ? WHERE id = ?", (f"2025-01-01T10:{i:02d}:00Z", cur.lastrowid))
+        db.insert_heartbeat(cur, "tick_start")
+        counts = db.get_heartbeat_counts(cur, db.to_epoch("2025-01-01"))
+    assert compaction.compact_heartbeats(datetime(2025, 2, 1), keep_days=14) == 7
+    with db.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM heartbeats")
+        assert cur.fetchone()[0] == 1
+        assert db.get_heartbeat_counts(cur, db.to_epoch("2025-01-01")) == counts == {"tick_start": 6, "no_data": 2}
+        cur.execute("PRAGMA auto_vacuum")
+        assert cur.fetchone()[0] == 2  # incremental, set when init_db creates the file
+
+def test_existing_db_converts_to_incremental_vacuum_only_under_threshold(tmp_path, monkeypatch):
+    import sqlite3
+    import storage.db as db
+    conn = sqlite3.connect(str(tmp_path / "mnemos.db"))
+    conn.execute("CREATE TABLE legacy (x)")
+    conn.close()
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "mnemos.db")  # not tmp_db: the file must predate init_db
+    db.init_db()
+    _, _, compaction = _setup(db, tmp_path, monkeypatch)
+    with db.cursor() as cur:
+        cur.execute("PRAGMA auto_vacuum")
+        assert cur.fetchone()[0] == 0  # init_db never runs a full VACUUM
+    monkeypatch.setattr(compaction, "AUTO_VACUUM_CONVERT_MAX_MB", 0)
+    compaction.run_compaction(datetime(2025, 2, 1))
+    with db.cursor() as cur:
+        cur.execute("PRAGMA auto_vacuum")
+        assert cur.fetchone()[0] == 0
+    monkeypatch.setattr(compaction, "AUTO_VACUUM_CONVERT_MAX_MB", 512)
+    compaction.run_compaction(datetime(2025, 2, 1))
+    with db.cursor() as cur:
+        cur.execute("PRAGMA auto_vacuum")
+        assert cur.fetchone()[0] == 2
+    assert compaction.enable_incremental_vacuum(force=True) is False  # already converted
+
+def test_expired_groq_responses_are_purged_in_batches(tmp_db, tmp_path, monkeypatch):
+    db, _, compaction = _setup(tmp_db, tmp_path, monkeypatch)
+    with db.cursor() as cur:
+        for i in range(7):
+            db.put_groq_cache(cur, f"h{i}", "note")
+        cur.execute("UPDATE groq_cache SET created_at = '2025-01-01T00:00:00Z' WHERE prompt_hash != 'h0'")
+    assert compaction.purge_groq_cache(datetime(2025, 1, 2), ttl_hours=12) == 6
+    with db.cursor() as cur:
+        cur.execute("SELECT prompt_hash FROM groq_cache")
+        assert [r[0] for r in cur.fetchall()] == ["h0"]
+
+def test_tick_stats_roll_up_to_hourly_sums(tmp_db, tmp_path, monkeypatch):
+    db, _, compaction = _setup(tmp_db, tmp_path, monkeypatch)
+    hour = db.to_epoch("2025-01-01T04:00:00Z")
+    with db.cursor() as cur:
+        for i, score in enumerate([0.2, None, 0.9, 0.1, 0.3]):
+            db.insert_tick_stats(cur, hour + i * 900, 10, 2, 1, score)  # 4 ticks in 04:00, 1 in 05:00
+        db.insert_tick_stats(cur, db.to_epoch("2025-01-20T00:00:00Z"), 10, 0, 0, None)
+    assert compaction.compact_tick_stats(datetime(2025, 2, 1), keep_days=14) == 5
+    with db.cursor() as cur:
+        cur.execute("SELECT * FROM tick_stats_hourly ORDER BY hour_epoch")
+        assert [tuple(r) for r in cur.fetchall()] == [(hour, 4, 40, 8, 4, 0.9), (hour + 3600, 1, 10, 2, 1, 0.3)]
+        cur.execute("SELECT COUNT(*) FROM tick_stats")
+        assert cur.fetchone()[0] == 1
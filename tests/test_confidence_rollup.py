@@ -0,0 +1,43 @@
+"""MNEMOS 2.1 - Tests for tiered confidence_history rollups."""
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def test_rollups_are_incremental_and_keep_aggregates(tmp_db, tmp_path, monkeypatch):
+    db = tmp_db
+    from storage import confidence_rollup as cr
+    monkeypatch.setattr(cr, "CONFIDENCE_ARCHIVE_DIR", tmp_path / "archive")
+    rng = np.random.default_rng(3)
+    values = []
+    with db.cursor() as cur:
+        for day in (1, 2, 20):
+            for minute in range(0, 180, 20):
+                c = float(rng.uniform())
+                values.append((day, c))
+                db.insert_confidence(cur, "A.NS", f"2025-01-{day:02d}T{4 + minute // 60:02d}:{minute % 60:02d}:00Z", c,
+                                     friction_score=c / 2, liquidity_score=1, volatility_score=1, data_quality_score=1,
+                                     win_rate_component=0.5)
+        before = db.get_confidence_series(cur, "A.NS")
+    now = datetime(2025, 1, 12)
+    monkeypatch.setattr(cr, "CONFIDENCE_RAW_DAYS", 7)
+    monkeypatch.setattr(cr, "CONFIDENCE_HOURLY_DAYS", 10)
+    assert cr.roll_up_confidence(now, archive=True) == {"raw": 18, "hourly": 3}
+    assert cr.roll_up_confidence(now, archive=True) == {"raw": 0, "hourly": 0}
+    assert len(list((tmp_path / "archive").glob("*.npz"))) == 1
+    with db.cursor() as cur:
+        hourly = db.get_confidence_series(cur, "A.NS", resolution="hour")
+    assert [(b, n) for b, n, *_ in hourly[:2]] == [("2025-01-01", 9), ("2025-01-02T04", 3)]
+    assert cr.roll_up_confidence(datetime(2025, 1, 13), archive=False)["hourly"] == 3
+    with db.cursor() as cur:
+        after = db.get_confidence_series(cur, "A.NS")
+        cur.execute("SELECT resolution, COUNT(*) FROM confidence_rollup GROUP BY resolution")
+        assert dict(cur.fetchall()) == {"day": 2}
+    assert [r[:2] for r in after] == [r[:2] for r in before]
+    for a, b in zip(after, before):
+        assert np.allclose(a[2:], b[2:])
+    day1 = [c for d, c in values if d == 1]
+    assert after[0][3] == min(day1) and after[0][4] == max(day1)
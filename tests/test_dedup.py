@@ -15,3 +15,19 @@ def test_severity_from_score():
     assert severity_from_score(0.9) == 4
     assert severity_from_score(0.65) == 2
     assert severity_from_score(0.5) == 1
+
+def test_alert_lock_cache_write_through_and_invalidation(tmp_db, monkeypatch):
+    db = tmp_db
+    from alerts import dedup
+    assert dedup.can_send_alert("INFY.NS", "panic_selling") == (True, None)
+    dedup.record_alert_sent("INFY.NS", "panic_selling")
+    with db.cursor() as cur:
+        assert db.get_alert_lock(cur, "INFY.NS", "panic_selling")  # written through
+    assert not dedup.can_send_alert("INFY.NS", "panic_selling")[0]
+    assert dedup.in_signal_cooldown("INFY.NS", "panic_selling")
+    # another process writes a lock and bumps the version
+    monkeypatch.setattr(dedup, "ALERT_LOCK_CACHE_CHECK_SEC", 0)
+    with db.cursor() as cur:
+        db.upsert_alert_lock(cur, "WIPRO.NS", "overreaction")
+        db.bump_cache_version(cur, dedup.ALERT_LOCK_CACHE)
+    assert not dedup.can_send_alert("WIPRO.NS", "overreaction")[0]
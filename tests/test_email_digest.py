@@ -0,0 +1,49 @@
+"""MNEMOS 2.1 - Tests for email digest batching and SMTP session reuse."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+class FakeSMTP:
+    connects = 0
+    sent: list = []
+
+    def __init__(self, *args, **kwargs):
+        FakeSMTP.connects += 1
+
+    def login(self, user, password):
+        pass
+
+    def noop(self):
+        return (250, b"OK")
+
+    def sendmail(self, sender, recipients, msg):
+        FakeSMTP.sent.append(msg)
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+def test_digest_batches_alerts_over_one_session(tmp_db, monkeypatch):
+    from alerts import email_alert as em
+    monkeypatch.setattr(em, "GMAIL_USER", "me@example.com")
+    monkeypatch.setattr(em, "GMAIL_APP_PASSWORD", "x")
+    monkeypatch.setattr(em, "ALERT_EMAIL_TO", "you@example.com")
+    monkeypatch.setattr(em, "EMAIL_DIGEST_ENABLED", True)
+    monkeypatch.setattr(em.smtplib, "SMTP_SSL", FakeSMTP)
+    em.close_smtp()
+    em.load_state({})
+
+    assert em.send_friction_email("TCS.NS", 0.7, "Sector lag")  # sent immediately (interval free)
+    assert em.send_friction_email("INFY.NS", 0.9, "Panic selling")  # queued
+    assert em.send_friction_email("SBIN.NS", 0.8, "Overreaction")  # queued
+    assert len(FakeSMTP.sent) == 1
+    assert em.flush_email_digest(force=True)
+    assert len(FakeSMTP.sent) == 2
+    digest = FakeSMTP.sent[-1]
+    assert "2 alerts" in digest and digest.index("INFY.NS") < digest.index("SBIN.NS")
+    assert FakeSMTP.connects == 1
+    em.close_smtp()
+    em.load_state({})
@@ -0,0 +1,33 @@
+"""MNEMOS 2.1 - Tests for the INTEGER epoch time columns."""
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def test_to_epoch_formats():
+    from storage.db import epoch_to_iso, to_epoch
+    utc = to_epoch("2025-01-02T03:45:00Z")
+    assert to_epoch("2025-01-02T03:45:00.999999Z") == to_epoch("2025-01-02 03:45:00") == utc
+    assert to_epoch("2025-01-02T09:15:00", market_local=True) == to_epoch("2025-01-02T09:15:00+05:30") == utc
+    assert to_epoch("2025-01-02") == to_epoch("2025-01-02T00:00:00Z") and to_epoch("") is None and to_epoch("x") is None
+    assert epoch_to_iso(utc) == "2025-01-02T03:45:00Z" and epoch_to_iso(utc, market_local=True) == "2025-01-02T09:15:00"
+
+def test_epoch_columns_follow_text_columns(tmp_db):
+    db = tmp_db
+    from analytics.attribution import get_close_on_date
+    bars = pd.DataFrame({"symbol": "A.NS", "datetime": pd.to_datetime(["2025-01-02 15:25", "2025-01-03 09:15"]),
+                         "Open": 1.0, "High": 1.0, "Low": 1.0, "Close": [10.0, 11.0], "Volume": 1.0})
+    with db.cursor() as cur:
+        db.insert_prices(cur, bars)
+        sid = db.insert_signal(cur, "A.NS", 0.5, "x")
+        cur.execute("UPDATE signals SET created_at = '2025-01-02T20:00:00Z' WHERE id = ?", (sid,))
+        cur.execute("SELECT created_epoch FROM signals")
+        assert cur.fetchone()[0] == db.to_epoch("2025-01-02T20:00:00Z")
+        cur.execute("INSERT INTO heartbeats (ts, status) VALUES ('2025-01-02T00:00:00Z', 'ok')")
+        cur.execute("SELECT ts_epoch FROM heartbeats")
+        assert cur.fetchone()[0] == db.to_epoch("2025-01-02")
+        # Dates are market-local days: the 3 Jan session starts 2 Jan 21:45 UTC
+        assert get_close_on_date(cur, "A.NS", "2025-01-03") == 11.0
+        assert db.price_range_watermark(cur, "2025-01-03", None)[0] == 1
@@ -0,0 +1,47 @@
+"""MNEMOS 2.1 - Tests for the vectorized event study."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def _bars():
+    days = pd.bdate_range("2025-01-06", periods=6)  # Mon..Mon
+    rows = []
+    for i, d in enumerate(days):
+        rows.append(("TCS.NS", d + pd.Timedelta(hours=15), 100 + i * 2 + 3, 100 + i * 2 - 3, 100.0 + i * 2))
+        rows.append(("^NSEI", d + pd.Timedelta(hours=15), 0, 0, 1000.0 + i * 10))
+    return pd.DataFrame(rows, columns=["symbol", "datetime", "high", "low", "close"])
+
+def test_event_returns_trading_days_and_benchmark():
+    from analytics.event_study import event_returns, panel_from_bars, signal_days
+    panel = panel_from_bars(_bars())
+    # Wed 10:00 IST signal, Saturday signal (-> Friday bar), unknown symbol
+    days = signal_days(["2025-01-08T04:30:00Z", "2025-01-11T06:00:00Z", "2025-01-08T04:30:00Z"])
+    out = event_returns(panel, ["TCS.NS", "TCS.NS", "XYZ.NS"], days, horizons=(1, 3))
+    assert round(out["ret_1d"][0], 4) == round((106 / 104 - 1) * 100, 4)
+    assert round(out["ret_3d"][0], 4) == round((110 / 104 - 1) * 100, 4)
+    assert round(out["mfe_3d"][0], 4) == round((113 / 104 - 1) * 100, 4)
+    assert round(out["mae_1d"][0], 4) == round((103 / 104 - 1) * 100, 4)
+    assert round(out["excess_1d"][0], 4) == round((106 / 104 - 1030 / 1020) * 100, 4)
+    assert round(out["ret_1d"][1], 4) == round((110 / 108 - 1) * 100, 4)  # Fri entry -> Mon
+    assert np.isnan(out["ret_3d"][1])  # beyond the data, no lookahead fill
+    assert out.iloc[2].isna().all()
+
+def test_run_event_study_from_store(tmp_db, tmp_path, monkeypatch):
+    db = tmp_db
+    from analytics.event_study import run_event_study
+    from storage import bar_store
+    monkeypatch.setattr(bar_store, "BAR_STORE_DIR", tmp_path / "bars")
+    bars = _bars().rename(columns={"high": "High", "low": "Low", "close": "Close"})
+    with db.cursor() as cur:
+        db.insert_prices(cur, bars)
+    bar_store.sync_from_db()
+    with db.cursor() as cur:
+        db.insert_signal(cur, "TCS.NS", 0.8, "x", signal_type="panic_selling")
+        cur.execute("UPDATE signals SET created_at = '2025-01-07T05:00:00Z'")
+    out = run_event_study("2025-01-01", horizons=(2,))
+    assert list(out["signal_type"]) == ["panic_selling"]
+    assert round(out["ret_2d"][0], 4) == round((106 / 102 - 1) * 100, 4)
@@ -0,0 +1,48 @@
+"""MNEMOS 2.1 - Tests for GROQ response cache and batching against a local stand-in server."""
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def _stand_in_server(requests):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            requests.append(body)
+            prompt = body["messages"][0]["content"]
+            n = sum(1 for line in prompt.splitlines() if line[:1].isdigit())
+            text = "\n".join(f"{i}. note {i}" for i in range(1, n + 1)) if n else "single note"
+            out = json.dumps({"choices": [{"message": {"content": text}}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(out)))
+            self.end_headers()
+            self.wfile.write(out)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def test_cache_and_batch(tmp_db, monkeypatch):
+    from engine import groq_analysis as groq
+    requests = []
+    server = _stand_in_server(requests)
+    monkeypatch.setattr(groq, "GROQ_URL", f"http://127.0.0.1:{server.server_port}/v1/chat/completions")
+    monkeypatch.setattr(groq, "GROQ_API_KEY", "test")
+    try:
+        assert groq.analyze_signal("TCS.NS", 0.812, "Panic selling") == "single note"
+        assert groq.analyze_signal("TCS.NS", 0.809, "Panic  selling") == "single note"  # normalized hit
+        assert len(requests) == 1
+        items = [("TCS.NS", 0.81, "Panic selling"), ("INFY.NS", 0.7, "Overreaction"), ("HDFC.NS", 0.9, "Lag")]
+        notes = groq.analyze_signals_batch(items)
+        assert notes[0] == "single note" and notes[1:] == ["note 1", "note 2"]
+        assert len(requests) == 2  # cached one skipped, other two in one request
+        assert groq.analyze_signal("HDFC.NS", 0.9, "Lag") == "note 2"
+        assert len(requests) == 2
+    finally:
+        server.shutdown()
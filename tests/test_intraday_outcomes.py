@@ -0,0 +1,43 @@
+"""MNEMOS 2.1 - Tests for intraday (+30m, +1h, +close) outcomes."""
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def _bars(day="2025-01-08", until="15:25"):
+    starts = pd.date_range(f"{day} 09:15", f"{day} {until}", freq="5min")
+    return pd.DataFrame({"symbol": "TCS.NS", "datetime": starts, "close": 100.0 + np.arange(len(starts)) * 0.1})
+
+def test_asof_returns_without_lookahead():
+    from analytics.intraday_outcomes import compute_intraday_returns
+    bars = _bars()
+    sig = pd.DataFrame({"signal_id": [1, 2], "symbol": ["TCS.NS"] * 2,
+                        "ts": pd.to_datetime(["2025-01-08 10:02", "2025-01-08 15:00"])})
+    out = compute_intraday_returns(sig, bars).set_index("signal_id")
+    entry = 100.0 + 8 * 0.1  # bar 09:55-10:00 is the last completed at 10:02
+    assert round(out.loc[1, "price_at_signal"], 6) == round(entry, 6)
+    assert round(out.loc[1, "ret_30m"], 6) == round(((100.0 + 14 * 0.1) / entry - 1) * 100, 6)  # bar ending 10:30
+    assert round(out.loc[1, "ret_close"], 6) == round(((100.0 + 74 * 0.1) / entry - 1) * 100, 6)
+    assert out.loc[2, "ret_1h"] == out.loc[2, "ret_close"]  # capped at the session close
+    partial = compute_intraday_returns(sig, _bars(until="10:20")).set_index("signal_id")
+    assert not np.isnan(partial.loc[1, "price_at_signal"])
+    assert np.isnan(partial.loc[1, "ret_30m"]) and np.isnan(partial.loc[1, "ret_close"])  # not yet known
+
+def test_update_and_stats(tmp_db):
+    db = tmp_db
+    from analytics import intraday_outcomes as io
+    now = pd.Timestamp(datetime.utcnow())
+    day = (now - pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+    bars = _bars(day).rename(columns={"close": "Close"})
+    with db.cursor() as cur:
+        db.insert_prices(cur, bars)
+        db.insert_signal(cur, "TCS.NS", 0.8, "x")
+        cur.execute("UPDATE signals SET created_at = ?", (f"{day}T04:32:00Z",))  # 10:02 IST
+    assert io.update_intraday_outcomes() == 1
+    stats = io.get_intraday_stats(min_samples=1)
+    assert stats["sample_count_30m"] == 1 and stats["win_rate_close"] == 100.0
+    assert io.update_intraday_outcomes() == 0  # final rows are not recomputed
@@ -0,0 +1,86 @@
+"""MNEMOS 2.1 - Tests for the versioned migration registry."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def _old_db(tmp_path, monkeypatch):
+    """DB stopped at v3 (epoch columns) with the duplicates v4 / v5 clean up (not tmp_db: init_db must stop at v3)."""
+    import storage.db as db
+    from storage import migrations
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "mnemos.db")
+    full = migrations.MIGRATIONS
+    monkeypatch.setattr(migrations, "MIGRATIONS", full[:1])
+    db.init_db()
+    monkeypatch.setattr(migrations, "MIGRATIONS", full)
+    with db.cursor() as cur:
+        sid = db.insert_signal(cur, "A.NS", 0.8, "x", signal_type="panic_selling")
+        for r in (1.0, 2.0, 3.0):
+            db.insert_outcome(cur, sid, "A.NS", "2025-01-02T05:00:00Z", 100.0, return_1d=r)
+        for close in (10.0, 11.0, 12.0):
+            cur.execute("INSERT INTO prices (symbol, dt, close, created_at) VALUES ('A.NS', '2025-01-02T09:15:00', ?, '')",
+                        (close,))
+    return db, migrations
+
+def test_upgrade_dedupes_in_batches_and_records_versions(tmp_path, monkeypatch):
+    db, migrations = _old_db(tmp_path, monkeypatch)
+    assert migrations.migrate(batch=1) == [4, 5, 6, 7, 8]
+    with db.cursor() as cur:
+        assert migrations.schema_version(cur) == 8
+        cur.execute("SELECT return_1d FROM outcomes")
+        assert [r[0] for r in cur.fetchall()] == [1.0]
+        cur.execute("SELECT close FROM prices")
+        assert [r[0] for r in cur.fetchall()] == [12.0]
+        db.insert_prices(cur, db.pd.DataFrame([{"symbol": "A.NS", "datetime": "2025-01-02 09:15:00", "Close": 13.0}]))
+        cur.execute("SELECT close FROM prices")
+        assert [r[0] for r in cur.fetchall()] == [13.0]
+        for m in migrations.MIGRATIONS[1:]:
+            for sql, index in m.plans:
+                assert any(index in line for line in migrations.query_plan(cur, sql))
+    assert migrations.migrate() == []
+
+def test_failed_plan_check_rolls_back_step(tmp_path, monkeypatch):
+    db, migrations = _old_db(tmp_path, monkeypatch)
+    def apply(cur):
+        cur.execute("CREATE INDEX idx_outcomes_signal_unique ON outcomes(signal_id)")
+    bad = migrations.Migration(4, "bad", apply=apply,
+                               plans=(("SELECT id FROM outcomes WHERE symbol = ?", "idx_outcomes_signal_unique"),))
+    monkeypatch.setattr(migrations, "MIGRATIONS", [migrations.MIGRATIONS[0], bad] + migrations.MIGRATIONS[2:])
+    assert migrations.migrate() == []
+    with db.cursor() as cur:
+        assert migrations.schema_version(cur) == 3
+        cur.execute("SELECT name FROM sqlite_master WHERE name = 'idx_outcomes_signal_unique'")
+        assert cur.fetchone() is None
+
+def test_rows_written_during_backfill_are_deduped_across_the_boundary(tmp_path, monkeypatch):
+    db, migrations = _old_db(tmp_path, monkeypatch)
+    run_backfills = migrations._run_backfills
+    def backfill_then_write(m, batch):
+        tops = run_backfills(m, batch)
+        with db.cursor() as cur:  # a writer sneaking in before the final lock
+            if m.version == 4:
+                cur.execute("SELECT id FROM signals")
+                db.insert_outcome(cur, cur.fetchone()[0], "A.NS", "2025-01-02T05:00:00Z", 100.0, return_1d=9.0)
+            if m.version == 5:
+                cur.execute("INSERT INTO prices (symbol, dt, close, created_at) "
+                            "VALUES ('A.NS', '2025-01-02T09:15:00', 14.0, '')")
+        return tops
+    monkeypatch.setattr(migrations, "_run_backfills", backfill_then_write)
+    assert migrations.migrate(batch=1) == [4, 5, 6, 7, 8]
+    with db.cursor() as cur:
+        cur.execute("SELECT return_1d FROM outcomes")
+        assert [r[0] for r in cur.fetchall()] == [1.0]
+        cur.execute("SELECT close FROM prices")
+        assert [r[0] for r in cur.fetchall()] == [14.0]
+
+def test_tick_stats_rekeyed_on_epoch(tmp_path, monkeypatch):
+    db, migrations = _old_db(tmp_path, monkeypatch)
+    with db.cursor() as cur:
+        cur.execute("DROP TABLE tick_stats")
+        cur.execute("CREATE TABLE tick_stats (ts TEXT PRIMARY KEY, evaluated INTEGER NOT NULL, "
+                    "nonzero INTEGER NOT NULL, stored INTEGER NOT NULL, max_score REAL)")
+        cur.execute("INSERT INTO tick_stats VALUES ('2025-01-01T04:00:00.5Z', 2, 1, 1, 0.7)")
+    assert 8 in migrations.migrate()
+    with db.cursor() as cur:
+        cur.execute("SELECT * FROM tick_stats")
+        assert [tuple(r) for r in cur.fetchall()] == [(db.to_epoch("2025-01-01T04:00:00Z"), 2, 1, 1, 0.7)]
@@ -0,0 +1,110 @@
+"""MNEMOS 2.1 - Tests for the durable alert outbox."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def test_outbox_retry_then_deliver(tmp_db, monkeypatch):
+    db = tmp_db
+    from alerts import outbox
+
+    results = [False, True]
+    monkeypatch.setattr(outbox, "deliver_friction", lambda *a, **k: results.pop(0))
+    oid = outbox.enqueue_friction("TCS.NS", 0.8, "Panic selling", None, "panic_selling")
+    assert oid
+    assert outbox.enqueue_friction("TCS.NS", 0.8, "Panic selling", None, "panic_selling") is None  # already pending
+
+    assert outbox.deliver_next()
+    with db.cursor() as cur:
+        cur.execute("SELECT status, attempts FROM alert_outbox WHERE id = ?", (oid,))
+        assert tuple(cur.fetchone()) == ("pending", 1)
+        # make the retry due now
+        cur.execute("UPDATE alert_outbox SET next_attempt_at = '2000-01-01T00:00:00Z'")
+    assert outbox.drain_outbox() == 1
+    with db.cursor() as cur:
+        cur.execute("SELECT status FROM alert_outbox WHERE id = ?", (oid,))
+        assert cur.fetchone()[0] == "sent"
+        assert db.get_alert_lock(cur, "TCS.NS", "panic_selling")
+
+def _status(db, oid):
+    with db.cursor() as cur:
+        cur.execute("SELECT status FROM alert_outbox WHERE id = ?", (oid,))
+        return cur.fetchone()[0]
+
+def test_buffered_alert_is_marked_sent_only_after_flush(tmp_db, monkeypatch):
+    db = tmp_db
+    from alerts import email_alert, outbox, telegram_alert as tg
+    monkeypatch.setattr(tg, "TELEGRAM_BOT_TOKEN", "t")
+    monkeypatch.setattr(tg, "TELEGRAM_CHAT_ID", "c")
+    monkeypatch.setattr(tg, "TELEGRAM_COALESCE_ENABLED", True)
+    monkeypatch.setattr(email_alert, "GMAIL_USER", "")
+    monkeypatch.setattr("alerts.dispatcher.GROQ_ASYNC_NOTES", False)
+    monkeypatch.setattr("engine.groq_analysis.analyze_signal", lambda *a: None)
+    monkeypatch.setattr(tg, "_post_keepalive", lambda url, data: 200)
+    tg.load_state({})
+    assert tg._rate_limit_global()  # send window already used
+    oid = outbox.enqueue_friction("TCS.NS", 0.8, "Panic selling", None, "panic_selling")
+    assert outbox.deliver_next()
+    assert _status(db, oid) == "queued" and tg.pending_outbox_ids() == [oid]
+    assert outbox.enqueue_friction("TCS.NS", 0.8, "Panic selling", None, "panic_selling") is None
+    tg.load_state({})  # crash: buffer lost
+    outbox.start_workers(0)
+    assert _status(db, oid) == "pending"
+    with db.cursor() as cur:
+        cur.execute("UPDATE alert_outbox SET next_attempt_at = '2000-01-01T00:00:00Z'")
+    assert outbox.deliver_next() and _status(db, oid) == "queued"
+    assert outbox.settle_delivered() == 0
+    assert tg.flush_telegram(force=True) and outbox.settle_delivered() == 1
+    assert _status(db, oid) == "sent"
+    with db.cursor() as cur:
+        assert db.get_alert_lock(cur, "TCS.NS", "panic_selling")
+    tg.load_state({})
+
+def test_stale_sending_row_is_requeued_on_the_next_pass(tmp_db, monkeypatch):
+    db = tmp_db
+    from datetime import datetime, timedelta
+    from alerts import outbox
+    monkeypatch.setattr(outbox, "deliver_friction", lambda *a, **k: True)
+    oid = outbox.enqueue_friction("TCS.NS", 0.8, "Panic selling", None, "panic_selling")
+    claimed = datetime.utcnow() - timedelta(minutes=outbox.STALE_SENDING_MIN + 1)
+    with db.cursor() as cur:  # claimed by a worker that then died
+        cur.execute("UPDATE alert_outbox SET status = 'sending', next_attempt_at = ?", (claimed.isoformat() + "Z",))
+    assert outbox.deliver_next() and _status(db, oid) == "sent"
+
+def test_restart_does_not_revive_workers_that_outlived_stop(tmp_db, monkeypatch):
+    import threading
+    from alerts import outbox
+    release = threading.Event()
+    monkeypatch.setattr(outbox, "deliver_next", lambda: release.wait(5) and False)
+    monkeypatch.setattr(outbox, "flush_pending_alerts", lambda: None)
+    monkeypatch.setattr(outbox, "settle_delivered", lambda: 0)
+    monkeypatch.setattr(outbox, "_workers", [])
+    monkeypatch.setattr(outbox, "_stop", threading.Event())
+    outbox.start_workers(1)
+    old = outbox._workers[0]
+    outbox.stop_workers(timeout=0.05)
+    assert outbox._workers == [old] and old.is_alive()
+    outbox.start_workers(1)
+    assert len(outbox._workers) == 2
+    release.set()
+    old.join(5)
+    assert not old.is_alive() and outbox._workers[1].is_alive()
+    outbox.stop_workers()
+    assert outbox._workers == []
+
+def test_buffered_alert_is_not_expired_and_settles_if_it_was(tmp_db, monkeypatch):
+    db = tmp_db
+    from alerts import email_alert, outbox, telegram_alert as tg
+    monkeypatch.setattr(outbox, "deliver_friction", lambda *a, **k: outbox.QUEUED)
+    monkeypatch.setattr(email_alert, "pending_outbox_ids", lambda: [])
+    held = outbox.enqueue_friction("TCS.NS", 0.8, "Panic selling", None, "panic_selling")
+    assert outbox.deliver_next() and _status(db, held) == "queued"
+    with db.cursor() as cur:
+        cur.execute("UPDATE alert_outbox SET created_at = '2000-01-01T00:00:00Z'")
+    monkeypatch.setattr(tg, "pending_outbox_ids", lambda: [held])
+    outbox.deliver_next()
+    assert _status(db, held) == "queued"  # the buffer still holds it
+    with db.cursor() as cur:
+        assert db.expire_old_alerts(cur, "2001-01-01T00:00:00Z") == 1
+    monkeypatch.setattr(tg, "pop_delivered", lambda: [held])
+    assert outbox.settle_delivered() == 1 and _status(db, held) == "sent"
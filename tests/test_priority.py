@@ -0,0 +1,33 @@
+"""MNEMOS 2.1 - Tests for cross-channel alert priority."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def test_priority_severity_confidence_and_aging():
+    from alerts.priority import alert_priority, is_expired, order_by_priority
+    now = 10_000.0
+    assert alert_priority(0.9, 0.5, now, now) > alert_priority(0.66, 0.5, now, now)
+    assert alert_priority(0.7, 0.9, now, now) > alert_priority(0.7, 0.1, now, now)
+    assert alert_priority(0.7, 0.5, now - 1800, now) > alert_priority(0.7, 0.5, now, now)  # aging
+    items = [{"score": 0.7, "ts": now - 5}, {"score": 0.7, "ts": now}]
+    assert order_by_priority(items, now)[0]["ts"] == now - 5  # aged one wins
+    items = [{"score": 0.7, "ts": now, "id": 1}, {"score": 0.7, "ts": now, "id": 2, "confidence": 0.1}]
+    assert order_by_priority(items, now)[0]["id"] == 2
+    assert is_expired(now - 10 * 86400, now) and not is_expired(now, now)
+
+def test_outbox_claims_highest_priority_first(tmp_db, monkeypatch):
+    db = tmp_db
+    from alerts import outbox
+    delivered = []
+    monkeypatch.setattr(outbox, "deliver_friction", lambda sym, *a, **k: delivered.append(sym) or True)
+    outbox.enqueue_friction("LOW.NS", 0.66, "x", None, "panic_selling", 0.3)
+    outbox.enqueue_friction("HIGH.NS", 0.95, "x", None, "panic_selling", 0.8)
+    outbox.enqueue_friction("OLD.NS", 0.95, "x", None, "panic_selling", 0.8)
+    with db.cursor() as cur:
+        cur.execute("UPDATE alert_outbox SET created_at = '2000-01-01T00:00:00Z' WHERE symbol = 'OLD.NS'")
+    assert outbox.drain_outbox() == 2
+    assert delivered == ["HIGH.NS", "LOW.NS"]
+    with db.cursor() as cur:
+        cur.execute("SELECT status FROM alert_outbox WHERE symbol = 'OLD.NS'")
+        assert cur.fetchone()[0] == "expired"
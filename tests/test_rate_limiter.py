@@ -0,0 +1,29 @@
+"""MNEMOS 2.1 - Tests for the shared token-bucket rate limiter."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def test_sqlite_bucket_shared_and_refills(tmp_db):
+    db = tmp_db
+    from core import rate_limiter as rl
+    rl.load_state({})
+    assert rl.acquire("t", 2, 0.0) and rl.acquire("t", 2, 0.0)
+    assert not rl.acquire("t", 2, 0.0)
+    assert rl._mem == {}  # state is in SQLite, visible to any process on the same DB
+    with db.cursor() as cur:
+        assert db.peek_rate_tokens(cur, "t", 2, 0.0, 0) == 0
+        cur.execute("UPDATE rate_buckets SET updated_at = updated_at - 10 WHERE name = 't'")
+    assert rl.available("t", 2, 0.1) >= 1.0  # refilled 10 s * 0.1/s
+    assert rl.acquire("t", 2, 0.1) and not rl.acquire("t", 2, 0.1)
+    rl.consume("t", 2, 0.1, cost=5)
+    assert rl.available("t", 2, 0.0) == 0
+
+def test_memory_backend(monkeypatch):
+    from core import rate_limiter as rl
+    monkeypatch.setattr(rl, "RATE_LIMIT_BACKEND", "memory")
+    rl.load_state({})
+    cap, rate = rl.interval_bucket(60)
+    assert rl.acquire("email", cap, rate) and not rl.acquire("email", cap, rate)
+    assert rl.get_state()["buckets"]["email"][0] < 1
+    rl.load_state({})
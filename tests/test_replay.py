@@ -0,0 +1,72 @@
+"""MNEMOS 2.1 - Tests for the historical replay backtester."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def _bars(n_days=30, symbols=("A.NS", "B.NS", "C.NS")):
+    rng = np.random.default_rng(7)
+    days = pd.bdate_range("2025-01-01", periods=n_days)
+    frames = []
+    for s in symbols:
+        c = 100 * np.cumprod(1 + rng.normal(0, 0.01, n_days))
+        v = rng.uniform(1e5, 2e5, n_days)
+        frames.append(pd.DataFrame({"symbol": s, "datetime": days, "Open": c, "High": c * 1.01, "Low": c * 0.99,
+                                    "Close": c, "Volume": v}))
+    return pd.concat(frames, ignore_index=True), days
+
+def test_replay_features_match_live_features_point_in_time():
+    from core.feature_engineering import build_features_for_symbols
+    from engine import replay
+    bars, days = _bars()
+    daily = replay.daily_bars(bars)
+    feats = replay.replay_features(daily, replay.tick_snapshots(bars, daily))
+    for i in (1, 2, 6, 12, 29):
+        live = build_features_for_symbols(bars[bars["datetime"] <= days[i]], ["A.NS", "B.NS", "C.NS"], 20)
+        for sym, f in live.items():
+            row = feats[(feats["symbol"] == sym) & (feats["day"] == days[i])].iloc[0]
+            for k in replay.FEATURES:
+                a, b = f.get(k, np.nan), row[k]
+                assert (np.isnan(a) and np.isnan(b)) or abs(a - b) < 1e-9, (i, sym, k)
+
+def test_run_replay_offline_from_prices_table(tmp_db, tmp_path, monkeypatch):
+    db = tmp_db
+    from engine import backtest_cache, replay
+    from storage import bar_store
+    monkeypatch.setattr(backtest_cache, "BACKTEST_CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(bar_store, "BAR_STORE_DIR", tmp_path / "bars")
+    bars, days = _bars()
+    crash = (bars["symbol"] == "A.NS") & (bars["datetime"] == days[20])
+    bars.loc[crash, ["Close", "Volume"]] = [bars.loc[crash, "Close"].iloc[0] * 0.9, 1e6]
+    with db.cursor() as cur:
+        db.insert_prices(cur, bars[bars["datetime"] < days[22]])
+    bar_store.sync_from_db()  # older bars from the columnar store, the rest still only in SQLite
+    with db.cursor() as cur:
+        db.insert_prices(cur, bars[bars["datetime"] >= days[22]])
+        db.insert_prices(cur, bars[bars["symbol"] == "B.NS"])  # re-fetched bars are deduplicated
+    res = replay.run_replay(days[15].strftime("%Y-%m-%d"), config={"friction_threshold": 0.5, "confidence_threshold": 0.0},
+                            workers=2)
+    assert res["ticks"] == 15 and res["evaluated"] == 45
+    panic = [r for r in res["rows"] if r["signal_type"] == "panic_selling"]
+    assert [r["symbol"] for r in panic] == ["A.NS"] and panic[0]["tick"].startswith(days[20].strftime("%Y-%m-%d"))
+    assert panic[0]["return_1d"] is not None
+    again = replay.run_replay(days[15].strftime("%Y-%m-%d"), config={"friction_threshold": 0.5, "confidence_threshold": 0.0})
+    assert again["cached"] and again["rows"] == res["rows"]
+    strict = replay.run_replay(days[15].strftime("%Y-%m-%d"), config={"confidence_threshold": 0.99}, workers=1)
+    assert strict["signals_count"] == 0
+
+def test_intraday_ticks_see_only_completed_bars():
+    from engine import replay
+    t = pd.date_range("2025-01-02 09:15", periods=3, freq="5min")
+    bars = pd.DataFrame({"symbol": "A.NS", "datetime": list(pd.to_datetime(["2025-01-01 15:25"])) + list(t),
+                         "Open": 100.0, "High": 101.0, "Low": 99.0, "Close": [100.0, 101.0, 102.0, 97.0],
+                         "Volume": [10.0, 1.0, 2.0, 3.0]})
+    daily = replay.daily_bars(bars)
+    feats = replay.replay_features(daily, replay.tick_snapshots(bars, daily, "intraday"))
+    day2 = feats[feats["day"] == pd.Timestamp("2025-01-02")]
+    assert list(day2["tick"].dt.strftime("%H:%M")) == ["09:20", "09:25", "09:30"]
+    assert np.allclose(day2["price_change_1d_pct"], [1.0, 2.0, -3.0])
+    assert np.allclose(day2["volume_ratio"], [1 / 5.5, 3 / 6.5, 6 / 8.0])
@@ -0,0 +1,31 @@
+"""MNEMOS 2.1 - Tests for calendar-aware scheduler."""
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def test_holiday_and_weekend_closed():
+    from engine.trading_calendar import is_trading_day
+    assert not is_trading_day(date(2025, 12, 25))  # Christmas (Thu)
+    assert not is_trading_day(date(2025, 12, 27))  # Saturday
+    assert is_trading_day(date(2025, 12, 26))
+
+def test_market_hours_respects_calendar():
+    from engine.scheduler import is_market_hours
+    # 05:00 UTC = 10:30 IST
+    assert is_market_hours(datetime(2025, 12, 26, 5, 0))
+    assert not is_market_hours(datetime(2025, 12, 25, 5, 0))
+
+def test_tick_aligned_after_bar_close():
+    from config.settings import BAR_CLOSE_DELAY_SEC
+    from engine.scheduler import next_tick_delay_seconds
+    # 10:31:00 IST -> next bar closes 10:35:00
+    assert next_tick_delay_seconds(datetime(2025, 12, 26, 5, 1, 0)) == 4 * 60 + BAR_CLOSE_DELAY_SEC
+
+def test_deep_sleep_over_holiday():
+    from config.settings import BAR_CLOSE_DELAY_SEC
+    from engine.scheduler import next_tick_delay_seconds
+    # Thu 25 Dec 2025 10:30 IST (holiday) -> Fri 26 Dec 09:15 IST
+    delay = next_tick_delay_seconds(datetime(2025, 12, 25, 5, 0))
+    assert delay == (22 * 60 + 45) * 60 + BAR_CLOSE_DELAY_SEC
@@ -0,0 +1,40 @@
+"""MNEMOS 2.1 - Tests for sparse (non-zero / transition) signal storage."""
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+SEQ = [(0.0, "unknown"), (0.5, "panic_selling"), (0.55, "panic_selling"), (0.8, "panic_selling"),
+       (0.7, "panic_selling"), (0.7, "silent_accumulation"), (0.0, "unknown"), (0.5, "silent_accumulation")]
+
+def test_live_transitions_and_replay_mask_agree(monkeypatch):
+    from alerts.dedup import severity_from_score
+    from engine import orchestrator, replay
+    monkeypatch.setattr(orchestrator, "SIGNAL_STORAGE_MODE", "transitions")
+    monkeypatch.setattr(orchestrator, "_signal_state", {})
+    live = [orchestrator._should_store("A.NS", s, t, severity_from_score(s)) for s, t in SEQ]
+    assert live == [False, True, False, True, False, True, False, True]
+    df = pd.DataFrame({"symbol": ["A.NS", "B.NS"] * len(SEQ), "tick": pd.date_range("2025-01-01", periods=2 * len(SEQ)),
+                       "score": [x for s, _ in SEQ for x in (s, 0.0)],
+                       "signal_type": [x for _, t in SEQ for x in (t, "unknown")], "passed": True})
+    assert list(replay.storage_mask(df, "transitions")[::2]) == live
+    assert list(replay.storage_mask(df, "nonzero")[::2]) == [s > 0 for s, _ in SEQ]
+    assert replay.storage_mask(df, "all").all()
+
+def test_zero_score_results_are_counted_not_stored(tmp_db, monkeypatch):
+    db = tmp_db
+    from engine import orchestrator
+    from engine.friction_engine import FrictionResult
+    monkeypatch.setattr(orchestrator, "SIGNAL_STORAGE_MODE", "nonzero")
+    monkeypatch.setattr(orchestrator, "compute_confidence", lambda *a: 0.5)
+    results = [FrictionResult(symbol=s, score=sc, explanation="", signals=[]) for s, sc in (("A.NS", 0.0), ("B.NS", 0.7))]
+    out = [orchestrator._store_result(r, {}, pd.DataFrame(), "2025-01-01T04:00:00Z") for r in results]
+    assert [o[2] for o in out] == [False, True]
+    orchestrator._record_tick_stats("2025-01-01T04:00:00Z", results, 1)
+    with db.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM signals")
+        assert cur.fetchone()[0] == 1
+        cur.execute("SELECT evaluated, nonzero, stored, max_score FROM tick_stats")
+        assert tuple(cur.fetchone()) == (2, 1, 1, 0.7)
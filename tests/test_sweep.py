@@ -0,0 +1,50 @@
+"""MNEMOS 2.1 - Tests for the replay-evaluated parameter sweep."""
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def _bars(n_days=60, n_symbols=6):
+    rng = np.random.default_rng(3)
+    days = pd.bdate_range("2025-01-01", periods=n_days)
+    frames = []
+    for i in range(n_symbols):
+        c = 100 * np.cumprod(1 + rng.normal(0, 0.02, n_days))
+        v = rng.uniform(1e5, 2e5, n_days) * np.where(rng.random(n_days) < 0.15, 3, 1)
+        frames.append(pd.DataFrame({"symbol": f"S{i}.NS", "datetime": days, "Open": c, "High": c * 1.01,
+                                    "Low": c * 0.99, "Close": c, "Volume": v}))
+    return pd.concat(frames, ignore_index=True)
+
+def test_grid_sweep_records_runs_and_saves_best(tmp_db):
+    db = tmp_db
+    from engine.replay import run_replay
+    from optimizer import strategy_optimizer as so
+    bars = _bars()
+    space = {"friction_threshold": [0.3, 0.5], "confidence_threshold": [0.3, 0.45], "rules.panic_drop_pct": [1.0, 2.0]}
+    res = so.sweep_parameters("2025-02-01", space=space, method="grid", min_signals=3, workers=2, bars=bars)
+    assert res["candidates"] == 9 and res["best"]["objective"] is not None
+    with db.cursor() as cur:
+        cur.execute("SELECT strategy_version_id, summary_json FROM backtest_runs")
+        runs = cur.fetchall()
+        cur.execute("SELECT id, active, config_json FROM strategy_versions")
+        version = cur.fetchone()
+    assert len(runs) == 9 and sum(1 for r in runs if r[0] == version[0]) == 1
+    assert version[1] == 0 and json.loads(version[2]) == res["best"]["config"]
+    # The sweep's evaluation of a candidate matches a full replay with the same config
+    cand = next(r for r in json.loads("[" + ",".join(r[1] for r in runs) + "]") if r["sample_count"])
+    replay = run_replay("2025-02-01", config=cand["config"], bars=bars, workers=1)
+    assert sum(r["return_1d"] is not None for r in replay["rows"]) == cand["sample_count"]
+    assert replay["t_stat_1d"] == cand["t_stat_1d"]
+
+def test_random_candidates_group_rule_sets_and_keep_baseline():
+    from engine.friction_engine import RULE_PARAMS
+    from optimizer import strategy_optimizer as so
+    groups = so.sweep_candidates(method="random", n_candidates=25, seed=1)
+    assert groups[0][0] == {} and groups[0][1][0]["rule_params"] == RULE_PARAMS
+    assert sum(len(c) for _, c in groups) == 26 and len(groups) == 4
+    w = groups[1][1][0]["confidence_weights"]
+    assert abs(sum(w.values()) - 1.0) < 1e-3
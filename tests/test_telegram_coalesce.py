@@ -0,0 +1,45 @@
+"""MNEMOS 2.1 - Tests for Telegram alert coalescing."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def test_pack_alerts_orders_by_severity_and_fits():
+    from alerts.telegram_alert import TELEGRAM_MAX_LEN, pack_alerts
+    pending = [{"score": 0.66, "block": "low " * 50, "ts": 1}, {"score": 0.9, "block": "crit " * 50, "ts": 2}]
+    pending += [{"score": 0.7, "block": "x" * 800, "ts": 3 + i} for i in range(10)]
+    text, packed, leftover = pack_alerts(pending)
+    assert len(text) <= TELEGRAM_MAX_LEN
+    assert packed[0]["score"] == 0.9
+    assert len(packed) + len(leftover) == len(pending)
+    assert leftover
+
+def test_coalesced_flush_keeps_leftover(tmp_db, monkeypatch):
+    from alerts import telegram_alert as tg
+    monkeypatch.setattr(tg, "TELEGRAM_BOT_TOKEN", "t")
+    monkeypatch.setattr(tg, "TELEGRAM_CHAT_ID", "c")
+    monkeypatch.setattr(tg, "TELEGRAM_COALESCE_ENABLED", True)
+    sent = []
+    monkeypatch.setattr(tg, "_post_keepalive", lambda url, data: sent.append(data) or 200)
+    tg.load_state({})
+    for i, sym in enumerate(["A.NS", "B.NS", "C.NS"]):
+        assert tg.send_friction_alert(sym, 0.7 + i / 10, "Panic selling")
+    assert len(sent) == 1  # first one went out; the rest wait for the next window
+    assert tg.flush_telegram(force=True)
+    assert len(sent) == 2 and b"2+alerts" in sent[1]
+    assert tg.get_state()["pending"] == []
+    tg.load_state({})
+
+def test_ai_note_waits_for_next_window_without_coalescing(tmp_db, monkeypatch):
+    from alerts import telegram_alert as tg
+    monkeypatch.setattr(tg, "TELEGRAM_BOT_TOKEN", "t")
+    monkeypatch.setattr(tg, "TELEGRAM_CHAT_ID", "c")
+    monkeypatch.setattr(tg, "TELEGRAM_COALESCE_ENABLED", False)
+    sent = []
+    monkeypatch.setattr(tg, "_post_keepalive", lambda url, data: sent.append(data) or 200)
+    tg.load_state({})
+    assert tg.send_friction_alert("A.NS", 0.8, "Panic selling") is True
+    assert tg.send_ai_note("A.NS", 0.8, "Likely forced selling")  # global window used by the alert
+    assert len(sent) == 1 and len(tg.get_state()["pending"]) == 1
+    assert tg.flush_telegram(force=True)
+    assert len(sent) == 2 and b"forced+selling" in sent[1] and tg.get_state()["pending"] == []
@@ -0,0 +1,80 @@
+"""MNEMOS 2.1 - Tests for incremental walk-forward optimization."""
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def _bars(n_days=90, n_symbols=6):
+    rng = np.random.default_rng(11)
+    days = pd.bdate_range("2025-01-01", periods=n_days)
+    frames = []
+    for i in range(n_symbols):
+        c = 100 * np.cumprod(1 + rng.normal(0, 0.02, n_days))
+        v = rng.uniform(1e5, 2e5, n_days) * np.where(rng.random(n_days) < 0.15, 3, 1)
+        frames.append(pd.DataFrame({"symbol": f"S{i}.NS", "datetime": days, "Open": c, "High": c * 1.01,
+                                    "Low": c * 0.99, "Close": c, "Volume": v}))
+    return pd.concat(frames, ignore_index=True), days
+
+def test_incremental_refit_matches_full_recompute(tmp_db, tmp_path, monkeypatch):
+    db = tmp_db
+    from optimizer import strategy_optimizer as so
+    bars, days = _bars()
+    kw = dict(train_days=20, test_days=10, n_candidates=12, min_signals=3, workers=1)
+    full = so.walk_forward("2025-01-15", bars=bars, **kw)
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "nightly.db")
+    db.init_db()
+    first = so.walk_forward("2025-01-15", bars=bars[bars["datetime"] < days[70]], **kw)
+    calls = []
+    real = so._run_sweep_tasks
+    monkeypatch.setattr(so, "_run_sweep_tasks", lambda tasks, m, *a, **k: calls.append(len(m)) or real(tasks, m, *a, **k))
+    again = so.walk_forward("2025-01-15", bars=bars, **kw)
+    assert len(first["folds"]) < len(again["folds"]) == len(full["folds"]) > 0
+    assert calls[0] == 6 * (20 + so.WALK_FORWARD_REFIT_DAYS)  # only the new days and the refit overlap
+    assert again["out_of_sample"] == full["out_of_sample"]
+    assert [f["config"] for f in again["folds"]] == [f["config"] for f in full["folds"]]
+
+def test_fold_winners_are_versioned_once(tmp_db):
+    db = tmp_db
+    from optimizer import strategy_optimizer as so
+    bars, _ = _bars()
+    kw = dict(train_days=20, test_days=10, n_candidates=12, min_signals=3, workers=1)
+    res = so.walk_forward("2025-01-15", bars=bars, **kw)
+    so.walk_forward("2025-01-15", bars=bars, **kw)
+    with db.cursor() as cur:
+        cur.execute("SELECT active, config_json FROM strategy_versions WHERE name = 'walk_forward' ORDER BY version")
+        rows = cur.fetchall()
+    assert len(rows) == len(res["folds"]) and [r[0] for r in rows][-1] == 1 and sum(r[0] for r in rows) == 1
+    assert json.loads(rows[-1][1])["walk_forward"]["test"] == res["folds"][-1]["test"]
+
+def test_stored_bar_replay_is_cached_and_only_extended(tmp_db, tmp_path, monkeypatch):
+    db = tmp_db
+    from engine import backtest_cache, replay
+    from optimizer import strategy_optimizer as so
+    from storage import bar_store
+    bars, days = _bars()
+    kw = dict(train_days=20, test_days=10, n_candidates=12, min_signals=3, workers=1)
+    monkeypatch.setattr(bar_store, "BAR_STORE_DIR", tmp_path / "bars")
+    monkeypatch.setattr(backtest_cache, "BACKTEST_CACHE_DIR", tmp_path / "cache")
+    with db.cursor() as cur:
+        db.insert_prices(cur, bars)
+    full = so.walk_forward("2025-01-15", **kw)
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "nightly.db")
+    monkeypatch.setattr(backtest_cache, "BACKTEST_CACHE_DIR", tmp_path / "nightly_cache")
+    db.init_db()
+    with db.cursor() as cur:
+        db.insert_prices(cur, bars[bars["datetime"] < days[70]])
+    so.walk_forward("2025-01-15", **kw)
+    with db.cursor() as cur:
+        db.insert_prices(cur, bars[bars["datetime"] >= days[70]])
+    calls = []
+    real = replay.replay_frame
+    monkeypatch.setattr(replay, "replay_frame", lambda since, *a, **k: calls.append(since) or real(since, *a, **k))
+    again = so.walk_forward("2025-01-15", **kw)
+    overlap = max(so.WALK_FORWARD_REFIT_DAYS, max(replay.HORIZONS) + 1)
+    assert calls == [str(days[70 - overlap].date())]  # only the new days and the overlap are replayed
+    assert again["out_of_sample"] == full["out_of_sample"] and full["folds"]
+    assert [f["config"] for f in again["folds"]] == [f["config"] for f in full["folds"]]